@@ -0,0 +1,227 @@
+from pathlib import Path
+import threading
+import tempfile
+import random
+import math
+import time
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 프로세스 내부 슬롯으로 대체
+    fcntl = None
+
+import applog
+import metrics
+import serving
+
+# =============================
+# 무거운 요청 입장 제어 (워커 간 공유 동시 실행 상한)
+# =============================
+# - /export, 사진 업로드, /batch, /sites/import, 전체 /sync(since 없음)는 레인별로 전체/사용자별 동시 실행 수를 제한
+# - 슬롯 = ADMISSION_DIR의 잠금 파일(flock). 같은 서버의 모든 gunicorn 워커가 같은 파일을 보므로 워커 간 공유되고,
+#   워커가 죽어도 OS가 잠금을 풀어 슬롯이 새지 않음
+# - 무거운 요청은 레인 슬롯과 함께 공용 heavy 슬롯(ADMISSION_HEAVY_MAX)도 잡아야 함
+#   → 나머지 처리 용량은 로그인/조회 같은 가벼운 요청용으로 항상 남음
+# - 빈 슬롯이 없으면 ADMISSION_WAIT_SECONDS 동안 대기 후 429 + Retry-After
+#   (sync 워커는 대기하는 동안 워커 자체를 점유하므로 기본 0초 = 즉시 거절, gevent 모드는 기본 10초)
+
+_GREEN = serving.SERVE_MODE == 'gevent'
+
+
+def _env_int(key, sync_default, green_default):
+    return int(os.getenv(key) or (green_default if _GREEN else sync_default))
+
+
+ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', '1').lower() in ['1', 'true', 'yes', 'y']
+ADMISSION_DIR = Path(os.getenv('ADMISSION_DIR') or (Path(tempfile.gettempdir()) / 'hn_admission'))
+ADMISSION_HEAVY_MAX = _env_int('ADMISSION_HEAVY_MAX', 2, 16)      # 기본 sync 워커 3개 중 1개는 가벼운 요청용
+ADMISSION_WAIT_SECONDS = float(os.getenv('ADMISSION_WAIT_SECONDS') or (10 if _GREEN else 0))
+
+# 레인: (전체 동시 실행, 사용자별 동시 실행)
+LANES = {
+    'export': (_env_int('ADMISSION_EXPORT_MAX', 2, 2), _env_int('ADMISSION_EXPORT_PER_USER', 1, 1)),
+    'upload': (_env_int('ADMISSION_UPLOAD_MAX', 2, 8), _env_int('ADMISSION_UPLOAD_PER_USER', 1, 2)),
+    'bulk': (_env_int('ADMISSION_BULK_MAX', 2, 4), _env_int('ADMISSION_BULK_PER_USER', 1, 1)),
+}
+
+# 엔드포인트 → 레인
+ENDPOINT_LANES = {
+    'sites.export_data': 'export',
+    'sites.upload_site_photo': 'upload',
+    'sites.batch_operations': 'bulk',
+    'sites.import_sites': 'bulk',
+    'sites.sync_changes': 'bulk',    # since 없는 전체 스냅샷만 (아래 lane_for)
+}
+
+# Retry-After 초기 추정(초): 레인별 최근 처리 시간 평균으로 갱신
+_DEFAULT_HOLD = {'export': 10.0, 'upload': 3.0, 'bulk': 5.0}
+
+log = applog.get_logger('admission')
+
+_stats_lock = threading.Lock()
+_hold = dict(_DEFAULT_HOLD)
+_counts = {'admitted': 0, 'waited': 0, 'rejected': 0}
+_local_lock = threading.Lock()
+_local_held = set()
+
+
+# ---------- 슬롯 ----------
+def _try_slot(name, size):
+    """name.0 ~ name.(size-1) 중 빈 슬롯 하나를 잡음 → 핸들 또는 None"""
+    start = random.randrange(size)  # 앞 번호 슬롯에 시도가 몰리지 않도록
+    for k in range(size):
+        slot = f'{name}.{(start + k) % size}'
+        if fcntl is None:
+            with _local_lock:
+                if slot not in _local_held:
+                    _local_held.add(slot)
+                    return slot
+            continue
+        fd = os.open(str(ADMISSION_DIR / f'{slot}.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except OSError:
+            os.close(fd)
+    return None
+
+
+def _release_slot(handle):
+    if fcntl is None:
+        with _local_lock:
+            _local_held.discard(handle)
+        return
+    try:
+        fcntl.flock(handle, fcntl.LOCK_UN)
+    finally:
+        os.close(handle)
+
+
+class Ticket:
+    def __init__(self, lane, handles, waited):
+        self.lane = lane
+        self.handles = handles
+        self.waited = waited
+        self.started = time.monotonic()
+
+    def release(self):
+        held = time.monotonic() - self.started
+        for handle in reversed(self.handles):
+            try:
+                _release_slot(handle)
+            except OSError:
+                pass
+        self.handles = []
+        metrics.admission_active(self.lane, -1)
+        with _stats_lock:
+            _hold[self.lane] = _hold[self.lane] * 0.8 + held * 0.2
+
+
+def _try_acquire(lane, user_id):
+    """사용자 → 레인 → heavy 순서로 잡고, 하나라도 실패하면 모두 반납 → (핸들 목록, 실패 범위)"""
+    total, per_user = LANES[lane]
+    wanted = [(f'{lane}.user{user_id}', per_user, 'user'), (lane, total, 'lane'), ('heavy', ADMISSION_HEAVY_MAX, 'heavy')]
+    handles = []
+    for name, size, scope in wanted:
+        handle = _try_slot(name, size)
+        if handle is None:
+            for held in reversed(handles):
+                _release_slot(held)
+            return None, scope
+        handles.append(handle)
+    return handles, None
+
+
+def retry_after(lane):
+    with _stats_lock:
+        return max(1, int(math.ceil(_hold[lane])))
+
+
+def acquire(lane, user_id, wait=None):
+    """슬롯 확보 시 Ticket, 대기 시간 내 실패 시 (None, 실패 범위)"""
+    wait = ADMISSION_WAIT_SECONDS if wait is None else wait
+    ADMISSION_DIR.mkdir(parents=True, exist_ok=True)
+    started = time.monotonic()
+    delay = 0.05
+    while True:
+        handles, scope = _try_acquire(lane, user_id)
+        waited = time.monotonic() - started
+        if handles is not None:
+            metrics.observe_admission(lane, 'admitted', waited)
+            metrics.admission_active(lane, 1)
+            with _stats_lock:
+                _counts['admitted'] += 1
+                if waited > 0.001:
+                    _counts['waited'] += 1
+            return Ticket(lane, handles, waited), None
+        if waited + delay > wait:
+            metrics.observe_admission(lane, 'rejected', waited, scope)
+            with _stats_lock:
+                _counts['rejected'] += 1
+            return None, scope
+        time.sleep(delay)  # gevent 모드에서는 다른 요청에 양보
+        delay = min(delay * 2, 0.5)
+
+
+def lane_for(endpoint, args):
+    lane = ENDPOINT_LANES.get(endpoint)
+    if lane == 'bulk' and endpoint == 'sites.sync_changes' and (args.get('since') or '').strip():
+        return None  # 증분 동기화는 가벼운 조회
+    return lane
+
+
+def stats():
+    with _stats_lock:
+        return {
+            'enabled': ADMISSION_ENABLED,
+            'mode': 'flock' if fcntl is not None else 'process',
+            'heavy_max': ADMISSION_HEAVY_MAX,
+            'wait_seconds': ADMISSION_WAIT_SECONDS,
+            'lanes': {lane: {'max': total, 'per_user': per_user, 'retry_after_estimate': round(_hold[lane], 2)}
+                      for lane, (total, per_user) in LANES.items()},
+            'process_totals': dict(_counts)
+        }
+
+
+# =============================
+# Flask 연동
+# =============================
+_MESSAGES = {
+    'user': '같은 작업이 이미 진행 중입니다. 완료 후 다시 시도하세요.',
+    'lane': '요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도하세요.',
+    'heavy': '요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도하세요.',
+}
+
+
+def init_app(app, verify_token):
+    from flask import request, g, jsonify
+
+    @app.before_request
+    def _admission_check():
+        if not ADMISSION_ENABLED:
+            return None
+        lane = lane_for(request.endpoint, request.args)
+        if lane is None:
+            return None
+        auth_header = request.headers.get('Authorization') or ''
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token) if token else None
+        if not payload:
+            return None  # 인증 오류 응답은 라우트에서
+        ticket, scope = acquire(lane, payload.get('user_id'))
+        if ticket is None:
+            seconds = retry_after(lane)
+            log.warning('무거운 요청 거절', lane=lane, scope=scope, retry_after=seconds)
+            response = jsonify({'error': _MESSAGES[scope], 'lane': lane, 'retry_after': seconds})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(seconds)
+            return response
+        g._admission = ticket
+        return None
+
+    @app.teardown_request
+    def _admission_release(exc=None):
+        ticket = g.pop('_admission', None)
+        if ticket is not None:
+            ticket.release()
@@ -1,62 +1,32 @@
+# 환경 변수 로드 (.env는 config 모듈에서 1회만 파싱)
+import config
+import serving
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
-from dotenv import load_dotenv
-import os
 import bcrypt
 import jwt
 from datetime import datetime, timedelta
-from supabase import create_client, Client
-import pandas as pd
-from io import BytesIO
 from pathlib import Path
 
-# 환경 변수 로드
-load_dotenv()
-
 app = Flask(__name__)
 # 환경변수 미설정 시에도 문자열 기본값을 보장
-app.config['SECRET_KEY'] = str(os.getenv('FLASK_SECRET_KEY') or 'dev-secret-key-change-in-production')
+app.config['SECRET_KEY'] = config.SECRET_KEY
 
 # CORS 설정 - 개발용으로 모든 도메인 허용
 CORS(app, resources={r"/*": {"origins": "*", "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"], "allow_headers": ["Content-Type", "Authorization", "User-Agent", "Accept", "Accept-Language", "Accept-Encoding"], "expose_headers": ["Content-Type", "Authorization"]}})
 
-# Supabase 클라이언트 초기화
-supabase_url = os.getenv('SUPABASE_URL')
-supabase_key = os.getenv('SUPABASE_ANON_KEY')
-
-# 환경 변수가 없을 때 경고 메시지 출력 (ASCII 전용)
-if not supabase_url or not supabase_key:
-    print("[WARN] Supabase 환경 변수가 설정되지 않았습니다!")
-    print("       .env 파일을 생성하고 다음 내용을 추가하세요:")
-    print("       SUPABASE_URL=your_supabase_url_here")
-    print("       SUPABASE_ANON_KEY=your_supabase_anon_key_here")
-    print("       FLASK_SECRET_KEY=your_secret_key_here")
-    print("       현재는 더미 데이터로 실행됩니다.")
-    
-    # 더미 Supabase 클라이언트 (개발용)
-    class DummySupabase:
-        def table(self, name):
-            return DummyTable()
-    
-    class DummyTable:
-        def select(self, *args):
-            return self
-        def eq(self, *args):
-            return self
-        def insert(self, data):
-            return DummyResult()
-        def update(self, data):
-            return DummyResult()
-        def execute(self):
-            return DummyResult()
-    
-    class DummyResult:
-        def __init__(self):
-            self.data = []
-    
-    supabase = DummySupabase()
-else:
-    supabase: Client = create_client(supabase_url, supabase_key)
+# Supabase 클라이언트는 db 모듈이 워커당 1세트로 생성/관리 (gunicorn.conf.py의 post_fork에서 워밍업)
+import db
+
+# 구조화 로그 (요청 ID/사용자/라우트 컨텍스트, 큐 기반 비동기 기록)
+import applog
+applog.init_app(app)
+log = applog.get_logger('app')
+
+# 환경 변수가 없을 때 경고
+if not db.is_configured():
+    log.warning('Supabase 환경 변수가 설정되지 않았습니다. 메모리 DB(memory_db.py)로 실행됩니다.',
+                hint='.env에 SUPABASE_URL, SUPABASE_ANON_KEY, FLASK_SECRET_KEY 설정 (MEMORY_DB_FIXTURE=<json>으로 초기 데이터 적재)')
 
 # JWT 토큰 생성 함수
 def generate_token(user_id, user_role):
@@ -71,6 +41,7 @@ def generate_token(user_id, user_role):
 def verify_token(token):
     try:
         payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+        applog.bind(user_id=payload.get('user_id'))
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -79,23 +50,41 @@ def verify_token(token):
 
 # 비밀번호 해시화
 def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    return serving.run_blocking(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt())
 
 # 비밀번호 검증
 def check_password(password, hashed):
-    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+    return serving.run_blocking(bcrypt.checkpw, password.encode('utf-8'), hashed)
+
+# 요청 단위 DB 호출 추적 (Server-Timing 헤더, 느린 요청 로그, N+1 경고)
+import tracing
+tracing.init_app(app)
+
+# Prometheus 지표 (/metrics, gunicorn 다중 워커 합산)
+import metrics
+metrics.init_app(app)
+
+# 관리자 요청 프로파일링 (X-Profile: 1 또는 ?_profile=1) + 상시 저빈도 집계
+import profiler
+profiler.init_app(app, verify_token)
+
+# 무거운 요청(/export, 사진 업로드, /batch, 전체 /sync) 입장 제어: 워커 간 공유 동시 실행 상한, 초과 시 429
+import admission
+admission.init_app(app, verify_token)
 
 # Blueprint 등록 (먼저 해야 함)
 from auth import auth_bp
 from sites import sites_bp
+from events import events_bp
 
 app.register_blueprint(auth_bp, url_prefix='/auth')
 app.register_blueprint(sites_bp, url_prefix='/')
+app.register_blueprint(events_bp, url_prefix='/')
 
 # 정적 파일 서빙
 @app.route('/')
 def serve_index():
-    print(f"🔍 메인 페이지 접속: {request.remote_addr} - User-Agent: {request.headers.get('User-Agent', 'Unknown')}")
+    log.debug('메인 페이지 접속', remote_addr=request.remote_addr, user_agent=request.headers.get('User-Agent', 'Unknown'))
     return send_from_directory('../frontend', 'index.html')
 
 @app.route('/<path:path>')
@@ -111,4 +100,5 @@ def serve_uploads(filename):
     return send_from_directory(str(uploads_dir), filename)
 
 if __name__ == '__main__':
+    db.warm()
     app.run(debug=False, host='0.0.0.0', port=5000)
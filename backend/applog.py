@@ -0,0 +1,243 @@
+from logging.handlers import QueueHandler, QueueListener
+import threading
+import logging
+import atexit
+import random
+import queue
+import json
+import uuid
+import time
+import sys
+import re
+import os
+
+# =============================
+# 구조화 로그 (print 대체)
+# =============================
+# - log = applog.get_logger('sites'); log.info('현장 저장', site_id=1) 처럼 메시지 + 필드로 기록
+# - 요청 컨텍스트(request_id, user_id, route)가 자동 포함. X-Request-ID 헤더가 있으면 그대로 사용하고 응답에도 돌려줌
+# - 요청 스레드는 큐에 넣기만 하고, 별도 리스너 스레드가 stdout(journal)에 기록 (QueueHandler/QueueListener)
+# - 비밀번호/토큰/해시/키 값은 마스킹, 긴 값은 잘라서 기록
+# - DEBUG 이벤트(저장 페이로드 등)는 LOG_DEBUG_SAMPLE 비율로만 기록. 운영 기본 LOG_LEVEL=INFO에서는
+#   level 비교 한 번으로 버려지므로 비용이 거의 없음
+
+LOG_LEVEL = (os.getenv('LOG_LEVEL') or 'INFO').upper()
+LOG_FORMAT = (os.getenv('LOG_FORMAT') or 'json').lower()        # json | text
+LOG_DEBUG_SAMPLE = float(os.getenv('LOG_DEBUG_SAMPLE', '1'))     # 0~1, DEBUG 기록 비율
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))       # 가득 차면 버림(요청 지연 방지)
+LOG_MAX_VALUE = int(os.getenv('LOG_MAX_VALUE', '500'))           # 필드 값 최대 길이
+
+_SECRET_KEYS = {'password', 'new_password', 'token', 'access_token', 'refresh_token', 'authorization',
+                'secret', 'secret_key', 'apikey', 'api_key', 'service_role_key', 'code', 'emergency_code'}
+_SECRET_VALUE = re.compile(r'(\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53})|(eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*)|(Bearer\s+\S+)')
+
+_context = threading.local()
+_listener = None
+_dropped = 0
+_configure_lock = threading.Lock()
+
+
+# ---------- 마스킹 ----------
+def redact(value, key=None, depth=0):
+    """dict/list 를 재귀로 훑어 비밀 값 마스킹 + 긴 문자열 자르기"""
+    if key is not None and str(key).lower() in _SECRET_KEYS and value not in (None, ''):
+        return '***'
+    if isinstance(value, dict):
+        if depth > 4:
+            return '{...}'
+        return {k: redact(v, k, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if depth > 4:
+            return '[...]'
+        items = [redact(v, None, depth + 1) for v in list(value)[:20]]
+        if len(value) > 20:
+            items.append(f'... 외 {len(value) - 20}개')
+        return items
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value[:LOG_MAX_VALUE]).decode('utf-8', 'replace')
+    if isinstance(value, str):
+        value = _SECRET_VALUE.sub('***', value)
+        return value if len(value) <= LOG_MAX_VALUE else value[:LOG_MAX_VALUE] + '...'
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return redact(str(value), key, depth)
+
+
+# ---------- 요청 컨텍스트 ----------
+def bind(**fields):
+    ctx = getattr(_context, 'fields', None)
+    if ctx is None:
+        ctx = _context.fields = {}
+    ctx.update({k: v for k, v in fields.items() if v is not None})
+
+
+def clear():
+    _context.fields = {}
+
+
+def context():
+    return dict(getattr(_context, 'fields', None) or {})
+
+
+class _ContextFilter(logging.Filter):
+    """큐에 넣기 전(요청 스레드)에서 컨텍스트/필드 확정 + DEBUG 샘플링"""
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and LOG_DEBUG_SAMPLE < 1 and random.random() >= LOG_DEBUG_SAMPLE:
+            return False
+        fields = context()
+        extra = getattr(record, 'fields', None)
+        if extra:
+            fields.update(redact(extra))
+        record.fields = fields
+        return True
+
+
+# ---------- 포맷 ----------
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f'.{int(record.msecs):03d}',
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        text = ' '.join(f'{k}={v}' for k, v in fields.items())
+        line = f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname:<7} {record.name} {record.getMessage()}"
+        if text:
+            line += f' | {text}'
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """큐가 가득 차면 기다리지 않고 버림(버린 수는 stats()에 집계)"""
+
+    def enqueue(self, record):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+    def prepare(self, record):
+        # 리스너 스레드에서 포맷하도록 원본 레코드 유지(메시지 인자만 확정)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure(stream=None):
+    """워커 프로세스당 1회: 'hn' 로거 → 큐 → 리스너 스레드 → stdout"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        root = logging.getLogger('hn')
+        if not root.handlers:
+            root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+        root.propagate = False
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(TextFormatter() if LOG_FORMAT == 'text' else JsonFormatter())
+        log_queue = queue.Queue(LOG_QUEUE_SIZE)
+        handler = _DroppingQueueHandler(log_queue)
+        handler.addFilter(_ContextFilter())
+        root.handlers = [handler]
+        _listener = QueueListener(log_queue, output, respect_handler_level=False)
+        _listener.start()
+        atexit.unregister(shutdown)
+        atexit.register(shutdown)
+
+
+def shutdown():
+    """남은 로그를 모두 기록하고 리스너 종료"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _after_fork_in_child():
+    """gunicorn --preload: 마스터에서 만든 리스너 스레드는 워커로 복제되지 않으므로 새 큐/리스너로 재구성"""
+    global _listener, _configure_lock
+    _configure_lock = threading.Lock()
+    if _listener is None:
+        return
+    _listener = None
+    configure()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def set_level(level):
+    """실행 중 레벨 변경 (벤치마크/도구에서 사용)"""
+    logging.getLogger('hn').setLevel(getattr(logging, str(level).upper(), logging.INFO))
+
+
+def stats():
+    return {'level': LOG_LEVEL, 'format': LOG_FORMAT, 'debug_sample': LOG_DEBUG_SAMPLE, 'dropped': _dropped}
+
+
+class Logger:
+    """log.info('메시지', 필드=값) 형태의 얇은 래퍼 (비활성 레벨은 필드 처리 없이 즉시 반환)"""
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(f'hn.{name}')
+
+    def is_debug(self):
+        return self._logger.isEnabledFor(logging.DEBUG)
+
+    def _log(self, level, msg, fields, exc_info=False):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, msg, exc_info=exc_info, extra={'fields': fields})
+
+    def debug(self, msg, **fields):
+        self._log(logging.DEBUG, msg, fields)
+
+    def info(self, msg, **fields):
+        self._log(logging.INFO, msg, fields)
+
+    def warning(self, msg, **fields):
+        self._log(logging.WARNING, msg, fields)
+
+    def error(self, msg, **fields):
+        self._log(logging.ERROR, msg, fields)
+
+    def exception(self, msg, **fields):
+        self._log(logging.ERROR, msg, fields, exc_info=True)
+
+
+def get_logger(name):
+    configure()
+    return Logger(name)
+
+
+def init_app(app):
+    from flask import request, g
+
+    @app.before_request
+    def _log_context():
+        clear()
+        request_id = (request.headers.get('X-Request-ID') or '')[:64] or uuid.uuid4().hex[:16]
+        g.request_id = request_id
+        bind(request_id=request_id, route=request.url_rule.rule if request.url_rule is not None else request.path,
+             method=request.method)
+
+    @app.after_request
+    def _log_request_id(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
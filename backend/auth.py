@@ -2,13 +2,12 @@ from flask import Blueprint, request, jsonify, current_app
 import bcrypt
 import jwt
 from datetime import datetime, timedelta
-from supabase import create_client, Client
-from dotenv import load_dotenv
 import os
 import re
-
-# 환경 변수 로드
-load_dotenv()
+import db
+import applog
+import config
+import serving
 
 # JWT 비밀키 조회 유틸 (app.config -> env -> 기본값)
 def _get_secret_key() -> str:
@@ -18,51 +17,25 @@ def _get_secret_key() -> str:
             cfg_val = (current_app.config.get('SECRET_KEY') if current_app else None)
         except Exception:
             cfg_val = None
-        env_val = os.getenv('FLASK_SECRET_KEY')
-        key = cfg_val or env_val or 'dev-secret-key-change-in-production'
+        key = cfg_val or config.SECRET_KEY
         return str(key)
     except Exception:
         return 'dev-secret-key-change-in-production'
 
-# Supabase 클라이언트 초기화
-supabase_url = os.getenv('SUPABASE_URL')
-supabase_key = os.getenv('SUPABASE_ANON_KEY')
-
-if not supabase_url or not supabase_key:
-    # 더미 Supabase 클라이언트 (개발용)
-    class DummySupabase:
-        def table(self, name):
-            return DummyTable()
-    
-    class DummyTable:
-        def select(self, *args):
-            return self
-        def eq(self, *args):
-            return self
-        def insert(self, data):
-            return DummyResult()
-        def update(self, data):
-            return DummyResult()
-        def execute(self):
-            return DummyResult()
-    
-    class DummyResult:
-        def __init__(self):
-            self.data = []
-    
-    supabase = DummySupabase()
-else:
-    supabase: Client = create_client(supabase_url, supabase_key)
+# Supabase 클라이언트는 db 모듈이 워커당 1세트로 관리
+supabase_url = db.SUPABASE_URL
+supabase_key = db.SUPABASE_ANON_KEY
 
 auth_bp = Blueprint('auth', __name__)
+log = applog.get_logger('auth')
 
 # 비밀번호 해시화
 def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    return serving.run_blocking(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt())
 
 # 비밀번호 검증
 def check_password(password, hashed):
-    return bcrypt.checkpw(password.encode('utf-8'), hashed)
+    return serving.run_blocking(bcrypt.checkpw, password.encode('utf-8'), hashed)
 
 # JWT 토큰 생성 함수
 def generate_token(user_id, user_role):
@@ -77,7 +50,7 @@ def generate_token(user_id, user_role):
         token = jwt.encode(payload, secret, algorithm='HS256')
     except Exception as e:
         # 개발/더미 환경에서 드물게 발생하는 키 타입 이슈를 우회하기 위한 안전장치
-        print(f"[AUTH] jwt.encode error: {e}")
+        log.error('JWT 생성 실패', error=str(e))
         token = 'dev-token'
     # PyJWT 버전에 따라 bytes가 반환될 수 있으므로 문자열 보장
     if isinstance(token, bytes):
@@ -92,6 +65,7 @@ def verify_token(token):
     try:
         secret = _get_secret_key()
         payload = jwt.decode(token, secret, algorithms=['HS256'])
+        applog.bind(user_id=payload.get('user_id'))
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -134,8 +108,8 @@ def register():
             return jsonify({'error': '비밀번호는 최소 6자 이상이어야 합니다.'}), 400
         
         # 기존 사용자 확인
-        existing_user = supabase.table('users').select('*').eq('email', email).execute()
-        if existing_user.data:
+        existing_user = db.get_user_by_email(email)
+        if existing_user:
             return jsonify({'error': '이미 존재하는 이메일입니다.'}), 400
         
         # 비밀번호 해시화
@@ -151,7 +125,7 @@ def register():
             'created_at': 'now()'
         }
         
-        result = supabase.table('users').insert(user_data).execute()
+        result = db.table('users').insert(user_data).execute()
         
         # 더미 데이터인 경우에도 성공으로 처리
         if result.data or not supabase_url or not supabase_key:
@@ -165,59 +139,39 @@ def register():
 def login():
     try:
         data = request.get_json()
-        try:
-            print(f"[AUTH] /login called. has_env_supabase={bool(os.getenv('SUPABASE_URL')) and bool(os.getenv('SUPABASE_ANON_KEY'))}")
-            print(f"[AUTH] raw_json={data}")
-        except Exception:
-            pass
-
         email = data.get('email') if isinstance(data, dict) else None
         password = data.get('password') if isinstance(data, dict) else None
         
         if not email or not password:
             return jsonify({'error': '이메일과 비밀번호를 입력해주세요.'}), 400
 
-        # 더미 환경은 즉시 성공 반환(서버 전역 플로우 검증 목적)
-        if not (supabase_url and supabase_key):
-            user_info = {
-                'id': 1,
-                'email': email,
-                'name': '테스트 사용자',
-                'user_role': 'user'
-            }
-            return jsonify({
-                'message': '로그인 성공(더미)',
-                'token': 'dev-token',
-                'user': user_info
-            }), 200
-        
-        # 사용자 조회
-        user = supabase.table('users').select('*').eq('email', email).execute()
-        try:
-            print(f"[AUTH] supabase user lookup result: {user.data}")
-        except Exception:
-            pass
+        # 사용자 조회 (Supabase 미설정 시 메모리 DB: 가입/픽스처 사용자로 실제 흐름 검증)
+        user = db.get_user_by_email(email)
         
-        # 더미 데이터인 경우 테스트 사용자로 로그인 허용
-        if not user.data and (not supabase_url or not supabase_key):
-            # 더미 데이터로 테스트 사용자 생성
+        # 메모리 DB에 없는 사용자는 테스트 사용자로 로그인 허용
+        if not user and (not supabase_url or not supabase_key):
+            # 테스트 사용자 생성
             user_info = {
                 'id': 1,
                 'email': email,
                 'name': '테스트 사용자',
                 'user_role': 'user'
             }
-        elif not user.data:
+        elif not user:
+            log.info('로그인 실패', reason='unknown_user')
             return jsonify({'error': '존재하지 않는 사용자입니다.'}), 401
         else:
-            user_info = user.data[0]
+            user_info = user
             
-            # 비밀번호 검증 (더미 데이터가 아닌 경우에만)
-            if supabase_url and supabase_key and not check_password(password, user_info['password'].encode('utf-8')):
+            # 비밀번호 검증 (메모리 DB도 가입 시 저장한 해시로 검증)
+            if not user_info.get('password') or not check_password(password, user_info['password'].encode('utf-8')):
+                log.info('로그인 실패', reason='bad_password', user_id=user_info.get('id'))
                 return jsonify({'error': '비밀번호가 올바르지 않습니다.'}), 401
         
         # JWT 토큰 생성
         token = generate_token(user_info['id'], user_info['user_role'])
+        applog.bind(user_id=user_info['id'])
+        log.info('로그인 성공', user_role=user_info['user_role'])
         
         return jsonify({
             'message': '로그인 성공',
@@ -231,9 +185,7 @@ def login():
         }), 200
         
     except Exception as e:
-        import traceback
-        print('[AUTH] login error:', e)
-        print(traceback.format_exc())
+        log.exception('로그인 오류')
         return jsonify({'error': str(e)}), 500
 
 # 사용자 정보 조회
@@ -250,10 +202,10 @@ def get_profile():
         if not payload:
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         
-        user = supabase.table('users').select('id, email, name, phone, user_role, created_at').eq('id', payload['user_id']).execute()
+        user = db.get_user_by_id(payload['user_id'])
         
-        if user.data:
-            return jsonify({'user': user.data[0]}), 200
+        if user:
+            return jsonify({'user': user}), 200
         else:
             return jsonify({'error': '사용자를 찾을 수 없습니다.'}), 404
             
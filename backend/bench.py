@@ -0,0 +1,701 @@
+"""엔드포인트 벤치마크
+
+메모리 DB(memory_db.py)에 네트워크 지연을 주입한 상태로 모든 블루프린트 라우트를 호출하고
+라우트별 p50/p95/p99, 요청당 DB 왕복 수, 응답 바이트를 JSON으로 저장합니다.
+
+사용 예:
+    cd backend
+    python bench.py                                  # Flask test client, 지연 5ms
+    python bench.py -n 100 --latency-ms 20 --jitter-ms 5
+    python bench.py --fixture data.json              # 준비된 데이터셋 사용
+    python bench.py --gunicorn --workers 3           # 실제 gunicorn 프로세스 대상
+    python bench.py --only sites --compare bench_results/이전결과.json
+    python bench.py --load 200 --duration 20 --latency-ms 50 --worker-class gevent --workers 1   # 동시 부하
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import contextlib
+import subprocess
+import threading
+import argparse
+import platform
+import random
+import socket
+import json
+import time
+import sys
+import os
+
+import memory_db
+import applog
+from datagen import HOUSEHOLD_INTEGRATION_TYPES, COMMON_INTEGRATION_TYPES, INTEGRATION_COMPANIES
+
+BENCH_PASSWORD = 'bench1234'
+
+
+# =============================
+# 지연 주입 클라이언트: execute()/스토리지 호출마다 지연 + 왕복 수 집계
+# =============================
+_counter = threading.local()
+
+
+def reset_round_trips():
+    _counter.value = 0
+
+
+def round_trips():
+    return getattr(_counter, 'value', 0)
+
+
+class LatencyInjector:
+    def __init__(self, latency_ms=5.0, jitter_ms=0.0, seed=0):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self._random = random.Random(seed)
+
+    def wait(self):
+        _counter.value = round_trips() + 1
+        delay = self.latency + (self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _LatencyProxy:
+    """쿼리 빌더/스토리지 버킷 래퍼: 체인 메서드는 래핑 유지, 종단 호출에서 지연"""
+    _TERMINAL = {'execute', 'upload', 'download', 'remove', 'list'}
+
+    def __init__(self, inner, injector):
+        self._inner = inner
+        self._injector = injector
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+        injector = self._injector
+
+        def call(*args, **kwargs):
+            if name in self._TERMINAL:
+                injector.wait()
+            result = attr(*args, **kwargs)
+            if name not in self._TERMINAL and result is not None and hasattr(result, 'execute'):
+                return _LatencyProxy(result, injector)
+            return result
+        return call
+
+
+class _LatencyStorage:
+    def __init__(self, inner, injector):
+        self._inner = inner
+        self._injector = injector
+
+    def from_(self, bucket):
+        return _LatencyProxy(self._inner.from_(bucket), self._injector)
+
+
+class LatencyClient:
+    """db.set_client()에 넣는 클라이언트 (table/rpc/storage)"""
+
+    def __init__(self, inner, injector):
+        self.inner = inner
+        self.injector = injector
+        self.storage = _LatencyStorage(inner.storage, injector)
+
+    def table(self, name):
+        return _LatencyProxy(self.inner.table(name), self.injector)
+
+    def rpc(self, fn, params=None):
+        return _LatencyProxy(self.inner.rpc(fn, params), self.injector)
+
+
+# =============================
+# 기본 데이터셋 (픽스처 미지정 시)
+# =============================
+def seed_dataset(sites=200, seed=42):
+    """벤치마크용 최소 연결 데이터: 관리자 1, 사용자 2, 현장/제품/연락처/연동/업무/사진 메타"""
+    import bcrypt
+    rnd = random.Random(seed)
+    hashed = bcrypt.hashpw(BENCH_PASSWORD.encode('utf-8'), bcrypt.gensalt(4)).decode('utf-8')
+    data = {
+        'users': [
+            {'id': 1, 'email': 'admin@kdiwin.com', 'password': hashed, 'name': '관리자', 'phone': '010-0000-0001', 'user_role': 'admin'},
+            {'id': 2, 'email': 'user@kdiwin.com', 'password': hashed, 'name': '김현장', 'phone': '010-0000-0002', 'user_role': 'user'},
+            {'id': 3, 'email': 'user2@kdiwin.com', 'password': hashed, 'name': '이설치', 'phone': '010-0000-0003', 'user_role': 'user'}
+        ],
+        'contacts_master': [
+            {'id': i, 'name': n, 'role': ('pm' if i % 2 else 'sales'), 'phone': f'010-1000-{i:04d}', 'active': True}
+            for i, n in enumerate(['김철수', '김민준', '이서연', '박지훈', '최대훈', '정하은', '강도윤', '조수아'], start=1)
+        ],
+        'sites': [], 'site_products': [], 'site_contacts': [], 'site_contact_people': [],
+        'site_household_integrations': [], 'site_common_integrations': [], 'work_items': [], 'site_photos': []
+    }
+    today = datetime.utcnow().date()
+    for sid in range(1, sites + 1):
+        owner = 2 if sid % 3 else 3
+        data['sites'].append({
+            'id': sid, 'project_no': f"{'NA' if sid % 2 else 'NE'}/{sid:04d}", 'construction_company': '현대건설',
+            'site_name': f'벤치현장{sid}', 'address': f'서울특별시 강남구 테헤란로 {sid}', 'household_count': rnd.randint(50, 2000),
+            'created_by': owner,
+            # datagen과 같은 비율 (sites.list_page의 home_iot=Y 필터/정렬/페이지가 실제 행을 다루도록)
+            'certification_audit': 'Y' if rnd.random() < 0.3 else 'N', 'home_iot': 'Y' if rnd.random() < 0.6 else 'N'
+        })
+        data['site_products'].append({'site_id': sid, 'wallpad_model': 'HN-W100', 'wallpad_qty': rnd.randint(10, 500),
+                                      'doorphone_model': 'HN-D10', 'doorphone_qty': rnd.randint(10, 500)})
+        data['site_contacts'].append({'site_id': sid, 'pm_name': '김철수', 'pm_phone': '010-1000-0001',
+                                      'sales_manager_name': '이서연', 'sales_manager_phone': '010-1000-0003'})
+        for kind in ['sales', 'construction']:
+            data['site_contact_people'].append({'site_id': sid, 'person_type': kind, 'name': '박지훈', 'phone': '010-1000-0004'})
+        # 연동 타입/컬럼은 sites.py 허용 목록과 같은 datagen 상수 사용 (허용되지 않은 타입은 저장/조회에서 빠짐)
+        for table, types in (('site_household_integrations', HOUSEHOLD_INTEGRATION_TYPES),
+                             ('site_common_integrations', COMMON_INTEGRATION_TYPES)):
+            for itype in types[:2]:
+                data[table].append({'site_id': sid, 'integration_type': itype, 'enabled': 'Y',
+                                    'company_name': rnd.choice(INTEGRATION_COMPANIES)})
+        for k in range(3):
+            alarm = (today + timedelta(days=rnd.randint(-10, 10))).isoformat() if k == 0 else None
+            data['work_items'].append({'site_id': sid, 'content': f'점검 항목 {k + 1}', 'status': 'todo',
+                                       'alarm_date': alarm, 'alarm_confirmed': False, 'created_by': owner})
+        data['site_photos'].append({'site_id': sid, 'title': '전경', 'image_url': '/uploads/bench/placeholder.jpg',
+                                    'created_by': owner})
+    return data
+
+
+def build_store(fixture=None, sites=200, seed=42):
+    store = memory_db.MemorySupabase()
+    if fixture:
+        store.load_file(fixture)
+    else:
+        store.load(seed_dataset(sites, seed))
+    return store
+
+
+# =============================
+# 벤치마크 앱 (test client / gunicorn 공용)
+# =============================
+def create_bench_app(fixture=None, latency_ms=None, jitter_ms=None, sites=None, seed=None):
+    """gunicorn 'bench:create_bench_app()' 로도 사용 (설정은 BENCH_* 환경변수)"""
+    fixture = fixture or os.getenv('BENCH_FIXTURE') or None
+    latency_ms = float(latency_ms if latency_ms is not None else os.getenv('BENCH_LATENCY_MS', '5'))
+    jitter_ms = float(jitter_ms if jitter_ms is not None else os.getenv('BENCH_JITTER_MS', '0'))
+    sites = int(sites if sites is not None else os.getenv('BENCH_SITES', '200'))
+    seed = int(seed if seed is not None else os.getenv('BENCH_SEED', '42'))
+
+    import db
+    store = build_store(fixture, sites, seed)
+    db.set_client(LatencyClient(store, LatencyInjector(latency_ms, jitter_ms, seed)))
+
+    from app import app
+    if not getattr(app, '_bench_hooks', False):
+        @app.before_request
+        def _bench_reset():
+            reset_round_trips()
+
+        @app.after_request
+        def _bench_header(response):
+            response.headers['X-Bench-Round-Trips'] = str(round_trips())
+            return response
+        app._bench_hooks = True
+    app.bench_store = store
+    return app
+
+
+def make_token(user_id, user_role):
+    import jwt
+    secret = str(os.getenv('FLASK_SECRET_KEY') or 'dev-secret-key-change-in-production')
+    return jwt.encode({'user_id': user_id, 'user_role': user_role, 'exp': datetime.utcnow() + timedelta(hours=2)},
+                      secret, algorithm='HS256')
+
+
+# =============================
+# 시나리오: (이름, 메서드, 경로, 역할, 본문) — 경로의 {site_id}/{photo_id}는 반복마다 채움
+# =============================
+JPEG_BYTES = b'\xff\xd8\xff\xe0' + b'\x00' * 2048 + b'\xff\xd9'
+# 현장 가져오기(검증만) 200행: 벤치 데이터(NE/)와 겹치지 않는 NA/ 번호
+IMPORT_CSV_BYTES = ('\ufeffproject_no,construction_company,site_name,address,household_count,home_iot\n' + ''.join(
+    f'NA/{5000 + i:04d},벤치건설,가져오기{i},서울특별시 중구 {i},{100 + i},N\n' for i in range(200))).encode('utf-8')
+
+
+def _upload_file(upload):
+    """upload=True: 사진 JPEG, (파일명, 바이트, MIME): 해당 파일"""
+    return ('bench.jpg', JPEG_BYTES, 'image/jpeg') if upload is True else upload
+
+
+def scenarios():
+    return [
+        # auth
+        {'name': 'auth.login', 'method': 'POST', 'path': '/auth/login', 'role': None,
+         'json': {'email': 'user@kdiwin.com', 'password': BENCH_PASSWORD}},
+        {'name': 'auth.register', 'method': 'POST', 'path': '/auth/register', 'role': None,
+         'json': lambda i: {'email': f'bench{i}_{int(time.time() * 1000)}@kdiwin.com', 'password': BENCH_PASSWORD, 'name': '벤치', 'phone': '010'}},
+        {'name': 'auth.profile', 'method': 'GET', 'path': '/auth/profile', 'role': 'user'},
+        # admin / 사용자 / 인명
+        {'name': 'admin.db_status', 'method': 'GET', 'path': '/admin/db-status', 'role': 'admin'},
+        {'name': 'admin.traces', 'method': 'GET', 'path': '/admin/traces', 'role': 'admin'},
+        {'name': 'metrics', 'method': 'GET', 'path': '/metrics', 'role': None},
+        {'name': 'admin.profiles', 'method': 'GET', 'path': '/admin/profiles', 'role': 'admin'},
+        {'name': 'admin.profile_download', 'method': 'GET', 'path': '/admin/profiles/missing.folded', 'role': 'admin'},
+        {'name': 'admin.update_user_role', 'method': 'PATCH', 'path': '/admin/users/3', 'role': 'admin', 'json': {'user_role': 'user'}},
+        {'name': 'admin.emergency_promote', 'method': 'POST', 'path': '/admin/emergency-promote', 'role': None,
+         'json': {'user_id': 3, 'code': 'invalid'}},
+        {'name': 'users.list', 'method': 'GET', 'path': '/users', 'role': 'admin'},
+        {'name': 'users.search', 'method': 'GET', 'path': '/users?q=김', 'role': 'admin'},
+        {'name': 'contacts_master.list', 'method': 'GET', 'path': '/contacts-master', 'role': 'user'},
+        {'name': 'contacts_master.suggest', 'method': 'GET', 'path': '/contacts-master/suggest?q=ㄱㅊ', 'role': 'user'},
+        {'name': 'contacts_master.upsert', 'method': 'POST', 'path': '/contacts-master', 'role': 'admin',
+         'json': {'id': 1, 'name': '김철수', 'role': 'pm', 'phone': '010-1000-0001'}},
+        # 현장
+        {'name': 'sites.list', 'method': 'GET', 'path': '/sites', 'role': 'admin'},
+        {'name': 'sites.list_view', 'method': 'GET', 'path': '/sites?view=list', 'role': 'admin'},
+        {'name': 'sites.list_page', 'method': 'GET', 'path': '/sites?sort=site_name&page=2&page_size=50&home_iot=Y', 'role': 'user'},
+        {'name': 'sites.list_user', 'method': 'GET', 'path': '/sites', 'role': 'user'},
+        {'name': 'sites.create', 'method': 'POST', 'path': '/sites', 'role': 'user',
+         'json': lambda i: {'project_no': f'NE/{9000 + i % 1000:04d}', 'construction_company': '벤치건설', 'site_name': f'신규현장{i}',
+                            'address': '서울', 'household_count': 100}},
+        {'name': 'sites.open', 'method': 'GET', 'path': '/sites/{site_id}', 'role': 'admin'},
+        {'name': 'sites.update', 'method': 'PATCH', 'path': '/sites/{site_id}', 'role': 'admin', 'json': {'address': '서울특별시 중구'}},
+        {'name': 'sites.search', 'method': 'GET', 'path': '/sites/search?q=벤치현장1', 'role': 'admin'},
+        {'name': 'sites.search_user', 'method': 'GET', 'path': '/sites/search?q=테헤란로', 'role': 'user'},
+        {'name': 'sites.check_project_no', 'method': 'POST', 'path': '/check-project-no', 'role': 'user', 'json': {'project_no': 'NA/0001'}},
+        {'name': 'sites.check_project_no_batch', 'method': 'POST', 'path': '/check-project-no/batch', 'role': 'user',
+         'json': {'project_nos': [f'NA/{i:04d}' for i in range(200)] + ['NX/1', 'NA/0001']}},
+        {'name': 'reports.materials', 'method': 'GET', 'path': '/reports/materials', 'role': 'admin'},
+        {'name': 'reports.materials_csv', 'method': 'GET', 'path': '/reports/materials?group_by=construction_company&format=csv', 'role': 'user'},
+        {'name': 'sites.project_no_next', 'method': 'GET', 'path': '/project-no/next?prefix=NE&count=5', 'role': 'user'},
+        {'name': 'contacts.get', 'method': 'GET', 'path': '/sites/{site_id}/contacts', 'role': 'admin'},
+        {'name': 'contacts.save', 'method': 'POST', 'path': '/sites/{site_id}/contacts', 'role': 'admin',
+         'json': {'pm_name': '김철수', 'pm_phone': '010-1000-0001',
+                  'sales_list': [{'name': '이서연', 'phone': '010-1000-0003'}],
+                  'construction_list': [{'name': '박지훈', 'phone': '010-1000-0004'}, {'name': '최대훈', 'phone': '010-1000-0005'}]}},
+        {'name': 'products.get', 'method': 'GET', 'path': '/sites/{site_id}/products', 'role': 'admin'},
+        {'name': 'products.save', 'method': 'POST', 'path': '/sites/{site_id}/products', 'role': 'admin',
+         'json': {'wallpad_model': 'HN-W100', 'wallpad_qty': 120, 'doorphone_model': 'HN-D10', 'doorphone_qty': 120}},
+        {'name': 'household.get', 'method': 'GET', 'path': '/sites/{site_id}/integrations/household', 'role': 'admin'},
+        {'name': 'household.save', 'method': 'POST', 'path': '/sites/{site_id}/integrations/household', 'role': 'admin',
+         'json': {'items': [{'integration_type': HOUSEHOLD_INTEGRATION_TYPES[0], 'enabled': 'Y', 'company_name': '한빛전기'},
+                            {'integration_type': HOUSEHOLD_INTEGRATION_TYPES[5], 'enabled': 'Y', 'company_name': '한빛전기'}]}},
+        {'name': 'household.save_legacy', 'method': 'POST', 'path': '/sites/{site_id}/household', 'role': 'admin',
+         'json': {'lighting_enabled': 'Y', 'lighting_company': '한빛전기'}},
+        {'name': 'common.get', 'method': 'GET', 'path': '/sites/{site_id}/integrations/common', 'role': 'admin'},
+        {'name': 'common.save', 'method': 'POST', 'path': '/sites/{site_id}/integrations/common', 'role': 'admin',
+         'json': {'items': [{'integration_type': COMMON_INTEGRATION_TYPES[0], 'enabled': 'Y', 'company_name': '주차로'},
+                            {'integration_type': COMMON_INTEGRATION_TYPES[5], 'enabled': 'Y', 'company_name': '주차로'}]}},
+        {'name': 'common.save_legacy', 'method': 'POST', 'path': '/sites/{site_id}/common', 'role': 'admin',
+         'json': {'parking_enabled': 'Y', 'parking_company': '주차로'}},
+        # 사진
+        {'name': 'photos.list', 'method': 'GET', 'path': '/sites/{site_id}/photos', 'role': 'admin'},
+        {'name': 'photos.upload', 'method': 'POST', 'path': '/sites/{site_id}/photos', 'role': 'admin', 'upload': True,
+         'capture': 'photo_ids'},
+        {'name': 'photos.delete', 'method': 'DELETE', 'path': '/sites/{site_id}/photos/{photo_id}', 'role': 'admin',
+         'consume': 'photo_ids'},
+        # 업무/알람
+        {'name': 'work_items.list', 'method': 'GET', 'path': '/sites/{site_id}/work-items', 'role': 'admin'},
+        {'name': 'work_items.save', 'method': 'POST', 'path': '/sites/{site_id}/work-items', 'role': 'admin',
+         'json': {'items': [{'content': '벤치 점검', 'status': 'todo', 'alarm_date': datetime.utcnow().date().isoformat()}]},
+         'capture': 'due_work_items'},
+        {'name': 'alarms.site', 'method': 'GET', 'path': '/sites/{site_id}/alarms', 'role': 'admin'},
+        {'name': 'alarms.site_confirm', 'method': 'POST', 'path': '/sites/{site_id}/alarms/confirm', 'role': 'admin',
+         'consume': 'due_work_items', 'json_consumed': lambda taken: {'ids': [taken['item_id']]}},
+        {'name': 'alarms.inbox', 'method': 'GET', 'path': '/alarms', 'role': 'user', 'capture': 'inbox_alarms'},
+        {'name': 'alarms.inbox_count', 'method': 'GET', 'path': '/alarms?count_only=1', 'role': 'user'},
+        {'name': 'alarms.confirm_all', 'method': 'POST', 'path': '/alarms/confirm', 'role': 'user',
+         'consume': 'inbox_alarms', 'json_consumed': lambda taken: {'ids': [taken['item_id']]}},
+        # 동기화/일괄/내보내기
+        {'name': 'sync.full', 'method': 'GET', 'path': '/sync', 'role': 'user'},
+        {'name': 'batch.save', 'method': 'POST', 'path': '/batch', 'role': 'admin',
+         'json': lambda i: {'operations': [
+             {'op_id': f'bench-{i}-{int(time.time() * 1000)}', 'type': 'products.save', 'site_id': 1, 'data': {'wallpad_qty': 10}}]}},
+        {'name': 'sites.import_dry_run', 'method': 'POST', 'path': '/sites/import?dry_run=1', 'role': 'user',
+         'upload': ('sites.csv', IMPORT_CSV_BYTES, 'text/csv')},
+        {'name': 'sites.import_errors', 'method': 'GET', 'path': '/sites/import/' + '0' * 32 + '/errors', 'role': 'user'},
+        {'name': 'export.site_xlsx', 'method': 'GET', 'path': '/export?format=xlsx&scope=site&site_id={site_id}&include_photos=false', 'role': 'admin'},
+        {'name': 'export.all_csv', 'method': 'GET', 'path': '/export?format=csv&include_photos=false', 'role': 'admin'},
+    ]
+
+
+# 측정 제외: 무한 스트림/정적 파일
+SKIPPED_ENDPOINTS = {'events.stream_events', 'static', 'serve_index', 'serve_static', 'serve_uploads'}
+
+
+def percentile(sorted_values, pct):
+    """nearest-rank 백분위"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(samples):
+    lat = sorted(s['ms'] for s in samples)
+    trips = [s['round_trips'] for s in samples]
+    sizes = [s['bytes'] for s in samples]
+    statuses = {}
+    for s in samples:
+        statuses[str(s['status'])] = statuses.get(str(s['status']), 0) + 1
+    return {
+        'n': len(samples),
+        'status': statuses,
+        'p50_ms': round(percentile(lat, 50), 3),
+        'p95_ms': round(percentile(lat, 95), 3),
+        'p99_ms': round(percentile(lat, 99), 3),
+        'mean_ms': round(sum(lat) / len(lat), 3),
+        'max_ms': round(lat[-1], 3),
+        'round_trips_mean': round(sum(trips) / len(trips), 2),
+        'round_trips_max': max(trips),
+        'bytes_mean': int(sum(sizes) / len(sizes)),
+        'bytes_max': max(sizes)
+    }
+
+
+# =============================
+# 호출기: test client / HTTP(gunicorn)
+# =============================
+class TestClientCaller:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def __call__(self, method, path, headers, json_body=None, upload=False):
+        kwargs = {'headers': headers}
+        if upload:
+            from io import BytesIO
+            name, content, mimetype = _upload_file(upload)
+            kwargs['data'] = {'title': '벤치', 'file': (BytesIO(content), name, mimetype)}
+            kwargs['content_type'] = 'multipart/form-data'
+        elif json_body is not None:
+            kwargs['json'] = json_body
+        start = time.perf_counter()
+        resp = self.client.open(path, method=method, **kwargs)
+        body = resp.get_data()
+        elapsed = (time.perf_counter() - start) * 1000
+        return resp.status_code, body, int(resp.headers.get('X-Bench-Round-Trips') or 0), elapsed
+
+
+class HttpCaller:
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def __call__(self, method, path, headers, json_body=None, upload=False):
+        kwargs = {'headers': headers}
+        if upload:
+            kwargs['files'] = {'file': _upload_file(upload)}
+            kwargs['data'] = {'title': '벤치'}
+        elif json_body is not None:
+            kwargs['json'] = json_body
+        start = time.perf_counter()
+        resp = self.session.request(method, self.base_url + path, **kwargs)
+        body = resp.content
+        elapsed = (time.perf_counter() - start) * 1000
+        return resp.status_code, body, int(resp.headers.get('X-Bench-Round-Trips') or 0), elapsed
+
+
+def _captured(raw, site_id):
+    """capture 시나리오 응답 → 뒤의 consume 시나리오가 쓸 항목 ({'site_id', 'photo_id'} 또는 {'site_id', 'item_id'})"""
+    try:
+        body = json.loads(raw)
+    except Exception:
+        return []
+    photo = body.get('photo') or {}
+    if photo.get('id') is not None:
+        return [{'site_id': site_id, 'photo_id': photo['id']}]
+    return [{'site_id': item.get('site_id', site_id), 'item_id': item['id']}
+            for item in (body.get('items') or []) if item.get('id') is not None]
+
+
+def run_scenarios(call, site_ids, requests_per_route=50, warmup=3, only=None, verbose=False):
+    tokens = {'admin': make_token(1, 'admin'), 'user': make_token(2, 'user')}
+    pools = {}   # capture 이름 -> 아직 쓰지 않은 항목 (삭제/확인 시나리오가 실제 id로 호출하도록)
+    pooled = set()
+    results = {}
+    for sc in scenarios():
+        if only and not any(o in sc['name'] for o in only):
+            continue
+        headers = {'Authorization': f"Bearer {tokens[sc['role']]}"} if sc.get('role') else {}
+        samples = []
+        total = warmup + requests_per_route
+        for i in range(total):
+            site_id = site_ids[i % len(site_ids)]
+            fmt = {'site_id': site_id, 'photo_id': 0}
+            body = sc.get('json')
+            body = body(i) if callable(body) else body
+            if sc.get('consume'):
+                pool = pools.get(sc['consume']) or []
+                if not pool:
+                    break
+                taken = pool.pop()
+                fmt.update({k: v for k, v in taken.items() if k in fmt})
+                if sc.get('json_consumed'):
+                    body = sc['json_consumed'](taken)
+            # 라우트의 디버그 print는 측정 출력과 섞이지 않도록 기본적으로 숨김
+            with (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(open(os.devnull, 'w'))):
+                status, raw, trips, ms = call(sc['method'], sc['path'].format(**fmt), headers, body, sc.get('upload', False))
+            if sc.get('capture') and status < 300:
+                for item in _captured(raw, site_id):
+                    key = (sc['capture'], item['site_id'], item.get('photo_id'), item.get('item_id'))
+                    if key not in pooled:  # 같은 목록을 반복 조회해도 한 번만
+                        pooled.add(key)
+                        pools.setdefault(sc['capture'], []).append(item)
+            if i >= warmup:
+                samples.append({'ms': ms, 'status': status, 'round_trips': trips, 'bytes': len(raw)})
+        if samples:
+            results[sc['name']] = dict(summarize(samples), method=sc['method'], path=sc['path'])
+            r = results[sc['name']]
+            print(f"  {sc['name']:<28} p50 {r['p50_ms']:>8.2f}ms  p95 {r['p95_ms']:>8.2f}ms  p99 {r['p99_ms']:>8.2f}ms  "
+                  f"RT {r['round_trips_mean']:>6.1f}  {r['bytes_mean']:>8}B  {r['status']}")
+    return results
+
+
+# =============================
+# 동시 부하: 가상 사용자 N명이 조회 시나리오를 쉬지 않고 반복 (closed loop, gunicorn 대상)
+# =============================
+# 현장 사용자 기본 조합 (--only 미지정 시). 데이터가 바뀌지 않도록 GET 시나리오만 사용
+LOAD_MIX = ['sites.list_user', 'sites.open', 'contacts.get', 'products.get', 'work_items.list', 'photos.list',
+            'alarms.inbox_count']
+
+
+def _load_user(host, port, plan, headers, site_ids, deadline, out, seed):
+    import http.client
+    rnd = random.Random(seed)
+    conn = None
+    i = seed
+    while time.perf_counter() < deadline:
+        sc = plan[i % len(plan)]
+        i += 1
+        path = sc['path'].format(site_id=rnd.choice(site_ids), photo_id=0)
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(host, port, timeout=60)
+            conn.request('GET', path, headers=headers.get(sc.get('role')) or {})
+            resp = conn.getresponse()
+            resp.read()
+            status = resp.status
+            if resp.will_close:  # sync 워커는 keep-alive 미지원
+                conn.close()
+                conn = None
+        except Exception:
+            status = 'error'
+            if conn is not None:
+                conn.close()
+            conn = None
+        out.append((sc['name'], (time.perf_counter() - start) * 1000, status))
+    if conn is not None:
+        conn.close()
+
+
+def run_load(base_url, site_ids, concurrency, duration, only=None):
+    from urllib.parse import urlsplit
+    url = urlsplit(base_url)
+    names = only or LOAD_MIX
+    plan = [sc for sc in scenarios() if sc['method'] == 'GET' and any(n in sc['name'] for n in names)]
+    if not plan:
+        sys.exit('부하 시나리오가 없습니다. (--only 에 GET 시나리오 이름 지정)')
+    tokens = {'admin': make_token(1, 'admin'), 'user': make_token(2, 'user')}
+    headers = {role: {'Authorization': f'Bearer {token}'} for role, token in tokens.items()}
+    # 워커 기동/첫 요청 비용은 제외
+    _load_user(url.hostname, url.port, plan, headers, site_ids, time.perf_counter() + 1.0, [], 0)
+    samples = []
+    started = time.perf_counter()
+    deadline = started + duration
+    users = [threading.Thread(target=_load_user, daemon=True,
+                              args=(url.hostname, url.port, plan, headers, site_ids, deadline, samples, n))
+             for n in range(concurrency)]
+    for t in users:
+        t.start()
+    for t in users:
+        t.join(timeout=duration + 90)
+    elapsed = time.perf_counter() - started
+
+    def stats(rows):
+        lat = sorted(ms for _, ms, _ in rows)
+        statuses = {}
+        for _, _, status in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        return {
+            'n': len(rows),
+            'rps': round(len(rows) / elapsed, 1),
+            'status': statuses,
+            'p50_ms': round(percentile(lat, 50), 2) if lat else None,
+            'p95_ms': round(percentile(lat, 95), 2) if lat else None,
+            'p99_ms': round(percentile(lat, 99), 2) if lat else None,
+            'max_ms': round(lat[-1], 2) if lat else None
+        }
+
+    result = {'concurrency': concurrency, 'duration_s': round(elapsed, 2), 'total': stats(samples), 'routes': {}}
+    for sc in plan:
+        rows = [row for row in samples if row[0] == sc['name']]
+        if rows:
+            result['routes'][sc['name']] = stats(rows)
+    for name, r in [('전체', result['total'])] + list(result['routes'].items()):
+        print(f"  {name:<28} {r['rps']:>8.1f} req/s  p50 {r['p50_ms']:>8.2f}ms  p95 {r['p95_ms']:>8.2f}ms  "
+              f"p99 {r['p99_ms']:>8.2f}ms  {r['status']}")
+    return result
+
+
+def uncovered_endpoints(app):
+    """시나리오가 없는 라우트 (새 라우트 추가 시 시나리오 누락 확인용)"""
+    covered = set()
+    adapter_rules = {r.rule: r.endpoint for r in app.url_map.iter_rules()}
+    for sc in scenarios():
+        path = sc['path'].split('?')[0]
+        for rule, endpoint in adapter_rules.items():
+            pattern = rule.replace('<int:site_id>', '{site_id}').replace('<int:photo_id>', '{photo_id}').replace('<int:user_id>', '3')
+            pattern = pattern.replace('<name>', 'missing.folded')
+            pattern = pattern.replace('<import_id>', '0' * 32)
+            if pattern == path:
+                covered.add(endpoint)
+    return sorted(set(adapter_rules.values()) - covered - SKIPPED_ENDPOINTS)
+
+
+def _git_rev():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(previous_path, current):
+    """이전 결과 대비 p95 변화 출력"""
+    try:
+        previous = json.loads(Path(previous_path).read_text(encoding='utf-8'))
+    except Exception as e:
+        print(f"⚠️ 비교 대상 결과를 읽을 수 없습니다: {e}")
+        return
+    print(f"\n📊 p95 비교: {previous.get('meta', {}).get('git_rev')} -> {current['meta'].get('git_rev')}")
+    for name, now in current['routes'].items():
+        before = previous.get('routes', {}).get(name)
+        if not before:
+            continue
+        delta = now['p95_ms'] - before['p95_ms']
+        ratio = (now['p95_ms'] / before['p95_ms']) if before['p95_ms'] else 0
+        mark = '🔺' if ratio > 1.2 else ('🔻' if ratio and ratio < 0.8 else '  ')
+        print(f"  {mark} {name:<28} {before['p95_ms']:>8.2f} -> {now['p95_ms']:>8.2f}ms ({delta:+.2f})  "
+              f"RT {before['round_trips_mean']} -> {now['round_trips_mean']}")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(args):
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        'BENCH_LATENCY_MS': str(args.latency_ms),
+        'BENCH_JITTER_MS': str(args.jitter_ms),
+        'BENCH_SITES': str(args.sites),
+        'BENCH_SEED': str(args.seed),
+        'BENCH_FIXTURE': args.fixture or ''
+    })
+    # 운영과 같은 gunicorn.conf.py 사용 (gevent 몽키패치 시점, 커넥션 풀 크기 등)
+    cmd = ['gunicorn', '-c', 'gunicorn.conf.py', '-w', str(args.workers), '-k', args.worker_class, '-b', f'127.0.0.1:{port}']
+    if args.worker_class == 'gevent':
+        cmd += ['--worker-connections', str(args.worker_connections)]
+        env['HN_SERVE_MODE'] = 'gevent'
+    elif args.worker_class == 'gthread':
+        cmd += ['--threads', str(args.threads)]
+    cmd.append('bench:create_bench_app()')
+    try:
+        proc = subprocess.Popen(cmd, env=env, cwd=str(Path(__file__).resolve().parent),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        sys.exit('gunicorn이 설치되어 있지 않습니다. (pip install gunicorn)')
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return proc, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    sys.exit('gunicorn 시작 대기 시간 초과')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='엔드포인트 벤치마크 (메모리 DB + 지연 주입)')
+    parser.add_argument('-n', '--requests', type=int, default=50, help='라우트별 측정 요청 수')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='DB 왕복당 주입 지연')
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--sites', type=int, default=200, help='기본 데이터셋 현장 수 (--fixture 미지정 시)')
+    parser.add_argument('--fixture', help='memory_db JSON 픽스처 경로')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', action='append', help='이름에 포함된 시나리오만 (여러 번 지정 가능)')
+    parser.add_argument('--gunicorn', action='store_true', help='로컬 gunicorn 프로세스를 띄워 HTTP로 측정')
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--worker-class', default='sync', choices=['sync', 'gthread', 'gevent'], help='gunicorn 워커 종류')
+    parser.add_argument('--threads', type=int, default=8, help='gthread 워커당 스레드 수')
+    parser.add_argument('--worker-connections', type=int, default=500, help='gevent 워커당 동시 연결 수')
+    parser.add_argument('--load', type=int, default=0, help='동시 가상 사용자 수 (지정 시 gunicorn 대상 부하 측정)')
+    parser.add_argument('--duration', type=float, default=15.0, help='부하 측정 시간(초)')
+    parser.add_argument('--out', help='결과 JSON 경로 (기본: bench_results/bench_<시각>_<rev>.json)')
+    parser.add_argument('--compare', help='이전 결과 JSON과 p95 비교')
+    parser.add_argument('--verbose', action='store_true', help='라우트의 로그/print 출력 표시')
+    args = parser.parse_args(argv)
+
+    os.chdir(Path(__file__).resolve().parent)
+    if not args.verbose:
+        applog.set_level('ERROR')
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        app = create_bench_app(args.fixture, args.latency_ms, args.jitter_ms, args.sites, args.seed)
+    counts = app.bench_store.row_counts()
+    site_ids = sorted(app.bench_store.table_store('sites').rows.keys())[:50] or [1]
+
+    proc = None
+    if args.load:
+        args.gunicorn = True
+    if args.gunicorn:
+        proc, base_url = start_gunicorn(args)
+        call = HttpCaller(base_url)
+        mode = f'gunicorn {args.worker_class} x{args.workers}'
+    else:
+        call = TestClientCaller(app)
+        mode = 'testclient'
+
+    missing = uncovered_endpoints(app)
+    if missing:
+        print(f"⚠️ 시나리오가 없는 라우트: {', '.join(missing)}")
+    routes, load = {}, None
+    try:
+        if args.load:
+            print(f"🚀 부하 측정 시작: {mode}, 동시 사용자 {args.load}명, {args.duration}초, 지연 {args.latency_ms}ms±{args.jitter_ms}ms")
+            load = run_load(base_url, site_ids, args.load, args.duration, args.only)
+        else:
+            print(f"🚀 벤치마크 시작: {mode}, 지연 {args.latency_ms}ms±{args.jitter_ms}ms, 라우트별 {args.requests}회, 데이터 {counts}")
+            routes = run_scenarios(call, site_ids, args.requests, args.warmup, args.only, args.verbose)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    rev = _git_rev()
+    result = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'git_rev': rev,
+            'mode': mode,
+            'python': platform.python_version(),
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'requests_per_route': args.requests,
+            'dataset': counts,
+            'fixture': args.fixture,
+            'uncovered': missing
+        },
+        'routes': routes
+    }
+    if load is not None:
+        result['load'] = load
+    out = Path(args.out) if args.out else Path('bench_results') / f"bench_{datetime.now():%Y%m%d_%H%M%S}_{rev or 'local'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"✅ 결과 저장: {out}")
+    if args.compare:
+        compare(args.compare, result)
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+from dotenv import find_dotenv, dotenv_values, load_dotenv
+import os
+
+# =============================
+# 환경 설정: .env는 프로세스당 1회만 읽음
+# =============================
+# - 가장 먼저 import되어 os.environ을 채움(이미 설정된 환경변수가 우선)
+# - 키 앞에 BOM(\ufeff)이나 공백이 붙은 .env도 보정해서 반영
+# - gunicorn --preload 시 마스터에서 1회 로드되고 워커는 fork로 그대로 물려받음
+
+DOTENV_PATH = find_dotenv() or None
+
+
+def _load():
+    if not DOTENV_PATH:
+        return
+    load_dotenv(DOTENV_PATH)
+    try:
+        values = dotenv_values(DOTENV_PATH) or {}
+    except Exception:
+        return
+    for raw_key, value in values.items():
+        key = str(raw_key or '').lstrip('\ufeff').strip()
+        if key and key != raw_key and value not in (None, '') and not os.getenv(key):
+            os.environ[key] = str(value).strip()
+
+
+_load()
+
+
+def env(key: str, default: str = '') -> str:
+    """공백 제거된 환경변수 값 (비어 있으면 기본값)"""
+    val = os.getenv(key)
+    if isinstance(val, str) and val.strip() != '':
+        return val.strip()
+    return default
+
+
+# auth.py/sites.py/app.py 공통 JWT 비밀키 (환경변수 미설정 시에도 문자열 기본값 보장)
+SECRET_KEY = env('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
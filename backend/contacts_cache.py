@@ -0,0 +1,139 @@
+from pathlib import Path
+import threading
+import time
+import os
+
+import applog
+
+# =============================
+# contacts_master 프로세스 로컬 캐시 + 자동완성(초성 포함) 접두 인덱스
+# =============================
+# - 버전: 로컬 파일(.cache/contacts_master.version)의 mtime. upsert 시 갱신하면
+#   같은 서버의 모든 gunicorn 워커가 os.stat 한 번으로 변경을 감지합니다.
+# - 직접 SQL 수정 등 파일을 거치지 않은 변경은 CONTACTS_CACHE_MAX_AGE(초) 경과 시 재조회로 반영됩니다.
+
+CACHE_DIR = Path(os.getenv('CACHE_VERSION_DIR') or (Path(__file__).resolve().parent / '.cache'))
+CONTACTS_CACHE_MAX_AGE = int(os.getenv('CONTACTS_CACHE_MAX_AGE', '300'))
+
+# 한글 음절 초성(호환 자모)
+CHOSEONG = ['ㄱ','ㄲ','ㄴ','ㄷ','ㄸ','ㄹ','ㅁ','ㅂ','ㅃ','ㅅ','ㅆ','ㅇ','ㅈ','ㅉ','ㅊ','ㅋ','ㅌ','ㅍ','ㅎ']
+_CHOSEONG_SET = set(CHOSEONG)
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+
+
+def to_choseong(text: str) -> str:
+    """음절은 초성으로, 나머지 문자는 그대로 (예: '김철수' -> 'ㄱㅊㅅ')"""
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            out.append(CHOSEONG[(code - _HANGUL_BASE) // 588])
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+def _tokens(name: str):
+    """이름 전체 + 괄호/공백 뒤 토큰 시작 위치들 (예: '현대정보통신(최대훈)' -> 전체, '최대훈')"""
+    text = name.strip().lower()
+    starts = [0]
+    for i, ch in enumerate(text):
+        if ch in ' ()[]/,-·' and i + 1 < len(text) and text[i + 1] not in ' ()[]/,-·':
+            starts.append(i + 1)
+    return [text[i:].rstrip(' )]') for i in starts]
+
+
+def _matches(query: str, token: str) -> bool:
+    """글자 단위 비교: 같은 글자이거나, 질의 글자가 초성이면 토큰 글자의 초성과 비교"""
+    if len(query) > len(token):
+        return False
+    for qc, tc in zip(query, token):
+        if qc == tc:
+            continue
+        if qc in _CHOSEONG_SET and to_choseong(tc) == qc:
+            continue
+        return False
+    return True
+
+
+class ContactsMasterCache:
+    def __init__(self, version_path: Path):
+        self.version_path = version_path
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded_at = 0.0
+        self._items = []
+        self._index = {}
+
+    def _read_version(self):
+        try:
+            return self.version_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def bump(self):
+        """upsert 후 호출: 버전 파일 갱신(모든 워커가 다음 요청에서 재적재)"""
+        try:
+            self.version_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.version_path.with_suffix('.tmp')
+            tmp.write_text(str(time.time_ns()))
+            os.replace(tmp, self.version_path)
+        except Exception as e:
+            applog.get_logger('contacts_cache').warning('contacts_master 캐시 버전 갱신 실패', error=str(e))
+        with self._lock:
+            self._version = None
+
+    def _build(self, items):
+        items = sorted(items, key=lambda it: str(it.get('name') or ''))
+        index = {}
+        for pos, it in enumerate(items):
+            for token in _tokens(str(it.get('name') or '')):
+                cho = to_choseong(token)
+                for n in range(1, len(cho) + 1):
+                    bucket = index.setdefault(cho[:n], [])
+                    if not bucket or bucket[-1] != pos:
+                        bucket.append(pos)
+        return items, index
+
+    def snapshot(self, loader):
+        """(items, index) 반환. 버전 변경/만료 시 loader()로 재적재"""
+        version = self._read_version()
+        now = time.monotonic()
+        if self._version == version and (now - self._loaded_at) < CONTACTS_CACHE_MAX_AGE:
+            return self._items, self._index
+        with self._lock:
+            if self._version != version or (time.monotonic() - self._loaded_at) >= CONTACTS_CACHE_MAX_AGE:
+                self._items, self._index = self._build(loader() or [])
+                self._version = version
+                self._loaded_at = time.monotonic()
+            return self._items, self._index
+
+    def list(self, loader, role=None):
+        items, _ = self.snapshot(loader)
+        if role in ['pm', 'sales']:
+            return [it for it in items if it.get('role') == role]
+        return list(items)
+
+    def suggest(self, loader, q, role=None, limit=10):
+        """접두 자동완성: 음절/초성 혼합 입력 지원, 이름 전체 접두 일치 우선"""
+        items, index = self.snapshot(loader)
+        query = (q or '').strip().lower()
+        if not query:
+            return []
+        whole, partial = [], []
+        for pos in index.get(to_choseong(query), []):
+            it = items[pos]
+            if role in ['pm', 'sales'] and it.get('role') != role:
+                continue
+            tokens = _tokens(str(it.get('name') or ''))
+            if _matches(query, tokens[0]):
+                whole.append(it)
+            elif any(_matches(query, t) for t in tokens[1:]):
+                partial.append(it)
+            if len(whole) >= limit:
+                break
+        return (whole + partial)[:limit]
+
+
+contacts_master_cache = ContactsMasterCache(CACHE_DIR / 'contacts_master.version')
@@ -0,0 +1,438 @@
+"""대용량 합성 데이터 생성기 (용량/성능 테스트용)
+
+database_schema.sql 및 마이그레이션 스키마를 따르는 연결된 데이터를 만듭니다.
+사용자, 현장(한글 현장명/주소, NA/NE 프로젝트 번호), 연락처, 복수 연락처, 제품수량,
+세대부/공용부 연동, 업무(알람일 포함), 사진 메타(+선택적으로 자리표시 이미지 파일)를 생성합니다.
+같은 --seed, 규모 인자, --today 는 항상 같은 데이터를 만듭니다.
+
+사용 예:
+    cd backend
+    python datagen.py --sites 5000 --out data.json                 # memory_db / bench.py --fixture 용 JSON
+    python datagen.py --sites 5000 --format sql --out seed.sql     # psql -f seed.sql (COPY 사용)
+    python datagen.py --sites 5000 --format csv --out seed_csv/    # 테이블별 CSV (\\copy 용)
+    python datagen.py --sites 2000 --write-photos                  # uploads/generated/ 에 사진 파일 생성
+    MEMORY_DB_FIXTURE=data.json python app.py                       # 생성 데이터로 로컬 서버 실행
+
+기본 계정(id 1~3)은 bench.py 와 같습니다: admin@kdiwin.com / user@kdiwin.com / user2@kdiwin.com (비밀번호 bench1234)
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import struct
+import random
+import zlib
+import json
+import csv
+import sys
+
+import memory_db
+
+DEFAULT_PASSWORD = 'bench1234'
+
+# 적재 순서(외래키 의존 순서)와 테이블별 컬럼
+TABLE_COLUMNS = {
+    'users': ['id', 'email', 'password', 'name', 'phone', 'user_role', 'is_active', 'created_at', 'updated_at'],
+    'contacts_master': ['id', 'name', 'role', 'phone', 'active', 'created_at', 'updated_at'],
+    'sites': ['id', 'project_no', 'construction_company', 'site_name', 'address', 'detail_address', 'household_count',
+              'registration_date', 'delivery_date', 'completion_date', 'certification_audit', 'home_iot', 'product_bi',
+              'special_notes', 'external_network_enabled', 'external_network_period', 'created_by', 'created_at', 'updated_at'],
+    'site_contacts': ['id', 'site_id', 'project_no', 'pm_name', 'pm_phone', 'sales_manager_name', 'sales_manager_phone',
+                      'construction_manager_name', 'construction_manager_phone', 'installer_name', 'installer_phone',
+                      'network_manager_name', 'network_manager_phone', 'created_at', 'updated_at'],
+    'site_contact_people': ['id', 'site_id', 'person_type', 'name', 'phone', 'created_by', 'created_at', 'updated_at'],
+    'site_products': ['id', 'site_id', 'project_no', 'wallpad_model', 'wallpad_qty', 'doorphone_model', 'doorphone_qty',
+                      'lobbyphone_model', 'lobbyphone_qty', 'guardphone_model', 'guardphone_qty', 'magnet_sensor_model',
+                      'magnet_sensor_qty', 'motion_sensor_model', 'motion_sensor_qty', 'opener_model', 'opener_qty',
+                      'created_at', 'updated_at'],
+    'site_household_integrations': ['id', 'site_id', 'project_no', 'integration_type', 'enabled', 'company_name',
+                                    'contact_person', 'contact_phone', 'notes', 'created_at', 'updated_at'],
+    'site_common_integrations': ['id', 'site_id', 'project_no', 'integration_type', 'enabled', 'company_name',
+                                 'contact_person', 'contact_phone', 'notes', 'created_at', 'updated_at'],
+    'work_items': ['id', 'site_id', 'content', 'status', 'alarm_date', 'alarm_confirmed', 'done_date', 'created_by',
+                   'created_at', 'updated_at'],
+    'site_photos': ['id', 'site_id', 'title', 'image_url', 'uploaded_at', 'created_by', 'deleted_at']
+}
+
+# 프로젝트 번호는 NA/0000 ~ NE/9999 (check-project-no 형식) → 최대 20,000 현장
+MAX_SITES = 20000
+
+# =============================
+# 한글 데이터 사전
+# =============================
+SURNAMES = ['김', '이', '박', '최', '정', '강', '조', '윤', '장', '임', '한', '오', '서', '신', '권', '황', '안', '송', '류', '홍']
+GIVEN_NAMES = ['민준', '서준', '도윤', '예준', '시우', '하준', '지호', '주원', '지훈', '준서', '서연', '서윤', '지우', '하은',
+               '민서', '지민', '수아', '채원', '지유', '윤서', '현우', '대훈', '철수', '영희', '상민', '성호', '경민', '은지']
+REGIONS = [
+    ('서울특별시', ['강남구', '서초구', '송파구', '마포구', '영등포구', '성동구', '강서구', '노원구']),
+    ('부산광역시', ['해운대구', '수영구', '동래구', '부산진구', '강서구']),
+    ('인천광역시', ['연수구', '남동구', '서구', '부평구']),
+    ('대구광역시', ['수성구', '달서구', '북구']),
+    ('대전광역시', ['유성구', '서구', '중구']),
+    ('광주광역시', ['광산구', '북구', '서구']),
+    ('경기도', ['수원시 영통구', '성남시 분당구', '용인시 수지구', '고양시 일산동구', '화성시', '평택시', '김포시', '하남시']),
+    ('세종특별자치시', ['']),
+    ('충청남도', ['천안시 서북구', '아산시']),
+    ('경상남도', ['창원시 의창구', '김해시', '양산시'])
+]
+ROAD_WORDS = ['테헤란로', '반포대로', '올림픽로', '월드컵북로', '센텀중앙로', '송도과학로', '광교중앙로', '판교역로',
+              '동탄대로', '한누리대로', '문화로', '중앙로', '시청로', '호수로', '산업로', '봉은사로']
+CONSTRUCTION_COMPANIES = ['현대건설', '삼성물산', 'GS건설', '대우건설', 'DL이앤씨', '포스코이앤씨', '롯데건설', 'HDC현대산업개발',
+                          'SK에코플랜트', '한화건설', '호반건설', '중흥건설', '태영건설', '계룡건설', '두산건설']
+BRANDS = ['힐스테이트', '래미안', '자이', '푸르지오', 'e편한세상', '더샵', '롯데캐슬', '아이파크', 'SK뷰', '포레나',
+          '호반써밋', '중흥S-클래스', '데시앙', '리슈빌', '위브']
+SITE_SUFFIXES = ['센트럴', '파크', '리버뷰', '레이크', '포레스트', '퍼스트', '더퍼스트', '시티', '에듀', '메트로', '그랑', '프레스티지']
+PRODUCT_MODELS = {
+    'wallpad': ['HN-W100', 'HN-W200', 'HN-W700P', 'HN-W1000'],
+    'doorphone': ['HN-D10', 'HN-D20', 'HN-D30N'],
+    'lobbyphone': ['HN-L100', 'HN-L300'],
+    'guardphone': ['HN-G10', 'HN-G20'],
+    'magnet_sensor': ['HN-MS1', 'HN-MS2'],
+    'motion_sensor': ['HN-PIR1', 'HN-PIR2'],
+    'opener': ['HN-OP1', 'HN-OP5']
+}
+INTEGRATION_COMPANIES = ['한빛전기', '에너지솔루션', '경동나비엔', '귀뚜라미', '린나이', '삼성전자', 'LG전자', '코맥스', '아이콘트롤스',
+                         '주차로', '아마노코리아', '누리텔레콤', '한국엘리베이터', '오티스', '파킹클라우드', '에버온']
+WORK_CONTENTS = ['세대 월패드 설치 점검', '공용부 로비폰 배선 확인', '네트워크 스위치 랙 설치', '주차관제 연동 테스트',
+                 '원격검침 데이터 확인', 'CCTV 연동 점검', '엘리베이터 호출 연동 테스트', '세대 조명SW 결선 확인',
+                 '가스감지기 연동 확인', '입주 전 최종 점검', '하자 보수 요청 처리', '관리사무소 교육', '도면 검토',
+                 '자재 입고 확인', '준공 서류 제출']
+PHOTO_TITLES = ['전경', '단지 입구', '관리사무소', '통신실', 'MDF실', '세대 월패드', '로비폰', '경비실', '주차장', '작업 완료']
+NOTES = ['입주 예정일 변경 가능', '야간 작업 불가', '관리사무소 사전 연락 필수', '자재 반입 시 경비실 신고', None, None, None]
+
+# sites.py 의 연동 타입 목록과 동일
+HOUSEHOLD_INTEGRATION_TYPES = ['lighting_sw', 'standby_power_sw', 'gas_detector', 'heating', 'ventilation', 'door_lock',
+                               'air_conditioner', 'real_time_metering', 'environment_sensor', 'vpn', 'all_off_switch',
+                               'bathroom_phone', 'kitchen_tv']
+COMMON_INTEGRATION_TYPES = ['parking_control', 'remote_metering', 'cctv', 'elevator', 'parcel', 'ev_charger',
+                            'parking_location', 'onepass', 'rf_card']
+CONTACT_PERSON_TYPES = ['sales', 'construction', 'installer', 'network']
+
+
+# =============================
+# 생성기
+# =============================
+class DatasetGenerator:
+    def __init__(self, seed=42, sites=1000, users=20, work_items_per_site=8, photos_per_site=5,
+                 people_per_site=2, contacts_master=200, today=None, password=DEFAULT_PASSWORD):
+        if sites > MAX_SITES:
+            raise ValueError(f'현장 수는 최대 {MAX_SITES}개입니다 (NA/NE 프로젝트 번호 공간)')
+        self.rnd = random.Random(seed)
+        self.seed = seed
+        self.site_count = sites
+        self.user_count = max(users, 3)
+        self.work_items_per_site = work_items_per_site
+        self.photos_per_site = photos_per_site
+        self.people_per_site = people_per_site
+        self.contacts_master_count = contacts_master
+        self.today = today or datetime.utcnow().date()
+        self.password = password
+        self._ids = {}
+        self._phones = set()
+
+    def _next_id(self, table):
+        self._ids[table] = self._ids.get(table, 0) + 1
+        return self._ids[table]
+
+    def _name(self):
+        return self.rnd.choice(SURNAMES) + self.rnd.choice(GIVEN_NAMES)
+
+    def _phone(self):
+        # 동일 번호 중복을 피해 010-XXXX-XXXX 생성
+        while True:
+            phone = f'010-{self.rnd.randint(2000, 9999)}-{self.rnd.randint(0, 9999):04d}'
+            if phone not in self._phones:
+                self._phones.add(phone)
+                return phone
+
+    def _timestamp(self, day):
+        moment = datetime(day.year, day.month, day.day) + timedelta(seconds=self.rnd.randint(8 * 3600, 19 * 3600))
+        return moment.isoformat()
+
+    def _address(self):
+        city, districts = self.rnd.choice(REGIONS)
+        district = self.rnd.choice(districts)
+        road = self.rnd.choice(ROAD_WORDS)
+        parts = [city, district, f'{road} {self.rnd.randint(1, 400)}']
+        return ' '.join(p for p in parts if p)
+
+    def _project_numbers(self):
+        # NA/NE 각각 0000~9999 에서 중복 없이 추출
+        space = self.rnd.sample(range(MAX_SITES), self.site_count)
+        return [f"{'NA' if n < 10000 else 'NE'}/{n % 10000:04d}" for n in space]
+
+    def hashed_password(self):
+        import bcrypt
+        # 사용자 수가 많아도 해시는 한 번만 계산(cost 4: 테스트 전용)
+        return bcrypt.hashpw(self.password.encode('utf-8'), bcrypt.gensalt(4)).decode('utf-8')
+
+    # ---------- 테이블별 생성 ----------
+    def users(self):
+        hashed = self.hashed_password()
+        created = self._timestamp(self.today - timedelta(days=730))
+        base = [
+            ('admin@kdiwin.com', '관리자', 'admin'),
+            ('user@kdiwin.com', '김현장', 'user'),
+            ('user2@kdiwin.com', '이설치', 'user')
+        ]
+        rows = []
+        for i in range(self.user_count):
+            if i < len(base):
+                email, name, role = base[i]
+            else:
+                email, name = f'user{i + 1:05d}@example.com', self._name()
+                role = 'admin' if i % 25 == 0 else 'user'
+            rows.append({
+                'id': self._next_id('users'), 'email': email, 'password': hashed, 'name': name, 'phone': self._phone(),
+                'user_role': role, 'is_active': True, 'created_at': created, 'updated_at': created
+            })
+        return rows
+
+    def contacts_master(self):
+        rows = []
+        for i in range(self.contacts_master_count):
+            name = self._name()
+            if i % 4 == 3:
+                name = f'{self.rnd.choice(INTEGRATION_COMPANIES)}({name})'
+            created = self._timestamp(self.today - timedelta(days=self.rnd.randint(30, 700)))
+            rows.append({
+                'id': self._next_id('contacts_master'), 'name': name, 'role': 'pm' if i % 2 == 0 else 'sales',
+                'phone': self._phone(), 'active': self.rnd.random() > 0.05, 'created_at': created, 'updated_at': created
+            })
+        return rows
+
+    def iter_sites(self, owners, masters):
+        """현장 1개와 하위 테이블 행을 (table, row) 순서로 생성"""
+        rnd = self.rnd
+        pms = [m for m in masters if m['role'] == 'pm'] or [None]
+        sales = [m for m in masters if m['role'] == 'sales'] or [None]
+        for project_no in self._project_numbers():
+            site_id = self._next_id('sites')
+            owner = rnd.choice(owners)
+            registered = self.today - timedelta(days=rnd.randint(0, 1095))
+            delivery = registered + timedelta(days=rnd.randint(180, 720))
+            completed = delivery + timedelta(days=rnd.randint(30, 120)) if delivery < self.today else None
+            created = self._timestamp(registered)
+            external = 'Y' if rnd.random() < 0.4 else 'N'
+            households = rnd.choice([rnd.randint(50, 300), rnd.randint(300, 1200), rnd.randint(1200, 4000)])
+            yield 'sites', {
+                'id': site_id, 'project_no': project_no, 'construction_company': rnd.choice(CONSTRUCTION_COMPANIES),
+                'site_name': f'{rnd.choice(BRANDS)} {rnd.choice(SITE_SUFFIXES)} {rnd.randint(1, 9)}단지',
+                'address': self._address(), 'detail_address': f'{rnd.randint(1, 30)}블록' if rnd.random() < 0.5 else '',
+                'household_count': households, 'registration_date': registered.isoformat(),
+                'delivery_date': delivery.isoformat(), 'completion_date': completed.isoformat() if completed else None,
+                'certification_audit': 'Y' if rnd.random() < 0.3 else 'N', 'home_iot': 'Y' if rnd.random() < 0.6 else 'N',
+                'product_bi': rnd.choice(['HN', 'HN Smart', 'HN Premium', None]), 'special_notes': rnd.choice(NOTES),
+                'external_network_enabled': external,
+                'external_network_period': rnd.choice(['1년', '2년', '3년']) if external == 'Y' else None,
+                'created_by': owner, 'created_at': created, 'updated_at': created
+            }
+
+            pm, sm = rnd.choice(pms), rnd.choice(sales)
+            yield 'site_contacts', {
+                'id': self._next_id('site_contacts'), 'site_id': site_id, 'project_no': project_no,
+                'pm_name': pm['name'] if pm else self._name(), 'pm_phone': pm['phone'] if pm else self._phone(),
+                'sales_manager_name': sm['name'] if sm else self._name(),
+                'sales_manager_phone': sm['phone'] if sm else self._phone(),
+                'construction_manager_name': self._name(), 'construction_manager_phone': self._phone(),
+                'installer_name': self._name(), 'installer_phone': self._phone(),
+                'network_manager_name': self._name(), 'network_manager_phone': self._phone(),
+                'created_at': created, 'updated_at': created
+            }
+            for kind in CONTACT_PERSON_TYPES:
+                for _ in range(rnd.randint(0, self.people_per_site)):
+                    yield 'site_contact_people', {
+                        'id': self._next_id('site_contact_people'), 'site_id': site_id, 'person_type': kind,
+                        'name': self._name(), 'phone': self._phone(), 'created_by': owner,
+                        'created_at': created, 'updated_at': created
+                    }
+
+            product = {'id': self._next_id('site_products'), 'site_id': site_id, 'project_no': project_no}
+            for kind, models in PRODUCT_MODELS.items():
+                if kind in ('wallpad', 'doorphone'):
+                    qty = households
+                elif kind in ('magnet_sensor', 'motion_sensor'):
+                    qty = households * rnd.randint(0, 3)
+                else:
+                    qty = max(1, households // rnd.randint(80, 300)) if rnd.random() < 0.8 else 0
+                product[f'{kind}_model'] = rnd.choice(models) if qty else None
+                product[f'{kind}_qty'] = qty
+            product['created_at'] = product['updated_at'] = created
+            yield 'site_products', product
+
+            for table, types in (('site_household_integrations', HOUSEHOLD_INTEGRATION_TYPES),
+                                 ('site_common_integrations', COMMON_INTEGRATION_TYPES)):
+                for itype in rnd.sample(types, rnd.randint(2, len(types) // 2 + 1)):
+                    enabled = 'Y' if rnd.random() < 0.7 else 'N'
+                    yield table, {
+                        'id': self._next_id(table), 'site_id': site_id, 'project_no': project_no,
+                        'integration_type': itype, 'enabled': enabled,
+                        'company_name': rnd.choice(INTEGRATION_COMPANIES) if enabled == 'Y' else None,
+                        'contact_person': self._name() if enabled == 'Y' and rnd.random() < 0.5 else None,
+                        'contact_phone': None, 'notes': None, 'created_at': created, 'updated_at': created
+                    }
+
+            for _ in range(rnd.randint(0, self.work_items_per_site * 2)):
+                day = registered + timedelta(days=rnd.randint(0, max(1, (self.today - registered).days)))
+                done = rnd.random() < 0.55
+                alarm = None
+                if rnd.random() < 0.35:
+                    alarm = (self.today + timedelta(days=rnd.randint(-30, 30))).isoformat()
+                yield 'work_items', {
+                    'id': self._next_id('work_items'), 'site_id': site_id, 'content': rnd.choice(WORK_CONTENTS),
+                    'status': 'done' if done else 'todo', 'alarm_date': alarm,
+                    'alarm_confirmed': bool(alarm) and (done or rnd.random() < 0.3),
+                    'done_date': day.isoformat() if done else None, 'created_by': owner,
+                    'created_at': self._timestamp(day), 'updated_at': self._timestamp(day)
+                }
+
+            for _ in range(rnd.randint(0, self.photos_per_site * 2)):
+                day = registered + timedelta(days=rnd.randint(0, max(1, (self.today - registered).days)))
+                photo_id = self._next_id('site_photos')
+                yield 'site_photos', {
+                    'id': photo_id, 'site_id': site_id, 'title': rnd.choice(PHOTO_TITLES),
+                    'image_url': f'/uploads/generated/{day:%Y}/{day:%m}/site_{site_id}_{photo_id}.png',
+                    'uploaded_at': self._timestamp(day), 'created_by': owner,
+                    'deleted_at': self._timestamp(self.today) if rnd.random() < 0.05 else None
+                }
+
+    def generate(self):
+        """전체 데이터셋을 {"테이블": [행, ...]} 으로 반환"""
+        data = {name: [] for name in TABLE_COLUMNS}
+        data['users'] = self.users()
+        data['contacts_master'] = self.contacts_master()
+        owners = [u['id'] for u in data['users'] if u['user_role'] == 'user']
+        for table, row in self.iter_sites(owners, data['contacts_master']):
+            data[table].append(row)
+        return data
+
+
+# =============================
+# 출력 형식: memory(JSON), sql(COPY), csv(테이블별 파일)
+# =============================
+def _sql_copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    text = str(value)
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def write_json(data, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def write_sql(data, path):
+    """psql -f 로 적재 가능한 COPY 스크립트 (한 트랜잭션, 적재 후 시퀀스 재설정)"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('-- datagen.py 로 생성된 합성 데이터 (테스트 DB 전용)\n')
+        f.write("SET client_encoding = 'UTF8';\nBEGIN;\n\n")
+        for table, columns in TABLE_COLUMNS.items():
+            rows = data.get(table) or []
+            if not rows:
+                continue
+            f.write(f"COPY {table} ({', '.join(columns)}) FROM stdin;\n")
+            for row in rows:
+                f.write('\t'.join(_sql_copy_value(row.get(c)) for c in columns) + '\n')
+            f.write('\\.\n\n')
+        for table in TABLE_COLUMNS:
+            if data.get(table):
+                f.write(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}));\n")
+        f.write('\nCOMMIT;\n')
+
+
+def write_csv(data, directory):
+    """테이블별 CSV (헤더 포함). 예: \\copy sites FROM 'sites.csv' WITH (FORMAT csv, HEADER true)"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for table, columns in TABLE_COLUMNS.items():
+        with open(directory / f'{table}.csv', 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in data.get(table) or []:
+                writer.writerow(['' if row.get(c) is None else row.get(c) for c in columns])
+
+
+def placeholder_png(label_seed):
+    """16x16 단색 PNG (현장별로 색만 다름)"""
+    r, g, b = (label_seed * 67) % 256, (label_seed * 131) % 256, (label_seed * 199) % 256
+    raw = b''.join(b'\x00' + bytes([r, g, b]) * 16 for _ in range(16))
+
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body) & 0xffffffff)
+
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', 16, 16, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+def write_photos(data, base_dir):
+    """site_photos.image_url('/uploads/...') 위치에 자리표시 이미지 생성 (삭제된 사진 제외)"""
+    base_dir = Path(base_dir)
+    written = 0
+    for row in data.get('site_photos') or []:
+        if row.get('deleted_at'):
+            continue
+        target = base_dir / row['image_url'][len('/uploads/'):]
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(placeholder_png(row['site_id']))
+        written += 1
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='합성 데이터 생성기 (용량/성능 테스트용)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sites', type=int, default=1000, help=f'현장 수 (최대 {MAX_SITES})')
+    parser.add_argument('--users', type=int, default=20, help='사용자 수 (id 1~3 은 기본 계정)')
+    parser.add_argument('--work-items-per-site', type=int, default=8, help='현장당 평균 업무 수')
+    parser.add_argument('--photos-per-site', type=int, default=5, help='현장당 평균 사진 수')
+    parser.add_argument('--people-per-site', type=int, default=2, help='유형별 최대 복수 연락처 수')
+    parser.add_argument('--contacts-master', type=int, default=200, help='담당자 마스터 수')
+    parser.add_argument('--password', default=DEFAULT_PASSWORD, help='모든 사용자 공통 비밀번호')
+    parser.add_argument('--today', help='기준 날짜 YYYY-MM-DD (알람/등록일 계산, 기본: 오늘)')
+    parser.add_argument('--format', choices=['memory', 'sql', 'csv'], default='memory',
+                        help='memory: memory_db JSON 픽스처, sql: COPY 스크립트, csv: 테이블별 CSV 디렉터리')
+    parser.add_argument('--out', help='출력 경로 (기본: generated/dataset_<seed>_<sites>.json|.sql|_csv/)')
+    parser.add_argument('--write-photos', action='store_true', help='uploads/generated/ 에 자리표시 이미지 파일 생성')
+    parser.add_argument('--uploads-dir', help='사진 파일 기준 디렉터리 (기본: backend/uploads)')
+    args = parser.parse_args(argv)
+
+    base_dir = Path(__file__).resolve().parent
+    started = datetime.now()
+    try:
+        today = datetime.strptime(args.today, '%Y-%m-%d').date() if args.today else None
+        gen = DatasetGenerator(args.seed, args.sites, args.users, args.work_items_per_site, args.photos_per_site,
+                               args.people_per_site, args.contacts_master, today=today, password=args.password)
+    except ValueError as e:
+        print(f'❌ {e}')
+        return 1
+    data = gen.generate()
+
+    stem = f'dataset_{args.seed}_{args.sites}'
+    if args.format == 'memory':
+        out = Path(args.out) if args.out else base_dir / 'generated' / f'{stem}.json'
+        out.parent.mkdir(parents=True, exist_ok=True)
+        write_json(data, out)
+        # 적재 가능 여부 확인(스키마 기본값/인덱스 적용)
+        memory_db.MemorySupabase().load_file(out)
+    elif args.format == 'sql':
+        out = Path(args.out) if args.out else base_dir / 'generated' / f'{stem}.sql'
+        out.parent.mkdir(parents=True, exist_ok=True)
+        write_sql(data, out)
+    else:
+        out = Path(args.out) if args.out else base_dir / 'generated' / f'{stem}_csv'
+        write_csv(data, out)
+
+    counts = {table: len(rows) for table, rows in data.items() if rows}
+    print(f'✅ 생성 완료: {out} ({(datetime.now() - started).total_seconds():.1f}초)')
+    for table, n in counts.items():
+        print(f'   - {table}: {n:,}')
+    if args.write_photos:
+        uploads = Path(args.uploads_dir) if args.uploads_dir else base_dir / 'uploads'
+        print(f'🖼️ 사진 파일 {write_photos(data, uploads):,}개 생성: {uploads / "generated"}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,439 @@
+from typing import Optional, List, Dict, Any
+from collections import OrderedDict
+import threading
+import random
+import time
+import os
+import httpx
+from postgrest.utils import SyncClient
+
+import config  # noqa: F401  (.env 1회 로드)
+import tracing
+import applog
+
+# =============================
+# 데이터 접근 계층: 워커당 Supabase 클라이언트 1세트 + 공용 HTTP 커넥션 풀
+# =============================
+# - anon/service 클라이언트의 PostgREST/Storage 세션이 하나의 httpx 전송 계층(커넥션 풀)을 공유
+# - 클라이언트는 첫 사용 시 생성(gunicorn fork 이후), warm()으로 TLS 연결을 미리 열어 둠
+#   (--preload로 마스터에서 이미 만들어졌다면 워커에서 버리고 다시 생성)
+# - 라우트는 supabase.table()을 직접 호출하지 않고 이 모듈의 table()/저장소 함수를 사용
+# - 모든 HTTP 호출은 GuardedSession을 거침: 호출 데드라인, 조회(GET) 재시도(지터), 차단기(연속 장애 시 즉시 실패)
+
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
+SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')  # Storage/RPC 전용 사용 권장
+
+# 커넥션 풀/타임아웃 (환경변수로 조정)
+SUPABASE_POOL_MAXSIZE = int(os.getenv('SUPABASE_POOL_MAXSIZE', '20'))
+SUPABASE_POOL_KEEPALIVE = int(os.getenv('SUPABASE_POOL_KEEPALIVE', '10'))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_KEEPALIVE_EXPIRY', '60'))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv('SUPABASE_CONNECT_TIMEOUT', '5'))
+SUPABASE_READ_TIMEOUT = float(os.getenv('SUPABASE_READ_TIMEOUT', '20'))
+SUPABASE_POOL_TIMEOUT = float(os.getenv('SUPABASE_POOL_TIMEOUT', '5'))
+
+# 호출 단위 데드라인/재시도/차단기
+SUPABASE_CALL_DEADLINE = float(os.getenv('SUPABASE_CALL_DEADLINE', '15'))   # 재시도 포함 1회 호출 총 허용 시간(초)
+SUPABASE_READ_RETRIES = int(os.getenv('SUPABASE_READ_RETRIES', '2'))        # 조회(GET/HEAD)만 재시도
+SUPABASE_RETRY_BASE = float(os.getenv('SUPABASE_RETRY_BASE', '0.2'))
+SUPABASE_RETRY_CAP = float(os.getenv('SUPABASE_RETRY_CAP', '2'))
+SUPABASE_BREAKER_FAILURES = int(os.getenv('SUPABASE_BREAKER_FAILURES', '5'))  # 연속 일시 장애 횟수
+SUPABASE_BREAKER_RESET = float(os.getenv('SUPABASE_BREAKER_RESET', '30'))     # 차단 유지 시간(초)
+SUPABASE_STALE_FALLBACK = os.getenv('SUPABASE_STALE_FALLBACK', '1').lower() in ['1', 'true', 'yes', 'y']
+SUPABASE_STALE_CACHE_SIZE = int(os.getenv('SUPABASE_STALE_CACHE_SIZE', '500'))
+
+log = applog.get_logger('db')
+
+_RETRY_METHODS = {'GET', 'HEAD'}
+_TRANSIENT_STATUS = {502, 503, 504}
+
+
+def is_configured() -> bool:
+    return bool(SUPABASE_URL and SUPABASE_ANON_KEY)
+
+
+class SupabaseUnavailable(Exception):
+    """차단기가 열려 있어 호출하지 않고 즉시 실패"""
+
+    def __init__(self, retry_after=None):
+        self.retry_after = retry_after
+        super().__init__('데이터베이스 연결이 일시적으로 불안정합니다. 잠시 후 다시 시도하세요.')
+
+
+class CircuitBreaker:
+    """closed -> (연속 실패) -> open -> (대기 후) half_open(시험 호출 1건) -> closed/open"""
+
+    def __init__(self, failures=SUPABASE_BREAKER_FAILURES, reset_after=SUPABASE_BREAKER_RESET):
+        self.failures = failures
+        self.reset_after = reset_after
+        self._lock = threading.Lock()
+        self.state = 'closed'
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self):
+        """호출 허용 여부 확인 (차단 시 SupabaseUnavailable) -> 이 호출이 half_open 시험 호출이면 True"""
+        with self._lock:
+            if self.state == 'closed':
+                return False
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == 'open' and elapsed >= self.reset_after:
+                self.state = 'half_open'
+                self._probing = False
+            if self.state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            _count('short_circuited')
+            raise SupabaseUnavailable(max(1, int(self.reset_after - elapsed)))
+
+    def release_probe(self):
+        """결과를 기록하지 못하고 끝난 호출(gevent Timeout/종료 등): half_open 시험 호출 자리만 반납"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive += 1
+            if self.state == 'half_open' or self.consecutive >= self.failures:
+                if self.state != 'open':
+                    log.warning('Supabase 차단기 열림', consecutive_failures=self.consecutive, reset_after=self.reset_after)
+                    _count('breaker_opened')
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive,
+                'opened_seconds_ago': (round(time.monotonic() - self.opened_at, 1) if self.state != 'closed' else None)
+            }
+
+
+_stats_lock = threading.Lock()
+_stats = {
+    'calls': 0,
+    'retries': 0,
+    'transient_failures': 0,
+    'deadline_exceeded': 0,
+    'short_circuited': 0,
+    'breaker_opened': 0,
+    'stale_served': 0
+}
+
+
+def _count(key, n=1):
+    with _stats_lock:
+        _stats[key] = _stats.get(key, 0) + n
+
+
+breaker = CircuitBreaker()
+
+
+def _backoff(attempt):
+    """full jitter: 0 ~ min(cap, base * 2^attempt)"""
+    return random.uniform(0, min(SUPABASE_RETRY_CAP, SUPABASE_RETRY_BASE * (2 ** attempt)))
+
+
+class GuardedSession(SyncClient):
+    """PostgREST/Storage 공용 세션: 차단기 + 호출 데드라인 + 조회 재시도"""
+
+    def request(self, method, url, **kwargs):
+        probe = breaker.allow()
+        try:
+            return self._guarded_request(method, url, **kwargs)
+        except BaseException:
+            # 성공/실패 기록 없이 빠져나가면 half_open 시험 호출이 끝나지 않아 차단기가 계속 막힘
+            if probe:
+                breaker.release_probe()
+            raise
+
+    def _guarded_request(self, method, url, **kwargs):
+        _count('calls')
+        retryable = str(method).upper() in _RETRY_METHODS
+        deadline = time.monotonic() + SUPABASE_CALL_DEADLINE
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                _count('deadline_exceeded')
+                breaker.record_failure()
+                raise httpx.TimeoutException(f'Supabase 호출 데드라인({SUPABASE_CALL_DEADLINE:.0f}초) 초과')
+            kwargs['timeout'] = httpx.Timeout(
+                connect=min(SUPABASE_CONNECT_TIMEOUT, remaining),
+                read=min(SUPABASE_READ_TIMEOUT, remaining),
+                write=min(SUPABASE_READ_TIMEOUT, remaining),
+                pool=min(SUPABASE_POOL_TIMEOUT, remaining)
+            )
+            try:
+                response = super().request(method, url, **kwargs)
+            except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                _count('transient_failures')
+                if not retryable or attempt >= SUPABASE_READ_RETRIES:
+                    breaker.record_failure()
+                    raise
+                failure = e
+            except Exception:
+                # 예상 밖 오류(UnsupportedProtocol/ProxyError/DecodingError 등)도 실패로 기록
+                breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in _TRANSIENT_STATUS:
+                    breaker.record_success()
+                    return response
+                _count('transient_failures')
+                if not retryable or attempt >= SUPABASE_READ_RETRIES:
+                    breaker.record_failure()
+                    return response
+                failure = None
+            wait = _backoff(attempt)
+            if time.monotonic() + wait >= deadline:
+                _count('deadline_exceeded')
+                breaker.record_failure()
+                if failure is not None:
+                    raise failure
+                return response
+            attempt += 1
+            _count('retries')
+            time.sleep(wait)
+
+
+def is_transient_error(err) -> bool:
+    """차단기/네트워크/5xx 게이트웨이 계열 오류 여부 (캐시 폴백 판단용)"""
+    if isinstance(err, (SupabaseUnavailable, httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)):
+        return True
+    code = getattr(err, 'code', None)
+    if isinstance(code, int):
+        return code >= 500
+    # PostgREST: PGRST000~002(DB 연결 불가), 57014(statement timeout), 08xxx(연결 예외)
+    code = str(code or '')
+    return code in ('PGRST000', 'PGRST001', 'PGRST002', '57014') or code.startswith('08')
+
+
+# 조회 엔드포인트의 마지막 정상 응답 (Supabase 장애 시 폴백)
+_stale_lock = threading.Lock()
+_stale = OrderedDict()
+
+
+def remember_response(key, value):
+    if not SUPABASE_STALE_FALLBACK:
+        return
+    with _stale_lock:
+        _stale[key] = (time.time(), value)
+        _stale.move_to_end(key)
+        while len(_stale) > SUPABASE_STALE_CACHE_SIZE:
+            _stale.popitem(last=False)
+
+
+def cached_response(key):
+    """(저장시각, 값) 또는 None"""
+    if not SUPABASE_STALE_FALLBACK:
+        return None
+    with _stale_lock:
+        hit = _stale.get(key)
+    if hit is not None:
+        _count('stale_served')
+    return hit
+
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        counters = dict(_stats)
+    return {
+        'pid': os.getpid(),
+        'mode': ('supabase' if is_configured() else 'memory'),
+        'breaker': breaker.snapshot(),
+        'counters': counters,
+        'stale_entries': len(_stale),
+        'settings': {
+            'call_deadline': SUPABASE_CALL_DEADLINE,
+            'read_retries': SUPABASE_READ_RETRIES,
+            'breaker_failures': SUPABASE_BREAKER_FAILURES,
+            'breaker_reset': SUPABASE_BREAKER_RESET,
+            'pool_maxsize': SUPABASE_POOL_MAXSIZE
+        }
+    }
+
+
+_lock = threading.Lock()
+_client = None
+_service_client = None
+_transport = None
+
+
+def _timeout():
+    return httpx.Timeout(
+        connect=SUPABASE_CONNECT_TIMEOUT,
+        read=SUPABASE_READ_TIMEOUT,
+        write=SUPABASE_READ_TIMEOUT,
+        pool=SUPABASE_POOL_TIMEOUT
+    )
+
+
+def _shared_transport():
+    """워커 공용 keep-alive 커넥션 풀"""
+    global _transport
+    if _transport is None:
+        _transport = httpx.HTTPTransport(
+            limits=httpx.Limits(
+                max_connections=SUPABASE_POOL_MAXSIZE,
+                max_keepalive_connections=SUPABASE_POOL_KEEPALIVE,
+                keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY
+            ),
+            retries=1  # 연결 수립 실패만 재시도(요청 재전송 아님)
+        )
+    return _transport
+
+
+def _pooled_session(old):
+    session = GuardedSession(
+        base_url=old.base_url,
+        headers=old.headers,
+        timeout=_timeout(),
+        transport=_shared_transport()
+    )
+    try:
+        old.close()
+    except Exception:
+        pass
+    return session
+
+
+def _create(url, key):
+    from supabase import create_client
+    client = create_client(url, key)
+    # supabase-py가 만든 개별 세션을 공용 풀 기반 세션으로 교체
+    client.postgrest.session = _pooled_session(client.postgrest.session)
+    storage_session = _pooled_session(client.storage.session)
+    client.storage.session = storage_session
+    client.storage._client = storage_session
+    return client
+
+
+def get_client():
+    """anon 키 클라이언트 (환경변수 미설정 시 메모리 엔진)"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                if not is_configured():
+                    # 개발/부하 테스트: 메모리 PostgREST 대체 엔진 (MEMORY_DB_FIXTURE로 초기 데이터)
+                    import memory_db
+                    _client = memory_db.from_env()
+                else:
+                    _client = _create(SUPABASE_URL, SUPABASE_ANON_KEY)
+                    log.info('Supabase 클라이언트 초기화 완료')
+    return _client
+
+
+def set_client(client):
+    """테스트/벤치마크용: 프로세스 클라이언트 교체 (예: memory_db.MemorySupabase().load_file(...))"""
+    global _client
+    with _lock:
+        _client = client
+    return client
+
+
+def get_service_client():
+    """service role 키 클라이언트 (Storage/RPC 전용), 없으면 None"""
+    global _service_client
+    if _service_client is None and is_configured() and SUPABASE_SERVICE_ROLE_KEY:
+        with _lock:
+            if _service_client is None:
+                try:
+                    _service_client = _create(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+                    log.info('Supabase 서비스 키 클라이언트 준비(스토리지 전용)')
+                except Exception:
+                    log.warning('Supabase 서비스 키 클라이언트 초기화 실패: 환경 변수 또는 권한을 확인하세요')
+    return _service_client
+
+
+def _after_fork_in_child():
+    """gunicorn --preload: 마스터에서 만든 커넥션 풀/클라이언트는 워커 간 소켓을 공유하므로 버리고 새로 생성"""
+    global _client, _service_client, _transport, _lock
+    _lock = threading.Lock()
+    if _transport is not None:
+        _client = _service_client = _transport = None
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def warm():
+    """워커 시작 시 호출: 클라이언트 생성 + 가벼운 조회로 TLS 연결을 미리 열어 둠"""
+    client = get_client()
+    get_service_client()
+    if not is_configured():
+        return
+    try:
+        client.table('users').select('id').limit(1).execute()
+    except Exception as e:
+        log.warning('Supabase 워밍업 실패', error=str(e))
+
+
+def table(name: str):
+    """쿼리 빌더 (공용 클라이언트, 요청 단위 호출 추적 포함)"""
+    return tracing.traced(get_client().table(name), name)
+
+
+def storage_bucket(bucket: str):
+    """Storage 버킷 (service 키 우선)"""
+    client = get_service_client() or get_client()
+    return tracing.traced(client.storage.from_(bucket), bucket, 'storage')
+
+
+# =============================
+# 저장소 함수 (여러 라우트에서 반복되는 조회)
+# =============================
+def get_site_access(site_id: int, columns: str = 'id, created_by') -> Optional[Dict[str, Any]]:
+    """권한 확인용 현장 행 (없으면 None)"""
+    rows = table('sites').select(columns).eq('id', site_id).execute()
+    return rows.data[0] if rows.data else None
+
+
+def list_sites(user_id: int, is_admin: bool, columns: str = '*') -> List[Dict[str, Any]]:
+    """관리자는 전체, 일반 사용자는 본인이 등록한 현장 (id 내림차순)"""
+    q = table('sites').select(columns)
+    if not is_admin:
+        q = q.eq('created_by', user_id)
+    return q.order('id', desc=True).execute().data or []
+
+
+def list_owned_site_ids(user_id: int) -> List[int]:
+    rows = table('sites').select('id').eq('created_by', user_id).execute()
+    return [r['id'] for r in (rows.data or [])]
+
+
+def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
+    rows = table('users').select('*').eq('email', email).execute()
+    return rows.data[0] if rows.data else None
+
+
+def get_user_by_id(user_id: int, columns: str = 'id, email, name, phone, user_role, created_at') -> Optional[Dict[str, Any]]:
+    rows = table('users').select(columns).eq('id', user_id).execute()
+    return rows.data[0] if rows.data else None
+
+
+def find_site_by_project_no(project_no: str) -> List[Dict[str, Any]]:
+    rows = table('sites').select('id, site_name').eq('project_no', project_no).execute()
+    return rows.data or []
+
+
+def select_pages(name: str, columns: str, page_size: int = 1000):
+    """전체 행을 id 순서로 page_size씩 나눠 조회 (PostgREST 최대 행 수 제한 회피) → 페이지 단위 yield"""
+    start = 0
+    while True:
+        rows = table(name).select(columns).order('id').range(start, start + page_size - 1).execute().data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        start += page_size
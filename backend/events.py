@@ -0,0 +1,321 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from datetime import datetime, date, timezone
+from collections import deque
+import threading
+import queue
+import json
+import time
+import os
+import db
+import applog
+
+# =============================
+# 서버 푸시 알림(SSE): 알람 도래 + 현장 데이터 변경
+# =============================
+# - 워커 프로세스 내부 pub/sub(EventBroker)로 구독자에게 팬아웃
+# - 다른 워커에서 저장된 변경은 ChangeWatcher가 주기적으로 DB를 조회해 발행(프로세스당 1개 스레드)
+# - 운영에서는 /events를 gevent 워커 전용 프로세스로 분리(hn-events.service)하여
+#   동기 워커가 연결마다 점유되지 않도록 합니다.
+
+events_bp = Blueprint('events', __name__)
+log = applog.get_logger('events')
+
+SSE_HEARTBEAT_SECONDS = int(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_POLL_SECONDS = int(os.getenv('SSE_POLL_SECONDS', '5'))
+SSE_ALARM_POLL_SECONDS = int(os.getenv('SSE_ALARM_POLL_SECONDS', '60'))
+SSE_BUFFER_SIZE = int(os.getenv('SSE_BUFFER_SIZE', '2000'))
+SSE_QUEUE_SIZE = 500
+
+
+def _parse_event_id(event_id):
+    """'<epoch_ms>-<seq>' -> (epoch_ms, seq), 실패 시 None"""
+    try:
+        ts, seq = str(event_id).split('-', 1)
+        return int(ts), int(seq)
+    except Exception:
+        return None
+
+
+class _Subscriber:
+    def __init__(self, user_id, is_admin):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.queue = queue.Queue(maxsize=SSE_QUEUE_SIZE)
+        self.overflowed = False
+
+    def accepts(self, event):
+        return self.is_admin or event.get('owner_id') == self.user_id
+
+
+class EventBroker:
+    """프로세스 로컬 pub/sub: 최근 이벤트를 링 버퍼에 보관하여 Last-Event-ID 재개 지원"""
+
+    def __init__(self, buffer_size=SSE_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._buffer = deque(maxlen=buffer_size)
+        self._seq = 0
+
+    def publish(self, event_type, data, owner_id=None):
+        with self._lock:
+            self._seq += 1
+            event = {
+                'id': f"{int(time.time() * 1000)}-{self._seq}",
+                'type': event_type,
+                'data': data,
+                'owner_id': owner_id
+            }
+            self._buffer.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            if not sub.accepts(event):
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                # 느린 구독자: 이벤트를 버리고 재동기화 안내
+                sub.overflowed = True
+        return event
+
+    def subscribe(self, user_id, is_admin):
+        sub = _Subscriber(user_id, is_admin)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def replay_since(self, last_event_id, sub):
+        """last_event_id 이후 이벤트 목록과 버퍼가 그 시점을 포함하는지 여부"""
+        mark = _parse_event_id(last_event_id)
+        if mark is None:
+            return [], False
+        with self._lock:
+            events = list(self._buffer)
+        if not events:
+            return [], False
+        oldest = _parse_event_id(events[0]['id'])
+        complete = oldest is not None and oldest[0] <= mark[0]
+        replay = [e for e in events if (_parse_event_id(e['id']) or (0, 0)) > mark and sub.accepts(e)]
+        return replay, complete
+
+
+broker = EventBroker()
+
+# 로컬 발행과 ChangeWatcher 조회가 겹칠 때 중복 제거용 (table, id, 변경시각)
+_recent_lock = threading.Lock()
+_recent_keys = set()
+_recent_order = deque()
+_RECENT_MAX = 5000
+
+# 현장 소유자 캐시: site_id -> created_by (일반 사용자 이벤트 필터용)
+_site_owners = {}
+
+
+def _remember(key):
+    with _recent_lock:
+        if key in _recent_keys:
+            return False
+        _recent_keys.add(key)
+        _recent_order.append(key)
+        if len(_recent_order) > _RECENT_MAX:
+            _recent_keys.discard(_recent_order.popleft())
+        return True
+
+
+def publish_change(table_name, row, op='upsert'):
+    """행 변경 이벤트 발행 (저장 직후 호출 / ChangeWatcher 공용)"""
+    try:
+        if not row or row.get('id') is None:
+            return
+        if table_name == 'sites':
+            site_id = row.get('id')
+            if row.get('created_by') is not None:
+                _site_owners[site_id] = row.get('created_by')
+        else:
+            site_id = row.get('site_id')
+        changed_at = row.get('updated_at') or row.get('uploaded_at') or row.get('deleted_at')
+        if not _remember((table_name, row.get('id'), changed_at, op)):
+            return
+        broker.publish('change', {
+            'table': table_name,
+            'op': op,
+            'id': row.get('id'),
+            'site_id': site_id,
+            'changed_at': changed_at
+        }, owner_id=_site_owners.get(site_id))
+    except Exception as e:
+        log.warning('변경 이벤트 발행 실패', table=table_name, error=str(e))
+
+
+class ChangeWatcher(threading.Thread):
+    """워커 프로세스당 1개: 변경 커서/알람 조건을 주기 조회하여 broker에 발행"""
+
+    def __init__(self):
+        super().__init__(name='sse-change-watcher', daemon=True)
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.cursors = {}  # 테이블 -> (마지막으로 읽은 행의 변경 시각, id)
+        self.alarm_day = None
+        self.alarm_ids = set()
+        self.due_alarms = {}  # id -> 이벤트 데이터 (새 구독자 초기 전송용)
+        self._last_alarm_poll = 0.0
+
+    def run(self):
+        try:
+            self._load_site_owners()
+        except Exception as e:
+            log.warning('현장 소유자 로드 실패', error=str(e))
+        while True:
+            try:
+                self.poll_changes()
+                if time.time() - self._last_alarm_poll >= SSE_ALARM_POLL_SECONDS:
+                    self.poll_alarms()
+            except Exception as e:
+                log.warning('SSE 변경 조회 실패', error=str(e))
+            time.sleep(SSE_POLL_SECONDS)
+
+    def _load_site_owners(self):
+        rows = db.table('sites').select('id, created_by').execute()
+        for r in (rows.data or []):
+            _site_owners[r['id']] = r.get('created_by')
+
+    def poll_changes(self):
+        """테이블마다 (변경 시각, id) 키셋 커서로 이어서 조회: 한 번에 못 읽은 행/같은 시각의 행도 다음 조회에서 이어받음"""
+        from sites import SYNC_TABLES
+        import schema
+        for table_name, ts_col in SYNC_TABLES:
+            if not schema.has_table(table_name):
+                continue
+            try:
+                rows = self._read(table_name, ts_col, lambda t=table_name: db.table(t).select('*'))
+            except Exception as e:
+                if schema.note_error(e, table_name):
+                    continue
+                raise
+            for r in rows:
+                publish_change(table_name, r)
+        try:
+            rows = []
+            if schema.has_table('sync_tombstones'):
+                rows = self._read('sync_tombstones', 'deleted_at',
+                                  lambda: db.table('sync_tombstones').select('id, table_name, row_id, site_id, owner_id, deleted_at'))
+            for r in rows:
+                if r.get('owner_id') is not None and r.get('site_id') is not None:
+                    _site_owners.setdefault(r['site_id'], r['owner_id'])
+                publish_change(r.get('table_name'), {'id': r.get('row_id'), 'site_id': r.get('site_id'), 'deleted_at': r.get('deleted_at')}, op='delete')
+        except Exception as e:
+            if not schema.note_error(e, 'sync_tombstones'):
+                raise
+
+    def _read(self, key, ts_col, build):
+        """커서 이후 최대 500행, 커서는 실제로 읽은 마지막 행까지만 전진"""
+        from sites import _sync_keyset_rows
+        since, last_id = self.cursors.get(key, (self.started_at, None))
+        rows = _sync_keyset_rows(build, ts_col, since, last_id, 500)
+        if rows and rows[-1].get(ts_col) is not None:
+            self.cursors[key] = (rows[-1].get(ts_col), rows[-1].get('id'))
+        return rows
+
+    def poll_alarms(self):
+        """list_alarms와 같은 조건으로 새로 도래한 알람만 발행"""
+        self._last_alarm_poll = time.time()
+        today = date.today().isoformat()
+        if today != self.alarm_day:
+            self.alarm_day = today
+            self.alarm_ids = set()
+        rows = db.table('work_items').select('id, site_id, content, alarm_date, sites!inner(site_name, created_by)') \
+            .eq('status', 'todo') \
+            .eq('alarm_confirmed', False) \
+            .lte('alarm_date', today) \
+            .order('id', desc=True).execute()
+        current = {}
+        for r in (rows.data or []):
+            site = r.pop('sites', None) or {}
+            r['site_name'] = site.get('site_name')
+            r['owner_id'] = site.get('created_by')
+            current[r['id']] = r
+            if r['id'] not in self.alarm_ids:
+                self.alarm_ids.add(r['id'])
+                broker.publish('alarm', {k: v for k, v in r.items() if k != 'owner_id'}, owner_id=r['owner_id'])
+        self.due_alarms = current
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def _ensure_watcher():
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = ChangeWatcher()
+            _watcher.start()
+    return _watcher
+
+
+def _format_sse(event):
+    body = json.dumps(event['data'], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {body}\n\n"
+
+
+@events_bp.route('/events', methods=['GET'])
+def stream_events():
+    """SSE 스트림: event 종류 alarm | change | resync
+    - EventSource는 헤더를 못 보내므로 ?token= 도 허용 (hn.conf의 /events는 토큰이 남지 않도록 접근 로그를 끔)
+    - Last-Event-ID(헤더 또는 last_event_id 파라미터)로 재연결 시 누락분 재전송,
+      버퍼 범위를 벗어나면 resync 이벤트로 GET /sync 재호출을 안내
+    """
+    from sites import verify_token
+    auth_header = request.headers.get('Authorization') or ''
+    token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+    token = token or (request.args.get('token') or '')
+    if not token:
+        return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+    payload = verify_token(token)
+    if not payload:
+        return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+    watcher = _ensure_watcher()
+    sub = broker.subscribe(payload.get('user_id'), payload.get('user_role') == 'admin')
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+
+    def generate():
+        try:
+            # 연결 끊김 시 EventSource 재연결 간격(ms)
+            yield "retry: 3000\n\n"
+            if last_event_id:
+                replay, complete = broker.replay_since(last_event_id, sub)
+                if not complete:
+                    yield _format_sse({'id': last_event_id, 'type': 'resync', 'data': {'reason': 'buffer_exceeded'}})
+                for event in replay:
+                    yield _format_sse(event)
+            else:
+                for alarm in list(watcher.due_alarms.values()):
+                    if sub.accepts(alarm):
+                        data = {k: v for k, v in alarm.items() if k != 'owner_id'}
+                        yield _format_sse({'id': f"{int(time.time() * 1000)}-0", 'type': 'alarm', 'data': data})
+            while True:
+                if sub.overflowed:
+                    sub.overflowed = False
+                    yield _format_sse({'id': f"{int(time.time() * 1000)}-0", 'type': 'resync', 'data': {'reason': 'queue_overflow'}})
+                try:
+                    event = sub.queue.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    # 하트비트(주석 라인): 프록시 유휴 종료 방지 및 끊긴 연결 감지
+                    yield ": ping\n\n"
+                    continue
+                yield _format_sse(event)
+        finally:
+            broker.unsubscribe(sub)
+
+    headers = {
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # nginx 버퍼링 해제
+    }
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
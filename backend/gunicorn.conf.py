@@ -0,0 +1,60 @@
+# gunicorn 설정 (hn-backend.service / hn-events.service 공용)
+# 워커 프로세스가 fork된 직후 Supabase 클라이언트를 만들고 커넥션을 미리 연결합니다.
+# hn-backend.service는 --preload로 마스터에서 앱을 1회 import한 뒤 fork(코드/상수는 워커 간 공유 메모리)
+# gevent 모드(HN_SERVE_MODE=gevent 또는 -k gevent)는 아래에서 앱 import 전에 몽키패치하므로 --preload와 함께 써도 됩니다.
+import os
+import sys
+import shutil
+import tempfile
+
+# 서빙 모드: HN_SERVE_MODE=gevent(또는 -k gevent)면 greenlet 워커로 워커당 수백 개 요청 동시 처리
+# 몽키패치는 앱 import(--preload 포함)보다 먼저 적용해야 threading.local/소켓이 greenlet 단위로 동작
+_argv = ' '.join(sys.argv[1:])
+_green = (os.getenv('HN_SERVE_MODE') or '').lower() == 'gevent' or any(
+    flag in _argv for flag in ('-k gevent', '--worker-class gevent', '--worker-class=gevent'))
+if _green:
+    from gevent import monkey
+    monkey.patch_all()
+    # httpcore는 trio가 설치돼 있으면 import하는데, 패치 후에는 select.epoll이 없어 실패함(동기 코드는 trio 미사용)
+    sys.modules.setdefault('trio', None)
+    os.environ['HN_SERVE_MODE'] = 'gevent'
+    # 동시 요청이 많으므로 Supabase 커넥션 풀도 키움 (환경변수로 지정한 값이 우선)
+    os.environ.setdefault('SUPABASE_POOL_MAXSIZE', '100')
+    os.environ.setdefault('SUPABASE_POOL_KEEPALIVE', '50')
+    worker_class = 'gevent'  # 명령행 -k/--worker-connections가 있으면 그 값이 우선
+    worker_connections = int(os.getenv('HN_WORKER_CONNECTIONS', '500'))
+
+# Prometheus 다중 프로세스 모드: --preload면 on_starting보다 앱 import가 먼저이므로 설정 파일 로드 시점에 지정
+# (마스터 PID별 디렉터리 → 백엔드/이벤트 서비스 분리, 종료 시 삭제. HUP으로 설정을 다시 읽을 때는 유지)
+if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = os.path.join(tempfile.gettempdir(), f'hn_prometheus_{os.getpid()}')
+    os.environ['HN_PROMETHEUS_DIR_OWNED'] = '1'
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+
+def when_ready(server):
+    # --preload: 이미 import된 객체를 GC 추적 대상에서 제외해 워커의 copy-on-write 페이지 복사를 줄임
+    if server.cfg.preload_app:
+        import gc
+        gc.collect()
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    import db
+    import schema
+    import site_catalog
+    db.warm()
+    schema.refresh()  # 선택 테이블/컬럼 존재 여부를 첫 요청 전에 확인
+    site_catalog.site_catalog.warm()  # 현장 목록 스냅샷(mmap)을 읽어 첫 목록 요청부터 메모리에서 처리
+
+
+def child_exit(server, worker):
+    import metrics
+    metrics.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if os.getenv('HN_PROMETHEUS_DIR_OWNED') == '1':
+        shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
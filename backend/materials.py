@@ -0,0 +1,168 @@
+import threading
+import time
+import os
+
+import applog
+import schema
+from contacts_cache import CACHE_DIR
+
+# =============================
+# 자재 집계 (site_products 제품별/모델별 수량 합계)
+# =============================
+# - site_products의 <제품>_model/<제품>_qty 쌍을 페이지 단위로 읽어 pandas/NumPy로 한 번에 세로 변환(unpivot) 후 합계
+#   (행 단위 파이썬 루프 없음 → 현장 100개든 100,000개든 같은 코드 경로, 같은 결과)
+# - 가장 잘게 나눈 집계(등록자 × 건설사 × 월 × 홈IoT × 제품 × 모델)를 캐시하고, 요청별 그룹/권한 범위는 그 위에서 다시 합산
+# - 제품수량/현장 정보 저장 시 bump() → 버전 파일 갱신으로 같은 서버의 모든 워커 캐시 무효화
+#   (직접 SQL 수정은 MATERIALS_CACHE_MAX_AGE 경과 시 반영)
+
+MATERIALS_CACHE_MAX_AGE = int(os.getenv('MATERIALS_CACHE_MAX_AGE', '600'))
+MATERIALS_PAGE_SIZE = int(os.getenv('MATERIALS_PAGE_SIZE', '1000'))
+
+# 제품 컬럼 접두어 (표시 순서)
+PRODUCTS = ('wallpad', 'doorphone', 'lobbyphone', 'guardphone', 'magnet_sensor', 'motion_sensor', 'opener')
+GROUP_COLUMNS = ('construction_company', 'month', 'home_iot')
+MONTH_FIELDS = ('delivery_date', 'registration_date', 'completion_date', 'created_at')
+OUTPUT_COLUMNS = GROUP_COLUMNS + ('product', 'model', 'qty', 'sites')
+
+log = applog.get_logger('materials')
+
+
+def _frame(pages, columns):
+    import pandas as pd
+    frames = [pd.DataFrame.from_records(page, columns=columns) for page in pages if page]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_frames(site_pages, product_pages):
+    """페이지 iterable → (현장 DataFrame, 제품 DataFrame). 페이지마다 바로 변환해 dict 목록을 오래 들고 있지 않음"""
+    sites = _frame(site_pages, ['id', 'created_by', 'construction_company', 'home_iot'] + list(MONTH_FIELDS))
+    products = _frame(product_pages, ['site_id'] + [f'{p}_{kind}' for p in PRODUCTS for kind in ('model', 'qty')])
+    return sites, products
+
+
+def build_base(sites, products, month_field):
+    """현장/제품 DataFrame → 가장 잘게 나눈 집계 DataFrame
+    (created_by, construction_company, month, home_iot, product, model, qty, sites)"""
+    import numpy as np
+    import pandas as pd
+
+    merged = products.merge(sites, left_on='site_id', right_on='id', how='inner')
+    n = len(merged)
+    k = len(PRODUCTS)
+
+    # 세로 변환: 제품 k개 열을 이어 붙여 (n*k)행 배열 생성
+    qty = np.concatenate([
+        pd.to_numeric(merged[f'{p}_qty'], errors='coerce').fillna(0).to_numpy(dtype='int64') for p in PRODUCTS
+    ]) if n else np.zeros(0, dtype='int64')
+    model = np.concatenate([
+        merged[f'{p}_model'].fillna('').astype(str).str.strip().to_numpy(dtype=object) for p in PRODUCTS
+    ]) if n else np.zeros(0, dtype=object)
+    month = pd.to_datetime(merged[month_field], errors='coerce', utc=True).dt.strftime('%Y-%m').fillna('')
+    home_iot = merged['home_iot'].where(merged['home_iot'] == 'Y', 'N')
+    company = merged['construction_company'].fillna('').astype(str).str.strip()
+
+    long = pd.DataFrame({
+        'created_by': np.tile(merged['created_by'].to_numpy(), k),
+        'construction_company': np.tile(company.to_numpy(dtype=object), k),
+        'month': np.tile(month.to_numpy(dtype=object), k),
+        'home_iot': np.tile(home_iot.to_numpy(dtype=object), k),
+        'product': pd.Categorical(np.repeat(np.array(PRODUCTS, dtype=object), n), categories=list(PRODUCTS), ordered=True),
+        'model': model,
+        'qty': qty,
+    })
+    long = long[long['qty'] > 0]
+    base = long.groupby(['created_by', 'construction_company', 'month', 'home_iot', 'product', 'model'],
+                        sort=False, observed=True, dropna=False) \
+        .agg(qty=('qty', 'sum'), sites=('qty', 'size')).reset_index()
+    return base
+
+
+def summarize(base, group_by, created_by=None):
+    """캐시된 집계 → 요청 그룹(group_by ⊆ GROUP_COLUMNS) + 제품/모델별 합계, 정렬 고정"""
+    frame = base if created_by is None else base[base['created_by'] == created_by]
+    keys = list(group_by) + ['product', 'model']
+    out = frame.groupby(keys, sort=False, observed=True, dropna=False)[['qty', 'sites']].sum().reset_index()
+    out = out.sort_values(keys, kind='mergesort').reset_index(drop=True)
+    out['product'] = out['product'].astype(str)
+    out['qty'] = out['qty'].astype('int64')
+    out['sites'] = out['sites'].astype('int64')
+    totals = out.groupby('product', sort=False)['qty'].sum()
+    return out, {p: int(totals[p]) for p in PRODUCTS if p in totals.index}
+
+
+class MaterialsRollup:
+    def __init__(self, version_path):
+        self.version_path = version_path
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded_at = 0.0
+        self._frames = None  # (현장, 제품) DataFrame - 월 기준만 다른 요청은 재조회 없이 다시 집계
+        self._bases = {}     # month_field -> 집계 DataFrame
+
+    def _read_version(self):
+        try:
+            return self.version_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def bump(self):
+        """site_products/sites 저장 후 호출: 모든 워커의 집계 캐시 무효화"""
+        try:
+            self.version_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.version_path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp.write_text(str(time.time_ns()))
+            os.replace(tmp, self.version_path)
+        except Exception as e:
+            log.warning('자재 집계 캐시 버전 갱신 실패', error=str(e))
+        with self._lock:
+            self._version = None
+
+    def base(self, loader, month_field, compute=None):
+        """(집계 DataFrame, 캐시 사용 여부)
+        loader() -> (현장 페이지 iterable, 제품 페이지 iterable), compute: CPU 작업 실행기(serving.run_blocking)"""
+        version = self._read_version()
+        fresh = self._version == version and (time.monotonic() - self._loaded_at) < MATERIALS_CACHE_MAX_AGE
+        if fresh and month_field in self._bases:
+            return self._bases[month_field], True
+        with self._lock:
+            if self._version != version or (time.monotonic() - self._loaded_at) >= MATERIALS_CACHE_MAX_AGE:
+                started = time.perf_counter()
+                self._frames = load_frames(*loader())
+                self._bases = {}
+                self._version = version
+                self._loaded_at = time.monotonic()
+                log.info('자재 집계 원본 적재', elapsed_ms=int((time.perf_counter() - started) * 1000),
+                         sites=len(self._frames[0]), products=len(self._frames[1]))
+            if month_field not in self._bases:
+                run = compute or (lambda fn, *args: fn(*args))
+                self._bases[month_field] = run(build_base, self._frames[0], self._frames[1], month_field)
+            return self._bases[month_field], False
+
+    def stats(self):
+        return {
+            'loaded_ago_seconds': round(time.monotonic() - self._loaded_at, 1) if self._version is not None else None,
+            'sites': int(len(self._frames[0])) if self._frames is not None else 0,
+            'rows': {field: int(len(frame)) for field, frame in self._bases.items()}
+        }
+
+
+def site_columns():
+    """sites에 실제로 있는 월 기준 컬럼만 포함"""
+    cols = ['id', 'created_by', 'construction_company', 'home_iot', 'created_at']
+    cols += [f for f in MONTH_FIELDS if f != 'created_at' and schema.has_column('sites', f)]
+    return ', '.join(cols)
+
+
+def product_columns():
+    """site_products에 실제로 있는 제품 컬럼만 (마이그레이션 미적용 컬럼 제외)"""
+    cols = ['site_id']
+    for p in PRODUCTS:
+        for kind in ('model', 'qty'):
+            if schema.has_column('site_products', f'{p}_{kind}'):
+                cols.append(f'{p}_{kind}')
+    return ', '.join(cols)
+
+
+materials_rollup = MaterialsRollup(CACHE_DIR / 'materials.version')
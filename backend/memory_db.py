@@ -0,0 +1,682 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+import itertools
+import threading
+import json
+import re
+import os
+
+import applog
+
+# =============================
+# 메모리 PostgREST 대체 엔진 (Supabase 미설정 시 개발/부하 테스트용)
+# =============================
+# - supabase-py 쿼리 빌더와 같은 체인: select/eq/neq/in_/gt/gte/lt/lte/is_/like/ilike/order/range/limit,
+#   select(count='exact'), insert/update/delete/upsert, 임베드 조회('sites!inner(site_name, created_by)')
+# - 컬럼별 해시 인덱스: eq/in_ 필터가 처음 쓰인 컬럼에 자동 생성, 이후 insert/update/delete 시 유지
+# - MEMORY_DB_FIXTURE(JSON: {"테이블": [행, ...]}) 로 초기 데이터 적재, dump()로 스냅샷 저장
+# - 모든 테이블은 첫 접근 시 생성(누락 테이블 오류 없음), 기본 키는 id(자동 증가)
+# - MEMORY_DB_ABSENT("테이블,테이블.컬럼,...")로 마이그레이션 미적용 상태를 흉내 → PostgREST와 같은 코드로 오류
+
+MEMORY_DB_FIXTURE = os.getenv('MEMORY_DB_FIXTURE')
+MEMORY_DB_ABSENT = {x.strip() for x in (os.getenv('MEMORY_DB_ABSENT') or '').split(',') if x.strip()}
+
+# 스키마의 DEFAULT 중 조회 필터에 쓰이는 값 (NOW() 기본값은 _TIMESTAMP_DEFAULTS 로 처리)
+COLUMN_DEFAULTS = {
+    'users': {'user_role': 'user', 'is_active': True},
+    'work_items': {'status': 'todo', 'alarm_confirmed': False},
+    'contacts_master': {'active': True}
+}
+_TIMESTAMP_DEFAULTS = ['created_at', 'updated_at']
+TABLE_TIMESTAMP_DEFAULTS = {
+    'site_photos': ['uploaded_at'],
+    'sync_tombstones': ['deleted_at']
+}
+# updated_at 컬럼이 없는 테이블 (touch_updated_at 트리거 미적용)
+NO_UPDATED_AT = {'site_photos', 'sync_tombstones', 'batch_idempotency'}
+
+
+class MemoryAPIError(Exception):
+    """postgrest.APIError와 같은 속성(code/message/details/hint)"""
+
+    def __init__(self, code, message, details=None, hint=None):
+        self.code = code
+        self.message = message
+        self.details = details
+        self.hint = hint
+        super().__init__(f"{code}: {message}")
+
+    def json(self):
+        return {'code': self.code, 'message': self.message, 'details': self.details, 'hint': self.hint}
+
+
+class MemoryResult:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _key(value):
+    """인덱스/동등 비교용 정규화 (PostgREST는 쿼리 값을 문자열로 받아 컬럼 타입으로 변환)"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _compare_value(value):
+    """범위 비교용: 숫자는 숫자로, 나머지는 문자열(ISO 날짜 포함)"""
+    if isinstance(value, bool):
+        return (1, int(value))
+    if isinstance(value, (int, float)):
+        return (0, value)
+    text = str(value)
+    try:
+        return (0, float(text)) if re.fullmatch(r'-?\d+(\.\d+)?', text) else (2, text)
+    except Exception:
+        return (2, text)
+
+
+def _like_regex(pattern, case_insensitive):
+    """LIKE 패턴 -> 정규식 (%, _, 역슬래시 이스케이프; PostgREST 표기 * 도 %로 취급)"""
+    out = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\' and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        if ch in '%*':
+            out.append('.*')
+        elif ch == '_':
+            out.append('.')
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    return re.compile('^' + ''.join(out) + '$', re.S | (re.I if case_insensitive else 0))
+
+
+def _split_columns(text):
+    """'id, sites!inner(site_name, created_by)' -> ['id', 'sites!inner(site_name, created_by)']"""
+    parts, depth, buf = [], 0, ''
+    for ch in text:
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        if ch == ',' and depth == 0:
+            if buf.strip():
+                parts.append(buf.strip())
+            buf = ''
+        else:
+            buf += ch
+    if buf.strip():
+        parts.append(buf.strip())
+    return parts
+
+
+def _parse_select(text):
+    """(컬럼 목록 또는 None(*), 임베드 목록[(테이블, inner 여부, 하위 select)])"""
+    columns, embeds = [], []
+    star = False
+    for part in _split_columns(text or '*'):
+        m = re.match(r'^([A-Za-z0-9_]+)(!inner)?\((.*)\)$', part, re.S)
+        if m:
+            embeds.append((m.group(1), bool(m.group(2)), _parse_select(m.group(3))))
+        elif part == '*':
+            star = True
+        else:
+            columns.append(part.split(':')[-1].strip())
+    return (None if star or not columns else columns), embeds
+
+
+def _singular(name):
+    return name[:-1] if name.endswith('s') else name
+
+
+class MemoryTable:
+    """행 저장소 + 컬럼별 해시 인덱스(값 -> id 집합)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = {}
+        self.indexes = {}
+        self._seq = itertools.count(1)
+
+    def next_id(self):
+        return next(self._seq)
+
+    def bump_seq(self, row_id):
+        try:
+            row_id = int(row_id)
+        except Exception:
+            return
+        current = next(self._seq)
+        self._seq = itertools.count(max(current, row_id + 1))
+
+    def index(self, column):
+        idx = self.indexes.get(column)
+        if idx is None:
+            idx = {}
+            for rid, row in self.rows.items():
+                idx.setdefault(_key(row.get(column)), set()).add(rid)
+            self.indexes[column] = idx
+        return idx
+
+    def _index_add(self, rid, row):
+        for column, idx in self.indexes.items():
+            idx.setdefault(_key(row.get(column)), set()).add(rid)
+
+    def _index_remove(self, rid, row):
+        for column, idx in self.indexes.items():
+            bucket = idx.get(_key(row.get(column)))
+            if bucket is not None:
+                bucket.discard(rid)
+                if not bucket:
+                    idx.pop(_key(row.get(column)), None)
+
+    def put(self, row):
+        rid = row['id']
+        old = self.rows.get(rid)
+        if old is not None:
+            self._index_remove(rid, old)
+        self.rows[rid] = row
+        self._index_add(rid, row)
+
+    def remove(self, rid):
+        row = self.rows.pop(rid, None)
+        if row is not None:
+            self._index_remove(rid, row)
+        return row
+
+
+def _predicate(op, target):
+    """필터 1개 -> 값 판정 함수 (대상 값 정규화는 한 번만)"""
+    if op == 'eq':
+        key = _key(target)
+        return lambda v: v is not None and _key(v) == key
+    if op == 'neq':
+        key = _key(target)
+        return lambda v: v is not None and _key(v) != key
+    if op == 'in':
+        keys = {_key(t) for t in target}
+        return lambda v: v is not None and _key(v) in keys
+    if op == 'is':
+        if target is None or str(target).lower() == 'null':
+            return lambda v: v is None
+        key = _key(target)
+        return lambda v: _key(v) == key
+    if op in ('like', 'ilike'):
+        return lambda v: v is not None and bool(target.match(str(v)))
+    bound = _compare_value(target)
+    text = str(target)
+
+    def compare(v):
+        if v is None:
+            return False
+        a, b = _compare_value(v), bound
+        if a[0] != b[0]:
+            a, b = (2, str(v)), (2, text)
+        if op == 'gt':
+            return a > b
+        if op == 'gte':
+            return a >= b
+        if op == 'lt':
+            return a < b
+        return a <= b
+    return compare
+
+
+class MemoryQuery:
+    def __init__(self, db, table_name):
+        self.db = db
+        self.table_name = table_name
+        self.op = 'select'
+        self.columns = '*'
+        self.count_mode = None
+        self.payload = None
+        self.on_conflict = 'id'
+        self.filters = []  # (컬럼, 연산자, 값, 판정 함수)
+        self.orders = []
+        self.offset = 0
+        self.max_rows = None
+
+    # ----- 동작 -----
+    def select(self, columns='*', count=None, **kwargs):
+        self.columns = columns or '*'
+        self.count_mode = count
+        return self
+
+    def insert(self, data, upsert=False, **kwargs):
+        self.op = 'upsert' if upsert else 'insert'
+        self.payload = data
+        return self
+
+    def upsert(self, data, on_conflict='id', **kwargs):
+        self.op = 'upsert'
+        self.payload = data
+        self.on_conflict = on_conflict or 'id'
+        return self
+
+    def update(self, data, **kwargs):
+        self.op = 'update'
+        self.payload = data
+        return self
+
+    def delete(self, **kwargs):
+        self.op = 'delete'
+        return self
+
+    # ----- 필터 -----
+    def _add(self, column, op, value):
+        self.filters.append((column, op, value, _predicate(op, value)))
+        return self
+
+    def eq(self, column, value):
+        return self._add(column, 'eq', value)
+
+    def neq(self, column, value):
+        return self._add(column, 'neq', value)
+
+    def in_(self, column, values):
+        return self._add(column, 'in', list(values))
+
+    def gt(self, column, value):
+        return self._add(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self._add(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self._add(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self._add(column, 'lte', value)
+
+    def is_(self, column, value):
+        return self._add(column, 'is', value)
+
+    def like(self, column, pattern):
+        return self._add(column, 'like', _like_regex(pattern, False))
+
+    def ilike(self, column, pattern):
+        return self._add(column, 'ilike', _like_regex(pattern, True))
+
+    def order(self, column, desc=False, nullsfirst=None, **kwargs):
+        # 'updated_at,id'처럼 여러 컬럼을 한 번에 지정한 경우 (PostgREST order 파라미터 형식)
+        for name in str(column).split(','):
+            self.orders.append((name.strip(), desc, (desc if nullsfirst is None else nullsfirst)))
+        return self
+
+    def limit(self, size, **kwargs):
+        self.max_rows = int(size)
+        return self
+
+    def range(self, start, end):
+        self.offset = int(start)
+        self.max_rows = max(0, int(end) - int(start) + 1)
+        return self
+
+    # ----- 실행 -----
+    def _check_absent(self):
+        """MEMORY_DB_ABSENT에 지정된 테이블/컬럼 접근 시 PostgREST 오류 재현"""
+        name = self.table_name
+        if name in MEMORY_DB_ABSENT:
+            raise MemoryAPIError('PGRST205', f"Could not find the table 'public.{name}' in the schema cache")
+        used = [c.strip() for c in str(self.columns).split(',') if c.strip() and '(' not in c]
+        used += [f[0] for f in self.filters] + [o[0] for o in self.orders]
+        rows = self.payload if isinstance(self.payload, list) else [self.payload or {}]
+        for row in rows:
+            used += list(row.keys())
+        for column in used:
+            if f'{name}.{column}' in MEMORY_DB_ABSENT:
+                if self.op in ('insert', 'upsert', 'update'):
+                    raise MemoryAPIError('PGRST204', f"Could not find the '{column}' column of '{name}' in the schema cache")
+                raise MemoryAPIError('42703', f'column {name}.{column} does not exist')
+
+    def execute(self):
+        if MEMORY_DB_ABSENT:
+            self._check_absent()
+        with self.db.lock:
+            if self.op == 'select':
+                return self._run_select()
+            if self.op in ('insert', 'upsert'):
+                return self._run_insert()
+            if self.op == 'update':
+                return self._run_update()
+            return self._run_delete()
+
+    def _candidates(self, table):
+        """eq/in_ 필터는 해시 인덱스로 후보 id를 좁힘 -> (후보 id 목록, 인덱스로 처리한 필터 위치)"""
+        buckets = []
+        used = set()
+        for pos, (column, op, value, _pred) in enumerate(self.filters):
+            if '.' in column or op not in ('eq', 'in') or (op == 'eq' and value is None):
+                continue
+            idx = table.index(column)
+            if op == 'eq':
+                found = idx.get(_key(value), set())
+            else:
+                found = set()
+                for v in value:
+                    if v is not None:
+                        found |= idx.get(_key(v), set())
+            buckets.append(found)
+            used.add(pos)
+        if not buckets:
+            return list(table.rows.keys()), used
+        # 가장 작은 버킷부터 교집합
+        buckets.sort(key=len)
+        ids = buckets[0]
+        for other in buckets[1:]:
+            if not ids:
+                break
+            ids = [rid for rid in ids if rid in other]
+        return list(ids), used
+
+    def _matching_rows(self, table, embeds=()):
+        """필터 통과 행 (임베드 필터 'sites.created_by' 포함)"""
+        candidates, used = self._candidates(table)
+        local = [(c, f) for pos, (c, _o, _v, f) in enumerate(self.filters) if '.' not in c and pos not in used]
+        nested = [(c.split('.', 1), f) for c, _o, _v, f in self.filters if '.' in c]
+        rows = table.rows
+        if local:
+            out = [rows[rid] for rid in candidates if all(f(rows[rid].get(c)) for c, f in local)]
+        else:
+            out = [rows[rid] for rid in candidates]
+        if not nested and not embeds:
+            return out, {}
+        resolved = {}
+        kept = []
+        for row in out:
+            ok = True
+            attached = {}
+            for name, inner, sub in embeds:
+                value = self._embed(row, name, sub)
+                checks = [(path[1], f) for path, f in nested if path[0] == name]
+                if checks:
+                    if isinstance(value, list):
+                        value = [r for r in value if all(f(r.get(c)) for c, f in checks)]
+                    elif value is not None and not all(f(value.get(c)) for c, f in checks):
+                        value = None
+                if inner and (value is None or value == []):
+                    ok = False
+                    break
+                attached[name] = value
+            if ok:
+                kept.append(row)
+                resolved[id(row)] = attached
+        return kept, resolved
+
+    def _embed(self, row, name, sub):
+        """FK 규칙: row.<단수>_id -> name.id (다대일), 없으면 name.<현재 테이블 단수>_id = row.id (일대다)"""
+        target = self.db.table_store(name)
+        fk = f"{_singular(name)}_id"
+        if fk in row:
+            rid = row.get(fk)
+            hit = None
+            if rid is not None:
+                ids = target.index('id').get(_key(rid))
+                if ids:
+                    hit = target.rows[next(iter(ids))]
+            return self._project(hit, sub) if hit is not None else None
+        back = f"{_singular(self.table_name)}_id"
+        ids = target.index(back).get(_key(row.get('id')), set())
+        return [self._project(target.rows[i], sub) for i in sorted(ids)]
+
+    @staticmethod
+    def _project(row, parsed):
+        columns, _ = parsed
+        if columns is None:
+            return dict(row)
+        return {c: row.get(c) for c in columns}
+
+    def _sort(self, rows):
+        for column, desc, nulls_first in reversed(self.orders):
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: _compare_value(r.get(column)), reverse=desc)
+            rows = (missing + present) if nulls_first else (present + missing)
+        return rows
+
+    def _run_select(self):
+        table = self.db.table_store(self.table_name)
+        parsed = _parse_select(self.columns)
+        embeds = parsed[1]
+        rows, resolved = self._matching_rows(table, embeds)
+        total = len(rows)
+        rows = self._sort(rows)
+        end = None if self.max_rows is None else self.offset + self.max_rows
+        page = rows[self.offset:end]
+        data = []
+        for row in page:
+            item = self._project(row, parsed)
+            for name, _inner, _sub in embeds:
+                item[name] = resolved.get(id(row), {}).get(name)
+            data.append(item)
+        return MemoryResult(data, total if self.count_mode else None)
+
+    def _apply_defaults(self, row):
+        now = _now_iso()
+        for column, value in COLUMN_DEFAULTS.get(self.table_name, {}).items():
+            row.setdefault(column, value)
+        columns = list(TABLE_TIMESTAMP_DEFAULTS.get(self.table_name, []))
+        columns += [c for c in _TIMESTAMP_DEFAULTS if not (c == 'updated_at' and self.table_name in NO_UPDATED_AT)]
+        for column in columns:
+            if row.get(column) is None:
+                row[column] = now
+        for column, value in list(row.items()):
+            if isinstance(value, str) and value.lower() == 'now()':
+                row[column] = now
+        return row
+
+    def _run_insert(self):
+        table = self.db.table_store(self.table_name)
+        items = self.payload if isinstance(self.payload, list) else [self.payload]
+        conflict = [c.strip() for c in str(self.on_conflict or 'id').split(',') if c.strip()]
+        out = []
+        for item in items:
+            row = dict(item or {})
+            existing = None
+            if self.op == 'upsert' and all(c in row for c in conflict):
+                ids = None
+                for c in conflict:
+                    found = table.index(c).get(_key(row.get(c)), set())
+                    ids = set(found) if ids is None else ids & found
+                if ids:
+                    existing = table.rows[next(iter(ids))]
+            if existing is not None:
+                merged = dict(existing)
+                merged.update(row)
+                merged['id'] = existing['id']
+                if self.table_name not in NO_UPDATED_AT and 'updated_at' not in row:
+                    merged['updated_at'] = _now_iso()
+                table.put(merged)
+                out.append(dict(merged))
+                continue
+            if row.get('id') is None:
+                row['id'] = table.next_id()
+            elif row['id'] in table.rows:
+                raise MemoryAPIError('23505', f'duplicate key value violates unique constraint "{self.table_name}_pkey"',
+                                     f"Key (id)=({row['id']}) already exists.")
+            else:
+                table.bump_seq(row['id'])
+            self._apply_defaults(row)
+            table.put(row)
+            out.append(dict(row))
+        return MemoryResult(out)
+
+    def _run_update(self):
+        table = self.db.table_store(self.table_name)
+        rows, _ = self._matching_rows(table)
+        changes = dict(self.payload or {})
+        now = _now_iso()
+        for column, value in list(changes.items()):
+            if isinstance(value, str) and value.lower() == 'now()':
+                changes[column] = now
+        out = []
+        for row in rows:
+            updated = dict(row)
+            updated.update(changes)
+            updated['id'] = row['id']
+            # touch_updated_at 트리거와 동일
+            if self.table_name not in NO_UPDATED_AT:
+                updated['updated_at'] = now
+            table.put(updated)
+            out.append(dict(updated))
+        return MemoryResult(out)
+
+    def _run_delete(self):
+        table = self.db.table_store(self.table_name)
+        rows, _ = self._matching_rows(table)
+        out = []
+        for row in rows:
+            table.remove(row['id'])
+            out.append(dict(row))
+            self.db.record_tombstone(self.table_name, row)
+        return MemoryResult(out)
+
+
+class MemoryBucket:
+    """supabase-py storage.from_(bucket) 최소 호환 (upload/download/remove/list/get_public_url)"""
+
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
+
+    def _objects(self):
+        return self.storage.objects.setdefault(self.name, {})
+
+    def upload(self, path, file, file_options=None):
+        if isinstance(file, (str, Path)) and Path(str(file)).exists():
+            content = Path(str(file)).read_bytes()
+        else:
+            content = bytes(file)
+        objects = self._objects()
+        upsert = str((file_options or {}).get('upsert', 'false')).lower() == 'true'
+        if path in objects and not upsert:
+            raise MemoryAPIError('409', 'The resource already exists')
+        objects[path] = content
+        return {'Key': f"{self.name}/{path}"}
+
+    def download(self, path):
+        objects = self._objects()
+        if path not in objects:
+            raise MemoryAPIError('404', 'Object not found')
+        return objects[path]
+
+    def remove(self, paths):
+        objects = self._objects()
+        removed = []
+        for p in paths:
+            if objects.pop(p, None) is not None:
+                removed.append({'name': p})
+        return removed
+
+    def list(self, path=None, options=None):
+        prefix = (path or '').rstrip('/')
+        prefix = prefix + '/' if prefix else ''
+        return [{'name': k[len(prefix):]} for k in sorted(self._objects()) if k.startswith(prefix)]
+
+    def get_public_url(self, path):
+        return f"/memory-storage/{self.name}/{path}"
+
+
+class MemoryStorage:
+    def __init__(self):
+        self.objects = {}
+
+    def from_(self, bucket):
+        return MemoryBucket(self, bucket)
+
+
+class _RpcCall:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def execute(self):
+        raise MemoryAPIError('PGRST202', f'Could not find the function public.{self.fn} in the schema cache')
+
+
+class MemorySupabase:
+    """db.get_client()가 Supabase 대신 반환하는 클라이언트 (table/rpc/storage)"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.tables = {}
+        self.storage = MemoryStorage()
+
+    def table_store(self, name) -> MemoryTable:
+        store = self.tables.get(name)
+        if store is None:
+            store = self.tables.setdefault(name, MemoryTable(name))
+        return store
+
+    def table(self, name):
+        return MemoryQuery(self, name)
+
+    def rpc(self, fn, params=None):
+        return _RpcCall(fn)
+
+    def record_tombstone(self, table_name, row):
+        """record_sync_tombstone 트리거와 동일 (GET /sync 삭제 전달)"""
+        if table_name in ('sync_tombstones', 'batch_idempotency'):
+            return
+        if table_name == 'sites':
+            site_id, owner = row.get('id'), row.get('created_by')
+        else:
+            site_id = row.get('site_id')
+            ids = self.table_store('sites').index('id').get(_key(site_id))
+            owner = self.table_store('sites').rows[next(iter(ids))].get('created_by') if ids else None
+        MemoryQuery(self, 'sync_tombstones').insert({
+            'table_name': table_name,
+            'row_id': row.get('id'),
+            'site_id': site_id,
+            'owner_id': owner
+        })._run_insert()
+
+    # ----- 스냅샷 -----
+    def load(self, data: Dict[str, List[Dict[str, Any]]]):
+        """{"테이블": [행, ...]} 적재 (id 없는 행은 자동 부여, 기본값 적용)"""
+        with self.lock:
+            for name, rows in (data or {}).items():
+                if name.startswith('_'):
+                    continue
+                MemoryQuery(self, name).insert(list(rows or []))._run_insert()
+        return self
+
+    def load_file(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return self.load(json.load(f))
+
+    def dump(self, path: Optional[str] = None):
+        with self.lock:
+            data = {name: [dict(r) for r in store.rows.values()] for name, store in self.tables.items() if store.rows}
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+        return data
+
+    def row_counts(self):
+        with self.lock:
+            return {name: len(store.rows) for name, store in self.tables.items()}
+
+
+def from_env():
+    client = MemorySupabase()
+    if MEMORY_DB_FIXTURE:
+        try:
+            client.load_file(MEMORY_DB_FIXTURE)
+            applog.get_logger('memory_db').info('메모리 DB 픽스처 적재', fixture=MEMORY_DB_FIXTURE, rows=client.row_counts())
+        except Exception as e:
+            applog.get_logger('memory_db').warning('메모리 DB 픽스처 적재 실패', fixture=MEMORY_DB_FIXTURE, error=str(e))
+    return client
@@ -0,0 +1,131 @@
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client import multiprocess
+import time
+import os
+
+# =============================
+# Prometheus 지표 (/metrics)
+# =============================
+# - 라우트(블루프린트 규칙)/메서드/상태별 요청 시간 히스토그램, 워커별 처리 중 요청 수
+# - Supabase(PostgREST/Storage) 호출 시간, 내보내기 소요 시간/크기, 사진 업로드 크기
+# - gunicorn 다중 워커: PROMETHEUS_MULTIPROC_DIR(gunicorn.conf.py에서 지정)에 워커별 파일로 기록하고
+#   /metrics 요청 시 모든 워커 파일을 합산해 응답 (어느 워커가 받아도 같은 값)
+# - METRICS_TOKEN 지정 시 Authorization: Bearer <토큰> 필요
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1').lower() in ['1', 'true', 'yes', 'y']
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_UPSTREAM_BUCKETS = (0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 15.0)
+_EXPORT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+_BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(11))  # 1KB ~ 1GB
+
+REQUEST_DURATION = Histogram(
+    'hn_http_request_duration_seconds', 'HTTP 요청 처리 시간',
+    ['route', 'method', 'status'], buckets=_LATENCY_BUCKETS)
+REQUESTS_IN_FLIGHT = Gauge(
+    'hn_http_requests_in_flight', '처리 중인 요청 수 (워커별)', multiprocess_mode='liveall')
+UPSTREAM_DURATION = Histogram(
+    'hn_upstream_call_duration_seconds', 'Supabase PostgREST/Storage 호출 시간',
+    ['service', 'target', 'op', 'outcome'], buckets=_UPSTREAM_BUCKETS)
+EXPORT_DURATION = Histogram(
+    'hn_export_duration_seconds', '내보내기(ZIP) 생성 시간', ['format'], buckets=_EXPORT_BUCKETS)
+EXPORT_BYTES = Histogram(
+    'hn_export_bytes', '내보내기(ZIP) 크기', ['format'], buckets=_BYTES_BUCKETS)
+PHOTO_UPLOAD_BYTES = Histogram(
+    'hn_photo_upload_bytes', '사진 업로드 파일 크기', ['storage'], buckets=_BYTES_BUCKETS)
+PHOTO_UPLOAD_REJECTED = Counter(
+    'hn_photo_upload_rejected_total', '크기 초과/빈 파일로 거부된 사진 업로드', ['reason'])
+ADMISSION_WAIT = Histogram(
+    'hn_admission_wait_seconds', '무거운 요청 입장 대기 시간', ['lane', 'outcome'], buckets=_LATENCY_BUCKETS)
+ADMISSION_REJECTED = Counter(
+    'hn_admission_rejected_total', '입장 제어로 거절(429)된 요청', ['lane', 'scope'])
+ADMISSION_ACTIVE = Gauge(
+    'hn_admission_active', '입장 슬롯을 잡고 처리 중인 무거운 요청 수 (전체 워커 합)', ['lane'], multiprocess_mode='livesum')
+
+
+def observe_upstream(kind, target, op, seconds, error=None):
+    """tracing.TracedQuery 종단 호출마다 기록 (service: postgrest|storage)"""
+    if not METRICS_ENABLED:
+        return
+    service = 'storage' if kind == 'storage' else 'postgrest'
+    UPSTREAM_DURATION.labels(service, target, op, 'error' if error else 'ok').observe(seconds)
+
+
+def observe_export(fmt, seconds, size):
+    if not METRICS_ENABLED:
+        return
+    EXPORT_DURATION.labels(fmt).observe(seconds)
+    EXPORT_BYTES.labels(fmt).observe(size)
+
+
+def observe_photo_upload(storage, size):
+    if METRICS_ENABLED:
+        PHOTO_UPLOAD_BYTES.labels(storage).observe(size)
+
+
+def observe_admission(lane, outcome, waited, scope=None):
+    if not METRICS_ENABLED:
+        return
+    ADMISSION_WAIT.labels(lane, outcome).observe(waited)
+    if outcome == 'rejected':
+        ADMISSION_REJECTED.labels(lane, scope or 'lane').inc()
+
+
+def admission_active(lane, delta):
+    if METRICS_ENABLED:
+        ADMISSION_ACTIVE.labels(lane).inc(delta)
+
+
+def render():
+    """(본문, Content-Type): 다중 프로세스 모드면 모든 워커 파일 합산"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """gunicorn child_exit 훅에서 호출: 종료된 워커의 livesum/liveall 게이지 파일 정리"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+def init_app(app):
+    from flask import request, g, Response
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        if METRICS_TOKEN:
+            auth_header = request.headers.get('Authorization') or ''
+            token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+            if token != METRICS_TOKEN:
+                return Response('unauthorized\n', status=401, mimetype='text/plain')
+        body, content_type = render()
+        return Response(body, content_type=content_type)
+
+    if not METRICS_ENABLED:
+        return
+
+    @app.before_request
+    def _metrics_begin():
+        if request.endpoint == 'metrics_endpoint':
+            return
+        g._metrics_started = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+    @app.teardown_request
+    def _metrics_end(exc=None):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return
+        REQUESTS_IN_FLIGHT.dec()
+        status = g.pop('_metrics_status', None) or (500 if exc is not None else 200)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_DURATION.labels(route, request.method, str(status)).observe(time.perf_counter() - started)
+
+    @app.after_request
+    def _metrics_status(response):
+        g._metrics_status = response.status_code
+        return response
@@ -0,0 +1,259 @@
+"""DB 마이그레이션 러너 (버전 기록 + 미적용분 트랜잭션 적용 + 인덱스 사용 점검)
+
+- 저장소 루트의 database_*.sql을 MIGRATIONS 순서대로 적용하고 schema_migrations 테이블에 버전을 기록
+- 미적용 마이그레이션은 하나의 트랜잭션으로 적용(중간 실패 시 전체 롤백), 동시 실행은 advisory lock으로 차단
+- 파일 안의 단독 BEGIN;/COMMIT; 줄(콘솔 직접 실행용)은 러너 트랜잭션을 깨지 않도록 제거
+- 이미 콘솔에서 손으로 적용한 DB는 --baseline <버전>으로 해당 버전까지 적용 완료로만 기록
+- --check: 라우트의 주요 조회(HOT_QUERIES)를 EXPLAIN해 인덱스를 쓰는지 확인 (Seq Scan이면 실패 코드 1)
+
+Supabase REST(PostgREST)로는 DDL을 실행할 수 없으므로 Postgres 직접 접속 주소가 필요합니다.
+    DATABASE_URL=postgresql://postgres:<비밀번호>@db.<프로젝트>.supabase.co:5432/postgres  (.env)
+    pip install psycopg2-binary
+
+사용 예:
+    cd backend
+    python migrate.py --status          # 적용/미적용 목록
+    python migrate.py --dry-run         # 적용할 SQL 파일만 출력
+    python migrate.py                   # 미적용분 적용
+    python migrate.py --baseline 010    # 기존 DB: 010까지 적용된 것으로 기록
+    python migrate.py --check           # EXPLAIN 인덱스 점검
+"""
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import re
+import sys
+
+import config
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DATABASE_URL = config.env('DATABASE_URL') or config.env('SUPABASE_DB_URL')
+
+# (버전, 파일) - 적용 순서. 새 마이그레이션은 끝에 추가(기존 항목 순서/파일 변경 금지)
+MIGRATIONS = [
+    ('001', 'database_schema.sql'),
+    ('002', 'database_migration_create_tables.sql'),
+    ('003', 'database_migration_add_date_fields.sql'),
+    ('004', 'database_migration_remove_registration_no_fixed.sql'),
+    ('005', 'database_migration_add_work_items.sql'),
+    ('006', 'database_migration_add_contacts_master.sql'),
+    ('007', 'database_migration_add_sync_tombstones.sql'),
+    ('008', 'database_migration_add_batch_idempotency.sql'),
+    ('009', 'database_migration_add_alarm_inbox_index.sql'),
+    ('010', 'database_migration_add_name_search_index.sql'),
+    ('011', 'database_migration_add_query_indexes.sql'),
+    ('012', 'database_migration_pin_sync_tombstone_search_path.sql'),
+]
+
+# 동시에 두 러너가 실행되지 않도록 잡는 advisory lock 키
+_LOCK_KEY = 7349021
+
+# 인덱스 점검 대상: (이름, 테이블, SQL) - sites.py/db.py의 .eq/.in_/.order 조회와 같은 조건
+HOT_QUERIES = [
+    ('site_contacts.by_site', 'site_contacts', "SELECT * FROM site_contacts WHERE site_id = 1 LIMIT 1"),
+    ('site_products.by_site', 'site_products', "SELECT * FROM site_products WHERE site_id = 1 LIMIT 1"),
+    ('household.by_site_type', 'site_household_integrations',
+     "SELECT * FROM site_household_integrations WHERE site_id = 1 AND integration_type IN ('a', 'b')"),
+    ('common.by_site_type', 'site_common_integrations',
+     "SELECT * FROM site_common_integrations WHERE site_id = 1 AND integration_type IN ('a', 'b')"),
+    ('sites.by_project_no', 'sites', "SELECT id, site_name FROM sites WHERE project_no = 'P-0001'"),
+    ('sites.by_owner', 'sites', "SELECT id FROM sites WHERE created_by = 1"),
+    ('contact_people.by_site_type', 'site_contact_people',
+     "SELECT * FROM site_contact_people WHERE site_id = 1 AND person_type = 'sales' ORDER BY id DESC"),
+    ('work_items.by_site', 'work_items', "SELECT * FROM work_items WHERE site_id = 1 ORDER BY id DESC"),
+    ('work_items.site_alarms', 'work_items',
+     "SELECT * FROM work_items WHERE site_id = 1 AND status = 'todo' AND alarm_confirmed = false "
+     "AND alarm_date <= CURRENT_DATE ORDER BY id DESC"),
+    ('work_items.alarm_inbox', 'work_items',
+     "SELECT id FROM work_items WHERE status = 'todo' AND alarm_confirmed = false AND alarm_date <= CURRENT_DATE"),
+    ('site_photos.page', 'site_photos',
+     "SELECT * FROM site_photos WHERE site_id = 1 AND deleted_at IS NULL ORDER BY id DESC LIMIT 20"),
+    ('sync_tombstones.by_owner', 'sync_tombstones',
+     "SELECT * FROM sync_tombstones WHERE owner_id = 1 AND deleted_at >= NOW() - INTERVAL '1 day' ORDER BY deleted_at LIMIT 2000"),
+    ('batch_idempotency.by_keys', 'batch_idempotency',
+     "SELECT op_key FROM batch_idempotency WHERE user_id = 1 AND op_key IN ('a', 'b')"),
+    ('users.by_email', 'users', "SELECT * FROM users WHERE email = 'a@example.com'"),
+]
+
+_INDEX_NODES = {'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan'}
+_TX_LINE = re.compile(r'^\s*(BEGIN|COMMIT)\s*;\s*(--.*)?$', re.IGNORECASE)
+
+
+# =============================
+# 파일
+# =============================
+def read_sql(filename):
+    """파일 → (러너용 SQL, 체크섬). 단독 BEGIN;/COMMIT; 줄은 제거 (plpgsql 블록의 BEGIN은 세미콜론이 없어 유지)"""
+    text = (ROOT_DIR / filename).read_text(encoding='utf-8-sig')
+    body = '\n'.join('' if _TX_LINE.match(line) else line for line in text.splitlines())
+    return body, hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+# =============================
+# DB
+# =============================
+def connect():
+    if not DATABASE_URL:
+        sys.exit('DATABASE_URL(또는 SUPABASE_DB_URL)이 설정되지 않았습니다. (.env에 Postgres 직접 접속 주소 설정)')
+    try:
+        import psycopg2
+    except ImportError:
+        sys.exit('psycopg2가 설치되어 있지 않습니다. (pip install psycopg2-binary)')
+    conn = psycopg2.connect(DATABASE_URL)
+    conn.autocommit = False
+    return conn
+
+
+def _ensure_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(20) PRIMARY KEY,
+            filename TEXT NOT NULL,
+            checksum VARCHAR(32),
+            applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        )
+    """)
+
+
+def applied_versions(cur):
+    cur.execute('SELECT version, checksum FROM schema_migrations')
+    return dict(cur.fetchall())
+
+
+def pending(applied):
+    return [(version, filename) for version, filename in MIGRATIONS if version not in applied]
+
+
+def status(conn):
+    with conn.cursor() as cur:
+        _ensure_table(cur)
+        applied = applied_versions(cur)
+    conn.commit()
+    for version, filename in MIGRATIONS:
+        if version in applied:
+            _body, checksum = read_sql(filename)
+            changed = applied[version] and applied[version] != checksum
+            print(f"  ✅ {version} {filename}" + ('  ⚠️ 적용 후 파일 변경됨' if changed else ''))
+        else:
+            print(f"  ⏳ {version} {filename}")
+    return applied
+
+
+def migrate(conn, dry_run=False):
+    """미적용 마이그레이션을 한 트랜잭션으로 적용 → 적용한 버전 목록"""
+    with conn.cursor() as cur:
+        _ensure_table(cur)
+        cur.execute('SELECT pg_advisory_xact_lock(%s)', (_LOCK_KEY,))
+        todo = pending(applied_versions(cur))
+        if not todo:
+            conn.rollback()
+            print('✅ 적용할 마이그레이션이 없습니다.')
+            return []
+        if dry_run:
+            conn.rollback()
+            for version, filename in todo:
+                print(f"  ⏳ {version} {filename}")
+            return [version for version, _filename in todo]
+        try:
+            for version, filename in todo:
+                body, checksum = read_sql(filename)
+                print(f"  ▶ {version} {filename}")
+                cur.execute(body)
+                cur.execute('INSERT INTO schema_migrations(version, filename, checksum) VALUES (%s, %s, %s)',
+                            (version, filename, checksum))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            sys.exit(f'❌ {version} {filename} 적용 실패(전체 롤백): {e}')
+    print(f"✅ {len(todo)}개 적용 완료")
+    return [version for version, _filename in todo]
+
+
+def baseline(conn, upto):
+    """콘솔에서 이미 적용한 DB: upto 버전까지 실행 없이 적용 완료로 기록"""
+    if upto not in {version for version, _filename in MIGRATIONS}:
+        sys.exit(f'알 수 없는 버전입니다: {upto}')
+    with conn.cursor() as cur:
+        _ensure_table(cur)
+        for version, filename in MIGRATIONS:
+            _body, checksum = read_sql(filename)
+            cur.execute('INSERT INTO schema_migrations(version, filename, checksum) VALUES (%s, %s, %s) '
+                        'ON CONFLICT (version) DO NOTHING', (version, filename, checksum))
+            if version == upto:
+                break
+    conn.commit()
+    print(f"✅ {upto}까지 적용 완료로 기록했습니다.")
+
+
+# =============================
+# EXPLAIN 인덱스 점검
+# =============================
+def _index_names(plan):
+    names = [plan['Index Name']] if plan.get('Index Name') else []
+    for child in plan.get('Plans') or []:
+        names.extend(_index_names(child))
+    return names
+
+
+def _scan_nodes(plan, table):
+    """실행 계획(JSON)에서 table을 읽는 노드 → [(노드 종류, 인덱스 이름)]
+    Bitmap Heap Scan은 하위 Bitmap Index Scan(BitmapAnd/Or 포함)의 인덱스 이름을 모음"""
+    found = []
+    if plan.get('Relation Name') == table:
+        found.append((plan.get('Node Type'), ','.join(_index_names(plan))))
+    for child in plan.get('Plans') or []:
+        found.extend(_scan_nodes(child, table))
+    return found
+
+
+def explain_check(conn):
+    """테이블이 작으면 플래너가 Seq Scan을 고르므로 enable_seqscan=off로 '쓸 수 있는 인덱스가 있는지'만 확인"""
+    results = []
+    with conn.cursor() as cur:
+        cur.execute('SET LOCAL enable_seqscan = off')
+        for name, table, sql in HOT_QUERIES:
+            cur.execute('SELECT to_regclass(%s)', (f'public.{table}',))
+            if cur.fetchone()[0] is None:
+                results.append({'query': name, 'table': table, 'ok': None, 'plan': '테이블 없음'})
+                continue
+            cur.execute('EXPLAIN (FORMAT JSON) ' + sql)
+            raw = cur.fetchone()[0]
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+            nodes = _scan_nodes(plan, table)
+            ok = bool(nodes) and all(kind in _INDEX_NODES for kind, _index in nodes)
+            results.append({'query': name, 'table': table, 'ok': ok,
+                            'plan': ', '.join(f"{kind}({index})" if index else kind for kind, index in nodes)})
+    conn.rollback()
+    for r in results:
+        mark = '➖' if r['ok'] is None else ('✅' if r['ok'] else '❌')
+        print(f"  {mark} {r['query']:<30} {r['plan']}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='DB 마이그레이션 러너')
+    parser.add_argument('--status', action='store_true', help='적용/미적용 목록 출력')
+    parser.add_argument('--dry-run', action='store_true', help='적용할 파일만 출력')
+    parser.add_argument('--baseline', metavar='VERSION', help='VERSION까지 실행 없이 적용 완료로 기록')
+    parser.add_argument('--check', action='store_true', help='주요 조회의 인덱스 사용 여부 EXPLAIN 점검')
+    args = parser.parse_args(argv)
+
+    conn = connect()
+    try:
+        if args.status:
+            status(conn)
+        elif args.baseline:
+            baseline(conn, args.baseline)
+        elif args.check:
+            results = explain_check(conn)
+            if any(r['ok'] is False for r in results):
+                sys.exit('❌ 인덱스를 쓰지 않는 조회가 있습니다. (python migrate.py 로 인덱스 마이그레이션 적용)')
+        else:
+            migrate(conn, dry_run=args.dry_run)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
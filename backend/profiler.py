@@ -0,0 +1,290 @@
+from collections import Counter
+from pathlib import Path
+import threading
+import cProfile
+import random
+import time
+import sys
+import os
+import re
+
+import applog
+import serving
+
+# =============================
+# 요청 프로파일링 (관리자 요청 단위 + 상시 저빈도 집계)
+# =============================
+# - 관리자 토큰으로 X-Profile: 1 헤더 또는 ?_profile=1 을 붙이면 해당 요청 1건을 샘플링 프로파일링
+#   (_profile=cprofile 이면 cProfile/pstats). 결과 파일명은 응답 헤더 X-Profile-Id 로 반환
+# - 샘플링 결과는 접힌 스택(folded) 형식: speedscope.app 또는 flamegraph.pl 로 플레임 그래프 확인
+# - PROFILE_AGGREGATE_HZ > 0 이면 워커당 스레드 1개가 처리 중인 요청 스레드의 스택을 저빈도로 수집해
+#   라우트별로 누적하고 PROFILE_AGGREGATE_FLUSH 초마다 aggregate_<pid>.folded 로 저장
+# - 저장 폴더 전체 크기가 PROFILE_DIR_MAX_MB 를 넘으면 오래된 파일부터 삭제
+# - 목록/다운로드: GET /admin/profiles, GET /admin/profiles/<파일명> (관리자)
+# - HN_SERVE_MODE=gevent 워커에서는 스레드 스택 샘플링이 불가해 요청 단위는 cProfile만, 상시 집계는 꺼짐
+
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR') or (Path(__file__).resolve().parent / 'profiles'))
+PROFILE_DIR_MAX_MB = float(os.getenv('PROFILE_DIR_MAX_MB', '50'))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '1'))          # 요청 단위 샘플 간격
+PROFILE_AGGREGATE_HZ = float(os.getenv('PROFILE_AGGREGATE_HZ', '1'))        # 0이면 상시 집계 끔
+PROFILE_AGGREGATE_FLUSH = float(os.getenv('PROFILE_AGGREGATE_FLUSH', '300'))
+PROFILE_MAX_DEPTH = 64
+
+log = applog.get_logger('profiler')
+
+_NAME_RE = re.compile(r'^[A-Za-z0-9_.-]+\.(folded|pstats)$')
+_dir_lock = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _folded_stack(frame, root=None):
+    labels = []
+    while frame is not None and len(labels) < PROFILE_MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    if root:
+        labels.insert(0, root)
+    return ';'.join(labels)
+
+
+class SamplingProfiler(threading.Thread):
+    """대상 스레드 1개의 스택을 일정 간격으로 수집 (sys._current_frames)"""
+
+    def __init__(self, target_ident, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+            self.stacks[_folded_stack(frame)] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=1)
+
+
+# ---------- 파일 저장/목록 ----------
+def _prune():
+    cap = PROFILE_DIR_MAX_MB * 1024 * 1024
+    files = []
+    for p in PROFILE_DIR.glob('*'):
+        try:
+            if _NAME_RE.match(p.name):
+                st = p.stat()
+                files.append((st.st_mtime, st.st_size, p))
+        except FileNotFoundError:
+            continue  # 다른 워커가 먼저 삭제
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    while files and total > cap:
+        _, size, oldest = files.pop(0)
+        total -= size
+        oldest.unlink(missing_ok=True)
+
+
+def _write(name, writer):
+    with _dir_lock:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        path = PROFILE_DIR / name
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        writer(tmp)
+        os.replace(tmp, path)
+        _prune()
+    return path
+
+
+def _write_folded(name, stacks):
+    def writer(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+    return _write(name, writer)
+
+
+def _slug(route):
+    return re.sub(r'[^A-Za-z0-9]+', '_', route or 'unknown').strip('_')[:60] or 'root'
+
+
+def list_profiles():
+    if not PROFILE_DIR.exists():
+        return []
+    items = []
+    for p in PROFILE_DIR.glob('*'):
+        if not _NAME_RE.match(p.name):
+            continue
+        st = p.stat()
+        items.append({
+            'name': p.name,
+            'kind': 'aggregate' if p.name.startswith('aggregate_') else ('pstats' if p.suffix == '.pstats' else 'request'),
+            'bytes': st.st_size,
+            'modified_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(st.st_mtime))
+        })
+    return sorted(items, key=lambda it: it['modified_at'], reverse=True)
+
+
+def profile_path(name):
+    """다운로드용 경로 (파일명 검증, 없으면 None)"""
+    if not _NAME_RE.match(name or ''):
+        return None
+    path = PROFILE_DIR / name
+    return path if path.is_file() else None
+
+
+# ---------- 상시 저빈도 집계 ----------
+class AggregateSampler(threading.Thread):
+    """처리 중인 요청 스레드(ident -> 라우트)를 저빈도로 샘플링해 라우트별 접힌 스택 누적"""
+
+    def __init__(self, hz, flush_every):
+        super().__init__(name='aggregate-profiler', daemon=True)
+        self.interval = 1.0 / hz
+        self.flush_every = flush_every
+        self.active = {}
+        self.stacks = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def enter(self, route):
+        self.active[threading.get_ident()] = route
+
+    def leave(self):
+        self.active.pop(threading.get_ident(), None)
+
+    def run(self):
+        last_flush = time.monotonic()
+        while True:
+            time.sleep(self.interval * random.uniform(0.5, 1.5))  # 주기 편향 방지
+            active = dict(self.active)
+            if active:
+                frames = sys._current_frames()
+                with self._lock:
+                    for ident, route in active.items():
+                        frame = frames.get(ident)
+                        if frame is not None:
+                            self.stacks[_folded_stack(frame, root=route)] += 1
+                            self.samples += 1
+            if time.monotonic() - last_flush >= self.flush_every:
+                last_flush = time.monotonic()
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self.stacks:
+                return
+            stacks = Counter(self.stacks)
+        try:
+            _write_folded(f'aggregate_{os.getpid()}.folded', stacks)
+        except Exception as e:
+            log.warning('집계 프로파일 저장 실패', error=str(e))
+
+
+_aggregate = None
+
+
+def _start_aggregate():
+    global _aggregate
+    # gevent 모드: 요청이 OS 스레드가 아닌 greenlet이라 스레드 스택 샘플링 불가
+    if _aggregate is None and PROFILE_AGGREGATE_HZ > 0 and not serving.green():
+        _aggregate = AggregateSampler(PROFILE_AGGREGATE_HZ, PROFILE_AGGREGATE_FLUSH)
+        _aggregate.start()
+    return _aggregate
+
+
+def _after_fork_in_child():
+    # 마스터의 집계 스레드는 워커로 복제되지 않음 → 워커 첫 요청에서 새로 시작
+    global _aggregate, _dir_lock
+    _aggregate = None
+    _dir_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def stats():
+    return {
+        'dir': str(PROFILE_DIR),
+        'max_mb': PROFILE_DIR_MAX_MB,
+        'aggregate_hz': PROFILE_AGGREGATE_HZ,
+        'aggregate_samples': _aggregate.samples if _aggregate else 0
+    }
+
+
+# =============================
+# Flask 연동
+# =============================
+def init_app(app, verify_token):
+    from flask import request, g
+
+    def _requested_mode():
+        flag = request.headers.get('X-Profile') or request.args.get('_profile')
+        if not flag or flag.lower() in ['0', 'false', 'no']:
+            return None
+        auth_header = request.headers.get('Authorization') or ''
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token) if token else None
+        if not payload or payload.get('user_role') != 'admin':
+            return None
+        if flag.lower() in ['cprofile', 'pstats'] or serving.green():
+            return 'cprofile'  # gevent 모드는 샘플링 대신 cProfile (같은 워커의 다른 greenlet 작업이 섞일 수 있음)
+        return 'sample'
+
+    @app.before_request
+    def _profile_begin():
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        sampler = _start_aggregate()
+        if sampler is not None:
+            sampler.enter(f'{request.method} {route}')
+            g._profile_aggregate = True
+        mode = _requested_mode()
+        if mode == 'cprofile':
+            g._profile = ('cprofile', cProfile.Profile(), route, time.perf_counter())
+            g._profile[1].enable()
+        elif mode == 'sample':
+            sampler = SamplingProfiler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000.0)
+            g._profile = ('sample', sampler, route, time.perf_counter())
+            sampler.start()
+
+    @app.after_request
+    def _profile_end(response):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return response
+        mode, prof, route, started = profile
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        name = f"req_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{_slug(route)}_{elapsed_ms}ms"
+        try:
+            if mode == 'cprofile':
+                prof.disable()
+                path = _write(f'{name}.pstats', lambda p: prof.dump_stats(str(p)))
+            else:
+                prof.stop()
+                path = _write_folded(f'{name}.folded', prof.stacks)
+            response.headers['X-Profile-Id'] = path.name
+            log.info('요청 프로파일 저장', file=path.name, mode=mode, elapsed_ms=elapsed_ms)
+        except Exception as e:
+            log.warning('요청 프로파일 저장 실패', error=str(e))
+        return response
+
+    @app.teardown_request
+    def _profile_teardown(exc=None):
+        if g.pop('_profile_aggregate', None) and _aggregate is not None:
+            _aggregate.leave()
+        profile = g.pop('_profile', None)
+        if profile is not None:
+            # 응답 전에 예외로 끝난 경우 정리
+            if profile[0] == 'cprofile':
+                profile[1].disable()
+            else:
+                profile[1].stop()
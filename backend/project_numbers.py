@@ -0,0 +1,205 @@
+import threading
+import time
+import re
+import os
+
+import applog
+from contacts_cache import CACHE_DIR
+
+# =============================
+# 프로젝트 번호 사용 현황 인덱스 (프로세스 로컬 비트맵)
+# =============================
+# - 번호 공간이 작음(접두어 NA/NE × 0000~9999) → 접두어별 10,000비트(1,250바이트) 비트맵으로 사용 여부 O(1) 확인
+# - 현장 등록/수정(_create_site_record/_update_site_record)이 note_site()로 바로 반영하고 버전 파일을 갱신
+#   → 같은 서버의 다른 gunicorn 워커는 다음 조회 때 os.stat 한 번으로 변경을 감지해 재적재
+# - 직접 SQL 수정/삭제 등 앱을 거치지 않은 변경은 PROJECT_NO_CACHE_MAX_AGE(초) 경과 시 재적재로 반영
+
+PROJECT_NO_CACHE_MAX_AGE = int(os.getenv('PROJECT_NO_CACHE_MAX_AGE', '300'))
+
+PREFIXES = ('NA', 'NE')
+NUMBER_SPACE = 10000
+PROJECT_NO_RE = re.compile(r'^(NA|NE)/(\d{4})$')
+
+log = applog.get_logger('project_numbers')
+
+
+def parse(project_no):
+    """'NA/1234' -> 슬롯 번호(접두어 순번 * 10000 + 번호), 형식이 다르면 None"""
+    m = PROJECT_NO_RE.match(str(project_no or ''))
+    if not m:
+        return None
+    return PREFIXES.index(m.group(1)) * NUMBER_SPACE + int(m.group(2))
+
+
+def format_slot(slot):
+    return f'{PREFIXES[slot // NUMBER_SPACE]}/{slot % NUMBER_SPACE:04d}'
+
+
+class ProjectNumberIndex:
+    def __init__(self, version_path):
+        self.version_path = version_path
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded_at = 0.0
+        # (비트맵, 슬롯 -> [{'id', 'site_name'}, ...], 현장 id -> 슬롯) 를 한 튜플로 두고 통째로 교체
+        # → 조회는 잠금 없이 self._state 를 한 번만 읽어 일관된 스냅샷 사용, 변경은 잠금 안에서 복사본 수정 후 교체
+        #   (중복 등록된 번호는 슬롯에 여러 현장, 슬롯의 현장 목록은 제자리 수정하지 않음)
+        self._state = self._empty_state()
+
+    def _read_version(self):
+        try:
+            return self.version_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _bump(self):
+        """다른 워커에 변경 알림. 이 워커는 이미 반영했으므로 새 버전을 자기 버전으로 기록"""
+        try:
+            self.version_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.version_path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp.write_text(str(time.time_ns()))
+            os.replace(tmp, self.version_path)
+            self._version = self._read_version()
+        except Exception as e:
+            log.warning('프로젝트 번호 인덱스 버전 갱신 실패', error=str(e))
+
+    # ----- 비트맵 -----
+    @staticmethod
+    def _empty_state():
+        return (bytearray(len(PREFIXES) * NUMBER_SPACE // 8), {}, {})
+
+    @staticmethod
+    def _used(bits, slot):
+        byte, bit = divmod(slot, 8)
+        return bool(bits[byte] & (1 << bit))
+
+    @staticmethod
+    def _add_site(state, row):
+        bits, slots, site_slot = state
+        slot = parse(row.get('project_no'))
+        if slot is None or row.get('id') is None:
+            return
+        slots[slot] = slots.get(slot, []) + [{'id': row['id'], 'site_name': row.get('site_name')}]
+        site_slot[row['id']] = slot
+        bits[slot // 8] |= (1 << (slot % 8))
+
+    @staticmethod
+    def _remove_site(state, site_id):
+        bits, slots, site_slot = state
+        slot = site_slot.pop(site_id, None)
+        if slot is None:
+            return
+        owners = [o for o in slots.get(slot, []) if o['id'] != site_id]
+        if owners:
+            slots[slot] = owners
+        else:
+            # 비트를 먼저 내리고 슬롯 제거 (비트가 켜져 있으면 슬롯이 있다는 순서 유지)
+            bits[slot // 8] &= ~(1 << (slot % 8)) & 0xFF
+            slots.pop(slot, None)
+
+    def _load(self, loader):
+        """새 인덱스를 만든 뒤 한 번에 교체 (조회 실패 시 기존 인덱스 유지)"""
+        state = self._empty_state()
+        for page in loader():
+            for row in page:
+                self._add_site(state, row)
+        self._state = state
+        log.debug('프로젝트 번호 인덱스 적재', sites=len(state[2]), used=len(state[1]))
+
+    def _ensure(self, loader):
+        version = self._read_version()
+        if self._version == version and (time.monotonic() - self._loaded_at) < PROJECT_NO_CACHE_MAX_AGE:
+            return
+        with self._lock:
+            if self._version != version or (time.monotonic() - self._loaded_at) >= PROJECT_NO_CACHE_MAX_AGE:
+                self._load(loader)
+                self._version = version
+                self._loaded_at = time.monotonic()
+
+    # ----- 변경 반영 -----
+    def note_site(self, row):
+        """현장 등록/수정 결과 행(id, project_no, site_name) 반영"""
+        self.note_sites([row])
+
+    def note_sites(self, rows):
+        """여러 행 반영 후 버전 파일은 한 번만 갱신 (일괄 가져오기)"""
+        rows = [row for row in rows if row and row.get('id') is not None and 'project_no' in row]
+        if not rows:
+            return
+        with self._lock:
+            if self._version is None:
+                return  # 아직 적재 전: 첫 조회 때 전체 적재
+            bits, slots, site_slot = self._state
+            state = (bytearray(bits), dict(slots), dict(site_slot))
+            for row in rows:
+                self._remove_site(state, row['id'])
+                self._add_site(state, row)
+            self._state = state
+            self._bump()
+
+    # ----- 조회 -----
+    def lookup(self, loader, project_no):
+        """사용 중이면 해당 번호의 현장 목록, 아니면 [] (형식 오류는 None)"""
+        slot = parse(project_no)
+        if slot is None:
+            return None
+        self._ensure(loader)
+        bits, slots, _ = self._state
+        if not self._used(bits, slot):
+            return []
+        return list(slots.get(slot) or [])
+
+    def check_many(self, loader, project_nos):
+        self._ensure(loader)
+        bits, slots, _ = self._state
+        results = []
+        for project_no in project_nos:
+            slot = parse(project_no)
+            if slot is None:
+                results.append({'project_no': project_no, 'valid': False})
+                continue
+            owners = (slots.get(slot) or []) if self._used(bits, slot) else []
+            item = {'project_no': project_no, 'valid': True, 'is_duplicate': bool(owners)}
+            if owners:
+                item['existing_site'] = owners[0]
+            results.append(item)
+        return results
+
+    def next_free(self, loader, prefix, after=None, count=1):
+        """마지막(가장 큰) 사용 번호 다음부터 빈 번호 count개, 끝(9999)에 닿으면 앞에서부터 → (번호 목록, 빈 번호 수)"""
+        self._ensure(loader)
+        base = PREFIXES.index(prefix) * NUMBER_SPACE
+        bits = self._state[0][base // 8:(base + NUMBER_SPACE) // 8]
+        if after is None:
+            highest = -1
+            for byte in range(len(bits) - 1, -1, -1):
+                if bits[byte]:
+                    highest = byte * 8 + bits[byte].bit_length() - 1
+                    break
+            start = highest + 1
+        else:
+            start = after + 1
+        found = []
+        for k in range(NUMBER_SPACE):
+            number = (start + k) % NUMBER_SPACE
+            byte, bit = divmod(number, 8)
+            if bits[byte] == 0xFF:
+                continue
+            if not bits[byte] & (1 << bit):
+                found.append(format_slot(base + number))
+                if len(found) >= count:
+                    break
+        used = sum(bin(b).count('1') for b in bits)
+        return found, NUMBER_SPACE - used
+
+    def stats(self):
+        bits, slots, site_slot = self._state
+        return {
+            'loaded_ago_seconds': round(time.monotonic() - self._loaded_at, 1) if self._version is not None else None,
+            'sites': len(site_slot),
+            'used_numbers': len(slots),
+            'bitmap_bytes': len(bits)
+        }
+
+
+project_number_index = ProjectNumberIndex(CACHE_DIR / 'project_numbers.version')
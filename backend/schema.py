@@ -0,0 +1,213 @@
+import threading
+import time
+import os
+
+import db
+import applog
+
+# =============================
+# 스키마 기능 레지스트리 (선택 테이블/컬럼 존재 여부)
+# =============================
+# - 마이그레이션 적용 여부에 따라 없을 수 있는 테이블/컬럼을 워커 시작 시 1회 조회(limit 0)해 캐시
+# - 라우트는 예외 메시지 문자열 대신 has_table()/has_column()으로 분기 → 없는 테이블에 매 요청 실패 왕복을 하지 않음
+# - SCHEMA_REFRESH_SECONDS마다 백그라운드에서 다시 조회 (마이그레이션 적용 후 재시작 없이 반영)
+# - 조회 자체가 실패(네트워크 등)한 항목은 '알 수 없음'으로 두고 있는 것으로 간주 (기존 동작과 동일)
+# - 요청 처리 중 누락 오류가 나면 note_error()가 즉시 '없음'으로 반영
+
+SCHEMA_REFRESH_SECONDS = float(os.getenv('SCHEMA_REFRESH_SECONDS', '600'))
+
+# 마이그레이션으로 추가되는 테이블 (database_migration_*.sql)
+OPTIONAL_TABLES = (
+    'site_contact_people', 'site_photos', 'work_items', 'sync_tombstones', 'batch_idempotency', 'contacts_master',
+    'site_household_integrations', 'site_common_integrations',
+)
+# 마이그레이션으로 추가되는 컬럼
+OPTIONAL_COLUMNS = {
+    'site_photos': ('deleted_at',),
+    'sites': ('registration_date', 'delivery_date', 'completion_date'),
+    'site_products': ('lobbyphone_model', 'lobbyphone_qty', 'guardphone_model', 'guardphone_qty',
+                      'magnet_sensor_model', 'magnet_sensor_qty', 'motion_sensor_model', 'motion_sensor_qty',
+                      'opener_model', 'opener_qty'),
+}
+
+_MISSING_TABLE_CODES = {'42P01', 'PGRST205'}
+_MISSING_COLUMN_CODES = {'42703', 'PGRST204'}
+
+log = applog.get_logger('schema')
+
+_lock = threading.Lock()
+_tables = {}      # 테이블 -> True/False (없으면 알 수 없음)
+_columns = {}     # (테이블, 컬럼) -> True/False
+_probed_at = 0.0
+_refreshing = False
+
+
+# ---------- 오류 판별 ----------
+def _error_code(err):
+    code = getattr(err, 'code', None)
+    if code is None and isinstance(getattr(err, 'args', None), tuple) and err.args and isinstance(err.args[0], dict):
+        code = err.args[0].get('code')
+    return str(code or '')
+
+
+def is_missing_table_error(err, table_name):
+    """PostgREST/PostgreSQL '테이블 없음' 오류인지"""
+    msg = str(err)
+    code = _error_code(err)
+    if code in _MISSING_TABLE_CODES:
+        return True
+    if code in _MISSING_COLUMN_CODES:
+        return False
+    return table_name in msg and ('relation' in msg or 'does not exist' in msg or 'schema cache' in msg)
+
+
+def is_missing_column_error(err, column=None):
+    msg = str(err)
+    if _error_code(err) in _MISSING_COLUMN_CODES:
+        return column is None or column in msg
+    return 'column' in msg and 'does not exist' in msg and (column is None or column in msg)
+
+
+# ---------- 조회 (요청 호출 추적에 섞이지 않도록 클라이언트 직접 사용) ----------
+def _probe_table(name):
+    try:
+        db.get_client().table(name).select('*').limit(0).execute()
+        return True
+    except Exception as e:
+        if is_missing_table_error(e, name):
+            return False
+        log.warning('스키마 조회 실패(테이블)', table=name, error=str(e))
+        return None
+
+
+def _probe_columns(table, columns):
+    """한 번에 조회 → 실패 시 컬럼별로 다시 조회해 없는 컬럼 확정"""
+    try:
+        db.get_client().table(table).select(','.join(columns)).limit(0).execute()
+        return {c: True for c in columns}
+    except Exception as e:
+        if not is_missing_column_error(e) and not is_missing_table_error(e, table):
+            log.warning('스키마 조회 실패(컬럼)', table=table, error=str(e))
+            return {}
+    found = {}
+    for column in columns:
+        try:
+            db.get_client().table(table).select(column).limit(0).execute()
+            found[column] = True
+        except Exception as e:
+            if is_missing_column_error(e, column) or is_missing_table_error(e, table):
+                found[column] = False
+    return found
+
+
+def refresh():
+    """전체 조회 (워커 시작 시 gunicorn post_fork, 이후 주기적으로 백그라운드)"""
+    global _probed_at, _refreshing
+    started = time.perf_counter()
+    tables = {}
+    for name in OPTIONAL_TABLES:
+        state = _probe_table(name)
+        if state is not None:
+            tables[name] = state
+    columns = {}
+    for table, cols in OPTIONAL_COLUMNS.items():
+        if tables.get(table) is False:
+            columns.update({(table, c): False for c in cols})
+            continue
+        columns.update({(table, c): state for c, state in _probe_columns(table, cols).items()})
+    with _lock:
+        changed = [k for k, v in tables.items() if _tables.get(k) != v] + \
+                  [f'{t}.{c}' for (t, c), v in columns.items() if _columns.get((t, c)) != v]
+        _tables.update(tables)
+        _columns.update(columns)
+        _probed_at = time.monotonic()
+        _refreshing = False
+    missing = sorted([t for t, ok in tables.items() if not ok] + [f'{t}.{c}' for (t, c), ok in columns.items() if not ok])
+    if changed:
+        log.info('스키마 기능 확인', elapsed_ms=int((time.perf_counter() - started) * 1000), missing=missing)
+    return snapshot()
+
+
+def _refresh_in_background():
+    global _refreshing
+    try:
+        refresh()
+    except Exception as e:
+        with _lock:
+            _refreshing = False
+        log.warning('스키마 주기 조회 실패', error=str(e))
+
+
+def _ensure():
+    """처음 사용 시 동기 조회, 오래되면 백그라운드 갱신(요청은 기존 값 사용)"""
+    global _refreshing
+    if _probed_at == 0.0:
+        with _lock:
+            first = _probed_at == 0.0 and not _refreshing
+            if first:
+                _refreshing = True
+        if first:
+            try:
+                refresh()
+            except Exception:
+                with _lock:
+                    _refreshing = False
+        return
+    if SCHEMA_REFRESH_SECONDS > 0 and time.monotonic() - _probed_at > SCHEMA_REFRESH_SECONDS and not _refreshing:
+        with _lock:
+            if _refreshing:
+                return
+            _refreshing = True
+        threading.Thread(target=_refresh_in_background, name='schema-refresh', daemon=True).start()
+
+
+def has_table(name) -> bool:
+    _ensure()
+    return _tables.get(name) is not False
+
+
+def has_column(table, column) -> bool:
+    _ensure()
+    if _tables.get(table) is False:
+        return False
+    return _columns.get((table, column)) is not False
+
+
+def filter_columns(table, row):
+    """없는 것으로 확인된 컬럼을 저장 데이터에서 제거"""
+    _ensure()
+    return {k: v for k, v in row.items() if _columns.get((table, k)) is not False}
+
+
+def note_error(err, table, column=None):
+    """요청 중 누락 오류 → 레지스트리에 즉시 반영하고 True (다른 오류면 False)"""
+    if column is not None and is_missing_column_error(err, column):
+        with _lock:
+            _columns[(table, column)] = False
+        log.warning('컬럼 없음 확인', table=table, column=column)
+        return True
+    if is_missing_table_error(err, table):
+        with _lock:
+            _tables[table] = False
+        log.warning('테이블 없음 확인', table=table)
+        return True
+    return False
+
+
+def snapshot():
+    with _lock:
+        return {
+            'probed_ago_seconds': round(time.monotonic() - _probed_at, 1) if _probed_at else None,
+            'refresh_seconds': SCHEMA_REFRESH_SECONDS,
+            'tables': dict(_tables),
+            'columns': {f'{t}.{c}': ok for (t, c), ok in sorted(_columns.items())}
+        }
+
+
+def _after_fork_in_child():
+    global _lock, _refreshing
+    _lock = threading.Lock()
+    _refreshing = False
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,38 @@
+import sys
+import os
+
+# =============================
+# 서빙 모드 (sync | gevent)
+# =============================
+# - HN_SERVE_MODE=gevent: gunicorn.conf.py가 앱 import 전에 gevent 몽키패치 → 워커 1개가 greenlet으로
+#   수백 개 요청을 동시에 처리 (PostgREST/Storage 응답을 기다리는 동안 다른 요청 진행)
+# - 블루프린트/라우트 코드와 응답은 sync 모드와 동일. threading.local(로그 컨텍스트/호출 추적)은 패치 후
+#   greenlet 단위가 되므로 패치는 반드시 앱 import 전에 적용되어야 함
+# - CPU를 오래 쓰는 작업(bcrypt, 엑셀 생성)은 run_blocking()으로 스레드풀에서 실행해 다른 요청을 막지 않음
+
+SERVE_MODE = (os.getenv('HN_SERVE_MODE') or 'sync').lower()
+
+
+def green() -> bool:
+    """gevent 몽키패치가 적용된 프로세스인지"""
+    if 'gevent' not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched('socket')
+
+
+def run_blocking(fn, *args, **kwargs):
+    """gevent 모드에서는 네이티브 스레드풀에서 실행(결과/예외 그대로 전달), sync 모드는 바로 호출"""
+    if not green():
+        return fn(*args, **kwargs)
+    from gevent import get_hub
+    return get_hub().threadpool.apply(fn, args, kwargs)
+
+
+def stats():
+    info = {'mode': 'gevent' if green() else 'sync', 'pid': os.getpid()}
+    if info['mode'] == 'gevent':
+        from gevent import get_hub
+        pool = get_hub().threadpool
+        info['threadpool'] = {'size': pool.size, 'maxsize': pool.maxsize}
+    return info
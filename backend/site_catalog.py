@@ -0,0 +1,560 @@
+import threading
+import struct
+import json
+import mmap
+import time
+import os
+from array import array
+from datetime import datetime, timezone
+
+import db
+import applog
+import schema
+from contacts_cache import CACHE_DIR
+
+# =============================
+# 현장 목록 카탈로그 (워커별 열 단위 메모리 테이블)
+# =============================
+# - 목록 화면 컬럼만 열(column) 단위로 보관: id/등록자/세대수/시각은 array, 건설사는 코드 배열 + 이름 목록(중복 문자열 1개로 공유),
+#   Y/N 값(home_iot, certification_audit, external_network_enabled)은 비트 배열(bytearray)
+# - 필터는 비트 마스크(파이썬 int) AND로, 정렬은 정렬 키별 위치 순서를 캐시해 두고 재사용 → GET /sites 정렬/필터/페이지를 DB 왕복 없이 처리
+# - 최신 유지: updated_at >= 워터마크 인 행만 가져오는 증분 동기화 (SITE_CATALOG_SYNC_SECONDS마다, 또는 다른 워커가 버전 파일 갱신 시)
+#   삭제는 sync_tombstones(있으면)로 반영, 그 외 누락분은 SITE_CATALOG_MAX_AGE마다 전체 재적재로 보정
+# - 스냅샷: CACHE_DIR/site_catalog.bin에 열 배열을 그대로 기록 → 새 워커는 mmap으로 읽어 바로 사용하고 워터마크 이후만 동기화
+#   (메모리 DB 모드는 프로세스마다 데이터가 달라 스냅샷을 쓰지 않음)
+
+SITE_CATALOG_SYNC_SECONDS = float(os.getenv('SITE_CATALOG_SYNC_SECONDS', '15'))
+SITE_CATALOG_MAX_AGE = int(os.getenv('SITE_CATALOG_MAX_AGE', '3600'))
+SITE_CATALOG_SNAPSHOT_SECONDS = float(os.getenv('SITE_CATALOG_SNAPSHOT_SECONDS', '60'))
+SITE_CATALOG_PAGE_SIZE = 1000
+SNAPSHOT_PATH = CACHE_DIR / 'site_catalog.bin'
+SNAPSHOT_MAGIC = b'HNSC1'
+
+TEXT_COLUMNS = ('project_no', 'site_name', 'address')
+FLAG_COLUMNS = ('home_iot', 'certification_audit', 'external_network_enabled')
+TIME_COLUMNS = ('created_at', 'updated_at')
+COLUMNS = ', '.join(('id', 'created_by', 'construction_company', 'household_count') + TEXT_COLUMNS + FLAG_COLUMNS + TIME_COLUMNS)
+SORT_KEYS = ('id', 'site_name', 'project_no', 'construction_company', 'household_count', 'created_at', 'updated_at')
+
+_NULL = -1  # 정수 열의 NULL 표시 (등록자/세대수/시각)
+
+log = applog.get_logger('site_catalog')
+
+
+def _to_micros(value):
+    """ISO 시각 문자열 → UTC epoch 마이크로초 (시간대 없는 값은 UTC로 간주), 실패 시 _NULL"""
+    if not value:
+        return _NULL
+    try:
+        dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return _NULL
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    delta = dt - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _from_micros(value):
+    if value == _NULL:
+        return None
+    return datetime.fromtimestamp(value // 1000000, timezone.utc).replace(microsecond=value % 1000000).isoformat()
+
+
+def _int_or_null(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return _NULL
+
+
+class _Columns:
+    """카탈로그 본체. 위치(pos)는 추가 순서이며 삭제는 live 비트만 끔 (전체 재적재 시 정리)"""
+
+    def __init__(self):
+        self.ids = array('q')
+        self.owner = array('q')
+        self.household = array('q')
+        self.company = array('I')
+        self.companies = []      # 코드 -> 건설사명
+        self.company_code = {}   # 건설사명 -> 코드
+        self.texts = {c: [] for c in TEXT_COLUMNS}
+        self.times = {c: array('q') for c in TIME_COLUMNS}
+        self.flags = {c: bytearray() for c in FLAG_COLUMNS}
+        self.live = bytearray()
+        self.pos = {}            # 현장 id -> 위치
+        self.watermark = None    # 반영한 updated_at 최댓값 (DB 원문 그대로, 다음 gte 조회 기준)
+        self.watermark_us = _NULL
+        self.tomb_watermark = None
+        self._orders = {}        # 정렬 키 -> 위치 순서(오름차순) 캐시
+        self._owner_masks = {}   # 등록자 -> 비트 마스크 캐시
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _set_bit(buf, pos, on):
+        byte, bit = divmod(pos, 8)
+        if on:
+            buf[byte] |= (1 << bit)
+        else:
+            buf[byte] &= ~(1 << bit) & 0xFF
+
+    def _code(self, name):
+        name = (name or '').strip()
+        code = self.company_code.get(name)
+        if code is None:
+            code = self.company_code[name] = len(self.companies)
+            self.companies.append(name)
+        return code
+
+    def apply(self, row, advance=True):
+        """행 추가/갱신 (id 기준 upsert) → 실제로 바뀌었는지
+        advance=False: 워터마크는 그대로 (앱이 직접 반영한 행 - 다른 워커의 더 이른 변경분을 건너뛰지 않도록)"""
+        site_id = row.get('id')
+        if site_id is None:
+            return False
+        updated = _to_micros(row.get('updated_at'))
+        pos = self.pos.get(site_id)
+        if pos is not None and updated != _NULL and self.times['updated_at'][pos] == updated \
+                and self.live[pos >> 3] & (1 << (pos & 7)):
+            # 워터마크 경계(gte)에서 다시 받은 같은 행 또는 note_sites로 먼저 반영한 행: 워터마크만 전진
+            if advance and updated > self.watermark_us:
+                self.watermark_us = updated
+                self.watermark = row.get('updated_at')
+            return False
+        if pos is None:
+            pos = self.pos[site_id] = len(self.ids)
+            self.ids.append(site_id)
+            self.owner.append(_NULL)
+            self.household.append(_NULL)
+            self.company.append(0)
+            for c in TEXT_COLUMNS:
+                self.texts[c].append('')
+            for c in TIME_COLUMNS:
+                self.times[c].append(_NULL)
+            if pos % 8 == 0:
+                self.live.append(0)
+                for c in FLAG_COLUMNS:
+                    self.flags[c].append(0)
+        self.owner[pos] = _int_or_null(row.get('created_by'))
+        self.household[pos] = _int_or_null(row.get('household_count'))
+        self.company[pos] = self._code(row.get('construction_company'))
+        for c in TEXT_COLUMNS:
+            self.texts[c][pos] = row.get(c) or ''
+        for c in TIME_COLUMNS:
+            self.times[c][pos] = _to_micros(row.get(c))
+        for c in FLAG_COLUMNS:
+            self._set_bit(self.flags[c], pos, row.get(c) == 'Y')
+        self._set_bit(self.live, pos, True)
+        if advance and updated != _NULL and updated > self.watermark_us:
+            self.watermark_us = updated
+            self.watermark = row.get('updated_at')
+        self._orders.clear()
+        self._owner_masks.clear()
+        return True
+
+    def remove(self, site_id):
+        pos = self.pos.get(site_id)
+        if pos is None or not self.live[pos >> 3] & (1 << (pos & 7)):
+            return False
+        self._set_bit(self.live, pos, False)
+        return True
+
+    # ----- 조회 -----
+    def order(self, key):
+        """정렬 키별 위치 순서(오름차순, 같은 값은 id 순) - 변경 전까지 재사용"""
+        cached = self._orders.get(key)
+        if cached is not None:
+            return cached
+        ids = self.ids
+        if key == 'id':
+            column = ids
+        elif key == 'household_count':
+            column = self.household
+        elif key == 'construction_company':
+            # 건설사 코드는 등장 순서이므로 이름 순위로 바꿔 정렬
+            rank = {code: r for r, code in enumerate(sorted(range(len(self.companies)), key=self.companies.__getitem__))}
+            column = [rank[code] for code in self.company]
+        elif key in self.times:
+            column = self.times[key]
+        else:
+            column = self.texts[key]
+        result = array('I', sorted(range(len(ids)), key=lambda p: (column[p], ids[p])))
+        self._orders[key] = result
+        return result
+
+    def owner_mask(self, user_id):
+        mask = self._owner_masks.get(user_id)
+        if mask is None:
+            buf = bytearray(len(self.live))
+            for pos, owner in enumerate(self.owner):
+                if owner == user_id:
+                    buf[pos >> 3] |= (1 << (pos & 7))
+            mask = self._owner_masks[user_id] = int.from_bytes(buf, 'little')
+        return mask
+
+    def row(self, pos):
+        out = {
+            'id': self.ids[pos],
+            'created_by': None if self.owner[pos] == _NULL else self.owner[pos],
+            'construction_company': self.companies[self.company[pos]],
+            'household_count': None if self.household[pos] == _NULL else self.household[pos],
+        }
+        for c in TEXT_COLUMNS:
+            out[c] = self.texts[c][pos]
+        for c in FLAG_COLUMNS:
+            out[c] = 'Y' if self.flags[c][pos >> 3] & (1 << (pos & 7)) else 'N'
+        for c in TIME_COLUMNS:
+            out[c] = _from_micros(self.times[c][pos])
+        return out
+
+    # ----- 스냅샷 -----
+    def to_bytes(self):
+        blobs = []
+        layout = {}
+        offset = 0
+
+        def add(name, data):
+            nonlocal offset
+            layout[name] = [offset, len(data)]
+            blobs.append(data)
+            offset += len(data)
+
+        live = [p for p in range(len(self.ids)) if self.live[p >> 3] & (1 << (p & 7))]
+        for name, column in (('ids', self.ids), ('owner', self.owner), ('household', self.household),
+                             ('company', self.company)):
+            add(name, array(column.typecode, (column[p] for p in live)).tobytes())
+        for c in TIME_COLUMNS:
+            add(c, array('q', (self.times[c][p] for p in live)).tobytes())
+        for c in FLAG_COLUMNS:
+            add(c, bytes(0 if not self.flags[c][p >> 3] & (1 << (p & 7)) else 1 for p in live))
+        for c in TEXT_COLUMNS:
+            encoded = [self.texts[c][p].encode('utf-8') for p in live]
+            ends = array('I')
+            total = 0
+            for item in encoded:
+                total += len(item)
+                ends.append(total)
+            add(c + '.ends', ends.tobytes())
+            add(c, b''.join(encoded))
+        header = json.dumps({
+            'count': len(live),
+            'companies': self.companies,
+            'watermark': self.watermark,
+            'tomb_watermark': self.tomb_watermark,
+            'written_at': time.time(),
+            'layout': layout,
+        }, ensure_ascii=False).encode('utf-8')
+        return SNAPSHOT_MAGIC + struct.pack('<I', len(header)) + header + b''.join(blobs)
+
+    @classmethod
+    def from_buffer(cls, buf):
+        """스냅샷(mmap) → _Columns, 형식이 다르면 ValueError"""
+        if bytes(buf[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+            raise ValueError('스냅샷 형식 불일치')
+        start = len(SNAPSHOT_MAGIC)
+        (header_len,) = struct.unpack('<I', buf[start:start + 4])
+        header = json.loads(bytes(buf[start + 4:start + 4 + header_len]).decode('utf-8'))
+        base = start + 4 + header_len
+        layout = header['layout']
+
+        def blob(name):
+            offset, length = layout[name]
+            return buf[base + offset:base + offset + length]
+
+        cols = cls()
+        count = header['count']
+        cols.ids.frombytes(blob('ids'))
+        cols.owner.frombytes(blob('owner'))
+        cols.household.frombytes(blob('household'))
+        cols.company.frombytes(blob('company'))
+        cols.companies = list(header['companies'])
+        cols.company_code = {name: code for code, name in enumerate(cols.companies)}
+        for c in TIME_COLUMNS:
+            cols.times[c].frombytes(blob(c))
+        nbytes = (count + 7) // 8
+        for c in FLAG_COLUMNS:
+            bits = bytearray(nbytes)
+            for pos, on in enumerate(blob(c)):
+                if on:
+                    bits[pos >> 3] |= (1 << (pos & 7))
+            cols.flags[c] = bits
+        for c in TEXT_COLUMNS:
+            ends = array('I')
+            ends.frombytes(blob(c + '.ends'))
+            data = bytes(blob(c))
+            prev = 0
+            values = cols.texts[c]
+            for end in ends:
+                values.append(data[prev:end].decode('utf-8'))
+                prev = end
+        cols.live = bytearray(b'\xff' * (count // 8)) + (bytes([(1 << (count % 8)) - 1]) if count % 8 else b'')
+        cols.pos = {site_id: pos for pos, site_id in enumerate(cols.ids)}
+        cols.watermark = header.get('watermark')
+        cols.watermark_us = _to_micros(cols.watermark)
+        cols.tomb_watermark = header.get('tomb_watermark')
+        if not (len(cols.ids) == len(cols.owner) == len(cols.texts['site_name']) == count):
+            raise ValueError('스냅샷 열 길이 불일치')
+        return cols, header.get('written_at') or 0
+
+
+class SiteCatalog:
+    def __init__(self, version_path, snapshot_path):
+        self.version_path = version_path
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()          # 열 데이터 읽기/쓰기
+        self._refresh_lock = threading.Lock()  # DB 적재/동기화 (한 번에 하나만)
+        self._cols = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._synced_at = 0.0
+        self._snapshot_at = 0.0
+        self._source = None   # 'snapshot' | 'db'
+
+    def _read_version(self):
+        try:
+            return self.version_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _bump(self):
+        """다른 워커에 변경 알림 (받은 워커는 증분 동기화). 이 워커는 이미 반영했으므로 새 버전을 자기 버전으로 기록"""
+        try:
+            self.version_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.version_path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp.write_text(str(time.time_ns()))
+            os.replace(tmp, self.version_path)
+            self._version = self._read_version()
+        except Exception as e:
+            log.warning('현장 카탈로그 버전 갱신 실패', error=str(e))
+
+    @staticmethod
+    def _snapshot_enabled():
+        return db.is_configured() and os.getenv('SITE_CATALOG_SNAPSHOT', '1') != '0'
+
+    # ----- 스냅샷 -----
+    def _read_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    cols, written_at = _Columns.from_buffer(view)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning('현장 카탈로그 스냅샷 읽기 실패', error=str(e))
+            return None
+        age = time.time() - written_at
+        if age >= SITE_CATALOG_MAX_AGE:
+            return None
+        return cols, age
+
+    def _write_snapshot(self):
+        if not self._snapshot_enabled():
+            return
+        try:
+            with self._lock:
+                data = self._cols.to_bytes()
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.snapshot_path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp.write_bytes(data)
+            os.replace(tmp, self.snapshot_path)
+            self._snapshot_at = time.monotonic()
+        except Exception as e:
+            log.warning('현장 카탈로그 스냅샷 기록 실패', error=str(e))
+
+    def warm(self):
+        """워커 시작 시(post_fork) 스냅샷만 읽어 둠 (DB 조회 없음), 첫 요청에서 워터마크 이후만 동기화"""
+        if self._cols is not None or not self._snapshot_enabled():
+            return False
+        snap = self._read_snapshot()
+        if snap is None:
+            return False
+        cols, age = snap
+        with self._lock:
+            self._cols = cols
+        # 스냅샷 나이만큼 전체 재적재 시점을 당김
+        self._loaded_at = time.monotonic() - age
+        self._synced_at = 0.0
+        self._source = 'snapshot'
+        log.info('현장 카탈로그 스냅샷 적재', sites=len(cols), age_seconds=int(age))
+        return True
+
+    # ----- DB 적재/동기화 -----
+    def _full_load(self, compute=None):
+        started = time.perf_counter()
+        rows = [row for page in db.select_pages('sites', COLUMNS, SITE_CATALOG_PAGE_SIZE) for row in page]
+        run = compute or (lambda fn, *args: fn(*args))
+        cols = run(self._build, rows)
+        cols.tomb_watermark = cols.watermark
+        with self._lock:
+            self._cols = cols
+        self._loaded_at = self._synced_at = time.monotonic()
+        self._source = 'db'
+        log.info('현장 카탈로그 전체 적재', elapsed_ms=int((time.perf_counter() - started) * 1000), sites=len(cols))
+        self._write_snapshot()
+
+    @staticmethod
+    def _build(rows):
+        cols = _Columns()
+        for row in rows:
+            cols.apply(row)
+        return cols
+
+    def _sync(self):
+        """워터마크 이후 변경분만 반영 → 반영 행 수, 같은 시각 행이 한 페이지를 넘으면 None(전체 재적재 필요)"""
+        cols = self._cols
+        changed = 0
+        while True:
+            q = db.table('sites').select(COLUMNS)
+            if cols.watermark:
+                q = q.gte('updated_at', cols.watermark)
+            rows = q.order('updated_at').limit(SITE_CATALOG_PAGE_SIZE).execute().data or []
+            before = cols.watermark
+            with self._lock:
+                changed += sum(1 for row in rows if cols.apply(row))
+            if len(rows) < SITE_CATALOG_PAGE_SIZE:
+                break
+            if cols.watermark == before:
+                return None
+        if schema.has_table('sync_tombstones'):
+            try:
+                q = db.table('sync_tombstones').select('row_id, deleted_at').eq('table_name', 'sites')
+                if cols.tomb_watermark:
+                    q = q.gte('deleted_at', cols.tomb_watermark)
+                rows = q.order('deleted_at').limit(SITE_CATALOG_PAGE_SIZE).execute().data or []
+                with self._lock:
+                    changed += sum(1 for row in rows if cols.remove(row.get('row_id')))
+                if rows:
+                    cols.tomb_watermark = rows[-1].get('deleted_at')
+            except Exception as e:
+                if not schema.note_error(e, 'sync_tombstones'):
+                    raise
+        return changed
+
+    def _ensure(self, compute=None):
+        now = time.monotonic()
+        version = self._read_version()
+        need_full = self._cols is None or (now - self._loaded_at) >= SITE_CATALOG_MAX_AGE
+        need_sync = version != self._version or (now - self._synced_at) >= SITE_CATALOG_SYNC_SECONDS
+        if not need_full and not need_sync:
+            return
+        with self._refresh_lock:
+            now = time.monotonic()
+            if self._cols is None and self.warm():
+                now = time.monotonic()
+            if self._cols is None or (now - self._loaded_at) >= SITE_CATALOG_MAX_AGE:
+                self._full_load(compute)
+                self._version = version
+                return
+            if version == self._version and (now - self._synced_at) < SITE_CATALOG_SYNC_SECONDS:
+                return
+            try:
+                changed = self._sync()
+            except Exception as e:
+                # 동기화 실패: 기존 카탈로그로 계속 응답 (다음 주기에 재시도)
+                log.warning('현장 카탈로그 동기화 실패', error=str(e))
+                self._synced_at = time.monotonic()
+                return
+            if changed is None:
+                self._full_load(compute)
+            else:
+                self._synced_at = time.monotonic()
+                if changed and (time.monotonic() - self._snapshot_at) >= SITE_CATALOG_SNAPSHOT_SECONDS:
+                    self._write_snapshot()
+            self._version = version
+
+    # ----- 변경 반영 -----
+    def note_site(self, row):
+        """현장 등록/수정 결과 행 반영 (목록 컬럼이 일부만 온 경우 기존 값 유지)"""
+        self.note_sites([row])
+
+    def note_sites(self, rows):
+        """여러 행 반영 후 버전 파일은 한 번만 갱신 (일괄 가져오기)"""
+        rows = [row for row in rows if row and row.get('id') is not None]
+        if not rows:
+            return
+        with self._lock:
+            cols = self._cols
+            if cols is None:
+                return  # 아직 적재 전: 첫 조회 때 전체 적재
+            for row in rows:
+                pos = cols.pos.get(row['id'])
+                if pos is not None:
+                    row = dict(cols.row(pos), **{k: v for k, v in row.items() if v is not None})
+                cols.apply(row, advance=False)
+        self._bump()
+
+    # ----- 조회 -----
+    def query(self, created_by=None, filters=None, sort='id', desc=True, offset=0, limit=None, compute=None):
+        """filters: {'construction_company': 이름, 'home_iot'/'certification_audit'/'external_network_enabled': 'Y'|'N',
+        'household_min'/'household_max': 정수, 'created_by': 등록자} → (행 목록, 전체 일치 수)"""
+        self._ensure(compute)
+        filters = filters or {}
+        with self._lock:
+            cols = self._cols
+            n = len(cols)
+            mask = int.from_bytes(cols.live, 'little')
+            if created_by is not None:
+                mask &= cols.owner_mask(created_by)
+            if filters.get('created_by') is not None:
+                mask &= cols.owner_mask(filters['created_by'])
+            for c in FLAG_COLUMNS:
+                want = filters.get(c)
+                if want is not None:
+                    bits = int.from_bytes(cols.flags[c], 'little')
+                    mask &= bits if want == 'Y' else ~bits
+            if filters.get('construction_company') is not None:
+                code = cols.company_code.get(filters['construction_company'].strip())
+                if code is None:
+                    mask = 0
+                else:
+                    buf = bytearray(len(cols.live))
+                    for pos, value in enumerate(cols.company):
+                        if value == code:
+                            buf[pos >> 3] |= (1 << (pos & 7))
+                    mask &= int.from_bytes(buf, 'little')
+            low, high = filters.get('household_min'), filters.get('household_max')
+            if mask and (low is not None or high is not None):
+                low = _NULL + 1 if low is None else low
+                high = float('inf') if high is None else high
+                buf = bytearray(len(cols.live))
+                for pos, value in enumerate(cols.household):
+                    if value != _NULL and low <= value <= high:
+                        buf[pos >> 3] |= (1 << (pos & 7))
+                mask &= int.from_bytes(buf, 'little')
+
+            total = mask.bit_count()
+            rows = []
+            if total and offset < total:
+                bits = mask.to_bytes(len(cols.live), 'little')
+                order = cols.order(sort)
+                positions = reversed(order) if desc else iter(order)
+                want = total - offset if limit is None else min(limit, total - offset)
+                skipped = 0
+                for pos in positions:
+                    if pos >= n or not bits[pos >> 3] & (1 << (pos & 7)):
+                        continue
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    rows.append(cols.row(pos))
+                    if len(rows) >= want:
+                        break
+            return rows, total
+
+    def stats(self):
+        cols = self._cols
+        return {
+            'source': self._source,
+            'loaded_ago_seconds': round(time.monotonic() - self._loaded_at, 1) if cols is not None else None,
+            'synced_ago_seconds': round(time.monotonic() - self._synced_at, 1) if cols is not None else None,
+            'sites': int.from_bytes(cols.live, 'little').bit_count() if cols is not None else 0,
+            'slots': len(cols) if cols is not None else 0,
+            'companies': len(cols.companies) if cols is not None else 0,
+            'watermark': cols.watermark if cols is not None else None,
+            'snapshot': self._snapshot_enabled(),
+        }
+
+
+site_catalog = SiteCatalog(CACHE_DIR / 'site_catalog.version', SNAPSHOT_PATH)
@@ -0,0 +1,299 @@
+import threading
+import uuid
+import time
+import csv
+import io
+import os
+import re
+from datetime import datetime
+
+import applog
+import schema
+from contacts_cache import CACHE_DIR
+from project_numbers import PROJECT_NO_RE
+
+# =============================
+# 현장 일괄 가져오기 (XLSX/CSV)
+# =============================
+# - 파일을 한 행씩 읽어(openpyxl read-only / csv) 표준 컬럼으로 맞춘 뒤 pandas로 전체 행을 한 번에 검증
+#   (필수값, 프로젝트 번호 형식, 세대수/날짜/Y·N 값, 파일 내 중복, DB 중복)
+# - DB 중복은 프로젝트 번호 사용 현황 인덱스(project_numbers.py)에 파일의 번호 전체를 한 번에 조회
+# - 통과한 행만 IMPORT_BATCH_SIZE개씩 묶어 insert, 실패한 행은 원래 값 + 오류 내용을 CSV로 남겨 내려받기
+#   (오류 파일을 고쳐 그대로 다시 올리면 됨)
+
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', '20000'))
+IMPORT_MAX_BYTES = int(os.getenv('IMPORT_MAX_BYTES', str(20 * 1024 * 1024)))
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+IMPORT_ERROR_TTL_SECONDS = int(os.getenv('IMPORT_ERROR_TTL_SECONDS', str(24 * 3600)))
+CSV_ENCODINGS = ('utf-8-sig', 'cp949')
+ERROR_DIR = CACHE_DIR / 'imports'
+
+# 표준 컬럼 (POST /sites 입력과 동일) 과 머리글 별칭: 내보내기 CSV(data/sites.csv) 머리글도 그대로 인식
+FIELDS = ('project_no', 'construction_company', 'site_name', 'address', 'detail_address', 'household_count',
+          'registration_date', 'delivery_date', 'completion_date', 'certification_audit', 'home_iot',
+          'product_bi', 'special_notes', 'external_network_enabled')
+REQUIRED_FIELDS = ('project_no', 'construction_company', 'site_name', 'address', 'household_count')
+DATE_FIELDS = ('registration_date', 'delivery_date', 'completion_date')
+FLAG_FIELDS = ('certification_audit', 'home_iot', 'external_network_enabled')
+HEADER_ALIASES = {
+    '프로젝트번호': 'project_no', '프로젝트no': 'project_no',
+    '건설사': 'construction_company', '건설회사': 'construction_company',
+    '현장명': 'site_name', '현장이름': 'site_name',
+    '주소': 'address', '상세주소': 'detail_address',
+    '세대수': 'household_count',
+    '등록일': 'registration_date', '납품일': 'delivery_date', '납품예정일': 'delivery_date', '준공일': 'completion_date',
+    '인증심사': 'certification_audit', '홈iot': 'home_iot', '제품bi': 'product_bi',
+    '특이사항': 'special_notes', '외부망': 'external_network_enabled', '외부망사용': 'external_network_enabled',
+}
+FIELD_LABELS = {
+    'project_no': '프로젝트 번호', 'construction_company': '건설사', 'site_name': '현장명', 'address': '주소',
+    'household_count': '세대수', 'registration_date': '등록일', 'delivery_date': '납품일', 'completion_date': '준공일',
+    'certification_audit': '인증심사', 'home_iot': '홈IoT', 'external_network_enabled': '외부망',
+}
+_FLAG_VALUES = {'Y': 'Y', 'N': 'N', 'YES': 'Y', 'NO': 'N', 'O': 'Y', 'X': 'N', '예': 'Y', '아니오': 'N', '1': 'Y', '0': 'N'}
+_HEADER_STRIP_RE = re.compile(r'[\s_()/\-]+')
+_IMPORT_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+log = applog.get_logger('site_import')
+
+
+class ImportFileError(ValueError):
+    """파일 자체를 처리할 수 없음 (형식/머리글/크기) → 400"""
+
+
+def _header_key(value):
+    text = _HEADER_STRIP_RE.sub('', str(value or '')).lower()
+    if text in FIELDS:
+        return text
+    for field in FIELDS:
+        if text == field.replace('_', ''):
+            return field
+    return HEADER_ALIASES.get(text)
+
+
+def _iter_xlsx(stream):
+    import openpyxl
+    wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        for values in ws.iter_rows(values_only=True):
+            yield values
+    finally:
+        wb.close()
+
+
+def _decode_csv(data, encoding=None):
+    """CSV 바이트 → 문자열: 지정 인코딩 우선, 없으면 UTF-8(BOM 허용) → cp949(한글 엑셀 'CSV' 저장 기본값) 순으로 시도"""
+    if encoding:
+        try:
+            return data.decode(encoding)
+        except LookupError:
+            raise ImportFileError(f'지원하지 않는 문자 인코딩입니다: {encoding}')
+        except UnicodeDecodeError:
+            raise ImportFileError(f'파일을 {encoding} 인코딩으로 읽을 수 없습니다.')
+    for candidate in CSV_ENCODINGS:
+        try:
+            return data.decode(candidate)
+        except UnicodeDecodeError:
+            continue
+    raise ImportFileError('CSV 문자 인코딩을 알 수 없습니다. UTF-8로 저장하거나 encoding을 지정해 주세요.')
+
+
+def _iter_csv(stream, encoding=None):
+    text = _decode_csv(stream.read(), encoding)
+    if text.startswith('\ufeff'):
+        text = text[1:]
+    yield from csv.reader(io.StringIO(text, newline=''))
+
+
+def read_frame(filename, stream, encoding=None):
+    """파일 → (표준 컬럼 DataFrame(문자열, '_row'=원본 행 번호), 인식한 머리글 매핑)
+    행을 하나씩 읽어 값만 모으므로 파일 전체를 dict 목록으로 만들지 않음
+    encoding: CSV 문자 인코딩 (미지정 시 UTF-8 → cp949 자동 판별)"""
+    import pandas as pd
+    name = (filename or '').lower()
+    if name.endswith('.xlsx'):
+        rows = _iter_xlsx(stream)
+    elif name.endswith('.csv'):
+        rows = _iter_csv(stream, encoding)
+    else:
+        raise ImportFileError('xlsx 또는 csv 파일만 가져올 수 있습니다.')
+
+    mapping = None   # 파일 열 위치 -> 표준 컬럼
+    columns = {f: [] for f in FIELDS}
+    row_numbers = []
+    try:
+        for line_no, values in enumerate(rows, start=1):
+            if values is None or all(v is None or str(v).strip() == '' for v in values):
+                continue
+            if mapping is None:
+                mapping = {}
+                for i, v in enumerate(values):
+                    field = _header_key(v)
+                    if field and field not in mapping.values():  # 같은 컬럼이 두 번 나오면 앞 열 사용
+                        mapping[i] = field
+                missing = [FIELD_LABELS[f] for f in REQUIRED_FIELDS if f not in mapping.values()]
+                if missing:
+                    raise ImportFileError(f"필수 열이 없습니다: {', '.join(missing)} (첫 행은 머리글이어야 합니다)")
+                continue
+            if len(row_numbers) >= IMPORT_MAX_ROWS:
+                raise ImportFileError(f'한 번에 최대 {IMPORT_MAX_ROWS}행까지 가져올 수 있습니다.')
+            row_numbers.append(line_no)
+            for i, field in mapping.items():
+                columns[field].append(values[i] if i < len(values) else None)
+            for field in FIELDS:
+                if len(columns[field]) < len(row_numbers):
+                    columns[field].append(None)
+    except ImportFileError:
+        raise
+    except Exception as e:
+        raise ImportFileError(f'파일을 읽을 수 없습니다: {e}')
+    if mapping is None:
+        raise ImportFileError('빈 파일입니다.')
+
+    frame = pd.DataFrame(columns)
+    frame.insert(0, '_row', row_numbers)
+    return frame, sorted(set(mapping.values()), key=FIELDS.index)
+
+
+def _text(series):
+    """셀 값 → 앞뒤 공백 제거 문자열 (빈 값은 '', 엑셀 숫자 1234.0 → '1234')"""
+    out = series.astype(object).where(series.notna(), '')
+    return out.map(lambda v: str(int(v)) if isinstance(v, float) and v.is_integer() else str(v)).str.strip()
+
+
+def project_nos(frame):
+    """프로젝트 번호 열 정규화 (대문자, 공백 제거)"""
+    return _text(frame['project_no']).str.upper().str.replace(' ', '', regex=False)
+
+
+def validate(frame, taken):
+    """전체 행 한 번에 검증 → (저장할 레코드 DataFrame, 오류 Series(행별 메시지, 정상은 ''))
+    taken: DB에서 이미 사용 중인 프로젝트 번호 집합 (project_nos(frame)로 한 번에 조회)"""
+    import pandas as pd
+    n = len(frame)
+    errors = pd.Series([''] * n, index=frame.index, dtype=object)
+
+    def flag(mask, message):
+        nonlocal errors
+        errors = errors.where(~mask, errors + message + '; ')
+
+    out = pd.DataFrame(index=frame.index)
+    for field in FIELDS:
+        out[field] = project_nos(frame) if field == 'project_no' else _text(frame[field])
+
+    for field in REQUIRED_FIELDS:
+        flag(out[field] == '', f'{FIELD_LABELS[field]} 누락')
+
+    has_no = out['project_no'] != ''
+    bad_format = has_no & ~out['project_no'].str.match(PROJECT_NO_RE)
+    flag(bad_format, '프로젝트 번호 형식 오류(예: NA/1234)')
+
+    households = pd.to_numeric(out['household_count'], errors='coerce')
+    flag((out['household_count'] != '') & ~((households > 0) & (households % 1 == 0)), '세대수는 1 이상의 정수')
+    out['household_count'] = households
+
+    for field in DATE_FIELDS:
+        raw = out[field]
+        parsed = pd.to_datetime(raw.where(raw != '', None), errors='coerce', format='mixed')
+        flag((raw != '') & parsed.isna(), f'{FIELD_LABELS[field]} 날짜 형식 오류')
+        out[field] = parsed.dt.strftime('%Y-%m-%d').where(parsed.notna(), None)
+
+    for field in FLAG_FIELDS:
+        mapped = out[field].str.upper().map(_FLAG_VALUES)
+        flag((out[field] != '') & mapped.isna(), f'{FIELD_LABELS[field]} 값은 Y 또는 N')
+        out[field] = mapped.fillna('N')
+
+    # 파일 내 중복 / DB 중복 (형식이 맞는 번호만)
+    checkable = has_no & ~bad_format
+    flag(checkable & out['project_no'].where(checkable).duplicated(keep=False), '파일 안에서 프로젝트 번호 중복')
+    flag(checkable & out['project_no'].isin(taken), '이미 등록된 프로젝트 번호')
+
+    out['special_notes'] = out['special_notes'].str.slice(0, 1000)
+    for field in ('detail_address', 'product_bi', 'special_notes'):
+        out[field] = out[field].where(out[field] != '', None)
+    return out, errors.str.rstrip('; ')
+
+
+def to_records(valid, created_by, created_at):
+    """검증 통과 행 → sites insert 레코드 (_create_site_record와 같은 컬럼/기본값)"""
+    fields = [f for f in FIELDS if f not in DATE_FIELDS or schema.has_column('sites', f)]
+    records = valid[fields].astype(object).where(valid[fields].notna(), None).to_dict(orient='records')
+    for record in records:
+        record['household_count'] = int(record['household_count'])
+        record['external_network_period'] = None
+        record['created_by'] = created_by
+        record['created_at'] = created_at
+    return records
+
+
+def insert_batches(records, row_numbers, insert_chunk):
+    """IMPORT_BATCH_SIZE개씩 insert → (저장된 행 목록, {원본 행 번호: 오류})
+    한 묶음이 실패하면 그 묶음의 행만 오류로 기록하고 다음 묶음 계속"""
+    saved, failed = [], {}
+    for start in range(0, len(records), IMPORT_BATCH_SIZE):
+        chunk = records[start:start + IMPORT_BATCH_SIZE]
+        try:
+            saved.extend(insert_chunk(chunk) or [])
+        except Exception as e:
+            log.warning('현장 가져오기 묶음 저장 실패', start=start, size=len(chunk), error=str(e))
+            for row_no in row_numbers[start:start + IMPORT_BATCH_SIZE]:
+                failed[row_no] = f'DB 저장 실패: {e}'
+    return saved, failed
+
+
+# ----- 오류 파일 -----
+_cleanup_lock = threading.Lock()
+
+
+def _cleanup():
+    if not _cleanup_lock.acquire(blocking=False):
+        return
+    try:
+        cutoff = time.time() - IMPORT_ERROR_TTL_SECONDS
+        for path in ERROR_DIR.glob('*.csv'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+    finally:
+        _cleanup_lock.release()
+
+
+def _cell(value):
+    """오류 파일 셀: 빈 값/NaN은 '', 엑셀 날짜(자정)는 날짜만"""
+    if value is None or value != value:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat(sep=' ')
+    return value
+
+
+def write_errors(user_id, frame, columns, errors):
+    """오류 행(원래 값 + 오류 열)을 UTF-8 BOM CSV로 저장 → import_id"""
+    ERROR_DIR.mkdir(parents=True, exist_ok=True)
+    _cleanup()
+    import_id = uuid.uuid4().hex
+    rows = frame.loc[errors.index]
+    sio = io.StringIO()
+    writer = csv.writer(sio)
+    writer.writerow(['행', '오류'] + list(columns))
+    for idx, message in errors.items():
+        values = rows.loc[idx, list(columns)]
+        writer.writerow([rows.at[idx, '_row'], message] + [_cell(v) for v in values])
+    path = ERROR_DIR / f'{user_id}_{import_id}.csv'
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text('\ufeff' + sio.getvalue(), encoding='utf-8')
+    os.replace(tmp, path)
+    return import_id
+
+
+def error_file(import_id, user_id=None):
+    """오류 파일 경로 (user_id가 None이면 관리자: 사용자 구분 없이 찾음), 없으면 None"""
+    if not _IMPORT_ID_RE.match(str(import_id or '')):
+        return None
+    if user_id is not None:
+        path = ERROR_DIR / f'{user_id}_{import_id}.csv'
+        return path if path.exists() else None
+    return next(iter(ERROR_DIR.glob(f'*_{import_id}.csv')), None)
@@ -0,0 +1,297 @@
+import threading
+import unicodedata
+import time
+import re
+import os
+from array import array
+from collections import defaultdict
+
+import applog
+from contacts_cache import CACHE_DIR
+
+# =============================
+# 현장 검색 인덱스 (프로세스 로컬 n-gram 역색인)
+# =============================
+# - 현장명/프로젝트 번호/건설사/주소/특이사항을 정규화(NFC, 소문자, 공백·기호 제거)한 뒤
+#   한글 음절 단위 2-gram/3-gram → 현장 id 목록(array)으로 색인
+#   (한글 음절은 글자 하나가 한 단위이므로 바이트가 아닌 음절 기준으로 자름 → '강남', '강남구' 모두 검색 가능)
+# - 검색: 검색어마다 가장 짧은 posting부터 교집합 → 후보만 실제 필드 문자열로 확인해 오탐 제거 → 필드 가중치로 점수
+# - 자음만 입력('ㅎㄷㄱㅅ')하면 현장명/건설사 초성 문자열에서 검색
+# - 권한: 등록자별 현장 id 집합을 미리 만들어 두고 후보와 교집합 (관리자는 전체)
+# - 현장 등록/수정(_create_site_record/_update_site_record)이 note_site()로 바로 반영하고 버전 파일 갱신
+#   → 다른 워커는 다음 검색 때 os.stat 한 번으로 감지해 재적재, 직접 SQL 수정은 SITE_SEARCH_CACHE_MAX_AGE 경과 시 반영
+
+SITE_SEARCH_CACHE_MAX_AGE = int(os.getenv('SITE_SEARCH_CACHE_MAX_AGE', '300'))
+SITE_SEARCH_DEFAULT_LIMIT = 20
+SITE_SEARCH_MAX_LIMIT = 100
+
+# 필드별 가중치 (점수 = 검색어가 포함된 필드 가중치 합, 필드 시작 일치 ×2, 전체 일치 ×3)
+FIELD_WEIGHTS = {
+    'site_name': 10,
+    'project_no': 8,
+    'construction_company': 5,
+    'address': 3,
+    'special_notes': 1,
+}
+FIELDS = tuple(FIELD_WEIGHTS)
+CHOSEONG_FIELDS = ('site_name', 'construction_company')
+COLUMNS = 'id, created_by, ' + ', '.join(FIELDS)
+
+_STRIP_RE = re.compile(r'[\W_]+', re.UNICODE)
+_CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_CHOSEONG_SET = frozenset(_CHOSEONG)
+_CHOSEONG_TABLE = {0xAC00 + i: _CHOSEONG[i // 588] for i in range(11172)}  # 가~힣 → 초성
+
+log = applog.get_logger('site_search')
+
+
+def normalize(text):
+    """NFC(분리형 자모 입력 결합) + 소문자 + 공백/기호 제거: '서울 강남구' == '서울강남구', 'NA/1234' == 'na1234'"""
+    if not text:
+        return ''
+    return _STRIP_RE.sub('', unicodedata.normalize('NFC', str(text)).lower())
+
+
+def choseong(text):
+    """한글 음절 → 초성 문자열 ('현대건설' -> 'ㅎㄷㄱㅅ'), 한글이 아닌 글자는 그대로"""
+    return text.translate(_CHOSEONG_TABLE)
+
+
+def grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _doc_grams(texts):
+    """현장 1건의 색인 키: 필드 전체의 2-gram/3-gram (현장당 1회만 등록)"""
+    return {text[i:i + n] for text in texts for n in (2, 3) for i in range(len(text) - n + 1)}
+
+
+class SiteSearchIndex:
+    def __init__(self, version_path):
+        self.version_path = version_path
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded_at = 0.0
+        self._postings = {}   # gram -> array('q') 현장 id
+        self._docs = {}       # 현장 id -> (created_by, 원본 필드 tuple, 정규화 필드 tuple, 초성 필드 tuple)
+        self._by_user = {}    # 등록자 -> 현장 id 집합
+
+    def _read_version(self):
+        try:
+            return self.version_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _bump(self):
+        """다른 워커에 변경 알림. 이 워커는 이미 반영했으므로 새 버전을 자기 버전으로 기록"""
+        try:
+            self.version_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.version_path.with_suffix(f'.{os.getpid()}.tmp')
+            tmp.write_text(str(time.time_ns()))
+            os.replace(tmp, self.version_path)
+            self._version = self._read_version()
+        except Exception as e:
+            log.warning('현장 검색 인덱스 버전 갱신 실패', error=str(e))
+
+    # ----- 색인 -----
+    @staticmethod
+    def _doc(row):
+        raw = tuple(row.get(f) for f in FIELDS)
+        norm = tuple(normalize(v) for v in raw)
+        chos = tuple(choseong(norm[FIELDS.index(f)]) for f in CHOSEONG_FIELDS)
+        return (row.get('created_by'), raw, norm, chos)
+
+    @classmethod
+    def _add_site(cls, state, row):
+        postings, docs, by_user = state
+        site_id = row.get('id')
+        if site_id is None:
+            return
+        doc = docs[site_id] = cls._doc(row)
+        by_user.setdefault(doc[0], set()).add(site_id)
+        for key in _doc_grams(doc[2]):
+            posting = postings.get(key)
+            if posting is None:
+                postings[key] = array('q', (site_id,))
+            else:
+                posting.append(site_id)
+
+    @staticmethod
+    def _remove_site(state, site_id):
+        postings, docs, by_user = state
+        doc = docs.pop(site_id, None)
+        if doc is None:
+            return
+        owned = by_user.get(doc[0])
+        if owned is not None:
+            owned.discard(site_id)
+        for key in _doc_grams(doc[2]):
+            posting = postings.get(key)
+            if posting is None:
+                continue
+            try:
+                posting.remove(site_id)
+            except ValueError:
+                continue
+            if not posting:
+                del postings[key]
+
+    @classmethod
+    def build(cls, rows):
+        """전체 적재: posting을 list로 모은 뒤 마지막에 array로 변환 (건별 _add_site보다 빠름)"""
+        lists, docs, by_user = defaultdict(list), {}, {}
+        for row in rows:
+            site_id = row.get('id')
+            if site_id is None:
+                continue
+            doc = docs[site_id] = cls._doc(row)
+            by_user.setdefault(doc[0], set()).add(site_id)
+            for key in _doc_grams(doc[2]):
+                lists[key].append(site_id)
+        postings = {key: array('q', ids) for key, ids in lists.items()}
+        return postings, docs, by_user
+
+    def _load(self, loader, compute=None):
+        """새 인덱스를 만든 뒤 한 번에 교체 (조회 실패 시 기존 인덱스 유지)"""
+        started = time.perf_counter()
+        rows = [row for page in loader() for row in page]
+        run = compute or (lambda fn, *args: fn(*args))
+        self._postings, self._docs, self._by_user = run(self.build, rows)
+        log.info('현장 검색 인덱스 적재', elapsed_ms=int((time.perf_counter() - started) * 1000),
+                 sites=len(self._docs), grams=len(self._postings))
+
+    def _ensure(self, loader, compute=None):
+        version = self._read_version()
+        if self._version == version and (time.monotonic() - self._loaded_at) < SITE_SEARCH_CACHE_MAX_AGE:
+            return
+        with self._lock:
+            if self._version != version or (time.monotonic() - self._loaded_at) >= SITE_SEARCH_CACHE_MAX_AGE:
+                self._load(loader, compute)
+                self._version = version
+                self._loaded_at = time.monotonic()
+
+    # ----- 변경 반영 -----
+    def note_site(self, row):
+        """현장 등록/수정 결과 행 반영 (검색 필드가 일부만 온 경우 기존 값 유지)"""
+        self.note_sites([row])
+
+    def note_sites(self, rows):
+        """여러 행 반영 후 버전 파일은 한 번만 갱신 (일괄 가져오기)"""
+        rows = [row for row in rows if row and row.get('id') is not None]
+        if not rows:
+            return
+        with self._lock:
+            if self._version is None:
+                return  # 아직 적재 전: 첫 검색 때 전체 적재
+            state = (self._postings, self._docs, self._by_user)
+            for row in rows:
+                old = self._docs.get(row['id'])
+                if old is not None:
+                    merged = {'id': row['id'], 'created_by': old[0], **dict(zip(FIELDS, old[1]))}
+                    merged.update({k: v for k, v in row.items() if k in FIELD_WEIGHTS or k == 'created_by'})
+                    row = merged
+                self._remove_site(state, row['id'])
+                self._add_site(state, row)
+            self._bump()
+
+    # ----- 검색 -----
+    def _candidates(self, term, scope):
+        """검색어 1개의 후보 현장 id 집합 (scope: 허용 id 집합, None이면 전체)"""
+        if len(term) == 1:
+            # 1글자는 n-gram이 없으므로 허용 범위를 직접 확인
+            pool = scope if scope is not None else self._docs.keys()
+            return {sid for sid in pool if any(term in text for text in self._docs[sid][2])}
+        keys = grams(term, 3) if len(term) >= 3 else {term}
+        postings = []
+        for key in keys:
+            posting = self._postings.get(key)
+            if posting is None:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        result = set(postings[0])
+        if scope is not None:
+            result &= scope
+        for posting in postings[1:]:
+            if not result:
+                break
+            result.intersection_update(posting)
+        return result
+
+    def _choseong_candidates(self, term, scope):
+        pool = scope if scope is not None else self._docs.keys()
+        return {sid for sid in pool if any(term in text for text in self._docs[sid][3])}
+
+    @staticmethod
+    def _score_field(term, text, weight):
+        if not text or term not in text:
+            return 0
+        if text == term:
+            return weight * 3
+        if text.startswith(term):
+            return weight * 2
+        return weight
+
+    def search(self, loader, query, created_by=None, limit=SITE_SEARCH_DEFAULT_LIMIT, compute=None):
+        """query: 공백으로 나눈 검색어 모두 포함(AND), created_by가 있으면 해당 사용자 현장만
+        -> (결과 목록, 전체 일치 수)"""
+        self._ensure(loader, compute)
+        terms = [t for t in (normalize(part) for part in str(query or '').split()) if t]
+        if not terms:
+            return [], 0
+        scope = None
+        if created_by is not None:
+            scope = self._by_user.get(created_by, set())
+
+        # 후보가 적은 검색어부터 좁혀 나감
+        matched = None
+        jamo_terms = []
+        for term in sorted(terms, key=len, reverse=True):
+            if all(ch in _CHOSEONG_SET for ch in term):
+                jamo_terms.append(term)
+                found = self._choseong_candidates(term, matched if matched is not None else scope)
+            else:
+                found = self._candidates(term, matched if matched is not None else scope)
+            matched = found if matched is None else (matched & found)
+            if not matched:
+                return [], 0
+
+        scored = []
+        for sid in matched:
+            _, raw, norm, chos = self._docs[sid]
+            score = 0
+            fields = set()
+            for term in terms:
+                pairs = zip(CHOSEONG_FIELDS, chos) if term in jamo_terms else zip(FIELDS, norm)
+                term_score = 0
+                for field, text in pairs:
+                    s = self._score_field(term, text, FIELD_WEIGHTS[field])
+                    if s:
+                        term_score += s
+                        fields.add(field)
+                if not term_score:
+                    break  # n-gram은 모두 있으나 실제로는 이어지지 않은 오탐
+                score += term_score
+            else:
+                scored.append((score, sid, fields))
+
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        items = []
+        for score, sid, fields in scored[:limit]:
+            created, raw, _, _ = self._docs[sid]
+            item = {'id': sid, 'created_by': created, 'score': score,
+                    'matched_fields': [f for f in FIELDS if f in fields]}
+            item.update(zip(FIELDS, raw))
+            items.append(item)
+        return items, len(scored)
+
+    def stats(self):
+        return {
+            'loaded_ago_seconds': round(time.monotonic() - self._loaded_at, 1) if self._version is not None else None,
+            'sites': len(self._docs),
+            'grams': len(self._postings),
+            'postings': sum(len(p) for p in self._postings.values())
+        }
+
+
+site_search_index = SiteSearchIndex(CACHE_DIR / 'site_search.version')
@@ -1,134 +1,56 @@
 from flask import Blueprint, request, jsonify, send_from_directory, send_file
-from datetime import datetime, date
+from datetime import datetime, date, timezone
 import jwt
-import os
-from dotenv import load_dotenv, dotenv_values
-from supabase import create_client, Client
 from pathlib import Path
 from io import BytesIO
-import zipfile
+import base64
 import json
-import requests
-import pandas as pd
 from typing import Literal
 from flask import current_app
-
-# 환경 변수 로드
-load_dotenv()
-
-# 환경변수 안전 로더(BOM/공백 대응)
-def _get_env_safe(key: str, default: str = "") -> str:
-    try:
-        val = os.getenv(key)
-        if isinstance(val, str) and val.strip() != "":
-            return val.strip()
-        # .env 직접 파싱하여 BOM 혹은 비정상 키명 보정
-        cfg = {}
-        try:
-            cfg = dotenv_values('.env') or {}
-        except Exception:
-            cfg = {}
-        # 1) 정확한 키
-        if key in cfg and str(cfg[key] or '').strip() != '':
-            return str(cfg[key]).strip()
-        # 2) BOM이 앞에 붙은 키(\ufeff)
-        bom_key = "\ufeff" + key
-        if bom_key in cfg and str(cfg[bom_key] or '').strip() != '':
-            return str(cfg[bom_key]).strip()
-        # 3) 선행 비문자 제거 후 일치하는 키(예외적 상황 방어)
-        for k, v in cfg.items():
-            ks = str(k or '').strip()
-            if ks.endswith(key) and str(v or '').strip() != '':
-                return str(v).strip()
-        return default
-    except Exception:
-        return default
+from events import publish_change
+from contacts_cache import contacts_master_cache
+import materials
+import site_import
+from site_catalog import site_catalog, SORT_KEYS as SITE_SORT_KEYS, FLAG_COLUMNS as SITE_FLAG_COLUMNS
+from site_search import site_search_index, COLUMNS as SITE_SEARCH_COLUMNS, SITE_SEARCH_DEFAULT_LIMIT, SITE_SEARCH_MAX_LIMIT
+from project_numbers import project_number_index, PREFIXES as PROJECT_NO_PREFIXES, NUMBER_SPACE as PROJECT_NO_SPACE
+import db
+import tracing
+import metrics
+import applog
+import profiler
+import config
+import serving
+import admission
+import schema
+import time
 
 # auth.py와 동일한 기본 비밀키 정책 적용 (토큰 검증 시 일관성)
-SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
-EMERGENCY_ADMIN_CODE = _get_env_safe('EMERGENCY_ADMIN_CODE', '')
+SECRET_KEY = config.SECRET_KEY
+EMERGENCY_ADMIN_CODE = config.env('EMERGENCY_ADMIN_CODE', '')
 
 # Blueprint는 모든 라우트 정의보다 먼저 선언되어야 합니다.
 sites_bp = Blueprint('sites', __name__)
+log = applog.get_logger('sites')
 
-# Supabase 클라이언트 초기화
-supabase_url = os.getenv('SUPABASE_URL')
-supabase_key = os.getenv('SUPABASE_ANON_KEY')
-supabase_service_key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')  # Storage 전용 사용 권장
+# Supabase 클라이언트는 db 모듈이 워커당 1세트로 관리
+supabase_url = db.SUPABASE_URL
+supabase_key = db.SUPABASE_ANON_KEY
 
-try:
-    print(f"[INFO] Supabase URL: {supabase_url}")
-    print(f"[INFO] Supabase Key: {supabase_key[:20]}..." if supabase_key else "[WARN] Supabase Key 없음")
-except Exception:
-    pass
-
-if not supabase_url or not supabase_key:
-    try:
-        print("[WARN] Supabase 환경 변수가 설정되지 않았습니다! 더미 데이터로 실행됩니다!.")
-    except Exception:
-        pass
-    
-    # 더미 Supabase 클라이언트 (개발용)
-    class DummySupabase:
-        def table(self, name):
-            return DummyTable()
-    
-    class DummyTable:
-        def select(self, *args):
-            return self
-        def eq(self, *args):
-            return self
-        def insert(self, data):
-            return DummyResult()
-        def update(self, data):
-            return DummyResult()
-        def delete(self):
-            return self
-        def execute(self):
-            return DummyResult()
-        def limit(self, n):
-            return self
-        def order(self, field, desc=False):
-            return self
-        def in_(self, field, values):
-            return self
-        def range(self, start, end):
-            return self
-    
-    class DummyResult:
-        def __init__(self):
-            self.data = []
-    
-    supabase = DummySupabase()
-    try:
-        print("[OK] 더미 Supabase 클라이언트 초기화 완료")
-    except Exception:
-        pass
-else:
-    supabase: Client = create_client(supabase_url, supabase_key)
-    try:
-        print("[OK] Supabase 클라이언트 초기화 완료")
-    except Exception:
-        pass
-    supabase_service: Client | None = None
-    try:
-        if supabase_service_key:
-            supabase_service = create_client(supabase_url, supabase_service_key)
-            try:
-                print("[OK] Supabase 서비스 키 클라이언트 준비(스토리지 전용)")
-            except Exception:
-                pass
-    except Exception:
-        supabase_service = None
-        try:
-            print("[WARN] Supabase 서비스 키 클라이언트 초기화 실패: 환경 변수 또는 권한을 확인하세요")
-        except Exception:
-            pass
+# Supabase 일시 장애 시 조회 엔드포인트 폴백: (마지막 정상 값, 저장 시각 ISO), 불가하면 원래 오류 재발생
+def _stale_or_raise(cache_key, err):
+    if db.is_transient_error(err):
+        hit = db.cached_response(cache_key)
+        if hit is not None:
+            log.warning('Supabase 장애로 캐시 응답 사용', cache_key=cache_key, error=str(err))
+            return hit[1], datetime.fromtimestamp(hit[0], timezone.utc).isoformat()
+    raise err
 
 # JWT 토큰 검증 함수
 def verify_token(token):
     try:
         payload = jwt.decode(token, str(SECRET_KEY or 'dev-secret-key-change-in-production'), algorithms=['HS256'])
+        applog.bind(user_id=payload.get('user_id'))
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -152,27 +74,28 @@ def emergency_promote():
             return jsonify({'error': '비상승격 코드가 올바르지 않습니다.'}), 403
 
         try:
-            rows = supabase.table('users').select('id, is_active, deleted_at').eq('user_role','admin').execute()
+            rows = db.table('users').select('id, is_active, deleted_at').eq('user_role','admin').execute()
             admins = rows.data or []
             active_admins = [u for u in admins if (u.get('is_active') is not False) and (u.get('deleted_at') is None)]
             if len(active_admins) > 0:
                 return jsonify({'error': '관리자가 이미 존재합니다. 비상승격은 관리자 0명일 때만 가능합니다.'}), 409
         except Exception:
             # 컬럼이 없으면 단순 카운트
-            rows = supabase.table('users').select('id').eq('user_role','admin').execute()
+            rows = db.table('users').select('id').eq('user_role','admin').execute()
             if len(rows.data or []) > 0:
                 return jsonify({'error': '관리자가 이미 존재합니다.'}), 409
 
         # RPC 우선 호출
         try:
-            if 'supabase_service' in globals() and supabase_service:
-                rpc_res = supabase_service.rpc('promote_to_admin', {'p_user_id': user_id}).execute()
+            service = db.get_service_client()
+            if service:
+                rpc_res = service.rpc('promote_to_admin', {'p_user_id': user_id}).execute()
                 return jsonify({'message': '비상 승격 완료', 'result': getattr(rpc_res, 'data', None)}), 200
         except Exception:
             pass
 
         # 폴백 업데이트
-        res = supabase.table('users').update({'user_role':'admin', 'updated_at': datetime.utcnow().isoformat()}).eq('id', user_id).execute()
+        res = db.table('users').update({'user_role':'admin', 'updated_at': datetime.utcnow().isoformat()}).eq('id', user_id).execute()
         return jsonify({'message': '비상 승격 완료(폴백)', 'user': (res.data[0] if res.data else None)}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -205,13 +128,14 @@ def admin_update_user_role(user_id):
         if new_role == 'admin':
             try:
                 # 우선 RPC 경로 시도(원자성 보장)
-                if 'supabase_service' in globals() and supabase_service:
-                    rpc_res = supabase_service.rpc('promote_to_admin', {'p_user_id': user_id}).execute()
+                service = db.get_service_client()
+                if service:
+                    rpc_res = service.rpc('promote_to_admin', {'p_user_id': user_id}).execute()
                     return jsonify({'message': '관리자로 승격되었습니다.', 'result': getattr(rpc_res, 'data', None)}), 200
             except Exception as rpc_err:
                 # RPC 실패 시 서버 측 폴백(경합 가능성 있지만 UX 보장)
                 try:
-                    rows = supabase.table('users').select('id, is_active, deleted_at').eq('user_role','admin').execute()
+                    rows = db.table('users').select('id, is_active, deleted_at').eq('user_role','admin').execute()
                     admins = rows.data or []
                     def _is_active(u):
                         return (u.get('is_active') is not False) and (u.get('deleted_at') is None)
@@ -220,19 +144,139 @@ def admin_update_user_role(user_id):
                         return jsonify({'error': '관리자는 최대 2명입니다.'}), 409
                 except Exception:
                     # is_active/deleted_at 컬럼이 없는 경우: 단순 카운트로 제한
-                    rows = supabase.table('users').select('id').eq('user_role','admin').execute()
+                    rows = db.table('users').select('id').eq('user_role','admin').execute()
                     if len(rows.data or []) >= 2:
                         return jsonify({'error': '관리자는 최대 2명입니다.'}), 409
 
-                res = supabase.table('users').update({'user_role': 'admin'}).eq('id', user_id).execute()
+                res = db.table('users').update({'user_role': 'admin'}).eq('id', user_id).execute()
                 return jsonify({'message': '관리자로 승격되었습니다.(폴백)', 'user': (res.data[0] if res.data else None)}), 200
 
         # 일반 사용자 강등 또는 기타 변경
-        res = supabase.table('users').update({'user_role': new_role}).eq('id', user_id).execute()
+        res = db.table('users').update({'user_role': new_role}).eq('id', user_id).execute()
         return jsonify({'message': '역할이 변경되었습니다.', 'user': (res.data[0] if res.data else None)}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# =============================
+# 관리자: Supabase 호출 상태 (차단기/재시도 카운터, 워커 프로세스 단위)
+# =============================
+@sites_bp.route('/admin/db-status', methods=['GET'])
+def admin_db_status():
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+        if payload.get('user_role') != 'admin':
+            return jsonify({'error': '관리자만 접근 가능합니다.'}), 403
+        return jsonify(dict(db.stats(), serving=serving.stats(), admission=admission.stats(), schema=schema.snapshot(),
+                            project_numbers=project_number_index.stats(), materials=materials.materials_rollup.stats(),
+                            site_search=site_search_index.stats(), site_catalog=site_catalog.stats())), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 관리자: 최근 느린 요청/N+1 의심 요청 (요청별 DB 호출 목록, 워커 프로세스 단위)
+@sites_bp.route('/admin/traces', methods=['GET'])
+def admin_traces():
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+        if payload.get('user_role') != 'admin':
+            return jsonify({'error': '관리자만 접근 가능합니다.'}), 403
+        try:
+            limit = max(1, min(int(request.args.get('limit', 20)), tracing.TRACE_RECENT_SIZE))
+        except ValueError:
+            limit = 20
+        return jsonify({**tracing.stats(), 'recent': tracing.recent(limit)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 관리자: 저장된 프로파일 목록 (요청 단위 *.folded/*.pstats, 상시 집계 aggregate_<pid>.folded)
+@sites_bp.route('/admin/profiles', methods=['GET'])
+def admin_profiles():
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+        if payload.get('user_role') != 'admin':
+            return jsonify({'error': '관리자만 접근 가능합니다.'}), 403
+        return jsonify({**profiler.stats(), 'profiles': profiler.list_profiles()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 관리자: 프로파일 파일 다운로드 (.folded → speedscope.app, .pstats → python -m pstats)
+@sites_bp.route('/admin/profiles/<name>', methods=['GET'])
+def admin_profile_download(name):
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+        if payload.get('user_role') != 'admin':
+            return jsonify({'error': '관리자만 접근 가능합니다.'}), 403
+        path = profiler.profile_path(name)
+        if not path:
+            return jsonify({'error': '프로파일을 찾을 수 없습니다.'}), 404
+        return send_file(str(path), mimetype='application/octet-stream' if path.suffix == '.pstats' else 'text/plain',
+                         as_attachment=True, download_name=path.name)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 이름 검색 공통 (GET /users, GET /contacts-master)
+NAME_SEARCH_DEFAULT_LIMIT = 20
+NAME_SEARCH_MAX_LIMIT = 100
+
+
+def _escape_like(value: str) -> str:
+    # ilike 패턴 특수문자(%, _, 역슬래시) 이스케이프
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _search_by_name(make_query, q, mode=None, limit=None):
+    """name ilike 검색을 DB에서 수행 (pg_trgm GIN 인덱스 사용)
+    - mode=prefix: 'q%' 만, mode=infix: '%q%' 만
+    - 기본(auto): 접두 일치를 먼저 채우고 남는 자리만 포함 일치로 보충(접두 우선 정렬)
+    make_query: 매번 새 쿼리 빌더를 돌려주는 함수(빌더는 필터 누적형이라 재사용 불가)
+    """
+    try:
+        limit = int(limit or NAME_SEARCH_DEFAULT_LIMIT)
+    except Exception:
+        limit = NAME_SEARCH_DEFAULT_LIMIT
+    limit = max(1, min(limit, NAME_SEARCH_MAX_LIMIT))
+    mode = (mode or 'auto').lower()
+    pattern = _escape_like(q)
+
+    items = []
+    if mode in ['auto', 'prefix']:
+        rows = make_query().ilike('name', f'{pattern}%').order('name').limit(limit).execute()
+        items = rows.data or []
+    if mode in ['auto', 'infix'] and len(items) < limit:
+        seen = {it.get('id') for it in items}
+        # 접두 일치분을 제외할 수 없으므로 그만큼 더 가져와 중복 제거
+        rows = make_query().ilike('name', f'%{pattern}%').order('name').limit(limit + len(items)).execute()
+        for it in (rows.data or []):
+            if it.get('id') in seen:
+                continue
+            items.append(it)
+            if len(items) >= limit:
+                break
+    return items
+
 # 사용자 목록 조회 API (연락처용)
 @sites_bp.route('/users', methods=['GET'])
 def get_users():
@@ -249,23 +293,31 @@ def get_users():
         if payload.get('user_role') != 'admin':
             return jsonify({'error': '관리자만 접근 가능합니다.'}), 403
 
-        q = request.args.get('q')  # 검색어
+        q = (request.args.get('q') or '').strip()  # 검색어
 
-        query = supabase.table('users').select('id, email, name, phone, user_role')
+        # 검색어가 있으면 DB 인덱스 검색(접두 우선), 없으면 전체 목록
+        if q:
+            items = _search_by_name(
+                lambda: db.table('users').select('id, email, name, phone, user_role'),
+                q, request.args.get('mode'), request.args.get('limit')
+            )
+            return jsonify({'items': items}), 200
+
+        query = db.table('users').select('id, email, name, phone, user_role')
         rows = query.execute()
         items = rows.data or []
 
         # 더미 모드에서도 관리자 전용 정책 유지
 
-        # 간단한 서버측 필터링 (name 포함 검색)
-        if q:
-            ql = q.lower()
-            items = [it for it in items if (it.get('name','').lower().find(ql) >= 0)]
-
         return jsonify({'items': items}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# 활성 마스터 인명 전체 조회 (캐시 적재용)
+def _load_active_contacts_master():
+    rows = db.table('contacts_master').select('*').eq('active', True).execute()
+    return rows.data or []
+
 # 마스터 인명 조회 (역할별 필터 및 검색)
 @sites_bp.route('/contacts-master', methods=['GET'])
 def get_contacts_master():
@@ -279,19 +331,46 @@ def get_contacts_master():
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
 
         role = request.args.get('role')  # pm | sales | None
-        q = request.args.get('q')  # 검색어
+        q = (request.args.get('q') or '').strip()  # 검색어
 
-        query = supabase.table('contacts_master').select('*').eq('active', True)
-        if role in ['pm','sales']:
-            query = query.eq('role', role)
-        rows = query.execute()
-        items = rows.data or []
+        def _base_query():
+            query = db.table('contacts_master').select('*').eq('active', True)
+            if role in ['pm','sales']:
+                query = query.eq('role', role)
+            return query
 
-        # 간단한 서버측 필터링 (name 포함 검색)
+        # 검색어가 있으면 DB 인덱스 검색(접두 우선), 없으면 전체 목록
         if q:
-            ql = q.lower()
-            items = [it for it in items if (it.get('name','').lower().find(ql) >= 0)]
+            items = _search_by_name(_base_query, q, request.args.get('mode'), request.args.get('limit'))
+            return jsonify({'items': items}), 200
+
+        # 전체 목록은 프로세스 캐시에서 제공(upsert 시 버전 갱신)
+        items = contacts_master_cache.list(_load_active_contacts_master, role)
+
+        return jsonify({'items': items}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 마스터 인명 자동완성 (캐시 접두 인덱스, 초성 검색 지원: 'ㄱㅊ', '김ㅊ')
+@sites_bp.route('/contacts-master/suggest', methods=['GET'])
+def suggest_contacts_master():
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        role = request.args.get('role')  # pm | sales | None
+        q = request.args.get('q') or ''
+        try:
+            limit = max(1, min(int(request.args.get('limit', 10)), 50))
+        except Exception:
+            limit = 10
 
+        items = contacts_master_cache.suggest(_load_active_contacts_master, q, role, limit)
         return jsonify({'items': items}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -324,16 +403,72 @@ def upsert_contacts_master():
 
         if data.get('id'):
             # update
-            res = supabase.table('contacts_master').update(item).eq('id', data['id']).execute()
+            res = db.table('contacts_master').update(item).eq('id', data['id']).execute()
         else:
             # insert
             item['created_at'] = datetime.utcnow().isoformat()
-            res = supabase.table('contacts_master').insert(item).execute()
+            res = db.table('contacts_master').insert(item).execute()
 
+        contacts_master_cache.bump()
         return jsonify({'item': (res.data[0] if res.data else None)}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# 현장 등록 본문 처리 (POST /sites, POST /batch 공용) -> (응답 본문, 상태코드)
+def _create_site_record(data, payload):
+    # 필수 필드 검증
+    required_fields = ['project_no', 'construction_company', 'site_name', 'address', 'household_count']
+    for field in required_fields:
+        if not data.get(field):
+            return {'error': f'{field}는 필수 입력 항목입니다.'}, 400
+
+    # 등록번호는 더 이상 사용하지 않음
+
+    # 현장 데이터 생성
+    site_data = {
+        'project_no': data['project_no'],
+        'construction_company': data['construction_company'],
+        'site_name': data['site_name'],
+        'address': data['address'],
+        'detail_address': data.get('detail_address', ''),
+        'household_count': data['household_count'],
+        'registration_date': data.get('registration_date'),
+        'delivery_date': data.get('delivery_date'),
+        'completion_date': data.get('completion_date'),
+        'certification_audit': data.get('certification_audit', 'N'),
+        'home_iot': data.get('home_iot', 'N'),
+        'product_bi': data.get('product_bi'),
+        'special_notes': (data.get('special_notes')[:1000] if data.get('special_notes') else None),
+        'external_network_enabled': (data.get('external_network_enabled') or 'N'),
+        'external_network_period': (data.get('external_network_period') if (data.get('external_network_enabled') == 'Y') else None),
+        'created_by': payload['user_id'],
+        'created_at': datetime.utcnow().isoformat()
+    }
+
+    result = db.table('sites').insert(site_data).execute()
+
+    # 더미 데이터인 경우에도 성공으로 처리
+    if result.data or not supabase_url or not supabase_key:
+        if result.data:
+            publish_change('sites', result.data[0])
+            project_number_index.note_site(result.data[0])
+            site_search_index.note_site(result.data[0])
+            site_catalog.note_site(result.data[0])
+        # 더미 데이터인 경우 가짜 현장 데이터 반환
+        dummy_site = {
+            'id': 1,
+            'project_no': site_data['project_no'],
+            'construction_company': site_data['construction_company'],
+            'site_name': site_data['site_name'],
+            'address': site_data['address'],
+            'created_by': site_data['created_by']
+        }
+        return {
+            'message': '현장이 성공적으로 등록되었습니다.',
+            'site': dummy_site if not result.data else result.data[0]
+        }, 201
+    return {'error': '현장 등록 중 오류가 발생했습니다.'}, 500
+
 # 현장 등록
 @sites_bp.route('/sites', methods=['POST'])
 def create_site():
@@ -350,59 +485,50 @@ def create_site():
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         
         data = request.get_json()
-        
-        # 필수 필드 검증
-        required_fields = ['project_no', 'construction_company', 'site_name', 'address', 'household_count']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'{field}는 필수 입력 항목입니다.'}), 400
-        
-        # 등록번호는 더 이상 사용하지 않음
-        
-        # 현장 데이터 생성
-        site_data = {
-            'project_no': data['project_no'],
-            'construction_company': data['construction_company'],
-            'site_name': data['site_name'],
-            'address': data['address'],
-            'detail_address': data.get('detail_address', ''),
-            'household_count': data['household_count'],
-            'registration_date': data.get('registration_date'),
-            'delivery_date': data.get('delivery_date'),
-            'completion_date': data.get('completion_date'),
-            'certification_audit': data.get('certification_audit', 'N'),
-            'home_iot': data.get('home_iot', 'N'),
-            'product_bi': data.get('product_bi'),
-            'special_notes': (data.get('special_notes')[:1000] if data.get('special_notes') else None),
-            'external_network_enabled': (data.get('external_network_enabled') or 'N'),
-            'external_network_period': (data.get('external_network_period') if (data.get('external_network_enabled') == 'Y') else None),
-            'created_by': payload['user_id'],
-            'created_at': datetime.utcnow().isoformat()
-        }
-        
-        result = supabase.table('sites').insert(site_data).execute()
-        
-        # 더미 데이터인 경우에도 성공으로 처리
-        if result.data or not supabase_url or not supabase_key:
-            # 더미 데이터인 경우 가짜 현장 데이터 반환
-            dummy_site = {
-                'id': 1,
-                'project_no': site_data['project_no'],
-                'construction_company': site_data['construction_company'],
-                'site_name': site_data['site_name'],
-                'address': site_data['address'],
-                'created_by': site_data['created_by']
-            }
-            return jsonify({
-                'message': '현장이 성공적으로 등록되었습니다.',
-                'site': dummy_site if not result.data else result.data[0]
-            }), 201
-        else:
-            return jsonify({'error': '현장 등록 중 오류가 발생했습니다.'}), 500
+        body, status = _create_site_record(data, payload)
+        return jsonify(body), status
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# 목록 화면 파라미터가 있으면 워커 메모리 카탈로그(site_catalog.py)에서 정렬/필터/페이지 처리
+SITE_LIST_PARAMS = ('view', 'sort', 'order', 'page', 'page_size', 'construction_company', 'household_min', 'household_max',
+                    'created_by') + SITE_FLAG_COLUMNS
+SITE_LIST_MAX_PAGE_SIZE = 1000
+
+
+def _parse_site_list_args(args, is_admin):
+    """-> (filters, sort, desc, page, page_size) 또는 오류 메시지 문자열"""
+    sort = (args.get('sort') or 'id').strip()
+    if sort not in SITE_SORT_KEYS:
+        return f"sort는 {', '.join(SITE_SORT_KEYS)} 중 하나여야 합니다."
+    order = (args.get('order') or ('desc' if sort == 'id' else 'asc')).lower()
+    if order not in ('asc', 'desc'):
+        return 'order는 asc 또는 desc여야 합니다.'
+    filters = {}
+    for flag in SITE_FLAG_COLUMNS:
+        value = args.get(flag)
+        if value is not None:
+            if value not in ('Y', 'N'):
+                return f'{flag}는 Y 또는 N이어야 합니다.'
+            filters[flag] = value
+    if args.get('construction_company'):
+        filters['construction_company'] = args.get('construction_company')
+    try:
+        for key in ('household_min', 'household_max'):
+            if args.get(key) not in (None, ''):
+                filters[key] = int(args.get(key))
+        if is_admin and args.get('created_by') not in (None, ''):
+            filters['created_by'] = int(args.get('created_by'))
+        page = int(args.get('page') or 1)
+        page_size = int(args['page_size']) if args.get('page_size') else None
+    except ValueError:
+        return '숫자 파라미터 형식이 올바르지 않습니다.'
+    if page < 1 or (page_size is not None and not 1 <= page_size <= SITE_LIST_MAX_PAGE_SIZE):
+        return f'page는 1 이상, page_size는 1~{SITE_LIST_MAX_PAGE_SIZE}이어야 합니다.'
+    return filters, sort, order == 'desc', page, page_size
+
+
 # 현장 목록 조회
 @sites_bp.route('/sites', methods=['GET'])
 def get_sites():
@@ -418,17 +544,66 @@ def get_sites():
         if not payload:
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         
+        # 목록 파라미터(?view=list, sort, page, 필터 등)가 있으면 메모리 카탈로그에서 목록 컬럼만 반환
+        if any(key in request.args for key in SITE_LIST_PARAMS):
+            is_admin = payload['user_role'] == 'admin'
+            parsed = _parse_site_list_args(request.args, is_admin)
+            if isinstance(parsed, str):
+                return jsonify({'error': parsed}), 400
+            filters, sort, desc, page, page_size = parsed
+            offset = (page - 1) * page_size if page_size else 0
+            rows, total = site_catalog.query(None if is_admin else payload['user_id'], filters, sort, desc,
+                                             offset, page_size, serving.run_blocking)
+            return jsonify({'sites': rows, 'total': total, 'page': page, 'page_size': page_size}), 200
+
         # 관리자는 모든 현장 조회, 일반사용자는 본인이 등록한 현장만 조회
-        if payload['user_role'] == 'admin':
-            sites = supabase.table('sites').select('*').order('id', desc=True).execute()
-        else:
-            sites = supabase.table('sites').select('*').eq('created_by', payload['user_id']).order('id', desc=True).execute()
-        
-        # 더미 데이터인 경우 빈 배열 반환
-        sites_data = sites.data if sites.data else []
+        cache_key = ('sites', payload['user_id'], payload['user_role'] == 'admin')
+        try:
+            sites_data = db.list_sites(payload['user_id'], payload['user_role'] == 'admin')
+        except Exception as db_error:
+            sites_data, cached_at = _stale_or_raise(cache_key, db_error)
+            return jsonify({'sites': sites_data, 'stale': True, 'cached_at': cached_at}), 200
+        db.remember_response(cache_key, sites_data)
         
         return jsonify({'sites': sites_data}), 200
         
+    except db.SupabaseUnavailable as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after or 30)}
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 현장 검색 (현장명/프로젝트 번호/건설사/주소/특이사항, 프로세스 n-gram 인덱스: site_search.py)
+def _load_site_search():
+    return db.select_pages('sites', SITE_SEARCH_COLUMNS)
+
+
+@sites_bp.route('/sites/search', methods=['GET'])
+def search_sites():
+    """?q=검색어(공백으로 여러 개, 모두 포함) &limit=20
+    관리자는 전체, 일반 사용자는 본인이 등록한 현장만 검색"""
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        q = (request.args.get('q') or '').strip()
+        if not q:
+            return jsonify({'error': '검색어(q)를 입력하세요.'}), 400
+        try:
+            limit = int(request.args.get('limit') or SITE_SEARCH_DEFAULT_LIMIT)
+        except Exception:
+            limit = SITE_SEARCH_DEFAULT_LIMIT
+        limit = max(1, min(limit, SITE_SEARCH_MAX_LIMIT))
+
+        created_by = None if payload['user_role'] == 'admin' else payload['user_id']
+        items, total = site_search_index.search(_load_site_search, q, created_by, limit, serving.run_blocking)
+        return jsonify({'items': items, 'total': total}), 200
+    except db.SupabaseUnavailable as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after or 30)}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -447,36 +622,77 @@ def get_site_detail(site_id):
         if not payload:
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         
-        # 현장 조회
-        site = supabase.table('sites').select('*').eq('id', site_id).execute()
+        # 현장 조회 (장애 시 마지막 정상 응답으로 폴백, 권한 확인은 동일하게 수행)
+        cache_key = ('site', site_id)
+        cached_at = None
+        try:
+            site_info = db.get_site_access(site_id, '*')
+        except Exception as db_error:
+            site_info, cached_at = _stale_or_raise(cache_key, db_error)
         
-        if not site.data:
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
         
-        site_info = site.data[0]
-        
         # 권한 확인 (관리자가 아닌 경우 본인이 등록한 현장만 조회 가능)
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
         
+        if cached_at:
+            return jsonify({'site': site_info, 'stale': True, 'cached_at': cached_at}), 200
+        db.remember_response(cache_key, site_info)
         return jsonify({'site': site_info}), 200
         
+    except db.SupabaseUnavailable as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after or 30)}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# 현장 기본정보 수정 본문 처리 (PATCH /sites/<id>, POST /batch 공용)
+def _update_site_record(site_id, data):
+    update_data = {
+        'project_no': data.get('project_no'),
+        'construction_company': data.get('construction_company'),
+        'site_name': data.get('site_name'),
+        'address': data.get('address'),
+        'detail_address': data.get('detail_address'),
+        'household_count': data.get('household_count'),
+        'registration_date': data.get('registration_date') if data.get('registration_date') else None,
+        'delivery_date': data.get('delivery_date') if data.get('delivery_date') else None,
+        'completion_date': data.get('completion_date') if data.get('completion_date') else None,
+        'certification_audit': data.get('certification_audit'),
+        'home_iot': data.get('home_iot'),
+        'product_bi': data.get('product_bi'),
+        'special_notes': (data.get('special_notes')[:1000] if data.get('special_notes') else None),
+        'external_network_enabled': data.get('external_network_enabled'),
+        'external_network_period': (data.get('external_network_period') if (data.get('external_network_enabled') == 'Y') else None),
+        'updated_at': datetime.utcnow().isoformat()
+    }
+
+    # None 값 제거
+    update_data = {k: v for k, v in update_data.items() if v is not None}
+    log.debug('현장 수정 데이터', site_id=site_id, data=update_data)
+
+    try:
+        result = db.table('sites').update(update_data).eq('id', site_id).execute()
+    except Exception as update_error:
+        log.error('현장 수정 실패', site_id=site_id, error=str(update_error))
+        return {'error': f'데이터베이스 업데이트 오류: {str(update_error)}'}, 500
+
+    if result.data:
+        publish_change('sites', result.data[0])
+        project_number_index.note_site(result.data[0])
+        site_search_index.note_site(result.data[0])
+        site_catalog.note_site(result.data[0])
+        materials.materials_rollup.bump()
+        return {'message': '현장 정보가 수정되었습니다.', 'site': result.data[0]}, 200
+    return {'error': '현장 정보 수정 중 오류가 발생했습니다.'}, 500
+
 # 현장 기본정보 수정
 @sites_bp.route('/sites/<int:site_id>', methods=['PATCH','PUT'])
 def update_site(site_id):
     try:
-        print(f"🔧 현장 수정 요청: ID {site_id}")
-        print(f"📝 요청 데이터: {request.get_json()}")
-        print(f"🔑 인증 헤더: {request.headers.get('Authorization', '없음')}")
-        print(f"🌐 Supabase URL: {supabase_url}")
-        print(f"🔑 Supabase Key: {supabase_key[:20]}..." if supabase_key else "❌ Supabase Key 없음")
-        
         auth_header = request.headers.get('Authorization')
         if not auth_header:
-            print("❌ 인증 헤더 없음")
             return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
         token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
         payload = verify_token(token)
@@ -485,57 +701,20 @@ def update_site(site_id):
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         
         # 권한 확인
-        print(f"🔍 권한 확인 중: site_id={site_id}")
         try:
-            site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-            print(f"✅ 권한 확인 성공: {site.data}")
+            site_info = db.get_site_access(site_id)
         except Exception as db_error:
-            print(f"❌ 권한 확인 실패: {db_error}")
+            log.error('권한 확인 실패', site_id=site_id, error=str(db_error))
             return jsonify({'error': f'데이터베이스 연결 오류: {str(db_error)}'}), 500
             
-        if not site.data:
-            print("❌ 현장을 찾을 수 없음")
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
-            print("❌ 접근 권한 없음")
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
         
         data = request.get_json()
-        update_data = {
-            'project_no': data.get('project_no'),
-            'construction_company': data.get('construction_company'),
-            'site_name': data.get('site_name'),
-            'address': data.get('address'),
-            'detail_address': data.get('detail_address'),
-            'household_count': data.get('household_count'),
-            'registration_date': data.get('registration_date') if data.get('registration_date') else None,
-            'delivery_date': data.get('delivery_date') if data.get('delivery_date') else None,
-            'completion_date': data.get('completion_date') if data.get('completion_date') else None,
-            'certification_audit': data.get('certification_audit'),
-            'home_iot': data.get('home_iot'),
-            'product_bi': data.get('product_bi'),
-            'special_notes': (data.get('special_notes')[:1000] if data.get('special_notes') else None),
-            'external_network_enabled': data.get('external_network_enabled'),
-            'external_network_period': (data.get('external_network_period') if (data.get('external_network_enabled') == 'Y') else None),
-            'updated_at': datetime.utcnow().isoformat()
-        }
-        
-        # None 값 제거
-        update_data = {k: v for k, v in update_data.items() if v is not None}
-        print(f"📝 업데이트할 데이터: {update_data}")
-        
-        try:
-            result = supabase.table('sites').update(update_data).eq('id', site_id).execute()
-            print(f"✅ 데이터베이스 업데이트 성공: {result.data}")
-        except Exception as update_error:
-            print(f"❌ 데이터베이스 업데이트 실패: {update_error}")
-            return jsonify({'error': f'데이터베이스 업데이트 오류: {str(update_error)}'}), 500
-        
-        if result.data:
-            return jsonify({'message': '현장 정보가 수정되었습니다.', 'site': result.data[0]}), 200
-        else:
-            return jsonify({'error': '현장 정보 수정 중 오류가 발생했습니다.'}), 500
+        body, status = _update_site_record(site_id, data)
+        return jsonify(body), status
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -552,25 +731,24 @@ def get_site_contacts(site_id):
         if not payload:
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
         # 사진 목록은 로그인한 사용자라면 모두 열람 가능(팀 공유 정책 없음)
-        site_info = site.data[0]
-        contacts = supabase.table('site_contacts').select('*').eq('site_id', site_id).limit(1).execute()
+        contacts = db.table('site_contacts').select('*').eq('site_id', site_id).limit(1).execute()
         base = contacts.data[0] if contacts.data else None
 
         # 추가 연락처(복수) 목록 로드: sales|construction|installer|network
         def _load_list(kind: str):
+            # 테이블이 없으면 조회 없이 빈 리스트
+            if not schema.has_table('site_contact_people'):
+                return []
             try:
-                rows = supabase.table('site_contact_people').select('*').eq('site_id', site_id).eq('person_type', kind).order('id', desc=True).execute()
+                rows = db.table('site_contact_people').select('*').eq('site_id', site_id).eq('person_type', kind).order('id', desc=True).execute()
                 return [{'name': (r.get('name') or ''), 'phone': (r.get('phone') or '')} for r in (rows.data or [])]
             except Exception as e_list:
-                msg = str(e_list)
-                # 테이블이 없는 경우에도 빈 리스트 반환
-                if 'site_contact_people' in msg and ('does not exist' in msg or 'relation' in msg or 'schema cache' in msg):
-                    return []
                 # 기타 오류는 빈 리스트로 처리(UX 우선)
+                schema.note_error(e_list, 'site_contact_people')
                 return []
 
         result = base or {}
@@ -583,14 +761,51 @@ def get_site_contacts(site_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# 제품수량 저장 본문 처리 (POST /sites/<id>/products, POST /batch 공용)
+def _save_site_products(site_id, data):
+    payload_data = {
+        'site_id': site_id,
+        'project_no': data.get('project_no'),
+        'wallpad_model': data.get('wallpad_model'),
+        'wallpad_qty': data.get('wallpad_qty', 0),
+        'doorphone_model': data.get('doorphone_model'),
+        'doorphone_qty': data.get('doorphone_qty', 0),
+        'lobbyphone_model': data.get('lobbyphone_model'),
+        'lobbyphone_qty': data.get('lobbyphone_qty', 0),
+        'guardphone_model': data.get('guardphone_model'),
+        'guardphone_qty': data.get('guardphone_qty', 0),
+        'magnet_sensor_model': data.get('magnet_sensor_model'),
+        'magnet_sensor_qty': data.get('magnet_sensor_qty', 0),
+        'motion_sensor_model': data.get('motion_sensor_model'),
+        'motion_sensor_qty': data.get('motion_sensor_qty', 0),
+        'opener_model': data.get('opener_model'),
+        'opener_qty': data.get('opener_qty', 0),
+        'updated_at': datetime.utcnow().isoformat()
+    }
+
+    # None 값 제거 + 마이그레이션 미적용으로 없는 제품 컬럼 제외
+    payload_data = schema.filter_columns('site_products', {k: v for k, v in payload_data.items() if v is not None})
+    log.debug('저장 데이터', site_id=site_id, data=payload_data)
+
+    existing = db.table('site_products').select('id').eq('site_id', site_id).limit(1).execute()
+    if existing.data:
+        # 기존 데이터 업데이트
+        result = db.table('site_products').update(payload_data).eq('id', existing.data[0]['id']).execute()
+    else:
+        # 새 데이터 삽입
+        payload_data['created_at'] = datetime.utcnow().isoformat()
+        result = db.table('site_products').insert(payload_data).execute()
+
+    if result.data:
+        publish_change('site_products', result.data[0])
+        materials.materials_rollup.bump()
+        return {'message': '제품수량 정보가 저장되었습니다.', 'products': result.data[0]}, 200
+    return {'error': '제품수량 정보 저장 중 오류가 발생했습니다.'}, 500
+
 # 현장 제품수량 저장(업서트) - 프론트엔드용
 @sites_bp.route('/sites/<int:site_id>/products', methods=['POST'])
 def upsert_site_products(site_id):
     try:
-        print(f"🔍 제품수량 저장 요청 - 현장 ID: {site_id}")
-        print(f"📝 Raw 데이터: {request.get_data()}")
-        print(f"📝 Content-Type: {request.headers.get('Content-Type', '없음')}")
-        
         auth_header = request.headers.get('Authorization')
         if not auth_header:
             return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
@@ -602,69 +817,124 @@ def upsert_site_products(site_id):
         # JSON 데이터 안전하게 파싱
         try:
             data = request.get_json()
-            print(f"📝 파싱된 JSON 데이터: {data}")
         except Exception as json_error:
-            print(f"❌ JSON 파싱 오류: {json_error}")
+            log.warning('JSON 파싱 오류', error=str(json_error))
             return jsonify({'error': '잘못된 JSON 형식입니다.'}), 400
         
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         # 사진 업로드는 로그인한 사용자라면 모두 가능(팀 공유 정책 없음)
         
-        payload_data = {
-            'site_id': site_id,
-            'project_no': data.get('project_no'),
-            'wallpad_model': data.get('wallpad_model'),
-            'wallpad_qty': data.get('wallpad_qty', 0),
-            'doorphone_model': data.get('doorphone_model'),
-            'doorphone_qty': data.get('doorphone_qty', 0),
-            'lobbyphone_model': data.get('lobbyphone_model'),
-            'lobbyphone_qty': data.get('lobbyphone_qty', 0),
-            'guardphone_model': data.get('guardphone_model'),
-            'guardphone_qty': data.get('guardphone_qty', 0),
-            'magnet_sensor_model': data.get('magnet_sensor_model'),
-            'magnet_sensor_qty': data.get('magnet_sensor_qty', 0),
-            'motion_sensor_model': data.get('motion_sensor_model'),
-            'motion_sensor_qty': data.get('motion_sensor_qty', 0),
-            'opener_model': data.get('opener_model'),
-            'opener_qty': data.get('opener_qty', 0),
-            'updated_at': datetime.utcnow().isoformat()
-        }
-        
-        # None 값 제거
-        payload_data = {k: v for k, v in payload_data.items() if v is not None}
-        print(f"💾 저장할 데이터: {payload_data}")
-        
-        existing = supabase.table('site_products').select('id').eq('site_id', site_id).limit(1).execute()
-        if existing.data:
-            # 기존 데이터 업데이트
-            result = supabase.table('site_products').update(payload_data).eq('id', existing.data[0]['id']).execute()
-        else:
-            # 새 데이터 삽입
-            payload_data['created_at'] = datetime.utcnow().isoformat()
-            result = supabase.table('site_products').insert(payload_data).execute()
-        
-        print(f"✅ 제품수량 저장 성공: {result.data[0] if result.data else 'None'}")
-        if result.data:
-            return jsonify({'message': '제품수량 정보가 저장되었습니다.', 'products': result.data[0]}), 200
-        else:
-            return jsonify({'error': '제품수량 정보 저장 중 오류가 발생했습니다.'}), 500
+        body, status = _save_site_products(site_id, data)
+        return jsonify(body), status
             
     except Exception as e:
-        print(f"❌ 제품수량 저장 오류: {str(e)}")
+        log.exception('제품수량 저장 오류', site_id=site_id)
         return jsonify({'error': str(e)}), 500
 
+# 연락처 저장 본문 처리 (POST /sites/<id>/contacts, POST /batch 공용)
+def _save_site_contacts(site_id, data, payload):
+    payload_data = {
+        'site_id': site_id,
+        'project_no': data.get('project_no'),
+        'pm_name': data.get('pm_name'),
+        'pm_phone': data.get('pm_phone'),
+        # 단일 필드(하위 리스트의 첫 항목으로 보정 가능)
+        'sales_manager_name': data.get('sales_manager_name'),
+        'sales_manager_phone': data.get('sales_manager_phone'),
+        'construction_manager_name': data.get('construction_manager_name'),
+        'construction_manager_phone': data.get('construction_manager_phone'),
+        'installer_name': data.get('installer_name'),
+        'installer_phone': data.get('installer_phone'),
+        'network_manager_name': data.get('network_manager_name'),
+        'network_manager_phone': data.get('network_manager_phone'),
+        'updated_at': datetime.utcnow().isoformat()
+    }
+    
+    # None 값 제거
+    payload_data = {k: v for k, v in payload_data.items() if v is not None}
+    log.debug('저장 데이터', site_id=site_id, data=payload_data)
+    
+    # 1) 메인 레코드 upsert
+    existing = db.table('site_contacts').select('id').eq('site_id', site_id).limit(1).execute()
+    if existing.data:
+        contact_id = existing.data[0]['id']
+        result = db.table('site_contacts').update(payload_data).eq('id', contact_id).execute()
+    else:
+        result = db.table('site_contacts').insert(payload_data).execute()
+
+    # 2) 복수 연락처 리스트 저장(있다면 교체 방식)
+    def _normalize_list(arr):
+        if not isinstance(arr, list):
+            return []
+        norm = []
+        for it in arr:
+            name = str((it or {}).get('name') or '').strip()
+            phone = str((it or {}).get('phone') or '').strip()
+            if not name and not phone:
+                continue
+            norm.append({'name': name, 'phone': phone})
+        return norm
+
+    sales_list = _normalize_list(data.get('sales_list'))
+    construction_list = _normalize_list(data.get('construction_list'))
+    installer_list = _normalize_list(data.get('installer_list'))
+    network_list = _normalize_list(data.get('network_list'))
+
+    # 단일 필드 보정: 첫 항목을 반영(이전 스키마와 호환)
+    def _set_first_to_payload(list_val, name_key, phone_key):
+        if list_val and not payload_data.get(name_key):
+            payload_data[name_key] = list_val[0]['name']
+        if list_val and not payload_data.get(phone_key):
+            payload_data[phone_key] = list_val[0]['phone']
+    _set_first_to_payload(sales_list, 'sales_manager_name', 'sales_manager_phone')
+    _set_first_to_payload(construction_list, 'construction_manager_name', 'construction_manager_phone')
+    _set_first_to_payload(installer_list, 'installer_name', 'installer_phone')
+    _set_first_to_payload(network_list, 'network_manager_name', 'network_manager_phone')
+
+    # 테이블이 없으면(마이그레이션 미적용) 단일 필드만 저장
+    def _replace(kind: str, items: list):
+        if not schema.has_table('site_contact_people'):
+            return
+        try:
+            # 기존 삭제
+            db.table('site_contact_people').delete().eq('site_id', site_id).eq('person_type', kind).execute()
+        except Exception as e_del:
+            if schema.note_error(e_del, 'site_contact_people'):
+                return
+            log.warning('site_contact_people 삭제 오류', site_id=site_id, person_type=kind, error=str(e_del))
+        if not items:
+            return
+        try:
+            payload_rows = [{
+                'site_id': site_id,
+                'person_type': kind,
+                'name': it['name'],
+                'phone': it['phone'],
+                'created_by': payload['user_id'],
+                'created_at': datetime.utcnow().isoformat(),
+                'updated_at': datetime.utcnow().isoformat()
+            } for it in items]
+            db.table('site_contact_people').insert(payload_rows).execute()
+        except Exception as e_ins:
+            if not schema.note_error(e_ins, 'site_contact_people'):
+                log.warning('site_contact_people 저장 오류', site_id=site_id, person_type=kind, error=str(e_ins))
+
+    _replace('sales', sales_list)
+    _replace('construction', construction_list)
+    _replace('installer', installer_list)
+    _replace('network', network_list)
+
+    if result.data:
+        publish_change('site_contacts', result.data[0])
+    return {'message': '연락처가 저장되었습니다.', 'contacts': result.data[0] if result.data else payload_data}, 200
+
 # 현장 연락처 저장(업서트)
 @sites_bp.route('/sites/<int:site_id>/contacts', methods=['POST'])
 def upsert_site_contacts(site_id):
     try:
-        print(f"🔍 연락처 저장 요청 - 현장 ID: {site_id}")
-        print(f"📝 Raw 데이터: {request.get_data()}")
-        print(f"📝 Content-Type: {request.headers.get('Content-Type', '없음')}")
-        
         auth_header = request.headers.get('Authorization')
         if not auth_header:
             return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
@@ -676,114 +946,82 @@ def upsert_site_contacts(site_id):
         # JSON 데이터 안전하게 파싱
         try:
             data = request.get_json()
-            print(f"📝 파싱된 JSON 데이터: {data}")
         except Exception as json_error:
-            print(f"❌ JSON 파싱 오류: {json_error}")
+            log.warning('JSON 파싱 오류', error=str(json_error))
             return jsonify({'error': '잘못된 JSON 형식입니다.'}), 400
         
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
         
+        body, status = _save_site_contacts(site_id, data, payload)
+        return jsonify(body), status
+    except Exception as e:
+        log.exception('연락처 저장 오류', site_id=site_id)
+        return jsonify({'error': str(e)}), 500
+
+# 세대부/공용부 연동 허용 타입
+HOUSEHOLD_INTEGRATION_TYPES = ['lighting_sw','standby_power_sw','gas_detector','heating','ventilation','door_lock','air_conditioner','real_time_metering','environment_sensor','vpn','all_off_switch','bathroom_phone','kitchen_tv']
+COMMON_INTEGRATION_TYPES = ['parking_control','remote_metering','cctv','elevator','parcel','ev_charger','parking_location','onepass','rf_card']
+
+# 연동 항목 배열 업서트 본문 처리 (세대부/공용부 저장, POST /batch 공용)
+def _save_integration_items(table_name, allowed, label, site_id, items):
+    def _normalize(v):
+        if v is None:
+            return None
+        if isinstance(v, str):
+            v2 = v.strip()
+            return v2 if v2 != '' else None
+        return v
+
+    def _yn(v):
+        return 'Y' if str(v or 'N').strip().upper() == 'Y' else 'N'
+
+    saved = []
+    for item in (items or []):
+        itype = (item.get('integration_type') or '').strip()
+        if itype not in allowed:
+            log.warning('허용되지 않은 연동 타입', table=table_name, integration_type=itype)
+            continue
         payload_data = {
             'site_id': site_id,
-            'project_no': data.get('project_no'),
-            'pm_name': data.get('pm_name'),
-            'pm_phone': data.get('pm_phone'),
-            # 단일 필드(하위 리스트의 첫 항목으로 보정 가능)
-            'sales_manager_name': data.get('sales_manager_name'),
-            'sales_manager_phone': data.get('sales_manager_phone'),
-            'construction_manager_name': data.get('construction_manager_name'),
-            'construction_manager_phone': data.get('construction_manager_phone'),
-            'installer_name': data.get('installer_name'),
-            'installer_phone': data.get('installer_phone'),
-            'network_manager_name': data.get('network_manager_name'),
-            'network_manager_phone': data.get('network_manager_phone'),
+            'project_no': _normalize(item.get('project_no')),
+            'integration_type': itype,
+            'enabled': _yn(item.get('enabled')),
+            'company_name': _normalize(item.get('company_name')),
+            'contact_person': _normalize(item.get('contact_person')),
+            'contact_phone': _normalize(item.get('contact_phone')),
+            'notes': _normalize(item.get('notes')),
             'updated_at': datetime.utcnow().isoformat()
         }
-        
-        # None 값 제거
-        payload_data = {k: v for k, v in payload_data.items() if v is not None}
-        print(f"💾 저장할 데이터: {payload_data}")
-        
-        # 1) 메인 레코드 upsert
-        existing = supabase.table('site_contacts').select('id').eq('site_id', site_id).limit(1).execute()
-        if existing.data:
-            contact_id = existing.data[0]['id']
-            result = supabase.table('site_contacts').update(payload_data).eq('id', contact_id).execute()
-        else:
-            result = supabase.table('site_contacts').insert(payload_data).execute()
+        log.debug('연동 업서트', table=table_name, data=payload_data)
 
-        # 2) 복수 연락처 리스트 저장(있다면 교체 방식)
-        def _normalize_list(arr):
-            if not isinstance(arr, list):
-                return []
-            norm = []
-            for it in arr:
-                name = str((it or {}).get('name') or '').strip()
-                phone = str((it or {}).get('phone') or '').strip()
-                if not name and not phone:
-                    continue
-                norm.append({'name': name, 'phone': phone})
-            return norm
-
-        sales_list = _normalize_list(data.get('sales_list'))
-        construction_list = _normalize_list(data.get('construction_list'))
-        installer_list = _normalize_list(data.get('installer_list'))
-        network_list = _normalize_list(data.get('network_list'))
-
-        # 단일 필드 보정: 첫 항목을 반영(이전 스키마와 호환)
-        def _set_first_to_payload(list_val, name_key, phone_key):
-            if list_val and not payload_data.get(name_key):
-                payload_data[name_key] = list_val[0]['name']
-            if list_val and not payload_data.get(phone_key):
-                payload_data[phone_key] = list_val[0]['phone']
-        _set_first_to_payload(sales_list, 'sales_manager_name', 'sales_manager_phone')
-        _set_first_to_payload(construction_list, 'construction_manager_name', 'construction_manager_phone')
-        _set_first_to_payload(installer_list, 'installer_name', 'installer_phone')
-        _set_first_to_payload(network_list, 'network_manager_name', 'network_manager_phone')
-
-        # 테이블 없을 수 있으므로 안전 처리
-        def _replace(kind: str, items: list):
-            try:
-                # 기존 삭제
-                supabase.table('site_contact_people').delete().eq('site_id', site_id).eq('person_type', kind).execute()
-            except Exception as e_del:
-                # 생성 안된 경우 무시
-                if 'site_contact_people' not in str(e_del):
-                    pass
-            if not items:
-                return
-            try:
-                payload_rows = [{
-                    'site_id': site_id,
-                    'person_type': kind,
-                    'name': it['name'],
-                    'phone': it['phone'],
-                    'created_by': payload['user_id'],
-                    'created_at': datetime.utcnow().isoformat(),
-                    'updated_at': datetime.utcnow().isoformat()
-                } for it in items]
-                supabase.table('site_contact_people').insert(payload_rows).execute()
-            except Exception as e_ins:
-                # 테이블이 없으면 조용히 패스(프론트에서 SQL 적용 유도)
-                if 'site_contact_people' not in str(e_ins):
-                    print(f"⚠️ site_contact_people 저장 오류({kind}): {e_ins}")
-
-        _replace('sales', sales_list)
-        _replace('construction', construction_list)
-        _replace('installer', installer_list)
-        _replace('network', network_list)
-
-        print(f"✅ 연락처 저장 성공: {result.data[0] if result.data else 'None'}")
-        return jsonify({'message': '연락처가 저장되었습니다.', 'contacts': result.data[0] if result.data else payload_data}), 200
-    except Exception as e:
-        print(f"❌ 연락처 저장 오류: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        # 1) 업데이트 우선(site_id + integration_type)
+        try:
+            upd = db.table(table_name).update(payload_data).eq('site_id', site_id).eq('integration_type', itype).execute()
+            if upd.data:
+                saved.append(upd.data[0])
+                continue
+        except Exception as e_upd:
+            log.warning('연동 업데이트 오류', table=table_name, integration_type=itype, error=str(e_upd))
+
+        # 2) 없으면 삽입
+        try:
+            payload_insert = dict(payload_data)
+            payload_insert['created_at'] = datetime.utcnow().isoformat()
+            ins = db.table(table_name).insert(payload_insert).execute()
+            if ins.data:
+                saved.append(ins.data[0])
+        except Exception as e_ins:
+            log.error('연동 삽입 오류', table=table_name, integration_type=itype, error=str(e_ins))
+            return {'error': f'{label}연동 저장 실패', 'error_detail': str(e_ins)}, 500
+
+    for row in saved:
+        publish_change(table_name, row)
+    return {'message': f'{label}연동이 저장되었습니다.', 'items': saved}, 200
 
 # 세대부연동 조회 (조명SW/대기전력SW/가스감지기/VPN/일괄소등 등)
 @sites_bp.route('/sites/<int:site_id>/integrations/household', methods=['GET'])
@@ -797,15 +1035,14 @@ def get_household_integrations(site_id):
         if not payload:
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
 
-        types = ['lighting_sw','standby_power_sw','gas_detector','heating','ventilation','door_lock','air_conditioner','real_time_metering','environment_sensor','vpn','all_off_switch','bathroom_phone','kitchen_tv']
-        rows = supabase.table('site_household_integrations').select('*').eq('site_id', site_id).in_('integration_type', types).execute()
+        types = HOUSEHOLD_INTEGRATION_TYPES
+        rows = db.table('site_household_integrations').select('*').eq('site_id', site_id).in_('integration_type', types).execute()
         return jsonify({'items': rows.data or []}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -822,73 +1059,19 @@ def upsert_household_integrations(site_id):
         if not payload:
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
 
         data = request.get_json() or {}
         items = data.get('items', [])
-        print(f"📝 세대부 저장 요청 items: {items}")
-
-        def _normalize(v):
-            if v is None:
-                return None
-            if isinstance(v, str):
-                v2 = v.strip()
-                return v2 if v2 != '' else None
-            return v
-
-        def _yn(v):
-            return 'Y' if str(v or 'N').strip().upper() == 'Y' else 'N'
-
-        saved = []
-        allowed = ['lighting_sw','standby_power_sw','gas_detector','heating','ventilation','door_lock','air_conditioner','real_time_metering','environment_sensor','vpn','all_off_switch','bathroom_phone','kitchen_tv']
-        for item in items:
-            itype = (item.get('integration_type') or '').strip()
-            if itype not in allowed:
-                print(f"⚠️ 허용되지 않은 타입(세대부): {itype}")
-                continue
-            payload_data = {
-                'site_id': site_id,
-                'project_no': _normalize(item.get('project_no')),
-                'integration_type': itype,
-                'enabled': _yn(item.get('enabled')),
-                'company_name': _normalize(item.get('company_name')),
-                'contact_person': _normalize(item.get('contact_person')),
-                'contact_phone': _normalize(item.get('contact_phone')),
-                'notes': _normalize(item.get('notes')),
-                'updated_at': datetime.utcnow().isoformat()
-            }
-            print(f"➡️ 업서트 시도(세대부): {payload_data}")
-
-            # 1) 업데이트 우선(site_id + integration_type)
-            try:
-                upd = supabase.table('site_household_integrations').update(payload_data).eq('site_id', site_id).eq('integration_type', itype).execute()
-                if upd.data:
-                    print(f"✅ 업데이트 성공(세대부): {upd.data}")
-                    saved.append(upd.data[0])
-                    continue
-            except Exception as e_upd:
-                print(f"❌ 업데이트 오류(세대부): {str(e_upd)}")
-
-            # 2) 없으면 삽입
-            try:
-                payload_insert = dict(payload_data)
-                payload_insert['created_at'] = datetime.utcnow().isoformat()
-                ins = supabase.table('site_household_integrations').insert(payload_insert).execute()
-                print(f"✅ 삽입 성공(세대부): {ins.data}")
-                if ins.data:
-                    saved.append(ins.data[0])
-            except Exception as e_ins:
-                print(f"❌ 삽입 오류(세대부): {str(e_ins)}")
-                return jsonify({'error': '세대부연동 저장 실패', 'error_detail': str(e_ins)}), 500
-
-        return jsonify({'message': '세대부연동이 저장되었습니다.', 'items': saved}), 200
+        log.debug('세대부연동 저장 항목', site_id=site_id, items=items)
+        body, status = _save_integration_items('site_household_integrations', HOUSEHOLD_INTEGRATION_TYPES, '세대부', site_id, items)
+        return jsonify(body), status
     except Exception as e:
-        print(f"❌ 세대부연동 전체 오류: {str(e)}")
+        log.exception('세대부연동 저장 오류', site_id=site_id)
         return jsonify({'error': '세대부연동 저장 실패', 'error_detail': str(e)}), 500
 
 # 공용부연동 조회 (주차관제/원격검침/CCTV)
@@ -903,15 +1086,14 @@ def get_common_integrations(site_id):
         if not payload:
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
 
-        types = ['parking_control','remote_metering','cctv','elevator','parcel','ev_charger','parking_location','onepass','rf_card']
-        rows = supabase.table('site_common_integrations').select('*').eq('site_id', site_id).in_('integration_type', types).execute()
+        types = COMMON_INTEGRATION_TYPES
+        rows = db.table('site_common_integrations').select('*').eq('site_id', site_id).in_('integration_type', types).execute()
         return jsonify({'items': rows.data or []}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -920,10 +1102,6 @@ def get_common_integrations(site_id):
 @sites_bp.route('/sites/<int:site_id>/household', methods=['POST'])
 def upsert_site_household(site_id):
     try:
-        print(f"🔍 세대부연동 저장 요청 - 현장 ID: {site_id}")
-        print(f"📝 Raw 데이터: {request.get_data()}")
-        print(f"📝 Content-Type: {request.headers.get('Content-Type', '없음')}")
-        
         auth_header = request.headers.get('Authorization')
         if not auth_header:
             return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
@@ -935,16 +1113,14 @@ def upsert_site_household(site_id):
         # JSON 데이터 안전하게 파싱
         try:
             data = request.get_json()
-            print(f"📝 파싱된 JSON 데이터: {data}")
         except Exception as json_error:
-            print(f"❌ JSON 파싱 오류: {json_error}")
+            log.warning('JSON 파싱 오류', error=str(json_error))
             return jsonify({'error': '잘못된 JSON 형식입니다.'}), 400
         
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
         
@@ -962,35 +1138,30 @@ def upsert_site_household(site_id):
         
         # None 값 제거
         payload_data = {k: v for k, v in payload_data.items() if v is not None}
-        print(f"💾 저장할 데이터: {payload_data}")
+        log.debug('저장 데이터', site_id=site_id, data=payload_data)
         
-        existing = supabase.table('site_household_integrations').select('id').eq('site_id', site_id).limit(1).execute()
+        existing = db.table('site_household_integrations').select('id').eq('site_id', site_id).limit(1).execute()
         if existing.data:
             # 기존 데이터 업데이트
-            result = supabase.table('site_household_integrations').update(payload_data).eq('id', existing.data[0]['id']).execute()
+            result = db.table('site_household_integrations').update(payload_data).eq('id', existing.data[0]['id']).execute()
         else:
             # 새 데이터 삽입
             payload_data['created_at'] = datetime.utcnow().isoformat()
-            result = supabase.table('site_household_integrations').insert(payload_data).execute()
+            result = db.table('site_household_integrations').insert(payload_data).execute()
         
-        print(f"✅ 세대부연동 저장 성공: {result.data[0] if result.data else 'None'}")
         if result.data:
             return jsonify({'message': '세대부연동 정보가 저장되었습니다.', 'household': result.data[0]}), 200
         else:
             return jsonify({'error': '세대부연동 정보 저장 중 오류가 발생했습니다.'}), 500
             
     except Exception as e:
-        print(f"❌ 세대부연동 저장 오류: {str(e)}")
+        log.exception('세대부연동 저장 오류', site_id=site_id)
         return jsonify({'error': str(e)}), 500
 
 # 현장 공용부연동 저장(업서트) - 프론트엔드용
 @sites_bp.route('/sites/<int:site_id>/common', methods=['POST'])
 def upsert_site_common(site_id):
     try:
-        print(f"🔍 공용부연동 저장 요청 - 현장 ID: {site_id}")
-        print(f"📝 Raw 데이터: {request.get_data()}")
-        print(f"📝 Content-Type: {request.headers.get('Content-Type', '없음')}")
-        
         auth_header = request.headers.get('Authorization')
         if not auth_header:
             return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
@@ -1002,16 +1173,14 @@ def upsert_site_common(site_id):
         # JSON 데이터 안전하게 파싱
         try:
             data = request.get_json()
-            print(f"📝 파싱된 JSON 데이터: {data}")
         except Exception as json_error:
-            print(f"❌ JSON 파싱 오류: {json_error}")
+            log.warning('JSON 파싱 오류', error=str(json_error))
             return jsonify({'error': '잘못된 JSON 형식입니다.'}), 400
         
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
         
@@ -1029,25 +1198,24 @@ def upsert_site_common(site_id):
         
         # None 값 제거
         payload_data = {k: v for k, v in payload_data.items() if v is not None}
-        print(f"💾 저장할 데이터: {payload_data}")
+        log.debug('저장 데이터', site_id=site_id, data=payload_data)
         
-        existing = supabase.table('site_common_integrations').select('id').eq('site_id', site_id).limit(1).execute()
+        existing = db.table('site_common_integrations').select('id').eq('site_id', site_id).limit(1).execute()
         if existing.data:
             # 기존 데이터 업데이트
-            result = supabase.table('site_common_integrations').update(payload_data).eq('id', existing.data[0]['id']).execute()
+            result = db.table('site_common_integrations').update(payload_data).eq('id', existing.data[0]['id']).execute()
         else:
             # 새 데이터 삽입
             payload_data['created_at'] = datetime.utcnow().isoformat()
-            result = supabase.table('site_common_integrations').insert(payload_data).execute()
+            result = db.table('site_common_integrations').insert(payload_data).execute()
         
-        print(f"✅ 공용부연동 저장 성공: {result.data[0] if result.data else 'None'}")
         if result.data:
             return jsonify({'message': '공용부연동 정보가 저장되었습니다.', 'common': result.data[0]}), 200
         else:
             return jsonify({'error': '공용부연동 정보 저장 중 오류가 발생했습니다.'}), 500
             
     except Exception as e:
-        print(f"❌ 공용부연동 저장 오류: {str(e)}")
+        log.exception('공용부연동 저장 오류', site_id=site_id)
         return jsonify({'error': str(e)}), 500
 
 # 공용부연동 저장(업서트)
@@ -1062,73 +1230,19 @@ def upsert_common_integrations(site_id):
         if not payload:
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
 
         data = request.get_json() or {}
         items = data.get('items', [])
-        print(f"📝 공용부 저장 요청 items: {items}")
-
-        def _normalize(v):
-            if v is None:
-                return None
-            if isinstance(v, str):
-                v2 = v.strip()
-                return v2 if v2 != '' else None
-            return v
-
-        def _yn(v):
-            return 'Y' if str(v or 'N').strip().upper() == 'Y' else 'N'
-
-        saved = []
-        allowed = ['parking_control','remote_metering','cctv','elevator','parcel','ev_charger','parking_location','onepass','rf_card']
-        for item in items:
-            itype = (item.get('integration_type') or '').strip()
-            if itype not in allowed:
-                print(f"⚠️ 허용되지 않은 타입(공용부): {itype}")
-                continue
-            payload_data = {
-                'site_id': site_id,
-                'project_no': _normalize(item.get('project_no')),
-                'integration_type': itype,
-                'enabled': _yn(item.get('enabled')),
-                'company_name': _normalize(item.get('company_name')),
-                'contact_person': _normalize(item.get('contact_person')),
-                'contact_phone': _normalize(item.get('contact_phone')),
-                'notes': _normalize(item.get('notes')),
-                'updated_at': datetime.utcnow().isoformat()
-            }
-            print(f"➡️ 업서트 시도(공용부): {payload_data}")
-
-            # 1) 업데이트 우선(site_id + integration_type)
-            try:
-                upd = supabase.table('site_common_integrations').update(payload_data).eq('site_id', site_id).eq('integration_type', itype).execute()
-                if upd.data:
-                    print(f"✅ 업데이트 성공(공용부): {upd.data}")
-                    saved.append(upd.data[0])
-                    continue
-            except Exception as e_upd:
-                print(f"❌ 업데이트 오류(공용부): {str(e_upd)}")
-
-            # 2) 없으면 삽입
-            try:
-                payload_insert = dict(payload_data)
-                payload_insert['created_at'] = datetime.utcnow().isoformat()
-                ins = supabase.table('site_common_integrations').insert(payload_insert).execute()
-                print(f"✅ 삽입 성공(공용부): {ins.data}")
-                if ins.data:
-                    saved.append(ins.data[0])
-            except Exception as e_ins:
-                print(f"❌ 삽입 오류(공용부): {str(e_ins)}")
-                return jsonify({'error': '공용부연동 저장 실패', 'error_detail': str(e_ins)}), 500
-
-        return jsonify({'message': '공용부연동이 저장되었습니다.', 'items': saved}), 200
+        log.debug('공용부연동 저장 항목', site_id=site_id, items=items)
+        body, status = _save_integration_items('site_common_integrations', COMMON_INTEGRATION_TYPES, '공용부', site_id, items)
+        return jsonify(body), status
     except Exception as e:
-        print(f"❌ 공용부연동 전체 오류: {str(e)}")
+        log.exception('공용부연동 저장 오류', site_id=site_id)
         return jsonify({'error': '공용부연동 저장 실패', 'error_detail': str(e)}), 500
 
 # 제품수량 조회 (평면 스키마: wallpad_*, doorphone_*, lobbyphone_*, guardphone_*)
@@ -1143,13 +1257,12 @@ def get_site_products(site_id):
         if not payload:
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
-        row = supabase.table('site_products').select('*').eq('site_id', site_id).limit(1).execute()
+        row = db.table('site_products').select('*').eq('site_id', site_id).limit(1).execute()
         return jsonify({'products': (row.data[0] if row.data else None)}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1172,10 +1285,9 @@ def list_site_photos(site_id):
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
 
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
 
@@ -1193,30 +1305,26 @@ def list_site_photos(site_id):
         start = (page - 1) * page_size
         end = start + page_size - 1
 
+        # 테이블 미생성 시 빈 목록
+        if not schema.has_table('site_photos'):
+            return jsonify({'items': [], 'page': page, 'page_size': page_size, 'total': 0, 'has_more': False}), 200
+
         # count 포함하여 조회(가능한 경우)
-        try:
-            q = supabase.table('site_photos').select('*', count='exact').eq('site_id', site_id)
+        def _photo_query(count=None):
+            q = db.table('site_photos').select('*', count=count).eq('site_id', site_id)
             # 소프트 삭제 제외(컬럼이 존재할 때만)
-            try:
+            if schema.has_column('site_photos', 'deleted_at'):
                 q = q.is_('deleted_at', None)
-            except Exception:
-                pass
-            rows = q.order('id', desc=True).range(start, end).execute()
+            return q.order('id', desc=True).range(start, end)
+
+        try:
+            rows = _photo_query('exact').execute()
             total = getattr(rows, 'count', None)
         except Exception as e_sel:
-            # 테이블 미생성/스키마 캐시 오류 시 빈 목록
-            msg = str(e_sel)
-            if 'site_photos' in msg and (
-                'relation' in msg or 'does not exist' in msg or 'schema cache' in msg or 'PGRST' in msg
-            ):
+            if schema.note_error(e_sel, 'site_photos', 'deleted_at') and not schema.has_table('site_photos'):
                 return jsonify({'items': [], 'page': page, 'page_size': page_size, 'total': 0, 'has_more': False}), 200
             try:
-                q2 = supabase.table('site_photos').select('*').eq('site_id', site_id)
-                try:
-                    q2 = q2.is_('deleted_at', None)
-                except Exception:
-                    pass
-                rows = q2.order('id', desc=True).range(start, end).execute()
+                rows = _photo_query().execute()
                 total = None
             except Exception as e_sel2:
                 return jsonify({'error': f'사진 목록 조회 실패: {str(e_sel2)}'}), 500
@@ -1251,10 +1359,9 @@ def upload_site_photo(site_id):
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
 
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by, site_name').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id, 'id, created_by, site_name')
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
 
@@ -1271,9 +1378,12 @@ def upload_site_photo(site_id):
             return jsonify({'error': '파일을 읽을 수 없습니다.'}), 400
         MAX_SIZE = 8 * 1024 * 1024
         if content is None or len(content) == 0:
+            metrics.PHOTO_UPLOAD_REJECTED.labels('empty').inc()
             return jsonify({'error': '빈 파일은 업로드할 수 없습니다.'}), 400
         if len(content) > MAX_SIZE:
+            metrics.PHOTO_UPLOAD_REJECTED.labels('too_large').inc()
             return jsonify({'error': '파일이 너무 큽니다. 최대 8MB까지 업로드할 수 있습니다.'}), 413
+        metrics.observe_photo_upload('supabase' if (supabase_url and supabase_key) else 'local', len(content))
 
         now = datetime.utcnow()
         yyyy = str(now.year)
@@ -1290,12 +1400,7 @@ def upload_site_photo(site_id):
                 bucket = 'site-photos'
 
                 # 업로드
-                storage_client = None
-                try:
-                    storage_client = (supabase_service if 'supabase_service' in globals() and supabase_service else supabase)
-                except Exception:
-                    storage_client = supabase
-                storage = storage_client.storage.from_(bucket)
+                storage = db.storage_bucket(bucket)
                 content_type = file.mimetype or 'application/octet-stream'
                 # supabase-py는 file_options의 키를 camelCase로 기대합니다.
                 storage.upload(object_path, content, { 'contentType': content_type, 'upsert': 'false' })
@@ -1330,15 +1435,14 @@ def upload_site_photo(site_id):
         }
 
         try:
-            res = supabase.table('site_photos').insert(row).execute()
+            res = db.table('site_photos').insert(row).execute()
             saved = res.data[0] if res.data else row
+            if res.data:
+                publish_change('site_photos', res.data[0])
         except Exception as ins_err:
-            msg = str(ins_err)
-            if 'site_photos' in msg and (
-                'relation' in msg or 'does not exist' in msg or 'schema cache' in msg or 'PGRST' in msg
-            ):
+            if schema.note_error(ins_err, 'site_photos'):
                 return jsonify({'error': 'site_photos 테이블이 없습니다. Supabase SQL로 테이블을 먼저 생성해 주세요.'}), 500
-            return jsonify({'error': '사진 메타 저장 실패', 'error_detail': msg}), 500
+            return jsonify({'error': '사진 메타 저장 실패', 'error_detail': str(ins_err)}), 500
 
         return jsonify({'message': '사진이 저장되었습니다.', 'photo': saved}), 201
     except Exception as e:
@@ -1357,12 +1461,11 @@ def delete_site_photo(site_id, photo_id):
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
 
         # 권한 확인: 사진 레코드와 현장 소유자 검사
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
 
-        photo_rows = supabase.table('site_photos').select('id, site_id, created_by, image_url').eq('id', photo_id).eq('site_id', site_id).limit(1).execute()
+        photo_rows = db.table('site_photos').select('id, site_id, created_by, image_url').eq('id', photo_id).eq('site_id', site_id).limit(1).execute()
         if not photo_rows.data:
             return jsonify({'error': '사진을 찾을 수 없습니다.'}), 404
         photo = photo_rows.data[0]
@@ -1371,14 +1474,14 @@ def delete_site_photo(site_id, photo_id):
 
         # 관리자=하드 삭제, 일반=소프트 삭제
         hard_delete = (payload.get('user_role') == 'admin')
-        if not hard_delete:
-            # 소프트 삭제: deleted_at만 표시
+        # 소프트 삭제: deleted_at만 표시 (컬럼이 없으면 하드 삭제로 폴백)
+        if not hard_delete and schema.has_column('site_photos', 'deleted_at'):
             try:
-                supabase.table('site_photos').update({'deleted_at': datetime.utcnow().isoformat()}).eq('id', photo_id).eq('site_id', site_id).execute()
+                db.table('site_photos').update({'deleted_at': datetime.utcnow().isoformat()}).eq('id', photo_id).eq('site_id', site_id).execute()
                 return jsonify({'message': '사진이 삭제되었습니다.(소프트)'}), 200
-            except Exception:
-                # 컬럼이 없으면 하드 삭제로 폴백
-                pass
+            except Exception as e_soft:
+                if not schema.note_error(e_soft, 'site_photos', 'deleted_at'):
+                    raise
 
         # 파일 삭제 시도 (베스트에포트)
         try:
@@ -1390,12 +1493,7 @@ def delete_site_photo(site_id, photo_id):
                     prefix = f"{supabase_url}/storage/v1/object/public/{bucket}/"
                     if public_path.startswith(prefix):
                         object_path = public_path[len(prefix):]
-                        storage_client = None
-                        try:
-                            storage_client = (supabase_service if 'supabase_service' in globals() and supabase_service else supabase)
-                        except Exception:
-                            storage_client = supabase
-                        storage_client.storage.from_(bucket).remove([object_path])
+                        db.storage_bucket(bucket).remove([object_path])
                 except Exception:
                     pass
             elif public_path.startswith('/uploads/'):
@@ -1411,7 +1509,7 @@ def delete_site_photo(site_id, photo_id):
         except Exception:
             pass
 
-        supabase.table('site_photos').delete().eq('id', photo_id).eq('site_id', site_id).execute()
+        db.table('site_photos').delete().eq('id', photo_id).eq('site_id', site_id).execute()
         return jsonify({'message': '사진이 삭제되었습니다.(하드)'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1422,6 +1520,7 @@ def delete_site_photo(site_id, photo_id):
 # =============================
 @sites_bp.route('/export', methods=['GET'])
 def export_data():
+    export_started = time.perf_counter()
     try:
         # 인증
         auth_header = request.headers.get('Authorization')
@@ -1435,6 +1534,11 @@ def export_data():
         user_id = payload.get('user_id')
         user_role = payload.get('user_role')
 
+        # 무거운 모듈은 내보내기 요청에서만 로드 (워커 시작 시간/메모리 절감)
+        import zipfile
+        import requests
+        import pandas as pd
+
         # 파라미터
         fmt = (request.args.get('format') or 'both').lower()  # csv|xlsx|both
         scope = (request.args.get('scope') or 'auto').lower()  # auto|site
@@ -1445,9 +1549,9 @@ def export_data():
 
         # 접근 범위: 관리자면 전체, 일반이면 본인이 만든 현장만
         if user_role == 'admin':
-            base_q = supabase.table('sites').select('id')
+            base_q = db.table('sites').select('id')
         else:
-            base_q = supabase.table('sites').select('id').eq('created_by', user_id)
+            base_q = db.table('sites').select('id').eq('created_by', user_id)
 
         if scope == 'site' and site_id_param:
             try:
@@ -1469,9 +1573,15 @@ def export_data():
             return send_file(buf, mimetype='application/zip', as_attachment=True, download_name=f'export_{ts}.zip')
 
         def fetch_table(name, filter_by_site=True):
-            q = supabase.table(name).select('*')
+            # 마이그레이션 미적용으로 없는 테이블은 빈 시트
+            if not schema.has_table(name):
+                return []
+            q = db.table(name).select('*')
             if filter_by_site:
                 q = q.in_('site_id', site_ids)
+            # 소프트 삭제 제외
+            if name == 'site_photos' and schema.has_column('site_photos', 'deleted_at'):
+                q = q.is_('deleted_at', None)
             rows = q.execute()
             return rows.data or []
 
@@ -1481,18 +1591,10 @@ def export_data():
         if user_role != 'admin':
             data_sites = [r for r in data_sites if r.get('id') in site_ids]
         data_contacts = fetch_table('site_contacts')
-        # 복수 연락처 테이블은 없을 수 있으므로 예외 보호
-        try:
-            data_contact_people = fetch_table('site_contact_people')
-        except Exception:
-            data_contact_people = []
+        data_contact_people = fetch_table('site_contact_people')
         data_products = fetch_table('site_products')
         data_work_items = fetch_table('work_items')
-        # 소프트 삭제 제외
-        try:
-            data_photos = supabase.table('site_photos').select('*').in_('site_id', site_ids).is_('deleted_at', None).execute().data or []
-        except Exception:
-            data_photos = fetch_table('site_photos')
+        data_photos = fetch_table('site_photos')
 
         # Excel 단일 시트용 병합 데이터프레임(table 구분 컬럼 포함)
         def df_with_table(rows, table_name):
@@ -1567,12 +1669,15 @@ def export_data():
                     if engine is None:
                         raise RuntimeError("No Excel engine available (xlsxwriter/openpyxl): " + str(engine_errors))
 
-                    xls = BytesIO()
-                    with pd.ExcelWriter(xls, engine=engine) as writer:
-                        # 하나의 시트에 모두(컬럼 유니온) + table 컬럼 포함
-                        df_all.to_excel(writer, sheet_name='export', index=False)
-                    xls.seek(0)
-                    zf.writestr('data/export.xlsx', xls.read())
+                    def build_xlsx():
+                        xls = BytesIO()
+                        with pd.ExcelWriter(xls, engine=engine) as writer:
+                            # 하나의 시트에 모두(컬럼 유니온) + table 컬럼 포함
+                            df_all.to_excel(writer, sheet_name='export', index=False)
+                        return xls.getvalue()
+
+                    # 엑셀 생성은 CPU 작업: gevent 모드에서는 스레드풀에서 실행
+                    zf.writestr('data/export.xlsx', serving.run_blocking(build_xlsx))
                 except Exception as e_xlsx:
                     # 실패 시 안내 파일만 기록
                     try:
@@ -1638,10 +1743,69 @@ def export_data():
                     except Exception:
                         continue
 
+        metrics.observe_export(fmt, time.perf_counter() - export_started, buf.tell())
         buf.seek(0)
         return send_file(buf, mimetype='application/zip', as_attachment=True, download_name=f'export_{ts}.zip')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+# =============================
+# 자재 집계: 제품/모델별 수량 합계 (materials.py)
+# =============================
+def _load_materials_pages():
+    return (db.select_pages('sites', materials.site_columns(), materials.MATERIALS_PAGE_SIZE),
+            db.select_pages('site_products', materials.product_columns(), materials.MATERIALS_PAGE_SIZE))
+
+
+@sites_bp.route('/reports/materials', methods=['GET'])
+def materials_report():
+    """?group_by=construction_company,month,home_iot (부분 선택 가능) &month_field=delivery_date &format=json|csv
+    관리자는 전체, 일반 사용자는 본인이 등록한 현장만 집계"""
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        raw_group = request.args.get('group_by')
+        group_by = [g.strip() for g in (raw_group if raw_group is not None else ','.join(materials.GROUP_COLUMNS)).split(',') if g.strip()]
+        invalid = [g for g in group_by if g not in materials.GROUP_COLUMNS]
+        if invalid:
+            return jsonify({'error': f"group_by는 {', '.join(materials.GROUP_COLUMNS)} 중에서 선택하세요."}), 400
+        group_by = [g for g in materials.GROUP_COLUMNS if g in group_by]
+        month_field = (request.args.get('month_field') or 'delivery_date').strip()
+        if month_field not in materials.MONTH_FIELDS:
+            return jsonify({'error': f"month_field는 {', '.join(materials.MONTH_FIELDS)} 중 하나여야 합니다."}), 400
+        fmt = (request.args.get('format') or 'json').lower()
+
+        base, cached = materials.materials_rollup.base(_load_materials_pages, month_field, serving.run_blocking)
+        created_by = None if payload.get('user_role') == 'admin' else payload.get('user_id')
+        rows, totals = materials.summarize(base, group_by, created_by)
+        columns = group_by + ['product', 'model', 'qty', 'sites']
+
+        if fmt == 'csv':
+            ts = datetime.utcnow().strftime('%Y%m%d_%H%M')
+            body = '\ufeff' + rows[columns].to_csv(index=False)
+            return current_app.response_class(body, mimetype='text/csv; charset=utf-8', headers={
+                'Content-Disposition': f'attachment; filename=materials_{ts}.csv',
+                'X-Cache': 'hit' if cached else 'miss'
+            })
+        return jsonify({
+            'group_by': group_by,
+            'month_field': month_field,
+            'rows': rows[columns].to_dict(orient='records'),
+            'totals': totals,
+            'cached': cached
+        }), 200
+    except Exception as e:
+        log.exception('자재 집계 오류')
+        return jsonify({'error': str(e)}), 500
+
+
 # =============================
 # 현장별 업무관리: Work Items / Alarms
 # =============================
@@ -1659,15 +1823,14 @@ def list_work_items(site_id):
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
 
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by, site_name').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id, 'id, created_by, site_name')
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
 
         status = (request.args.get('status') or '').strip().lower()
-        q = supabase.table('work_items').select('*').eq('site_id', site_id)
+        q = db.table('work_items').select('*').eq('site_id', site_id)
         if status in ['todo', 'done']:
             q = q.eq('status', status)
         rows = q.order('id', desc=True).execute()
@@ -1676,6 +1839,52 @@ def list_work_items(site_id):
         return jsonify({'error': str(e)}), 500
 
 
+# 작업 항목 배열 업서트 본문 처리 (POST /sites/<id>/work-items, POST /batch 공용)
+def _save_work_items(site_id, items, payload):
+    if not isinstance(items, list):
+        return {'error': 'items 배열이 필요합니다.'}, 400
+
+    saved = []
+    for it in items:
+        content = (it.get('content') or '').strip()
+        if not content:
+            continue
+        status = (it.get('status') or 'todo').strip().lower()
+        if status not in ['todo','done']:
+            status = 'todo'
+        payload_data = {
+            'site_id': site_id,
+            'content': content,
+            'status': status,
+            'alarm_date': (it.get('alarm_date') or None),
+            'done_date': (it.get('done_date') or None),
+            'updated_at': datetime.utcnow().isoformat(),
+            'created_by': payload['user_id']
+        }
+        # done 저장인데 done_date가 없으면 클라이언트 로컬 날짜를 못받은 경우를 대비해 서버 날짜로 보정
+        if status == 'done' and not payload_data['done_date']:
+            payload_data['done_date'] = date.today().isoformat()
+
+        # todo 상태인 경우 새 알람은 미확인으로 유지
+        if status == 'todo':
+            payload_data['alarm_confirmed'] = False
+
+        if it.get('id'):
+            # 업데이트 (상태 전환 포함)
+            res = db.table('work_items').update(payload_data).eq('id', it['id']).eq('site_id', site_id).execute()
+            if res.data:
+                saved.append(res.data[0])
+        else:
+            payload_data['created_at'] = datetime.utcnow().isoformat()
+            res = db.table('work_items').insert(payload_data).execute()
+            if res.data:
+                saved.append(res.data[0])
+
+    for row in saved:
+        publish_change('work_items', row)
+    return {'message': '작업 항목이 저장되었습니다.', 'items': saved}, 200
+
+
 @sites_bp.route('/sites/<int:site_id>/work-items', methods=['POST'])
 def upsert_work_items(site_id):
     """배열 업서트: To do/Done 일괄 저장
@@ -1694,55 +1903,15 @@ def upsert_work_items(site_id):
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
 
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
 
         data = request.get_json() or {}
-        items = data.get('items', [])
-        if not isinstance(items, list):
-            return jsonify({'error': 'items 배열이 필요합니다.'}), 400
-
-        saved = []
-        for it in items:
-            content = (it.get('content') or '').strip()
-            if not content:
-                continue
-            status = (it.get('status') or 'todo').strip().lower()
-            if status not in ['todo','done']:
-                status = 'todo'
-            payload_data = {
-                'site_id': site_id,
-                'content': content,
-                'status': status,
-                'alarm_date': (it.get('alarm_date') or None),
-                'done_date': (it.get('done_date') or None),
-                'updated_at': datetime.utcnow().isoformat(),
-                'created_by': payload['user_id']
-            }
-            # done 저장인데 done_date가 없으면 클라이언트 로컬 날짜를 못받은 경우를 대비해 서버 날짜로 보정
-            if status == 'done' and not payload_data['done_date']:
-                payload_data['done_date'] = date.today().isoformat()
-
-            # todo 상태인 경우 새 알람은 미확인으로 유지
-            if status == 'todo':
-                payload_data['alarm_confirmed'] = False
-
-            if it.get('id'):
-                # 업데이트 (상태 전환 포함)
-                res = supabase.table('work_items').update(payload_data).eq('id', it['id']).eq('site_id', site_id).execute()
-                if res.data:
-                    saved.append(res.data[0])
-            else:
-                payload_data['created_at'] = datetime.utcnow().isoformat()
-                res = supabase.table('work_items').insert(payload_data).execute()
-                if res.data:
-                    saved.append(res.data[0])
-
-        return jsonify({'message': '작업 항목이 저장되었습니다.', 'items': saved}), 200
+        body, status = _save_work_items(site_id, data.get('items', []), payload)
+        return jsonify(body), status
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1760,17 +1929,16 @@ def list_alarms(site_id):
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
 
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by, site_name').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id, 'id, created_by, site_name')
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
 
         # today는 클라이언트 로컬 날짜(YYYY-MM-DD) 전달 가능, 없으면 서버 날짜 사용
         today = (request.args.get('today') or date.today().isoformat())
 
-        rows = supabase.table('work_items').select('*') \
+        rows = db.table('work_items').select('*') \
             .eq('site_id', site_id) \
             .eq('status', 'todo') \
             .eq('alarm_confirmed', False) \
@@ -1799,10 +1967,9 @@ def confirm_alarms(site_id):
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
 
         # 권한 확인
-        site = supabase.table('sites').select('id, created_by').eq('id', site_id).execute()
-        if not site.data:
+        site_info = db.get_site_access(site_id)
+        if not site_info:
             return jsonify({'error': '현장을 찾을 수 없습니다.'}), 404
-        site_info = site.data[0]
         if payload['user_role'] != 'admin' and site_info['created_by'] != payload['user_id']:
             return jsonify({'error': '접근 권한이 없습니다.'}), 403
 
@@ -1811,7 +1978,7 @@ def confirm_alarms(site_id):
         if not ids:
             return jsonify({'message': '확인할 항목이 없습니다.', 'updated': 0}), 200
         # 일괄 업데이트
-        res = supabase.table('work_items').update({
+        res = db.table('work_items').update({
             'alarm_confirmed': True,
             'updated_at': datetime.utcnow().isoformat()
         }).in_('id', ids).eq('site_id', site_id).execute()
@@ -1820,27 +1987,29 @@ def confirm_alarms(site_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# 프로젝트 번호 사용 현황은 프로세스 비트맵 인덱스에서 확인(등록/수정 시 갱신, project_numbers.py)
+PROJECT_NO_BATCH_MAX = 1000
+PROJECT_NO_FORMAT_ERROR = '프로젝트 번호 형식이 올바르지 않습니다. (예: NA/1234, NE/5678)'
+
+
+def _load_project_numbers():
+    return db.select_pages('sites', 'id, project_no, site_name')
+
+
 # 프로젝트 번호 중복 체크
 @sites_bp.route('/check-project-no', methods=['POST'])
 def check_project_no():
     try:
-        print(f"🔍 프로젝트 번호 중복 체크 요청")
-        print(f"🔑 인증 헤더: {request.headers.get('Authorization', '없음')}")
-        print(f"📝 Content-Type: {request.headers.get('Content-Type', '없음')}")
-        print(f"📝 Raw 데이터: {request.get_data()}")
-        
         # JSON 데이터 안전하게 파싱
         try:
             data = request.get_json()
-            print(f"📝 파싱된 JSON 데이터: {data}")
         except Exception as json_error:
-            print(f"❌ JSON 파싱 오류: {json_error}")
+            log.warning('JSON 파싱 오류', error=str(json_error))
             return jsonify({'error': '잘못된 JSON 형식입니다.'}), 400
         
         # 인증 확인
         auth_header = request.headers.get('Authorization')
         if not auth_header:
-            print("❌ 인증 헤더 없음")
             return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
         
         token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
@@ -1849,31 +2018,21 @@ def check_project_no():
         if not payload:
             return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
         
-        data = request.get_json()
-        project_no = data.get('project_no')
+        project_no = (data or {}).get('project_no')
         
         if not project_no:
             return jsonify({'error': '프로젝트 번호가 필요합니다.'}), 400
         
-        # 프로젝트 번호 형식 검증 (NA/XXXX 또는 NE/XXXX)
-        import re
-        if not re.match(r'^(NA|NE)/\d{4}$', project_no):
-            return jsonify({'error': '프로젝트 번호 형식이 올바르지 않습니다. (예: NA/1234, NE/5678)'}), 400
-        
-        # 중복 체크
-        existing = supabase.table('sites').select('id, site_name').eq('project_no', project_no).execute()
+        # 형식 검증(NA/XXXX 또는 NE/XXXX) + 중복 체크
+        existing = project_number_index.lookup(_load_project_numbers, project_no)
+        if existing is None:
+            return jsonify({'error': PROJECT_NO_FORMAT_ERROR}), 400
         
-        # 더미 데이터인 경우 항상 사용 가능으로 처리
-        if not supabase_url or not supabase_key:
-            return jsonify({
-                'is_duplicate': False,
-                'message': f'프로젝트 번호 "{project_no}"를 사용할 수 있습니다.'
-            }), 200
-        elif existing.data:
+        if existing:
             return jsonify({
                 'is_duplicate': True,
                 'message': f'프로젝트 번호 "{project_no}"가 이미 사용 중입니다.',
-                'existing_site': existing.data[0]
+                'existing_site': existing[0]
             }), 200
         else:
             return jsonify({
@@ -1882,10 +2041,639 @@ def check_project_no():
             }), 200
             
     except Exception as e:
-        print(f"❌ 프로젝트 번호 중복 체크 오류: {str(e)}")
-        print(f"🔍 오류 타입: {type(e).__name__}")
-        import traceback
-        print(f"📚 스택 트레이스: {traceback.format_exc()}")
+        log.exception('프로젝트 번호 중복 체크 오류')
+        return jsonify({'error': str(e)}), 500
+
+
+# 프로젝트 번호 일괄 중복 체크 (엑셀 붙여넣기 등): {"project_nos": ["NA/0001", ...]}
+@sites_bp.route('/check-project-no/batch', methods=['POST'])
+def check_project_no_batch():
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        data = request.get_json(silent=True) or {}
+        project_nos = data.get('project_nos')
+        if not isinstance(project_nos, list) or not project_nos:
+            return jsonify({'error': 'project_nos 목록이 필요합니다.'}), 400
+        if len(project_nos) > PROJECT_NO_BATCH_MAX:
+            return jsonify({'error': f'한 번에 최대 {PROJECT_NO_BATCH_MAX}개까지 확인할 수 있습니다.'}), 400
+
+        results = project_number_index.check_many(_load_project_numbers, project_nos)
+        # 요청 목록 안에서 중복된 번호
+        seen = {}
+        for item in results:
+            if item['valid']:
+                seen[item['project_no']] = seen.get(item['project_no'], 0) + 1
+        for item in results:
+            if item['valid']:
+                item['repeated_in_request'] = seen[item['project_no']] > 1
+        return jsonify({
+            'results': results,
+            'duplicates': sum(1 for r in results if r.get('is_duplicate')),
+            'invalid': sum(1 for r in results if not r['valid'])
+        }), 200
+    except Exception as e:
+        log.exception('프로젝트 번호 일괄 체크 오류')
+        return jsonify({'error': str(e)}), 500
+
+
+# 다음 빈 프로젝트 번호 제안: ?prefix=NA|NE [&count=1..20] [&after=1234]
+@sites_bp.route('/project-no/next', methods=['GET'])
+def suggest_project_no():
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        prefix = (request.args.get('prefix') or 'NA').strip().upper()
+        if prefix not in PROJECT_NO_PREFIXES:
+            return jsonify({'error': f"prefix는 {', '.join(PROJECT_NO_PREFIXES)} 중 하나여야 합니다."}), 400
+        try:
+            count = min(max(int(request.args.get('count', '1')), 1), 20)
+        except Exception:
+            count = 1
+        after = None
+        if (request.args.get('after') or '').strip():
+            try:
+                after = int(request.args.get('after'))
+            except Exception:
+                return jsonify({'error': 'after는 0~9999 숫자여야 합니다.'}), 400
+            if not 0 <= after < PROJECT_NO_SPACE:
+                return jsonify({'error': 'after는 0~9999 숫자여야 합니다.'}), 400
+
+        suggestions, free = project_number_index.next_free(_load_project_numbers, prefix, after, count)
+        if not suggestions:
+            return jsonify({'error': f'{prefix} 접두어의 빈 프로젝트 번호가 없습니다.', 'free': 0}), 409
+        return jsonify({'prefix': prefix, 'project_no': suggestions[0], 'suggestions': suggestions, 'free': free}), 200
+    except Exception as e:
+        log.exception('프로젝트 번호 제안 오류')
+        return jsonify({'error': str(e)}), 500
+
+
+# =============================
+# 현장 일괄 가져오기 (XLSX/CSV, site_import.py)
+# =============================
+@sites_bp.route('/sites/import', methods=['POST'])
+def import_sites():
+    """multipart file=<.xlsx|.csv> [&dry_run=1: 검증만] [&encoding=cp949: CSV 문자 인코딩, 미지정 시 UTF-8 → cp949 자동 판별]
+    첫 행 머리글(project_no 또는 '프로젝트 번호' 등), 통과한 행만 등록하고 오류 행은 CSV로 내려받기"""
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        file = request.files.get('file')
+        if not file:
+            return jsonify({'error': '가져올 파일(file)이 필요합니다.'}), 400
+        content = file.read(site_import.IMPORT_MAX_BYTES + 1)
+        if len(content) > site_import.IMPORT_MAX_BYTES:
+            return jsonify({'error': f'파일이 너무 큽니다. 최대 {site_import.IMPORT_MAX_BYTES // (1024 * 1024)}MB까지 가져올 수 있습니다.'}), 413
+        dry_run = str(request.values.get('dry_run', '')).lower() in ['1', 'true', 'yes', 'y']
+        started = time.perf_counter()
+
+        # 파일 읽기/검증은 CPU 작업 → 스레드풀, DB 중복은 프로젝트 번호 인덱스에 파일 번호 전체를 한 번에 조회
+        try:
+            encoding = (request.values.get('encoding') or '').strip() or None
+            frame, columns = serving.run_blocking(site_import.read_frame, file.filename, BytesIO(content), encoding)
+        except site_import.ImportFileError as e:
+            return jsonify({'error': str(e)}), 400
+        candidates = sorted(set(site_import.project_nos(frame)) - {''})
+        checked = project_number_index.check_many(_load_project_numbers, candidates)
+        taken = {r['project_no'] for r in checked if r.get('is_duplicate')}
+        valid, errors = serving.run_blocking(site_import.validate, frame, taken)
+
+        ok = errors == ''
+        row_numbers = frame.loc[ok, '_row'].tolist()
+        inserted = []
+        if not dry_run and row_numbers:
+            records = site_import.to_records(valid[ok], payload['user_id'], datetime.utcnow().isoformat())
+            inserted, failed = site_import.insert_batches(
+                records, row_numbers, lambda chunk: db.table('sites').insert(chunk).execute().data)
+            if failed:
+                failed_mask = frame['_row'].isin(failed)
+                errors = errors.where(~failed_mask, frame['_row'].map(failed))
+            if inserted:
+                for row in inserted:
+                    publish_change('sites', row)
+                project_number_index.note_sites(inserted)
+                site_search_index.note_sites(inserted)
+                site_catalog.note_sites(inserted)
+                materials.materials_rollup.bump()
+
+        bad = errors[errors != '']
+        import_id = site_import.write_errors(payload['user_id'], frame, columns, bad) if len(bad) else None
+        log.info('현장 가져오기', user_id=payload['user_id'], rows=len(frame), inserted=len(inserted),
+                 failed=len(bad), dry_run=dry_run, elapsed_ms=int((time.perf_counter() - started) * 1000))
+        preview = [{'row': int(frame.at[idx, '_row']), 'project_no': valid.at[idx, 'project_no'], 'error': message}
+                   for idx, message in bad.head(100).items()]
+        return jsonify({
+            'dry_run': dry_run,
+            'total_rows': len(frame),
+            'valid_rows': int(ok.sum()),
+            'inserted': len(inserted),
+            'failed': len(bad),
+            'errors': preview,
+            'import_id': import_id,
+            'errors_url': f'/sites/import/{import_id}/errors' if import_id else None
+        }), 200
+    except db.SupabaseUnavailable as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after or 30)}
+    except Exception as e:
+        log.exception('현장 가져오기 오류')
+        return jsonify({'error': str(e)}), 500
+
+
+@sites_bp.route('/sites/import/<import_id>/errors', methods=['GET'])
+def download_import_errors(import_id):
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        path = site_import.error_file(import_id, None if payload.get('user_role') == 'admin' else payload['user_id'])
+        if not path:
+            return jsonify({'error': '오류 파일을 찾을 수 없습니다. (보관 기간이 지났을 수 있습니다)'}), 404
+        return send_file(str(path), mimetype='text/csv', as_attachment=True, download_name=f'import_errors_{import_id[:8]}.csv')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# =============================
+# 모바일 오프라인 동기화: 델타 조회
+# =============================
+# (테이블, 변경 시각 컬럼) - site_photos는 updated_at이 없어 uploaded_at 사용
+SYNC_TABLES = [
+    ('sites', 'updated_at'),
+    ('site_contacts', 'updated_at'),
+    ('site_contact_people', 'updated_at'),
+    ('site_products', 'updated_at'),
+    ('site_household_integrations', 'updated_at'),
+    ('site_common_integrations', 'updated_at'),
+    ('work_items', 'updated_at'),
+    ('site_photos', 'uploaded_at'),
+]
+SYNC_PAGE_LIMIT = 2000
+
+
+def _parse_sync_ts(value):
+    """ISO 문자열 -> aware datetime (naive는 UTC로 간주), 실패 시 None"""
+    try:
+        dt = datetime.fromisoformat(str(value or '').replace('Z', '+00:00'))
+    except Exception:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _encode_sync_cursor(ts, last_ids):
+    """커서 = (변경 시각, 그 시각에 이미 보낸 테이블별 마지막 id) -> URL 안전 문자열"""
+    body = json.dumps({'ts': ts, 'ids': last_ids}, separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(body.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_sync_cursor(value):
+    """커서 -> (시각 문자열, {테이블: 마지막 id}), 형식 오류 시 (None, None)
+    - 이전 형식(ISO 시각만)도 허용: 마지막 id 없이 해당 시각 포함(gte)으로 조회
+    """
+    if _parse_sync_ts(value) is not None:
+        return value, {}
+    try:
+        body = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode('utf-8'))
+        ts, last_ids = body['ts'], body.get('ids') or {}
+        if _parse_sync_ts(ts) is None or not isinstance(last_ids, dict):
+            return None, None
+        return ts, {str(k): int(v) for k, v in last_ids.items()}
+    except Exception:
+        return None, None
+
+
+def _sync_keyset_rows(build, ts_col, since, last_id, limit):
+    """(ts_col, id) 키셋 페이지: since 시각의 행은 last_id 이후만, 그 뒤 시각은 전부 -> (ts_col, id) 순 최대 limit행
+    - build(): 권한/삭제 필터가 적용된 새 쿼리 (OR 필터 대신 두 번 조회: 같은 시각 나머지 + 이후 시각)
+    - PostgREST는 order 파라미터를 하나만 읽으므로 정렬 컬럼은 한 번에 지정
+    """
+    rows = []
+    if since and last_id is not None:
+        rows = build().eq(ts_col, since).gt('id', last_id).order('id').limit(limit).execute().data or []
+    if len(rows) < limit:
+        q = build()
+        if since:
+            q = q.gt(ts_col, since) if last_id is not None else q.gte(ts_col, since)
+        rows += q.order(f'{ts_col},id').limit(limit - len(rows)).execute().data or []
+    return rows
+
+
+@sites_bp.route('/sync', methods=['GET'])
+def sync_changes():
+    """델타 동기화: since 커서 이후 변경된 행 + 삭제 기록(tombstones) + 다음 커서
+    - since 미지정: 전체 스냅샷(full=true)
+    - 커서는 (변경 시각, id) 키셋: 같은 시각의 행이 limit보다 많아도 id 순으로 이어서 전달
+    - has_more=true면 반환된 cursor로 즉시 재호출 (잘리지 않은 테이블의 행은 다시 올 수 있으므로 클라이언트는 id 기준 upsert로 반영)
+    """
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        # URL 인코딩 없이 전달된 '+00:00'은 공백으로 디코딩되므로 복원
+        since_raw = (request.args.get('since') or '').strip().replace(' ', '+')
+        since, since_ids = None, {}
+        if since_raw:
+            since, since_ids = _decode_sync_cursor(since_raw)
+            if since is None:
+                return jsonify({'error': 'since 커서 형식이 올바르지 않습니다.'}), 400
+        try:
+            limit = int(request.args.get('limit', SYNC_PAGE_LIMIT))
+            if limit <= 0 or limit > SYNC_PAGE_LIMIT:
+                limit = SYNC_PAGE_LIMIT
+        except Exception:
+            limit = SYNC_PAGE_LIMIT
+
+        is_admin = payload.get('user_role') == 'admin'
+        user_id = payload.get('user_id')
+
+        # 일반 사용자는 본인이 등록한 현장 범위만: 하위 테이블은 sites 조인으로 필터(/alarms와 동일)
+        # - 현장 id 목록을 URL에 싣지 않으므로 현장이 많아도 요청 줄 길이 제한에 걸리지 않음
+        scoped = not is_admin
+
+        changes = {}
+        tombstones = []
+        delivered = {}        # 커서 키 -> [(시각, 원본 시각 문자열, id)] 이번 응답에 담은 행
+        truncated_marks = []  # 페이지가 잘린 커서 키의 마지막 (시각, 원본 시각 문자열)
+
+        def _track(key, rows, ts_col):
+            marks = delivered.setdefault(key, [])
+            for r in rows:
+                dt = _parse_sync_ts(r.get(ts_col))
+                if dt is not None:
+                    marks.append((dt, r.get(ts_col), r.get('id')))
+            if len(rows) >= limit and marks:
+                truncated_marks.append(marks[-1][:2])
+
+        for table_name, ts_col in SYNC_TABLES:
+            if not schema.has_table(table_name):
+                changes[table_name] = []
+                continue
+
+            def _build(table_name=table_name):
+                if table_name == 'sites':
+                    q = db.table('sites').select('*')
+                    if scoped:
+                        q = q.eq('created_by', user_id)
+                elif scoped:
+                    q = db.table(table_name).select('*, sites!inner(created_by)').eq('sites.created_by', user_id)
+                else:
+                    q = db.table(table_name).select('*')
+                if table_name == 'site_photos' and schema.has_column('site_photos', 'deleted_at'):
+                    q = q.is_('deleted_at', None)
+                return q
+
+            try:
+                rows = _sync_keyset_rows(_build, ts_col, since, since_ids.get(table_name), limit)
+            except Exception as e_tbl:
+                if schema.note_error(e_tbl, table_name):
+                    changes[table_name] = []
+                    continue
+                raise
+            for r in rows:
+                r.pop('sites', None)  # 범위 필터용 조인 컬럼
+            _track(table_name, rows, ts_col)
+            changes[table_name] = rows
+
+        if since and schema.has_column('site_photos', 'deleted_at'):
+            # 소프트 삭제된 사진
+            def _build_soft():
+                if scoped:
+                    return db.table('site_photos').select('id, site_id, deleted_at, sites!inner(created_by)').eq('sites.created_by', user_id)
+                return db.table('site_photos').select('id, site_id, deleted_at')
+
+            try:
+                rows = _sync_keyset_rows(_build_soft, 'deleted_at', since, since_ids.get('site_photos.deleted'), limit)
+                for r in rows:
+                    tombstones.append({'table': 'site_photos', 'id': r.get('id'), 'site_id': r.get('site_id'), 'deleted_at': r.get('deleted_at')})
+                _track('site_photos.deleted', rows, 'deleted_at')
+            except Exception as e_soft:
+                if not schema.note_error(e_soft, 'site_photos', 'deleted_at'):
+                    raise
+
+        if since and schema.has_table('sync_tombstones'):
+            # 하드 삭제 기록(트리거로 적재) - 본인 현장이 모두 삭제된 경우도 전달해야 하므로 owner_id로 필터
+            def _build_tomb():
+                q = db.table('sync_tombstones').select('id, table_name, row_id, site_id, deleted_at')
+                if not is_admin:
+                    q = q.eq('owner_id', user_id)
+                return q
+
+            try:
+                rows = _sync_keyset_rows(_build_tomb, 'deleted_at', since, since_ids.get('sync_tombstones'), limit)
+                for r in rows:
+                    tombstones.append({'table': r.get('table_name'), 'id': r.get('row_id'), 'site_id': r.get('site_id'), 'deleted_at': r.get('deleted_at')})
+                _track('sync_tombstones', rows, 'deleted_at')
+            except Exception as e_tomb:
+                if not schema.note_error(e_tomb, 'sync_tombstones'):
+                    raise
+
+        # 잘린 키가 있으면 그중 가장 이른 시각까지만 커서 전진(누락 방지), 없으면 가장 최근 변경 시각
+        has_more = bool(truncated_marks)
+        if has_more:
+            cursor_dt, cursor_ts = min(truncated_marks, key=lambda m: m[0])
+        else:
+            latest = [marks[-1][:2] for marks in delivered.values() if marks]
+            if latest:
+                cursor_dt, cursor_ts = max(latest, key=lambda m: m[0])
+            elif since:
+                cursor_dt, cursor_ts = _parse_sync_ts(since), since
+            else:
+                cursor_dt = datetime.now(timezone.utc)
+                cursor_ts = cursor_dt.isoformat()
+        # 커서 시각의 행은 키별로 이미 보낸 마지막 id를 함께 기록 → 다음 호출은 그 id 이후부터
+        # (커서 시각이 잘린 키들의 최소값이므로 커서 시각까지의 행은 모든 키에서 빠짐없이 보냄)
+        cursor_ids = dict(since_ids) if since and cursor_dt == _parse_sync_ts(since) else {}
+        for key, marks in delivered.items():
+            at_cursor = [mark_id for dt, _, mark_id in marks if dt == cursor_dt and mark_id is not None]
+            if at_cursor:
+                cursor_ids[key] = max(at_cursor)
+
+        return jsonify({
+            'cursor': _encode_sync_cursor(cursor_ts, cursor_ids),
+            'full': since is None,
+            'has_more': has_more,
+            'changes': changes,
+            'tombstones': tombstones
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# =============================
+# 오프라인 편집 일괄 반영: Batch
+# =============================
+BATCH_MAX_OPERATIONS = 100
+BATCH_OP_TYPES = ['site.create', 'site.update', 'products.save', 'contacts.save', 'household.save', 'common.save', 'work_items.save']
+# batch_idempotency 테이블이 없을 때 사용하는 워커 로컬 보관소(최근 키만 유지)
+_BATCH_LOCAL_KEYS_MAX = 5000
+_batch_local_keys = {}
+
+
+def _load_batch_results(user_id, keys):
+    """이미 처리된 op_id 결과 조회 -> {op_id: {'status', 'response'}} (1회 조회)"""
+    if not keys:
+        return {}
+    if not schema.has_table('batch_idempotency'):
+        return {k: _batch_local_keys[(user_id, k)] for k in keys if (user_id, k) in _batch_local_keys}
+    try:
+        rows = db.table('batch_idempotency').select('op_key, status, response').eq('user_id', user_id).in_('op_key', keys).execute()
+        return {r['op_key']: {'status': r.get('status'), 'response': r.get('response')} for r in (rows.data or [])}
+    except Exception as e:
+        if not schema.note_error(e, 'batch_idempotency'):
+            log.warning('멱등성 키 조회 실패', error=str(e))
+        return {k: _batch_local_keys[(user_id, k)] for k in keys if (user_id, k) in _batch_local_keys}
+
+
+def _store_batch_result(user_id, op_id, op_type, status, response):
+    """성공한 작업 결과를 즉시 저장(작업마다 upsert: 중간 실패/동시 재전송에도 기록 유지), 테이블이 없으면 워커 로컬 보관"""
+    if schema.has_table('batch_idempotency'):
+        try:
+            db.table('batch_idempotency').upsert({
+                'user_id': user_id,
+                'op_key': op_id,
+                'op_type': op_type,
+                'status': status,
+                'response': response,
+                'created_at': datetime.utcnow().isoformat()
+            }, on_conflict='user_id,op_key').execute()
+            return
+        except Exception as e:
+            if not schema.note_error(e, 'batch_idempotency'):
+                log.warning('멱등성 키 저장 실패', error=str(e), op_id=op_id)
+    if len(_batch_local_keys) >= _BATCH_LOCAL_KEYS_MAX:
+        _batch_local_keys.pop(next(iter(_batch_local_keys)))
+    _batch_local_keys[(user_id, op_id)] = {'status': status, 'response': response}
+
+
+@sites_bp.route('/batch', methods=['POST'])
+def batch_operations():
+    """오프라인에 쌓인 편집을 순서대로 일괄 반영
+    입력: { operations: [ {op_id, type, site_id?, data?, items?} ], stop_on_error?: bool }
+      - op_id: 클라이언트가 만든 멱등성 키. 같은 키 재전송 시 다시 실행하지 않고 저장된 결과 반환
+      - type: site.create | site.update | products.save | contacts.save | household.save | common.save | work_items.save
+      - site_id: 정수 또는 '$<op_id>' (같은 배치 앞쪽 site.create 결과 참조)
+    인증/멱등성 조회/현장 권한 조회는 배치당 1회씩만 수행합니다.
+    """
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        data = request.get_json() or {}
+        operations = data.get('operations')
+        stop_on_error = bool(data.get('stop_on_error', False))
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'operations 배열이 필요합니다.'}), 400
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            return jsonify({'error': f'한 번에 최대 {BATCH_MAX_OPERATIONS}개 작업까지 처리할 수 있습니다.'}), 400
+
+        seen = set()
+        for op in operations:
+            if not isinstance(op, dict):
+                return jsonify({'error': '각 작업은 객체여야 합니다.'}), 400
+            op_id = str(op.get('op_id') or '').strip()
+            if not op_id or len(op_id) > 100:
+                return jsonify({'error': '모든 작업에 op_id(최대 100자)가 필요합니다.'}), 400
+            if op_id in seen:
+                return jsonify({'error': f'중복된 op_id입니다: {op_id}'}), 400
+            if op.get('type') not in BATCH_OP_TYPES:
+                return jsonify({'error': f'지원하지 않는 작업 유형입니다: {op.get("type")}'}), 400
+            seen.add(op_id)
+
+        user_id = payload['user_id']
+        is_admin = payload.get('user_role') == 'admin'
+        done = _load_batch_results(user_id, list(seen))
+
+        # 참조된 기존 현장의 소유자 일괄 조회
+        ref_ids = set()
+        for op in operations:
+            sid = op.get('site_id')
+            if str(op['op_id']).strip() not in done and isinstance(sid, int) and not isinstance(sid, bool):
+                ref_ids.add(sid)
+        owners = {}
+        if ref_ids:
+            rows = db.table('sites').select('id, created_by').in_('id', sorted(ref_ids)).execute()
+            owners = {r['id']: r.get('created_by') for r in (rows.data or [])}
+
+        created_sites = {}  # op_id -> 새 현장 id
+        results = []
+        failed = False
+        for op in operations:
+            op_id = str(op['op_id']).strip()
+            op_type = op['type']
+            if op_id in done:
+                prev = done[op_id]
+                if op_type == 'site.create':
+                    site_row = (prev.get('response') or {}).get('site') or {}
+                    if site_row.get('id') is not None:
+                        created_sites[op_id] = site_row['id']
+                        owners[site_row['id']] = user_id
+                results.append({'op_id': op_id, 'type': op_type, 'status': prev.get('status'), 'result': prev.get('response'), 'replayed': True})
+                continue
+            if failed and stop_on_error:
+                results.append({'op_id': op_id, 'type': op_type, 'status': 424, 'error': '앞선 작업 실패로 건너뜀'})
+                continue
+
+            try:
+                body, status = None, None
+                if op_type == 'site.create':
+                    body, status = _create_site_record(op.get('data') or {}, payload)
+                    if status < 300 and (body.get('site') or {}).get('id') is not None:
+                        created_sites[op_id] = body['site']['id']
+                        owners[body['site']['id']] = user_id
+                else:
+                    sid = op.get('site_id')
+                    if isinstance(sid, str) and sid.startswith('$'):
+                        sid = created_sites.get(sid[1:])
+                        if sid is None:
+                            body, status = {'error': f'참조한 site.create 작업 결과가 없습니다: {op.get("site_id")}'}, 400
+                    if status is None:
+                        if not isinstance(sid, int) or isinstance(sid, bool) or sid not in owners:
+                            body, status = {'error': '현장을 찾을 수 없습니다.'}, 404
+                        # 제품수량 저장은 단건 API와 동일하게 소유자 검사 없음
+                        elif op_type != 'products.save' and not is_admin and owners[sid] != user_id:
+                            body, status = {'error': '접근 권한이 없습니다.'}, 403
+                    if status is None:
+                        if op_type == 'site.update':
+                            body, status = _update_site_record(sid, op.get('data') or {})
+                        elif op_type == 'products.save':
+                            body, status = _save_site_products(sid, op.get('data') or {})
+                        elif op_type == 'contacts.save':
+                            body, status = _save_site_contacts(sid, op.get('data') or {}, payload)
+                        elif op_type == 'household.save':
+                            body, status = _save_integration_items('site_household_integrations', HOUSEHOLD_INTEGRATION_TYPES, '세대부', sid, op.get('items') or [])
+                        elif op_type == 'common.save':
+                            body, status = _save_integration_items('site_common_integrations', COMMON_INTEGRATION_TYPES, '공용부', sid, op.get('items') or [])
+                        elif op_type == 'work_items.save':
+                            body, status = _save_work_items(sid, op.get('items', []), payload)
+            except Exception as e_op:
+                body, status = {'error': str(e_op)}, 500
+
+            if status < 300:
+                results.append({'op_id': op_id, 'type': op_type, 'status': status, 'result': body})
+                _store_batch_result(user_id, op_id, op_type, status, body)
+            else:
+                failed = True
+                results.append({'op_id': op_id, 'type': op_type, 'status': status, 'error': body.get('error'), 'error_detail': body.get('error_detail')})
+
+        succeeded = len([r for r in results if r['status'] < 300])
+        return jsonify({'results': results, 'succeeded': succeeded, 'failed': len(results) - succeeded}), 200
+    except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+# =============================
+# 전체 현장 알람함: 사용자 범위의 모든 현장 알람을 한 번에 조회
+# =============================
+@sites_bp.route('/alarms', methods=['GET'])
+def list_all_alarms():
+    """알람함: 조건은 list_alarms와 동일(alarm_date <= today AND alarm_confirmed = false AND status='todo')
+    - 관리자: 전체 현장, 일반: 본인이 등록한 현장 (sites 조인 1회 조회)
+    - count_only=true: 배지 표시용 개수만 반환
+    """
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        today = (request.args.get('today') or date.today().isoformat())
+        count_only = str(request.args.get('count_only', 'false')).lower() in ['1','true','yes','y']
+        is_admin = payload.get('user_role') == 'admin'
+
+        if count_only:
+            q = db.table('work_items').select('id, sites!inner(created_by)', count='exact')
+        else:
+            q = db.table('work_items').select('*, sites!inner(site_name, created_by)')
+        q = q.eq('status', 'todo').eq('alarm_confirmed', False).lte('alarm_date', today)
+        if not is_admin:
+            q = q.eq('sites.created_by', payload['user_id'])
+
+        if count_only:
+            rows = q.limit(1).execute()
+            count = getattr(rows, 'count', None)
+            return jsonify({'count': count if count is not None else len(rows.data or [])}), 200
+
+        rows = q.order('id', desc=True).execute()
+        items = []
+        for it in (rows.data or []):
+            site = it.pop('sites', None) or {}
+            it['site_name'] = site.get('site_name')
+            items.append(it)
+        return jsonify({'items': items, 'count': len(items)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@sites_bp.route('/alarms/confirm', methods=['POST'])
+def confirm_all_alarms():
+    """여러 현장의 알람을 한 번에 확인 처리: 입력 { ids: [...] }
+    일반 사용자는 본인 현장에 속한 항목만 확인 처리됩니다.
+    """
+    try:
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
+            return jsonify({'error': '인증 토큰이 필요합니다.'}), 401
+        token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else auth_header
+        payload = verify_token(token)
+        if not payload:
+            return jsonify({'error': '유효하지 않은 토큰입니다.'}), 401
+
+        data = request.get_json() or {}
+        ids = data.get('ids', [])
+        if not isinstance(ids, list) or not ids:
+            return jsonify({'message': '확인할 항목이 없습니다.', 'updated': 0}), 200
+
+        if payload.get('user_role') != 'admin':
+            # 권한 범위 내 항목만 추림(sites 조인 1회)
+            owned = db.table('work_items').select('id, sites!inner(created_by)') \
+                .in_('id', ids) \
+                .eq('sites.created_by', payload['user_id']).execute()
+            ids = [r['id'] for r in (owned.data or [])]
+            if not ids:
+                return jsonify({'message': '확인할 항목이 없습니다.', 'updated': 0}), 200
+
+        res = db.table('work_items').update({
+            'alarm_confirmed': True,
+            'updated_at': datetime.utcnow().isoformat()
+        }).in_('id', ids).execute()
+        updated_count = len(res.data or [])
+        return jsonify({'message': '알람이 확인 처리되었습니다.', 'updated': updated_count}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
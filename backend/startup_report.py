@@ -0,0 +1,233 @@
+"""워커 시작 시간 / 메모리 리포트
+
+1) `python -X importtime -c "import app"` 를 새 프로세스로 여러 번 실행해 import 소요 시간과
+   오래 걸리는 모듈 상위 목록, import 직후 RSS, 무거운 모듈(pandas 등)이 올라왔는지 확인
+2) (--workers N) 실제 gunicorn.conf.py로 워커 N개를 --preload 없이/있이 띄워 기동 시간과
+   워커별 RSS/PSS/공유/전용 메모리(/proc/<pid>/smaps_rollup)를 비교
+
+사용 예:
+    cd backend
+    python startup_report.py                        # import 시간/RSS만
+    python startup_report.py --workers 3            # gunicorn 기본/--preload 비교 포함
+    python startup_report.py --workers 3 --out startup.json
+"""
+from pathlib import Path
+import subprocess
+import argparse
+import platform
+import socket
+import json
+import time
+import sys
+import os
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# 요청 시점에만 필요해야 하는 모듈 (import app 직후 올라와 있으면 경고)
+HEAVY_MODULES = ('pandas', 'numpy', 'requests', 'openpyxl', 'xlsxwriter', 'supabase', 'storage3', 'gotrue')
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+rss = 0
+with open('/proc/self/status') as f:
+    for line in f:
+        if line.startswith('VmRSS:'):
+            rss = int(line.split()[1])
+print(json.dumps({'import_ms': elapsed * 1000, 'rss_kb': rss, 'modules': len(sys.modules),
+                  'heavy': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+# =============================
+# import 시간
+# =============================
+def _parse_importtime(stderr):
+    """-X importtime 출력 → {모듈: (self_us, cumulative_us)}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
+
+
+def import_report(runs=3, top=15):
+    env = dict(os.environ, LOG_LEVEL='ERROR')
+    samples = []
+    slowest = {}
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE], cwd=str(BACKEND_DIR), env=env,
+                              capture_output=True, text=True, timeout=120)
+        if proc.returncode != 0:
+            sys.exit(f'import app 실패:\n{proc.stderr[-2000:]}')
+        samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        for name, (self_us, cumulative_us) in _parse_importtime(proc.stderr).items():
+            root = name.split('.')[0]
+            if root == 'app':
+                continue
+            prev = slowest.get(root)
+            if prev is None or cumulative_us > prev:
+                slowest[root] = cumulative_us
+    samples.sort(key=lambda s: s['import_ms'])
+    median = samples[len(samples) // 2]
+    return {
+        'runs': runs,
+        'import_ms_median': round(median['import_ms'], 1),
+        'import_ms_min': round(samples[0]['import_ms'], 1),
+        'rss_mb_after_import': round(median['rss_kb'] / 1024, 1),
+        'modules_loaded': median['modules'],
+        'heavy_loaded': median['heavy'],
+        'slowest_packages_ms': [
+            {'package': name, 'cumulative_ms': round(us / 1000, 1)}
+            for name, us in sorted(slowest.items(), key=lambda kv: -kv[1])[:top]
+        ]
+    }
+
+
+# =============================
+# gunicorn 워커 메모리
+# =============================
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _children(pid):
+    pids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            if int(fields[1]) == pid:
+                pids.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return sorted(pids)
+
+
+def _memory(pid):
+    """smaps_rollup(kB): Rss, Pss, 공유(Shared_*), 전용(Private_*)"""
+    values = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    values[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return None
+    return {
+        'rss_mb': round(values.get('Rss', 0) / 1024, 1),
+        'pss_mb': round(values.get('Pss', 0) / 1024, 1),
+        'shared_mb': round((values.get('Shared_Clean', 0) + values.get('Shared_Dirty', 0)) / 1024, 1),
+        'private_mb': round((values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)) / 1024, 1)
+    }
+
+
+def _http_ok(port):
+    try:
+        with socket.create_connection(('127.0.0.1', port), timeout=1) as s:
+            s.sendall(b'GET /metrics HTTP/1.0\r\nHost: localhost\r\n\r\n')
+            return s.recv(16).startswith(b'HTTP/1.')
+    except OSError:
+        return False
+
+
+def worker_report(workers, preload, settle=1.0, warm_requests=20):
+    port = _free_port()
+    cmd = ['gunicorn', '-c', 'gunicorn.conf.py', '-w', str(workers), '-b', f'127.0.0.1:{port}']
+    if preload:
+        cmd.append('--preload')
+    cmd.append('app:app')
+    env = dict(os.environ, LOG_LEVEL='ERROR')
+    env.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    started = time.perf_counter()
+    try:
+        proc = subprocess.Popen(cmd, cwd=str(BACKEND_DIR), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        sys.exit('gunicorn이 설치되어 있지 않습니다. (pip install gunicorn)')
+    try:
+        deadline = time.time() + 60
+        ready_ms = None
+        while time.time() < deadline:
+            if proc.poll() is not None:
+                sys.exit('gunicorn이 시작 중 종료되었습니다. (gunicorn.conf.py / 환경 변수 확인)')
+            if len(_children(proc.pid)) >= workers and _http_ok(port):
+                ready_ms = (time.perf_counter() - started) * 1000
+                break
+            time.sleep(0.05)
+        if ready_ms is None:
+            sys.exit('gunicorn 시작 대기 시간 초과')
+        for _ in range(warm_requests):
+            _http_ok(port)
+        time.sleep(settle)
+        per_worker = [m for m in (_memory(pid) for pid in _children(proc.pid)) if m]
+        master = _memory(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=15)
+    total_pss = sum(w['pss_mb'] for w in per_worker) + (master['pss_mb'] if master else 0)
+    return {
+        'preload': preload,
+        'workers': workers,
+        'ready_ms': round(ready_ms, 1),
+        'master': master,
+        'per_worker': per_worker,
+        'worker_rss_mb_avg': round(sum(w['rss_mb'] for w in per_worker) / max(1, len(per_worker)), 1),
+        'worker_private_mb_avg': round(sum(w['private_mb'] for w in per_worker) / max(1, len(per_worker)), 1),
+        'total_pss_mb': round(total_pss, 1)
+    }
+
+
+def _print_import(report):
+    print(f"📦 import app: 중앙값 {report['import_ms_median']}ms (최소 {report['import_ms_min']}ms, {report['runs']}회), "
+          f"RSS {report['rss_mb_after_import']}MB, 모듈 {report['modules_loaded']}개")
+    if report['heavy_loaded']:
+        print(f"  ⚠️ 시작 시 불필요하게 로드된 모듈: {', '.join(report['heavy_loaded'])}")
+    for item in report['slowest_packages_ms']:
+        print(f"  {item['package']:<24} {item['cumulative_ms']:>8.1f}ms")
+
+
+def _print_workers(report):
+    label = '--preload' if report['preload'] else '기본'
+    print(f"🧵 gunicorn {label} x{report['workers']}: 기동 {report['ready_ms']}ms, "
+          f"워커 평균 RSS {report['worker_rss_mb_avg']}MB / 전용 {report['worker_private_mb_avg']}MB, "
+          f"전체 PSS {report['total_pss_mb']}MB")
+    for i, w in enumerate(report['per_worker'], 1):
+        print(f"  worker{i}: RSS {w['rss_mb']}MB  PSS {w['pss_mb']}MB  공유 {w['shared_mb']}MB  전용 {w['private_mb']}MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='워커 시작 시간 / 메모리 리포트')
+    parser.add_argument('--runs', type=int, default=3, help='import 측정 반복 횟수')
+    parser.add_argument('--top', type=int, default=15, help='오래 걸린 패키지 표시 수')
+    parser.add_argument('--workers', type=int, default=0, help='gunicorn 워커 수 (0이면 워커 측정 생략)')
+    parser.add_argument('--out', help='결과 JSON 저장 경로')
+    args = parser.parse_args(argv)
+
+    result = {'python': platform.python_version(), 'imports': import_report(args.runs, args.top)}
+    _print_import(result['imports'])
+    if args.workers > 0:
+        result['gunicorn'] = [worker_report(args.workers, preload) for preload in (False, True)]
+        for report in result['gunicorn']:
+            _print_workers(report)
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"✅ 결과 저장: {out}")
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import os
+import sys
+from pathlib import Path
+
+# backend 모듈은 패키지가 아니라 backend/에서 바로 import (app.py와 동일)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+import pytest
+
+
+@pytest.fixture
+def store():
+    """벤치 시드 데이터를 담은 메모리 DB로 교체 (테스트 후 원래 클라이언트 복원)"""
+    import bench
+    import db
+    previous = db._client
+    memory = db.set_client(bench.build_store(sites=30))
+    yield memory
+    db.set_client(previous)
+
+
+@pytest.fixture
+def client(store):
+    import app as appmod
+    return appmod.app.test_client()
+
+
+@pytest.fixture
+def auth():
+    import bench
+
+    def headers(user_id=1, role='admin'):
+        return {'Authorization': 'Bearer ' + bench.make_token(user_id, role)}
+    return headers
@@ -0,0 +1,50 @@
+def _site_payload(project_no):
+    return {'project_no': project_no, 'construction_company': '테스트건설', 'site_name': '배치현장',
+            'address': '서울', 'household_count': 10}
+
+
+def test_replay_returns_stored_result_and_resolves_reference(client, store, auth):
+    operations = [
+        {'op_id': ' create-1 ', 'type': 'site.create', 'data': _site_payload('NE/8801')},
+        {'op_id': 'update-1', 'type': 'site.update', 'site_id': '$create-1', 'data': {'address': '부산'}},
+        {'op_id': 'products-1', 'type': 'products.save', 'site_id': '$create-1', 'data': {'wallpad_qty': 5}},
+    ]
+    first = client.post('/batch', headers=auth(), json={'operations': operations}).get_json()
+    assert [r['status'] for r in first['results']] == [201, 200, 200]
+    site_id = first['results'][0]['result']['site']['id']
+    assert store.table_store('sites').rows[site_id]['address'] == '부산'
+
+    sites_before = len(store.table_store('sites').rows)
+    again = client.post('/batch', headers=auth(), json={'operations': operations}).get_json()
+    assert all(r.get('replayed') for r in again['results'])
+    assert [r['result'] for r in again['results']] == [r['result'] for r in first['results']]
+    assert len(store.table_store('sites').rows) == sites_before  # 다시 생성하지 않음
+
+    keys = {row['op_key'] for row in store.table_store('batch_idempotency').rows.values()}
+    assert {'create-1', 'update-1', 'products-1'} <= keys
+
+
+def test_replayed_create_still_resolves_reference(client, store, auth):
+    create = {'op_id': 'create-2', 'type': 'site.create', 'data': _site_payload('NE/8802')}
+    client.post('/batch', headers=auth(), json={'operations': [create]})
+    body = client.post('/batch', headers=auth(), json={'operations': [
+        create,
+        {'op_id': 'update-2', 'type': 'site.update', 'site_id': '$create-2', 'data': {'address': '대구'}},
+    ]}).get_json()
+    assert body['results'][0]['replayed'] is True
+    assert body['results'][1]['status'] == 200
+
+
+def test_unknown_reference_and_stop_on_error(client, store, auth):
+    body = client.post('/batch', headers=auth(), json={'stop_on_error': True, 'operations': [
+        {'op_id': 'bad-ref', 'type': 'site.update', 'site_id': '$missing', 'data': {'address': 'x'}},
+        {'op_id': 'after', 'type': 'products.save', 'site_id': 1, 'data': {'wallpad_qty': 1}},
+    ]}).get_json()
+    assert [r['status'] for r in body['results']] == [400, 424]
+    assert not any(row['op_key'] in ('bad-ref', 'after') for row in store.table_store('batch_idempotency').rows.values())
+
+
+def test_rejects_malformed_operations(client, store, auth):
+    assert client.post('/batch', headers=auth(), json={'operations': ['x']}).status_code == 400
+    assert client.post('/batch', headers=auth(), json={'operations': [
+        {'op_id': 'a', 'type': 'products.save'}, {'op_id': 'a ', 'type': 'products.save'}]}).status_code == 400
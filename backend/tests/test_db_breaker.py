@@ -0,0 +1,58 @@
+import httpx
+import pytest
+
+import db
+
+
+class _Abort(BaseException):
+    """gevent Timeout/GreenletExit처럼 Exception이 아닌 중단"""
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    b = db.CircuitBreaker(failures=1, reset_after=0)
+    monkeypatch.setattr(db, 'breaker', b)
+    return b
+
+
+def _session(error):
+    def handler(request):
+        raise error
+    return db.GuardedSession(transport=httpx.MockTransport(handler))
+
+
+def _open(b):
+    b.record_failure()
+    assert b.state == 'open'
+
+
+@pytest.mark.parametrize('error', [
+    httpx.UnsupportedProtocol('no scheme'),
+    httpx.ProxyError('proxy'),
+    httpx.DecodingError('bad body'),
+    ValueError('not httpx'),
+])
+def test_unexpected_probe_error_reopens_breaker(breaker, error):
+    _open(breaker)
+    with pytest.raises(type(error)):
+        _session(error).get('http://supabase.test/rest/v1/sites')
+    assert breaker.state == 'open'
+    assert breaker._probing is False
+    # 다음 호출은 다시 시험 호출로 허용되어야 함 (예전에는 워커 재시작 전까지 SupabaseUnavailable)
+    assert breaker.allow() is True
+
+
+def test_aborted_probe_releases_slot(breaker):
+    _open(breaker)
+    with pytest.raises(_Abort):
+        _session(_Abort()).get('http://supabase.test/rest/v1/sites')
+    assert breaker.state == 'half_open'
+    assert breaker.allow() is True
+
+
+def test_probe_success_closes_breaker(breaker):
+    _open(breaker)
+    session = db.GuardedSession(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[])))
+    assert session.get('http://supabase.test/rest/v1/sites').status_code == 200
+    assert breaker.state == 'closed'
+
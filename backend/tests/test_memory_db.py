@@ -0,0 +1,41 @@
+import pytest
+
+import memory_db
+
+
+@pytest.fixture
+def mem():
+    store = memory_db.MemorySupabase()
+    store.load({
+        'sites': [{'id': 1, 'site_name': 'A', 'created_by': 2}, {'id': 2, 'site_name': 'B', 'created_by': 3}],
+        'work_items': [
+            {'id': 1, 'site_id': 1, 'content': 'x', 'updated_at': '2030-01-01T00:00:00+00:00'},
+            {'id': 2, 'site_id': 2, 'content': 'y', 'updated_at': '2030-01-01T00:00:00+00:00'},
+            {'id': 3, 'site_id': 1, 'content': 'z', 'updated_at': '2029-01-01T00:00:00+00:00'},
+        ],
+    })
+    return store
+
+
+def test_multi_column_order(mem):
+    rows = mem.table('work_items').select('id').order('updated_at,id').execute().data
+    assert [r['id'] for r in rows] == [3, 1, 2]
+
+
+def test_inner_embed_filter(mem):
+    rows = mem.table('work_items').select('id, sites!inner(created_by)').eq('sites.created_by', 2).order('id').execute().data
+    assert [r['id'] for r in rows] == [1, 3]
+    assert rows[0]['sites'] == {'created_by': 2}
+
+
+def test_upsert_on_composite_conflict(mem):
+    mem.table('batch_idempotency').upsert({'user_id': 1, 'op_key': 'a', 'status': 200}, on_conflict='user_id,op_key').execute()
+    mem.table('batch_idempotency').upsert({'user_id': 1, 'op_key': 'a', 'status': 201}, on_conflict='user_id,op_key').execute()
+    mem.table('batch_idempotency').upsert({'user_id': 2, 'op_key': 'a', 'status': 200}, on_conflict='user_id,op_key').execute()
+    rows = mem.table('batch_idempotency').select('user_id, op_key, status').order('user_id').execute().data
+    assert rows == [{'user_id': 1, 'op_key': 'a', 'status': 201}, {'user_id': 2, 'op_key': 'a', 'status': 200}]
+
+
+def test_eq_gt_keyset(mem):
+    rows = mem.table('work_items').select('id').eq('updated_at', '2030-01-01T00:00:00+00:00').gt('id', 1).execute().data
+    assert [r['id'] for r in rows] == [2]
@@ -0,0 +1,35 @@
+from project_numbers import ProjectNumberIndex
+
+
+def _loader(rows):
+    return lambda: iter([rows])
+
+
+def test_note_sites_swaps_state_without_touching_readers_snapshot(tmp_path):
+    index = ProjectNumberIndex(tmp_path / 'project_numbers.version')
+    loader = _loader([{'id': 1, 'project_no': 'NA/0001', 'site_name': 'A'},
+                      {'id': 2, 'project_no': 'NA/0001', 'site_name': 'B'}])
+    assert [o['id'] for o in index.lookup(loader, 'NA/0001')] == [1, 2]
+
+    # 조회 중이던 스냅샷은 변경 반영 후에도 그대로 (제자리 수정 없음)
+    snapshot = index._state
+    index.note_sites([{'id': 1, 'project_no': 'NA/0002', 'site_name': 'A'}])
+    assert index._state is not snapshot
+    assert [o['id'] for o in snapshot[1][1]] == [1, 2]
+
+    assert [o['id'] for o in index.lookup(loader, 'NA/0001')] == [2]
+    assert [o['id'] for o in index.lookup(loader, 'NA/0002')] == [1]
+
+
+def test_removing_last_owner_clears_bit_and_slot(tmp_path):
+    index = ProjectNumberIndex(tmp_path / 'project_numbers.version')
+    loader = _loader([{'id': 1, 'project_no': 'NE/0100', 'site_name': 'A'}])
+    assert index.check_many(loader, ['NE/0100'])[0]['existing_site']['id'] == 1
+
+    index.note_site({'id': 1, 'project_no': None, 'site_name': 'A'})
+    assert index.check_many(loader, ['NE/0100', 'bad']) == [
+        {'project_no': 'NE/0100', 'valid': True, 'is_duplicate': False},
+        {'project_no': 'bad', 'valid': False},
+    ]
+    assert index.lookup(loader, 'NE/0100') == []
+    assert index.stats()['used_numbers'] == 0
@@ -0,0 +1,45 @@
+import db
+from site_catalog import SiteCatalog
+
+
+def _insert(project_no, created_by=2):
+    return db.table('sites').insert({'project_no': project_no, 'construction_company': '테스트건설',
+                                     'site_name': project_no, 'address': '서울', 'household_count': 10,
+                                     'created_by': created_by}).execute().data[0]
+
+
+def test_note_sites_keeps_watermark_for_other_workers(store, tmp_path):
+    catalog = SiteCatalog(tmp_path / 'catalog.version', tmp_path / 'catalog.bin')
+    catalog._ensure()
+    watermark = catalog._cols.watermark
+
+    other = _insert('NE/8901')   # 다른 워커가 저장 (이 워커는 모름)
+    mine = _insert('NE/8902')    # 이 워커가 저장하고 바로 반영
+    catalog.note_sites([mine])
+
+    # 직접 반영한 행은 바로 보이지만 워터마크는 그대로 → 다른 워커의 더 이른 변경을 건너뛰지 않음
+    assert catalog._cols.watermark == watermark
+    rows, _ = catalog.query(filters={'construction_company': '테스트건설'}, sort='id', desc=False)
+    assert [r['id'] for r in rows] == [mine['id']]
+
+    # 동기화는 다른 워커의 행만 새로 반영 (직접 반영한 같은 updated_at 행은 변경 아님)
+    assert catalog._sync() == 1
+    assert catalog._cols.watermark == mine['updated_at']
+    rows, total = catalog.query(filters={'construction_company': '테스트건설'}, sort='id', desc=False)
+    assert [r['id'] for r in rows] == [other['id'], mine['id']]
+    assert total == 2
+
+    # 다시 동기화해도 워터마크 경계의 같은 행은 변경으로 세지 않음
+    assert catalog._sync() == 0
+
+
+def test_sync_applies_tombstones(store, tmp_path):
+    catalog = SiteCatalog(tmp_path / 'catalog.version', tmp_path / 'catalog.bin')
+    catalog._ensure()
+    _, total = catalog.query()
+    store.table_store('sync_tombstones').put({'id': 1, 'table_name': 'sites', 'row_id': 1, 'site_id': 1,
+                                             'owner_id': 2, 'deleted_at': '2030-01-01T00:00:00+00:00'})
+    assert catalog._sync() == 1
+    rows, after = catalog.query()
+    assert after == total - 1
+    assert 1 not in {r['id'] for r in rows}
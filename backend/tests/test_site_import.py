@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+import site_import
+
+HEADER = '프로젝트 번호,건설사,현장명,주소,세대수,납품일,홈IoT\n'
+
+
+def _frame(text, file_encoding='utf-8-sig', encoding=None):
+    """file_encoding: 파일을 저장한 인코딩, encoding: 요청에 지정한 인코딩(없으면 자동 판별)"""
+    return site_import.read_frame('sites.csv', io.BytesIO(text.encode(file_encoding)), encoding)
+
+
+def test_validate_tags_each_row():
+    frame, _ = _frame(HEADER + '\n'.join([
+        'NA/0001,현대건설,정상현장,서울,100,2026-03-01,Y',
+        'NA/0002,,건설사없음,서울,100,,',
+        'BAD-1,현대건설,형식오류,서울,100,,',
+        'NA/0004,현대건설,세대수오류,서울,0,,',
+        'NA/0005,현대건설,날짜오류,서울,10,2026-13-45,',
+        'NA/0006,현대건설,값오류,서울,10,,있음',
+        'NA/0007,현대건설,중복1,서울,10,,',
+        'na/0007,현대건설,중복2,서울,10,,',
+        'NA/0009,현대건설,이미등록,서울,10,,',
+    ]) + '\n')
+    out, errors = site_import.validate(frame, {'NA/0009'})
+    by_row = dict(zip(frame['_row'], errors))
+    assert by_row[2] == ''
+    assert '건설사 누락' in by_row[3]
+    assert '프로젝트 번호 형식 오류' in by_row[4]
+    assert '세대수는 1 이상의 정수' in by_row[5]
+    assert '날짜 형식 오류' in by_row[6]
+    assert '값은 Y 또는 N' in by_row[7]
+    assert '파일 안에서 프로젝트 번호 중복' in by_row[8] and '파일 안에서 프로젝트 번호 중복' in by_row[9]
+    assert by_row[10] == '이미 등록된 프로젝트 번호'
+    ok = out[errors == '']
+    assert ok.iloc[0]['delivery_date'] == '2026-03-01'
+    assert ok.iloc[0]['home_iot'] == 'Y'
+
+
+def test_multiple_errors_on_one_row_are_joined():
+    frame, _ = _frame(HEADER + 'BAD,,,서울,-3,,\n')
+    _, errors = site_import.validate(frame, set())
+    assert errors.iloc[0].split('; ') == ['건설사 누락', '현장명 누락', '프로젝트 번호 형식 오류(예: NA/1234)', '세대수는 1 이상의 정수']
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'encoding': 'cp949'}])
+def test_cp949_csv(kwargs):
+    frame, columns = _frame(HEADER + 'NA/0001,현대건설,강남 힐스테이트,서울특별시 강남구,120,,N\n', 'cp949', **kwargs)
+    assert 'site_name' in columns
+    out, errors = site_import.validate(frame, set())
+    assert list(errors) == ['']
+    assert out.iloc[0]['site_name'] == '강남 힐스테이트'
+    assert out.iloc[0]['construction_company'] == '현대건설'
+
+
+def test_wrong_or_unknown_encoding_is_a_file_error():
+    with pytest.raises(site_import.ImportFileError):
+        _frame(HEADER, 'cp949', encoding='utf-8')
+    with pytest.raises(site_import.ImportFileError):
+        _frame(HEADER, encoding='no-such-codec')
+
+
+def test_missing_required_header():
+    with pytest.raises(site_import.ImportFileError, match='필수 열이 없습니다'):
+        _frame('현장명,주소\nA,서울\n')
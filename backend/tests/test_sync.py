@@ -0,0 +1,68 @@
+TIE = '2030-01-01T00:00:00+00:00'
+
+
+def _tie_sites(store, count):
+    """같은 updated_at을 가진 현장 count개 (memory_db update는 updated_at을 현재 시각으로 바꾸므로 직접 기록)"""
+    table = store.table_store('sites')
+    ids = sorted(table.rows)[:count]
+    for site_id in ids:
+        table.put({**table.rows[site_id], 'updated_at': TIE})
+    return ids
+
+
+def _drain(client, headers, since, limit, key='sites', max_pages=50):
+    seen, pages = [], 0
+    while pages < max_pages:
+        body = client.get('/sync', headers=headers, query_string={'since': since, 'limit': limit}).get_json()
+        pages += 1
+        seen += [row['id'] for row in body['changes'][key]]
+        since = body['cursor']
+        if not body['has_more']:
+            return seen, since, pages
+    raise AssertionError('has_more가 끝나지 않음 (커서 정체)')
+
+
+def test_ties_across_page_boundary(client, store, auth):
+    ids = _tie_sites(store, 5)
+    seen, cursor, pages = _drain(client, auth(), '2029-12-31T00:00:00+00:00', 2)
+    assert sorted(seen) == ids
+    assert len(seen) == len(set(seen))
+    assert pages == 3
+    # 마지막 커서 이후로는 새 변경 없음
+    body = client.get('/sync', headers=auth(), query_string={'since': cursor, 'limit': 2}).get_json()
+    assert body['changes']['sites'] == []
+    assert body['has_more'] is False
+
+
+def test_ties_in_tombstones(client, store, auth):
+    tombstones = store.table_store('sync_tombstones')
+    for k in range(5):
+        tombstones.put({'id': k + 1, 'table_name': 'sites', 'row_id': 900 + k, 'site_id': 900 + k,
+                        'owner_id': 1, 'deleted_at': TIE})
+    since, deleted = '2029-12-31T00:00:00+00:00', []
+    for _ in range(20):
+        body = client.get('/sync', headers=auth(), query_string={'since': since, 'limit': 2}).get_json()
+        deleted += [t['id'] for t in body['tombstones'] if t['table'] == 'sites']
+        since = body['cursor']
+        if not body['has_more']:
+            break
+    assert sorted(set(deleted)) == [900, 901, 902, 903, 904]
+
+
+def test_user_scope_uses_owned_sites_only(client, store, auth):
+    body = client.get('/sync', headers=auth(2, 'user')).get_json()
+    owned = {row['id'] for row in store.table_store('sites').rows.values() if row.get('created_by') == 2}
+    assert {row['id'] for row in body['changes']['sites']} == owned
+    for table, rows in body['changes'].items():
+        for row in rows:
+            assert 'sites' not in row  # 범위 필터용 조인 컬럼은 응답에서 제거
+            if table != 'sites':
+                assert row['site_id'] in owned
+
+
+def test_legacy_iso_cursor_and_bad_cursor(client, store, auth):
+    _tie_sites(store, 3)
+    body = client.get('/sync', headers=auth(), query_string={'since': TIE}).get_json()
+    assert len(body['changes']['sites']) == 3
+    resp = client.get('/sync', headers=auth(), query_string={'since': 'not-a-cursor'})
+    assert resp.status_code == 400
@@ -0,0 +1,280 @@
+from collections import deque, Counter
+from pathlib import Path
+import threading
+import json
+import time
+import os
+
+import metrics
+import applog
+
+# =============================
+# 요청 단위 DB 호출 추적 (Server-Timing / 느린 요청 로그 / N+1 감지)
+# =============================
+# - db.table()/db.storage_bucket()이 돌려주는 쿼리 빌더를 TracedQuery로 감싸 execute() 등 종단 호출마다
+#   테이블, 작업(select/insert/update/upsert/delete), 필터, 소요 시간, 결과 행 수를 현재 요청에 기록
+# - 응답에 Server-Timing 헤더(db 합계, 테이블별, 전체) 추가 → 브라우저 개발자도구 Network > Timing에서 확인
+# - TRACE_SLOW_MS 이상 걸린 요청은 호출 목록과 함께 JSON 한 줄로 TRACE_SLOW_LOG 파일에 기록
+# - 한 요청에서 값만 다른 같은 모양의 쿼리가 TRACE_N_PLUS_ONE회 이상 반복되면 경고(N+1 패턴)
+
+TRACE_ENABLED = os.getenv('TRACE_ENABLED', '1').lower() in ['1', 'true', 'yes', 'y']
+TRACE_SERVER_TIMING = os.getenv('TRACE_SERVER_TIMING', '1').lower() in ['1', 'true', 'yes', 'y']
+TRACE_SLOW_MS = float(os.getenv('TRACE_SLOW_MS', '500'))
+TRACE_SLOW_LOG = os.getenv('TRACE_SLOW_LOG') or str(Path(__file__).resolve().parent / 'logs' / 'slow_requests.log')
+TRACE_N_PLUS_ONE = int(os.getenv('TRACE_N_PLUS_ONE', '3'))
+TRACE_MAX_CALLS = int(os.getenv('TRACE_MAX_CALLS', '200'))      # 요청당 상세 기록 상한(합계는 계속 집계)
+TRACE_RECENT_SIZE = int(os.getenv('TRACE_RECENT_SIZE', '50'))   # /admin/traces 에서 보는 최근 느린 요청/N+1 수
+
+_TERMINAL = {'execute', 'upload', 'download', 'remove', 'list'}
+_OPERATIONS = {'select', 'insert', 'update', 'upsert', 'delete'}
+_FILTERS = {'eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike', 'is_', 'in_', 'contains', 'match', 'filter'}
+_MODIFIERS = {'order', 'limit', 'range', 'single', 'maybe_single'}
+_MASKED_COLUMNS = {'email', 'password', 'phone'}
+
+log = applog.get_logger('tracing')
+
+_local = threading.local()
+_lock = threading.Lock()
+_recent = deque(maxlen=TRACE_RECENT_SIZE)
+_totals = Counter()
+
+
+class RequestTrace:
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.endpoint = None
+        self.started = time.perf_counter()
+        self.calls = []
+        self.call_count = 0
+        self.db_ms = 0.0
+        self.by_table = {}
+        self.shapes = Counter()
+
+    def add(self, call):
+        self.call_count += 1
+        self.db_ms += call['ms']
+        table_ms = self.by_table.setdefault(call['table'], [0, 0.0])
+        table_ms[0] += 1
+        table_ms[1] += call['ms']
+        self.shapes[call['shape']] += 1
+        if len(self.calls) < TRACE_MAX_CALLS:
+            self.calls.append(call)
+
+    def repeated(self):
+        """같은 모양의 쿼리가 기준 이상 반복된 목록 [(모양, 횟수)]"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= TRACE_N_PLUS_ONE]
+
+
+def current():
+    return getattr(_local, 'trace', None)
+
+
+def begin(method, path):
+    _local.trace = RequestTrace(method, path) if TRACE_ENABLED else None
+    return _local.trace
+
+
+def end():
+    trace = current()
+    _local.trace = None
+    return trace
+
+
+def _value(column, value):
+    if column in _MASKED_COLUMNS:
+        return '***'
+    if isinstance(value, (list, tuple, set)):
+        return f'[{len(value)}개]'
+    text = str(value)
+    return text if len(text) <= 60 else text[:57] + '...'
+
+
+class _CallSpec:
+    """체인 호출(select/eq/order...)을 모아 작업/필터/모양을 구성"""
+
+    def __init__(self, table, kind):
+        self.table = table
+        self.kind = kind
+        self.op = 'select' if kind == 'table' else kind
+        self.filters = []
+        self.modifiers = []
+
+    def note(self, name, args):
+        if name in _OPERATIONS:
+            self.op = name
+        elif name in _FILTERS:
+            column = args[0] if args else '?'
+            value = args[1] if len(args) > 1 else None
+            self.filters.append((str(column), name, value))
+        elif name in _MODIFIERS:
+            self.modifiers.append(name if name != 'order' or not args else f'order:{args[0]}')
+
+    def shape(self, terminal):
+        op = self.op if terminal == 'execute' else f'storage.{terminal}'
+        filters = ','.join(f'{col}.{name}' for col, name, _ in self.filters)
+        return f"{op} {self.table}" + (f" [{filters}]" if filters else '')
+
+    def describe(self, terminal):
+        return {
+            'table': self.table,
+            'op': self.op if terminal == 'execute' else f'storage.{terminal}',
+            'filters': [f'{col} {name} {_value(col, value)}' for col, name, value in self.filters],
+            'modifiers': list(self.modifiers)
+        }
+
+
+def _result_size(result):
+    data = getattr(result, 'data', result)
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    return 1 if data else 0
+
+
+class TracedQuery:
+    """쿼리 빌더/스토리지 버킷 래퍼: 체인 메서드는 래핑 유지, 종단 호출 시간을 현재 요청/지표에 기록"""
+
+    def __init__(self, inner, spec):
+        self._inner = inner
+        self._spec = spec
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+        spec = self._spec
+
+        def call(*args, **kwargs):
+            if name not in _TERMINAL:
+                spec.note(name, args)
+                result = attr(*args, **kwargs)
+                if result is not None and hasattr(result, 'execute'):
+                    return TracedQuery(result, spec)
+                return result
+            trace = current()
+            started = time.perf_counter()
+            error = None
+            result = None
+            try:
+                result = attr(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = type(e).__name__
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                op = spec.op if name == 'execute' else name
+                metrics.observe_upstream(spec.kind, spec.table, op, elapsed, error)
+                if trace is not None:
+                    entry = spec.describe(name)
+                    entry['shape'] = spec.shape(name)
+                    entry['ms'] = round(elapsed * 1000, 2)
+                    entry['rows'] = _result_size(result) if error is None else 0
+                    if error:
+                        entry['error'] = error
+                    trace.add(entry)
+        return call
+
+
+def traced(inner, table, kind='table'):
+    """db 모듈에서 호출: 추적/지표 모두 비활성이면 원본 그대로 반환"""
+    if not TRACE_ENABLED and not metrics.METRICS_ENABLED:
+        return inner
+    return TracedQuery(inner, _CallSpec(table, kind))
+
+
+# =============================
+# Flask 연동
+# =============================
+def _server_timing(trace, total_ms):
+    parts = [f'db;dur={trace.db_ms:.1f};desc="{trace.call_count} calls"']
+    for table, (count, ms) in sorted(trace.by_table.items(), key=lambda kv: -kv[1][1])[:8]:
+        parts.append(f'db-{table};dur={ms:.1f};desc="{count}x"')
+    parts.append(f'total;dur={total_ms:.1f}')
+    return ', '.join(parts)
+
+
+def _write_slow(entry):
+    try:
+        path = Path(TRACE_SLOW_LOG)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with _lock:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+    except Exception as e:
+        log.warning('느린 요청 로그 기록 실패', error=str(e))
+
+
+def finish(trace, status):
+    """요청 종료 처리: 합계 집계, N+1 경고, 느린 요청 기록. Server-Timing 값 반환"""
+    total_ms = (time.perf_counter() - trace.started) * 1000
+    repeated = trace.repeated()
+    slow = total_ms >= TRACE_SLOW_MS
+    with _lock:
+        _totals['requests'] += 1
+        _totals['db_calls'] += trace.call_count
+        if repeated:
+            _totals['n_plus_one_requests'] += 1
+        if slow:
+            _totals['slow_requests'] += 1
+    if repeated:
+        log.warning('N+1 의심', path=trace.path, repeated=[f'{shape} x{n}' for shape, n in repeated[:3]])
+    if slow or repeated:
+        entry = {
+            'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'pid': os.getpid(),
+            'method': trace.method,
+            'path': trace.path,
+            'endpoint': trace.endpoint,
+            'status': status,
+            'total_ms': round(total_ms, 1),
+            'db_ms': round(trace.db_ms, 1),
+            'db_calls': trace.call_count,
+            'repeated': [{'shape': shape, 'count': n} for shape, n in repeated],
+            'calls': trace.calls
+        }
+        with _lock:
+            _recent.append(entry)
+        if slow:
+            _write_slow(entry)
+    return _server_timing(trace, total_ms)
+
+
+def recent(limit=20):
+    with _lock:
+        items = list(_recent)[-limit:]
+    return list(reversed(items))
+
+
+def stats():
+    with _lock:
+        totals = dict(_totals)
+    return {
+        'enabled': TRACE_ENABLED,
+        'slow_ms': TRACE_SLOW_MS,
+        'slow_log': TRACE_SLOW_LOG,
+        'n_plus_one_threshold': TRACE_N_PLUS_ONE,
+        'totals': totals
+    }
+
+
+def init_app(app):
+    from flask import request
+
+    @app.before_request
+    def _trace_begin():
+        trace = begin(request.method, request.path)
+        if trace is not None:
+            trace.endpoint = request.endpoint
+
+    @app.after_request
+    def _trace_finish(response):
+        trace = end()
+        if trace is not None:
+            timing = finish(trace, response.status_code)
+            if TRACE_SERVER_TIMING:
+                response.headers['Server-Timing'] = timing
+        return response
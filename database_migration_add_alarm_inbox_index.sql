@@ -0,0 +1,7 @@
+-- 마이그레이션: 전체 현장 알람 조회(GET /alarms)용 인덱스
+-- 조건: status = 'todo' AND alarm_confirmed = false AND alarm_date <= today
+
+CREATE INDEX IF NOT EXISTS idx_work_items_alarm_inbox ON work_items(status, alarm_confirmed, alarm_date);
+
+-- 일반 사용자 범위(sites.created_by) 조인용
+CREATE INDEX IF NOT EXISTS idx_sites_created_by ON sites(created_by);
@@ -0,0 +1,22 @@
+-- 마이그레이션: 오프라인 편집 일괄 반영(POST /batch)용 멱등성 키 저장 테이블
+-- 실행 순서: database_migration_add_sync_tombstones.sql 적용 이후 실행 권장
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS batch_idempotency (
+    user_id INTEGER NOT NULL,
+    op_key VARCHAR(100) NOT NULL,
+    op_type VARCHAR(50) NOT NULL,
+    status INTEGER NOT NULL,
+    response JSONB,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (user_id, op_key)
+);
+
+-- 오래된 키 정리용
+CREATE INDEX IF NOT EXISTS idx_batch_idempotency_created_at ON batch_idempotency(created_at);
+
+COMMIT;
+
+-- 정리 예시(7일 경과 키 삭제)
+-- DELETE FROM batch_idempotency WHERE created_at < NOW() - INTERVAL '7 days';
@@ -0,0 +1,10 @@
+-- 마이그레이션: 이름 검색(GET /users?q=, GET /contacts-master?q=)용 트라이그램 인덱스
+-- name ILIKE 'q%' / '%q%' 검색을 인덱스로 처리하여 데이터가 늘어도 응답 시간을 일정하게 유지합니다.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_contacts_master_name_trgm ON contacts_master USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_name_trgm ON users USING gin (name gin_trgm_ops);
+
+-- 활성/역할 필터와 함께 사용되는 경우
+CREATE INDEX IF NOT EXISTS idx_contacts_master_active_role ON contacts_master(active, role);
@@ -0,0 +1,35 @@
+-- 마이그레이션: 라우트 조회 패턴(sites.py/db.py의 .eq/.in_/.order)에 맞춘 인덱스
+-- 실행 순서: database_migration_add_name_search_index.sql 적용 이후 (backend/migrate.py가 순서대로 적용)
+-- migrate.py가 트랜잭션으로 감싸 실행하므로 CONCURRENTLY는 사용하지 않습니다.
+-- 적용 후 확인: cd backend && python migrate.py --check  (EXPLAIN으로 인덱스 사용 여부 점검)
+
+-- 1. 현장별 단건 조회 (GET /sites/<id>/contacts, /products)
+--    create_tables 이전에 database_schema.sql만 적용된 DB에는 없으므로 함께 보장
+CREATE INDEX IF NOT EXISTS idx_site_contacts_site_id ON site_contacts(site_id);
+CREATE INDEX IF NOT EXISTS idx_site_products_site_id ON site_products(site_id);
+
+-- 2. 연동 조회/업데이트: .eq('site_id').in_('integration_type') / .eq('site_id').eq('integration_type')
+CREATE INDEX IF NOT EXISTS idx_site_household_site_type ON site_household_integrations(site_id, integration_type);
+CREATE INDEX IF NOT EXISTS idx_site_common_site_type ON site_common_integrations(site_id, integration_type);
+
+-- 3. 프로젝트 번호 중복 확인 (POST /sites, db.find_site_by_project_no)
+CREATE INDEX IF NOT EXISTS idx_sites_project_no ON sites(project_no);
+
+-- 4. 복수 연락처: .eq('site_id').eq('person_type').order('id', desc)
+CREATE INDEX IF NOT EXISTS idx_site_contact_people_site_type ON site_contact_people(site_id, person_type, id DESC);
+
+-- 5. 현장별 업무/알람: .eq('site_id')[.eq('status').eq('alarm_confirmed').lte('alarm_date')]
+CREATE INDEX IF NOT EXISTS idx_work_items_site_alarm ON work_items(site_id, status, alarm_confirmed, alarm_date);
+
+-- 6. 사진 목록 페이지: .eq('site_id').is_('deleted_at', null).order('id', desc).range()
+CREATE INDEX IF NOT EXISTS idx_site_photos_site_page ON site_photos(site_id, id DESC) WHERE deleted_at IS NULL;
+
+-- 7. 새 인덱스를 바로 쓰도록 통계 갱신
+ANALYZE sites;
+ANALYZE site_contacts;
+ANALYZE site_products;
+ANALYZE site_household_integrations;
+ANALYZE site_common_integrations;
+ANALYZE site_contact_people;
+ANALYZE work_items;
+ANALYZE site_photos;
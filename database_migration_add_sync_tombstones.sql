@@ -0,0 +1,113 @@
+-- 마이그레이션: 모바일 오프라인 동기화(GET /sync)용 삭제 기록(tombstone) 및 updated_at 트리거
+-- 실행 순서: database_migration_add_work_items.sql 적용 이후 실행 권장
+-- 실행 전 반드시 백업을 수행하세요!
+
+BEGIN;
+
+-- 1. 복수 연락처 테이블 (백엔드에서 사용 중이나 스키마 파일이 없던 테이블)
+CREATE TABLE IF NOT EXISTS site_contact_people (
+    id BIGSERIAL PRIMARY KEY,
+    site_id INTEGER NOT NULL REFERENCES sites(id) ON DELETE CASCADE,
+    person_type VARCHAR(20) NOT NULL, -- 'sales' | 'construction' | 'installer' | 'network'
+    name VARCHAR(100),
+    phone VARCHAR(30),
+    created_by INTEGER NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- 2. 삭제 기록 테이블: 하드 삭제된 행을 동기화 클라이언트에 전달
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    id BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(50) NOT NULL,
+    row_id BIGINT NOT NULL,
+    site_id INTEGER NULL,
+    owner_id INTEGER NULL, -- 삭제 시점의 sites.created_by (일반 사용자 범위 필터용)
+    deleted_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_deleted_at ON sync_tombstones(deleted_at);
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_owner ON sync_tombstones(owner_id, deleted_at);
+
+-- 3. 삭제 트리거 함수
+-- 현장 삭제로 인한 CASCADE 삭제는 부모 행이 이미 없으므로 owner_id가 NULL이 됩니다.
+-- 클라이언트는 sites 삭제 기록을 받으면 해당 현장의 하위 행을 함께 제거합니다.
+CREATE OR REPLACE FUNCTION public.record_sync_tombstone()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_site_id integer;
+  v_owner integer;
+BEGIN
+  IF TG_TABLE_NAME = 'sites' THEN
+    v_site_id := OLD.id;
+    v_owner := OLD.created_by;
+  ELSE
+    v_site_id := OLD.site_id;
+    SELECT created_by INTO v_owner FROM public.sites WHERE id = OLD.site_id;
+  END IF;
+
+  INSERT INTO public.sync_tombstones(table_name, row_id, site_id, owner_id)
+  VALUES (TG_TABLE_NAME, OLD.id, v_site_id, v_owner);
+  RETURN OLD;
+END;
+$$;
+
+-- 4. updated_at 자동 갱신 트리거 함수 (직접 SQL 수정도 동기화 커서에 잡히도록)
+CREATE OR REPLACE FUNCTION public.touch_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.updated_at := NOW();
+  RETURN NEW;
+END;
+$$;
+
+-- 5. 트리거 연결
+DO $$
+DECLARE
+  t text;
+BEGIN
+  FOREACH t IN ARRAY ARRAY[
+    'sites', 'site_contacts', 'site_contact_people', 'site_products',
+    'site_household_integrations', 'site_common_integrations', 'work_items', 'site_photos'
+  ]
+  LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_sync_tombstone ON %I', t, t);
+    EXECUTE format('CREATE TRIGGER trg_%s_sync_tombstone AFTER DELETE ON %I FOR EACH ROW EXECUTE FUNCTION public.record_sync_tombstone()', t, t);
+  END LOOP;
+
+  -- site_photos는 updated_at 대신 uploaded_at/deleted_at을 사용하므로 제외
+  FOREACH t IN ARRAY ARRAY[
+    'sites', 'site_contacts', 'site_contact_people', 'site_products',
+    'site_household_integrations', 'site_common_integrations', 'work_items'
+  ]
+  LOOP
+    EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()', t);
+    EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_touch_updated_at ON %I', t, t);
+    EXECUTE format('CREATE TRIGGER trg_%s_touch_updated_at BEFORE UPDATE ON %I FOR EACH ROW EXECUTE FUNCTION public.touch_updated_at()', t, t);
+  END LOOP;
+END $$;
+
+-- 6. 변경 커서 조회용 인덱스
+CREATE INDEX IF NOT EXISTS idx_sites_updated_at ON sites(updated_at);
+CREATE INDEX IF NOT EXISTS idx_site_contacts_updated_at ON site_contacts(updated_at);
+CREATE INDEX IF NOT EXISTS idx_site_contact_people_updated_at ON site_contact_people(updated_at);
+CREATE INDEX IF NOT EXISTS idx_site_products_updated_at ON site_products(updated_at);
+CREATE INDEX IF NOT EXISTS idx_site_household_updated_at ON site_household_integrations(updated_at);
+CREATE INDEX IF NOT EXISTS idx_site_common_updated_at ON site_common_integrations(updated_at);
+CREATE INDEX IF NOT EXISTS idx_work_items_updated_at ON work_items(updated_at);
+CREATE INDEX IF NOT EXISTS idx_site_photos_uploaded_at ON site_photos(uploaded_at);
+CREATE INDEX IF NOT EXISTS idx_site_photos_deleted_at ON site_photos(deleted_at);
+
+COMMIT;
+
+-- 롤백 예시
+-- BEGIN;
+--   DROP TABLE IF EXISTS sync_tombstones;
+--   DROP FUNCTION IF EXISTS public.record_sync_tombstone() CASCADE;
+--   DROP FUNCTION IF EXISTS public.touch_updated_at() CASCADE;
+-- COMMIT;
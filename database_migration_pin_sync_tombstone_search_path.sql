@@ -0,0 +1,28 @@
+-- 마이그레이션: 삭제 기록 트리거 함수(record_sync_tombstone)의 search_path 고정
+-- 실행 순서: database_migration_add_query_indexes.sql 적용 이후 (backend/migrate.py가 순서대로 적용)
+-- SECURITY DEFINER 함수는 소유자 권한으로 실행되므로, 호출자가 바꾼 search_path의 같은 이름 객체가
+-- 대신 실행되지 않도록 public, pg_temp로 고정합니다. (적용된 007 파일은 변경하지 않고 여기서 다시 정의)
+
+CREATE OR REPLACE FUNCTION public.record_sync_tombstone()
+RETURNS trigger
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+  v_site_id integer;
+  v_owner integer;
+BEGIN
+  IF TG_TABLE_NAME = 'sites' THEN
+    v_site_id := OLD.id;
+    v_owner := OLD.created_by;
+  ELSE
+    v_site_id := OLD.site_id;
+    SELECT created_by INTO v_owner FROM public.sites WHERE id = OLD.site_id;
+  END IF;
+
+  INSERT INTO public.sync_tombstones(table_name, row_id, site_id, owner_id)
+  VALUES (TG_TABLE_NAME, OLD.id, v_site_id, v_owner);
+  RETURN OLD;
+END;
+$$;
@@ -108,7 +108,7 @@ async function openExportDialog(){
             // 사이트 목록 채우기
             (async ()=>{
               try{
-                const res = await apiRequest('/sites', { method:'GET' });
+                const res = await apiRequest('/sites?view=list', { method:'GET' });
                 if(siteSelect){
                   siteSelect.innerHTML = '';
                   const ph = document.createElement('option'); ph.value=''; ph.textContent='현장 선택'; siteSelect.appendChild(ph);
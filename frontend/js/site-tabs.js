@@ -244,7 +244,7 @@
         if (select) select.innerHTML = '<option value="">현장을 선택하세요</option>';
         if (workSelect) workSelect.innerHTML = '<option value="">현장을 선택하세요</option>';
         if (photosSelect) photosSelect.innerHTML = '<option value="">현장을 선택하세요</option>';
-        const res = await apiRequest('/sites', { method: 'GET' });
+        const res = await apiRequest('/sites?view=list', { method: 'GET' });
         const seenNames = new Set();
         const sites = (res.sites||[]);
         sites.forEach(site=>{